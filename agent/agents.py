@@ -1,47 +1,89 @@
+"""
+Production agent: ChatOpenAI (+ LLM concurrency cap and response cache)
+around the graph in workflow.py.
+
+Importing this module is cheap: langchain_openai, langgraph, the tools (and
+through them docker) are imported and the model client, tool executor and
+graph are built on first use, each once per process (get_llm(),
+get_tool_executor(), get_agent()). The old module attributes (agents.llm,
+agents.agent_runnable, ...) still work and resolve to the same objects.
+"""
 import os
+from functools import lru_cache
+
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage
-from langgraph.prebuilt import create_react_agent
-
-# import the prompts and tools
-from prompts import SYSTEM_PROMPT
-from tools import (
-    list_active_alerts,
-    query_prometheus,
-    consult_runbook,
-    generate_dry_run_plan,
-    execute_remediation_action
-)
-
-# Loading environment variables (reading .env)
+
+# Loading environment variables (reading .env) before anything reads its settings
 load_dotenv()
 
-# Initialize the large language model (compatible with Qwen/DashScope)
-llm = ChatOpenAI(
-    model=os.getenv("CUSTOM_MODEL_NAME", "qwen-plus"),
-    api_key=os.getenv("CUSTOM_MODEL_API_KEY"),
-    base_url=os.getenv("CUSTOM_MODEL_BASE_URL"),
-    temperature=0
-)
-
-# Prepare Tools
-tools = [
-    list_active_alerts,
-    query_prometheus,
-    consult_runbook,
-    generate_dry_run_plan,
-    execute_remediation_action
-]
-
-# Creating an Agent (ReAct mode)
-# This is a pre-built Agent that automatically understands the cycle of: "Think -> Find a tool -> Observe the result -> Think again"
-agent_runnable = create_react_agent(
-    model=llm,
-    tools=tools,
-    state_modifier=SYSTEM_PROMPT # Instilling the SRE mindset
-)
-
-# Helper function, used by graph.py
+
+@lru_cache(maxsize=None)
+def get_llm_limiter():
+    """Concurrent sessions share AGENT_LLM_CONCURRENCY provider slots (None = no cap)."""
+    from llm_limit import make_llm_limiter
+    return make_llm_limiter()
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache():
+    """Response cache for repeated investigations (AGENT_LLM_CACHE=memory|sqlite|none)."""
+    from llm_cache import make_llm_cache
+    return make_llm_cache()
+
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """The chat model (compatible with Qwen/DashScope); cache hits take no limiter slot."""
+    from langchain_openai import ChatOpenAI
+    from llm_cache import CachedChatModel
+    from llm_limit import LimitedChatModel
+
+    llm = ChatOpenAI(
+        model=os.getenv("CUSTOM_MODEL_NAME", "qwen-plus"),
+        api_key=os.getenv("CUSTOM_MODEL_API_KEY"),
+        base_url=os.getenv("CUSTOM_MODEL_BASE_URL"),
+        temperature=0
+    )
+    if get_llm_limiter() is not None:
+        llm = LimitedChatModel(llm, get_llm_limiter())
+    if get_llm_cache() is not None:
+        llm = CachedChatModel(llm, get_llm_cache())
+    return llm
+
+
+def get_tools():
+    from workflow import TOOLS
+    return TOOLS
+
+
+@lru_cache(maxsize=None)
+def get_tool_executor():
+    """Tool calls from one AI message run concurrently, each with its own timeout."""
+    from workflow import make_tool_executor
+    return make_tool_executor(get_tools())
+
+
+@lru_cache(maxsize=None)
 def get_agent():
-    return agent_runnable
\ No newline at end of file
+    """The compiled graph with its checkpointer (AGENT_CHECKPOINTER); built on the first call."""
+    from memory import make_checkpointer
+    from workflow import build_graph
+    return build_graph(get_llm(), get_tools(), tool_executor=get_tool_executor(), checkpointer=make_checkpointer())
+
+
+# Module attributes of the eager version, built on first access
+_LAZY = {
+    "llm": get_llm,
+    "llm_limiter": get_llm_limiter,
+    "llm_cache": get_llm_cache,
+    "tools": get_tools,
+    "tool_executor": get_tool_executor,
+    "agent_runnable": get_agent,
+    "checkpointer": lambda: get_agent().checkpointer,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,260 @@
+"""
+Multi-session agent API: many concurrent investigations in one process.
+
+main.py and streamlit_app.py drive one synchronous stream() per process.
+This FastAPI app hosts any number of sessions on one event loop:
+
+- One compiled graph, checkpointer, tool executor and MCP connection pool
+  are shared by every session.
+- A session is a checkpointer thread (thread_id = session id), its own
+  pager of large tool results (tools.RESULT_PAGERS) and a lock:
+  turns of one session run one after another, different sessions run
+  concurrently. Every turn gets its own trace (tracing keeps it in a
+  ContextVar, which is per request task).
+- LLM requests of all sessions share AGENT_LLM_CONCURRENCY slots
+  (llm_limit.py); sync graph nodes and tools run on a pool of
+  AGENT_API_THREADS threads; sessions idle for AGENT_SESSION_TTL seconds
+  are dropped together with their history.
+
+Endpoints:
+    POST   /sessions                         -> {"session_id"}
+    POST   /sessions/{id}/messages           {"content"} -> answer, tool calls, metrics
+    POST   /sessions/{id}/messages?stream=1  the same turn as server-sent events (stream_events.py)
+    GET    /sessions/{id}                    turns, state, idle time
+    DELETE /sessions/{id}
+    GET    /stats                            sessions, turns, LLM slots, TTFT, triage hit rate
+
+Run: uvicorn api_server:app --host 0.0.0.0 --port 8502
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field
+
+from stream_events import aiter_events, ttft_metrics
+from triage import triage_stats
+
+AGENT_MAX_SESSIONS = int(os.getenv("AGENT_MAX_SESSIONS", "200"))
+AGENT_SESSION_TTL = float(os.getenv("AGENT_SESSION_TTL", "3600"))
+AGENT_API_THREADS = int(os.getenv("AGENT_API_THREADS", "64"))
+# Same limit as the CLI: guards against tool-call loops
+RECURSION_LIMIT = 15
+
+
+class Session:
+
+    __slots__ = ("id", "created", "last_active", "turns", "running", "lock")
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.created = self.last_active = time.time()
+        self.turns = 0
+        self.running = False
+        self.lock = asyncio.Lock()
+
+    def info(self) -> Dict:
+        return {"session_id": self.id, "turns": self.turns, "running": self.running,
+                "created": self.created, "idle_s": round(time.time() - self.last_active, 3)}
+
+
+class SessionLimit(Exception):
+    pass
+
+
+class SessionStore:
+    """Sessions by id; at most `max_sessions`, idle ones expire after `ttl` seconds."""
+
+    def __init__(self, max_sessions: int = AGENT_MAX_SESSIONS, ttl: float = AGENT_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: Dict[str, Session] = {}
+        self.created = 0
+        self.expired = 0
+
+    def create(self, session_id: Optional[str] = None) -> Session:
+        if len(self._sessions) >= self.max_sessions:
+            raise SessionLimit(f"{self.max_sessions} sessions are open; close one or retry later")
+        session = Session(session_id or uuid.uuid4().hex)
+        self._sessions[session.id] = session
+        self.created += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    def remove(self, session_id: str) -> Optional[Session]:
+        return self._sessions.pop(session_id, None)
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Drop sessions idle for longer than the TTL (never one with a turn in progress)."""
+        now = now or time.time()
+        idle = [s.id for s in self._sessions.values() if not s.running and now - s.last_active > self.ttl]
+        for session_id in idle:
+            del self._sessions[session_id]
+        self.expired += len(idle)
+        return idle
+
+    def stats(self) -> Dict:
+        return {"open": len(self._sessions), "running": sum(s.running for s in self._sessions.values()),
+                "created": self.created, "expired": self.expired, "max": self.max_sessions}
+
+
+class MessageReq(BaseModel):
+    content: str = Field(min_length=1)
+
+
+def _sse(event: Dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def create_app(graph=None, limiter=None, store: Optional[SessionStore] = None,
+               threads: int = AGENT_API_THREADS) -> FastAPI:
+    """
+    graph:   compiled agent graph with a checkpointer; built from agents.py at startup when not given
+    limiter: llm_limit.LLMLimiter of that graph's model, reported in /stats
+    """
+    store = store or SessionStore()
+    state = {"graph": graph, "limiter": limiter}
+    turns = {"completed": 0, "failed": 0}
+
+    async def drop(session_ids: List[str]):
+        """Forget closed/expired sessions: checkpointer thread and stored tool-result pages."""
+        from tools import RESULT_PAGERS
+        checkpointer = getattr(state["graph"], "checkpointer", None)
+        delete = getattr(checkpointer, "adelete_thread", None)
+        for session_id in session_ids:
+            RESULT_PAGERS.drop(session_id)
+            if delete is not None:
+                await delete(session_id)
+
+    async def expire_loop():
+        while True:
+            await asyncio.sleep(min(store.ttl, 60))
+            await drop(store.expire())
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Sync graph nodes and tools run on the loop's default executor
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix="agent"))
+        checkpointer = None
+        if state["graph"] is None:
+            import agents
+            from memory import make_async_checkpointer
+            from workflow import build_graph
+            checkpointer = await make_async_checkpointer()
+            state["graph"] = build_graph(agents.get_llm(), agents.get_tools(), tool_executor=agents.get_tool_executor(),
+                                         checkpointer=checkpointer)
+            state["limiter"] = agents.get_llm_limiter()
+        expirer = asyncio.create_task(expire_loop())
+        yield
+        expirer.cancel()
+        # AsyncSqliteSaver's connection runs on its own thread
+        conn = getattr(checkpointer, "conn", None)
+        if conn is not None:
+            await conn.close()
+
+    app = FastAPI(title="SRE Agent API", version="0.1.0", lifespan=lifespan)
+
+    def session_or_404(session_id: str) -> Session:
+        session = store.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session '{session_id}'")
+        return session
+
+    async def run_turn(session: Session, content: str):
+        """Events of one turn; holds the session lock, so a session's turns never interleave."""
+        config = {"recursion_limit": RECURSION_LIMIT, "configurable": {"thread_id": session.id}}
+        async with session.lock:
+            session.running = True
+            try:
+                async for event in aiter_events(state["graph"], {"messages": [HumanMessage(content=content)]},
+                                                config=config):
+                    yield event
+                turns["completed"] += 1
+            except Exception:
+                turns["failed"] += 1
+                raise
+            finally:
+                session.turns += 1
+                session.running = False
+                session.last_active = time.time()
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", "time": time.time()}
+
+    @app.post("/sessions", status_code=201)
+    def create_session():
+        try:
+            session = store.create()
+        except SessionLimit as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        return {"session_id": session.id}
+
+    @app.get("/sessions/{session_id}")
+    def get_session(session_id: str):
+        return session_or_404(session_id).info()
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        session_or_404(session_id)
+        store.remove(session_id)
+        await drop([session_id])
+        return {"status": "deleted", "session_id": session_id}
+
+    @app.post("/sessions/{session_id}/messages")
+    async def send_message(session_id: str, req: MessageReq, stream: bool = False):
+        """One user turn. The answer and a summary of the tool calls, or (stream=1) every event as SSE."""
+        session = session_or_404(session_id)
+        session.last_active = time.time()
+        if stream:
+            async def events():
+                try:
+                    async for event in run_turn(session, req.content):
+                        yield _sse(event)
+                except Exception as e:
+                    yield _sse({"type": "error", "detail": f"{type(e).__name__}: {e}"})
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        answer, tool_calls, triage, metrics = "", [], None, {}
+        try:
+            async for event in run_turn(session, req.content):
+                if event["type"] == "final":
+                    answer = event["content"]
+                elif event["type"] == "tool_call":
+                    tool_calls.append({"name": event["name"], "args": event["args"]})
+                elif event["type"] == "triage":
+                    triage = {k: v for k, v in event.items() if k != "type"}
+                elif event["type"] == "metrics":
+                    metrics = {k: v for k, v in event.items() if k != "type"}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {e}")
+        return {"session_id": session.id, "turn": session.turns, "answer": answer, "tool_calls": tool_calls,
+                "triage": triage, "metrics": metrics}
+
+    @app.get("/stats")
+    def stats():
+        limiter = state["limiter"]
+        return {
+            "sessions": store.stats(),
+            "turns": dict(turns),
+            "llm": limiter.stats() if limiter is not None else None,
+            "ttft": ttft_metrics.summary(),
+            "triage": triage_stats.summary(),
+        }
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,214 @@
+"""
+Alert correlation: group firing alerts into incidents, one per probable root cause.
+
+When one service fails, alerts fire for it, for its dependents, for the
+scrape targets that disappear and for the SLOs it breaks. Instead of a flat
+list, correlate() returns incidents:
+
+1. Every alert is pinned to a container where possible: the `name`/`container`
+   label (cAdvisor), the runbook's `component`, the host of `instance`, or the
+   `service` label / alertname prefix (Kafka*, HDFS*, ...).
+2. Alerts on the same container, or on containers linked in the service
+   topology (COMPOSE_DEPENDENCIES), belong to one incident.
+3. Monitoring and SLO alerts without a container are symptoms: they join the
+   incident that started closest before them within `window` seconds. Other
+   container-less alerts (e.g. node) are grouped by shared instance/service label.
+4. The probable root is the incident's most upstream container, ties broken by
+   the earliest activeAt, then severity.
+
+Identical alerts (same alertname) within an incident are shown once with a count.
+"""
+import bisect
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from prompts import CONTAINERS
+from remediation_batch import COMPOSE_DEPENDENCIES
+
+# `service` label / alertname prefix -> container that owns the service
+SERVICE_CONTAINERS = {"kafka": "kafka", "hdfs": "namenode", "spark": "spark-master", "clickhouse": "clickhouse"}
+
+SEVERITY_RANK = {"critical": 0, "warning": 1, "info": 2}
+
+# Alerts about observability itself; they follow whatever broke the scraped service
+SYMPTOM_SERVICES = {"monitoring", "slo"}
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Prometheus activeAt ('2024-05-01T10:00:00.123456789Z') -> epoch seconds."""
+    if not value:
+        return None
+    try:
+        stamp, _, fraction = value.rstrip("Z").partition(".")
+        parsed = datetime.fromisoformat(stamp).replace(tzinfo=timezone.utc)
+        return parsed.timestamp() + (float(f"0.{fraction[:6]}") if fraction else 0.0)
+    except ValueError:
+        return None
+
+
+class _Groups:
+    """Union-find over alert positions."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        self.parent[self.find(a)] = self.find(b)
+
+
+class AlertCorrelator:
+
+    def __init__(self, index=None, containers: Iterable[str] = CONTAINERS.values(),
+                 dependencies: Dict[str, List[str]] = COMPOSE_DEPENDENCIES, window: float = 300):
+        """
+        index: optional RunbookIndex, for the runbook `component` of an alert
+        dependencies: container -> containers it depends on
+        window: seconds a container-less alert may start after an incident and still join it
+        """
+        self.index = index
+        self.containers = set(containers)
+        self.dependencies = dependencies
+        self.window = window
+
+    def component(self, alert: Dict) -> Optional[str]:
+        labels = alert.get("labels", {})
+        for candidate in (labels.get("name"), labels.get("container")):
+            if candidate in self.containers:
+                return candidate
+        found = self.index.get(labels.get("alertname", "")) if self.index is not None else None
+        if found:
+            actions = found[1].get("remediation_actions") or []
+            components = {a.get("component") for a in actions if a.get("component")}
+            if len(components) == 1:
+                return components.pop()
+        host = labels.get("instance", "").split(":")[0]
+        if host in self.containers:
+            return host
+        if labels.get("service") in SERVICE_CONTAINERS:
+            return SERVICE_CONTAINERS[labels["service"]]
+        name = labels.get("alertname", "").lower().removeprefix("slo")
+        return next((c for prefix, c in SERVICE_CONTAINERS.items() if name.startswith(prefix)), None)
+
+    @staticmethod
+    def is_symptom(alert: Dict) -> bool:
+        labels = alert.get("labels", {})
+        name = labels.get("alertname", "")
+        return bool({labels.get("component"), labels.get("service")} & SYMPTOM_SERVICES) or \
+            name.startswith(("Monitoring", "SLO"))
+
+    def _upstream(self, component: str, components: set) -> bool:
+        """True if none of `component`'s dependencies is also affected."""
+        return not any(d in components for d in self.dependencies.get(component, []))
+
+    def _closest(self, at: Optional[float], pinned: List, pinned_times: List[float],
+                 untimed: Optional[int]) -> Optional[int]:
+        """Pinned alert that started closest to `at`: up to `window` before, or slightly (window/10) after."""
+        if at is None:
+            # Unknown timing: any incident qualifies, take the earliest one
+            return pinned[0][1] if pinned else untimed
+        pos = bisect.bisect_right(pinned_times, at)
+        candidates = []
+        if pos > 0 and at - pinned_times[pos - 1] <= self.window:
+            candidates.append((at - pinned_times[pos - 1], pinned[pos - 1][1]))
+        if pos < len(pinned) and pinned_times[pos] - at <= self.window / 10:
+            candidates.append((pinned_times[pos] - at, pinned[pos][1]))
+        if candidates:
+            return min(candidates)[1]
+        return untimed
+
+    def correlate(self, alerts: List[Dict]) -> List[Dict]:
+        if not alerts:
+            return []
+        components = [self.component(a) for a in alerts]
+        started = [parse_time(a.get("activeAt")) for a in alerts]
+        groups = _Groups(len(alerts))
+
+        # 1. Same container or linked in the topology
+        first_of: Dict[str, int] = {}
+        for i, c in enumerate(components):
+            if c is not None:
+                groups.union(i, first_of.setdefault(c, i))
+        for c, deps in self.dependencies.items():
+            for d in deps:
+                if c in first_of and d in first_of:
+                    groups.union(first_of[c], first_of[d])
+
+        # 2. Container-less symptoms join the closest incident that started before them
+        pinned = sorted((started[i], i) for i, c in enumerate(components) if c is not None and started[i] is not None)
+        pinned_times = [t for t, _ in pinned]
+        untimed = next((i for i, c in enumerate(components) if c is not None and started[i] is None), None)
+        by_label: Dict[str, int] = {}
+        for i, c in enumerate(components):
+            if c is not None:
+                continue
+            target = self._closest(started[i], pinned, pinned_times, untimed) if self.is_symptom(alerts[i]) else None
+            if target is not None:
+                groups.union(i, target)
+                continue
+            labels = alerts[i].get("labels", {})
+            key = labels.get("instance") or labels.get("service") or labels.get("component") or ""
+            groups.union(i, by_label.setdefault(key, i))
+
+        members: Dict[int, List[int]] = {}
+        for i in range(len(alerts)):
+            members.setdefault(groups.find(i), []).append(i)
+        incidents = [self._incident(alerts, components, started, idx) for idx in members.values()]
+        incidents.sort(key=lambda inc: (SEVERITY_RANK.get(inc["severity"], 3), inc["started"] or float("inf")))
+        for n, incident in enumerate(incidents, 1):
+            incident["id"] = n
+        return incidents
+
+    def _incident(self, alerts: List[Dict], components: List, started: List, idx: List[int]) -> Dict:
+        affected = {components[i] for i in idx if components[i] is not None}
+
+        def rank(i):
+            labels = alerts[i].get("labels", {})
+            return (components[i] is None,
+                    not self._upstream(components[i], affected) if components[i] else True,
+                    started[i] if started[i] is not None else float("inf"),
+                    SEVERITY_RANK.get(labels.get("severity"), 3),
+                    "down" not in labels.get("alertname", "").lower())
+
+        ordered = sorted(idx, key=rank)
+        root = ordered[0]
+        grouped: Dict[str, Dict] = {}
+        for i in ordered:
+            labels = alerts[i].get("labels", {})
+            entry = grouped.setdefault(labels.get("alertname", "Unknown"), {
+                "alertname": labels.get("alertname", "Unknown"), "severity": labels.get("severity", "Unknown"),
+                "description": alerts[i].get("annotations", {}).get("description", ""), "count": 0})
+            entry["count"] += 1
+        times = [started[i] for i in idx if started[i] is not None]
+        return {
+            "root": components[root],
+            "root_alert": alerts[root].get("labels", {}).get("alertname", "Unknown"),
+            "components": sorted(affected),
+            "severity": min((alerts[i].get("labels", {}).get("severity", "") for i in idx),
+                            key=lambda s: SEVERITY_RANK.get(s, 3)),
+            "started": min(times) if times else None,
+            "alerts": list(grouped.values()),
+            "alert_count": len(idx),
+        }
+
+
+def format_incidents(incidents: List[Dict]) -> List[str]:
+    """Lines for the LLM: one header per incident, then its (deduplicated) alerts, root first."""
+    total = sum(inc["alert_count"] for inc in incidents)
+    lines = [f"{total} firing alerts correlated into {len(incidents)} incident(s). "
+             f"Investigate each incident once, starting from its probable root."]
+    for inc in incidents:
+        since = (time.strftime(" since %H:%M:%SZ", time.gmtime(inc["started"])) if inc["started"] else "")
+        root = f"probable root: {inc['root']} ({inc['root_alert']})" if inc["root"] else \
+            f"probable root: unknown ({inc['root_alert']})"
+        lines.append(f"Incident {inc['id']} [{inc['severity']}] {root}, {inc['alert_count']} alerts{since}")
+        for a in inc["alerts"]:
+            count = f" x{a['count']}" if a["count"] > 1 else ""
+            lines.append(f"  - [ALERT] {a['alertname']}{count} (Severity: {a['severity']}): {a['description']}")
+    return lines
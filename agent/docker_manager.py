@@ -0,0 +1,230 @@
+"""
+Long-lived Docker client for remediation actions.
+
+- One client per process instead of docker.from_env() per tool call.
+- Container name -> ID lookups are cached. A background thread follows the
+  Docker events stream and drops entries when containers are created,
+  destroyed or renamed; while that stream is down the cache is bypassed.
+  Restarts and health polls use the ID directly (low-level API: restart,
+  inspect), so a cached container costs no lookup; a stale ID (NotFound) is
+  resolved by name once more.
+- Restarts run as background jobs: the caller gets a job ID right away, the
+  restart uses a configurable stop timeout, and the job then waits until the
+  container is running (and healthy, when it has a healthcheck). Finished
+  jobs are kept for `job_ttl` seconds for check_remediation_status.
+- The docker SDK is imported with the first client, not when the agent
+  starts; docker_errors() gives its exception classes.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# Events that can change which container ID a name points to
+_NAME_EVENTS = ("create", "destroy", "rename")
+
+
+class RestartJob:
+
+    def __init__(self, job_id: str, component: str):
+        self.id = job_id
+        self.component = component
+        self.state = "pending"  # pending -> restarting -> waiting_health -> succeeded/failed/timeout
+        self.detail = ""
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def finish(self, state: str, detail: str = ""):
+        self.state, self.detail = state, detail
+        self.finished = time.time()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        return {"job_id": self.id, "component": self.component, "state": self.state,
+                "detail": self.detail, "elapsed_s": round(self.elapsed, 2)}
+
+
+def docker_errors():
+    """docker.errors, imported on first use: `except docker_errors().NotFound:`."""
+    import docker.errors
+    return docker.errors
+
+
+def docker_from_env():
+    import docker
+    return docker.from_env()
+
+
+class DockerManager:
+
+    def __init__(self, client_factory: Callable = docker_from_env, stop_timeout: int = 10,
+                 health_timeout: float = 60.0, poll_interval: float = 1.0, max_workers: int = 4,
+                 job_ttl: float = 3600.0):
+        """
+        stop_timeout:   seconds Docker waits for a graceful stop before killing
+        health_timeout: seconds to wait for running/healthy after the restart
+        job_ttl:        seconds a finished job stays in `jobs`
+        """
+        self._client_factory = client_factory
+        self._client = None
+        self.stop_timeout = stop_timeout
+        self.health_timeout = health_timeout
+        self.poll_interval = poll_interval
+        self.job_ttl = job_ttl
+        self._lock = threading.Lock()
+        self._ids: Dict[str, str] = {}
+        self._watching = False
+        self._events = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docker")
+        self._job_ids = itertools.count(1)
+        self.jobs: Dict[str, RestartJob] = {}
+        self.lookups = 0
+        self.cache_hits = 0
+
+    # ---- client + name cache -----------------------------------------------
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._client_factory()
+                threading.Thread(target=self._watch_events, name="docker-events", daemon=True).start()
+            return self._client
+
+    def _watch_events(self):
+        backoff = 1.0
+        while True:
+            try:
+                self._events = self._client.events(decode=True, filters={"type": "container", "event": list(_NAME_EVENTS)})
+                self._watching = True
+                backoff = 1.0
+                for event in self._events:
+                    self._invalidate(event)
+            except Exception:
+                pass
+            # Stream ended or failed: events may have been missed, so start over with an empty cache
+            self._watching = False
+            with self._lock:
+                self._ids.clear()
+                if self._client is None:
+                    return
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _invalidate(self, event: Dict):
+        actor = event.get("Actor", {})
+        names = {actor.get("Attributes", {}).get("name"), actor.get("Attributes", {}).get("oldName", "").lstrip("/")}
+        with self._lock:
+            for name, cid in list(self._ids.items()):
+                if name in names or cid == actor.get("ID"):
+                    del self._ids[name]
+
+    def resolve(self, name: str) -> str:
+        """Container ID for `name`; raises docker.errors.NotFound."""
+        client = self.client
+        self.lookups += 1
+        if self._watching:
+            with self._lock:
+                cid = self._ids.get(name)
+            if cid is not None:
+                self.cache_hits += 1
+                return cid
+        cid = client.containers.get(name).id
+        if self._watching:
+            with self._lock:
+                self._ids[name] = cid
+        return cid
+
+    def _by_id(self, name: str, cid: str, call: Callable[[str], object]) -> tuple:
+        """(call(cid), cid); on NotFound (stale ID, event not seen yet) the name is resolved once more."""
+        try:
+            return call(cid), cid
+        except docker_errors().NotFound:
+            with self._lock:
+                if self._ids.get(name) == cid:
+                    del self._ids[name]
+            cid = self.resolve(name)
+            return call(cid), cid
+
+    # ---- restarts ----------------------------------------------------------
+
+    def restart(self, name: str, stop_timeout: Optional[int] = None) -> RestartJob:
+        """Start a restart in the background; raises docker.errors.NotFound for unknown containers."""
+        cid = self.resolve(name)
+        with self._lock:
+            self._prune_jobs()
+            running = next((j for j in self.jobs.values() if j.component == name and not j.done), None)
+            if running is not None:
+                return running  # one restart per container at a time
+            job = RestartJob(f"restart-{next(self._job_ids)}", name)
+            self.jobs[job.id] = job
+        self._pool.submit(self._run_restart, job, cid, self.stop_timeout if stop_timeout is None else stop_timeout)
+        return job
+
+    def _prune_jobs(self):
+        """Drop jobs that finished more than job_ttl seconds ago (caller holds the lock)."""
+        cutoff = time.time() - self.job_ttl
+        for job_id in [j.id for j in self.jobs.values() if j.done and j.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def _run_restart(self, job: RestartJob, cid: str, stop_timeout: int):
+        api = self.client.api
+        name = job.component
+        try:
+            job.state = "restarting"
+            _, cid = self._by_id(name, cid, lambda c: api.restart(c, timeout=stop_timeout))
+            job.state = "waiting_health"
+            deadline = time.monotonic() + self.health_timeout
+            while True:
+                attrs, cid = self._by_id(name, cid, api.inspect_container)
+                state = attrs.get("State", {})
+                status = state.get("Status")
+                health = state.get("Health", {}).get("Status")
+                if status == "running" and health in (None, "healthy"):
+                    job.finish("succeeded", "running" + (" and healthy" if health else ""))
+                    return
+                if status in ("exited", "dead"):
+                    job.finish("failed", f"container is {status} (exit code {state.get('ExitCode')})")
+                    return
+                if time.monotonic() >= deadline:
+                    job.finish("timeout", f"still {health or status} after {self.health_timeout:g}s")
+                    return
+                time.sleep(self.poll_interval)
+        except Exception as e:
+            job.finish("failed", str(e))
+
+    def find_job(self, ref: str) -> Optional[RestartJob]:
+        """Job by ID, or the most recent job for a container name."""
+        with self._lock:
+            self._prune_jobs()
+        if ref in self.jobs:
+            return self.jobs[ref]
+        matches: List[RestartJob] = [j for j in self.jobs.values() if j.component == ref]
+        return matches[-1] if matches else None
+
+    def stats(self) -> Dict:
+        return {"lookups": self.lookups, "cache_hits": self.cache_hits, "cached_names": len(self._ids),
+                "watching_events": self._watching,
+                "active_jobs": sum(1 for j in self.jobs.values() if not j.done)}
+
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+            self._ids.clear()
+        if self._events is not None:
+            self._events.close()
+        if client is not None:
+            client.close()
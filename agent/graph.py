@@ -2,8 +2,12 @@
 
 from agents import get_agent
 
-# Get the robot defined in agents.py
-app = get_agent()
+
+def __getattr__(name: str):
+    # `from graph import app` compiles the graph on first use; agents.get_agent() keeps the one instance
+    if name == "app":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # # Graph structure
-# print(app.get_graph().draw_ascii())
\ No newline at end of file
+# print(get_agent().get_graph().draw_ascii())
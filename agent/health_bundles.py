@@ -0,0 +1,79 @@
+"""
+Component health bundles for check_component_health.
+
+Each bundle lists the signals an SRE looks at together when a component
+misbehaves (mostly the expressions behind its alert rules in
+monitoring/prometheus/rules/alerts.yml). The whole bundle goes to
+mcp-monitor's /tools/query_batch in one request and is evaluated there
+concurrently, instead of one query_prometheus tool call and one HTTP round
+trip per signal.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# component -> [(label, PromQL)]
+HEALTH_BUNDLES: Dict[str, List[Tuple[str, str]]] = {
+    "kafka": [
+        ("exporter up", 'up{job="kafka-exporter"}'),
+        ("brokers", "kafka_brokers"),
+        ("consumer lag", "sum(kafka_consumergroup_lag) by (consumergroup, topic)"),
+        ("under-replicated partitions", "sum(kafka_topic_partition_under_replicated_partition) by (topic)"),
+        ("topic partitions", "count(kafka_topic_partitions)"),
+        ("container CPU %", 'rate(container_cpu_usage_seconds_total{name=~"kafka.*"}[5m]) * 100'),
+        ("container memory bytes", 'container_memory_usage_bytes{name=~"kafka.*"}'),
+    ],
+    "hdfs": [
+        ("namenode up", 'up{job="hdfs"}'),
+        ("heap used ratio",
+         'jvm_memory_bytes_used{job="hdfs",area="heap"} / jvm_memory_bytes_max{job="hdfs",area="heap"}'),
+        ("GC seconds per second", 'rate(jvm_gc_collection_seconds_sum{job="hdfs"}[5m])'),
+        ("threads", 'jvm_threads_current{job="hdfs"}'),
+        ("container CPU %", 'rate(container_cpu_usage_seconds_total{name="namenode"}[5m]) * 100'),
+    ],
+    "spark": [
+        ("targets up", 'up{job="spark"}'),
+        ("container CPU %", 'rate(container_cpu_usage_seconds_total{name=~"spark-.*"}[5m]) * 100'),
+        ("container memory bytes", 'container_memory_usage_bytes{name=~"spark-.*"}'),
+    ],
+    "clickhouse": [
+        ("exporter up", 'up{job="clickhouse"}'),
+        ("running queries", "ClickHouseMetrics_Query"),
+        ("inserted rows per second", "rate(ClickHouseProfileEvents_InsertedRows[5m])"),
+        ("replica max delay seconds", "ClickHouseAsyncMetrics_ReplicasMaxAbsoluteDelay"),
+        ("container CPU %", 'rate(container_cpu_usage_seconds_total{name="clickhouse"}[5m]) * 100'),
+    ],
+    "node": [
+        ("CPU %", '100 - (avg by(instance) (rate(node_cpu_seconds_total{mode="idle"}[5m])) * 100)'),
+        ("memory used ratio", "1 - node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes"),
+        ("disk used ratio", '1 - node_filesystem_avail_bytes{fstype!~"tmpfs|overlay"} '
+                            '/ node_filesystem_size_bytes{fstype!~"tmpfs|overlay"}'),
+    ],
+    "containers": [
+        ("CPU %", 'topk(10, rate(container_cpu_usage_seconds_total{name!=""}[5m]) * 100)'),
+        ("memory / limit", 'topk(10, container_memory_usage_bytes{name!=""} '
+                           '/ (container_spec_memory_limit_bytes{name!=""} > 0))'),
+        ("restarts in 10m", 'changes(container_start_time_seconds{name!=""}[10m]) > 0'),
+    ],
+    "monitoring": [
+        ("targets down", "up == 0"),
+        ("targets up per job", "sum(up) by (job)"),
+    ],
+}
+
+# Container names and other words the model may use for a component
+COMPONENT_ALIASES = {
+    "kafka-exporter": "kafka", "broker": "kafka",
+    "namenode": "hdfs", "datanode": "hdfs",
+    "spark-master": "spark", "spark-worker": "spark",
+    "clickhouse-exporter": "clickhouse",
+    "host": "node", "node-exporter": "node", "infra": "node",
+    "docker": "containers", "cadvisor": "containers", "container": "containers",
+    "prometheus": "monitoring", "targets": "monitoring",
+}
+
+
+def resolve_component(component: str) -> Optional[str]:
+    """'namenode' / 'HDFS' / 'spark-worker' -> bundle name, or None."""
+    name = component.strip().lower()
+    if name in HEALTH_BUNDLES:
+        return name
+    return COMPONENT_ALIASES.get(name)
@@ -0,0 +1,231 @@
+"""
+Response cache for the agent's LLM calls.
+
+The same alerts (ContainerRestarting, NodeCPUHigh, ...) are investigated many
+times a day, and at temperature 0 the model is asked near-identical questions
+each time. CachedChatModel wraps the chat model and answers a repeated prompt
+from an LLMCache instead of calling the provider.
+
+- cache_key(): hash of the model settings, the bound tool schemas and the
+  normalized message history. Message ids and tool-call ids are dropped, and
+  volatile values are masked: timestamps, epoch times and durations (elapsed
+  seconds, latencies). Metric values are kept: a diagnosis cached for a
+  critical reading must not be replayed for a healthy one. Integers, job ids
+  and result handles are kept too, because the model copies them into tool
+  arguments.
+- LLMCache: SQLite store (a file, or in memory) with a TTL and a maximum
+  size; the least recently used entries are evicted first. Hits, misses and
+  the provider time saved are counted for the hit rate.
+- make_llm_cache(): "none" (default), "memory" or "sqlite", from
+  AGENT_LLM_CACHE.
+
+Cached replies get fresh tool-call ids, so a replayed decision never collides
+with a tool call already in the thread.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+import tracing
+
+_VOLATILE = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?\b"), "<time>"),
+    (re.compile(r"\b1\d{9}(?:\d{3})?(?:\.\d+)?\b"), "<epoch>"),
+    # Durations only: "took 0.42s", "elapsed_s": 1.5; other numbers are metric values and stay in the key
+    (re.compile(r"((?:elapsed|duration|latency)\w*[\"']?\s*[:=]\s*)\d+(?:\.\d+)?", re.I), r"\1<dur>"),
+    (re.compile(r"(?<![\w.])\d+\.\d+\s?m?s\b"), "<dur>"),
+]
+
+
+def mask_volatile(text: str) -> str:
+    for pattern, placeholder in _VOLATILE:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def _normalize(message: BaseMessage) -> list:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, sort_keys=True)
+    calls = [[tc["name"], mask_volatile(json.dumps(tc["args"], sort_keys=True))]
+             for tc in getattr(message, "tool_calls", None) or []]
+    return [message.type, mask_volatile(content), calls]
+
+
+def cache_key(model: str, tools: str, messages: List[BaseMessage]) -> str:
+    """model / tools: identify the model settings and the bound tool schemas."""
+    payload = json.dumps([model, tools, [_normalize(m) for m in messages]], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+
+    def __init__(self, path: str = ":memory:", ttl: float = 21600.0, max_entries: int = 5000):
+        """
+        path:        SQLite file, or ":memory:" for a per-process cache
+        ttl:         seconds an entry is served after it was stored
+        max_entries: least recently used entries beyond this are evicted
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Sessions call the model from different threads; every access goes through _lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                         "created REAL NOT NULL, used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache (used)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+        self.saved_s = 0.0
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] >= self.ttl:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                self._size -= 1
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE llm_cache SET used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._db.commit()
+            value = json.loads(row[0])
+            self.hits += 1
+            self.saved_s += value.get("elapsed_s", 0.0)
+            return value
+
+    def put(self, key: str, value: Dict):
+        now = time.time()
+        with self._lock:
+            existed = self._db.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO llm_cache (key, value, created, used) VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(value), now, now))
+            self._size += existed is None
+            self.stores += 1
+            if self._size > self.max_entries:
+                # Expired entries go first, then the least recently used ones
+                self._db.execute("DELETE FROM llm_cache WHERE created <= ?", (now - self.ttl,))
+                over = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+                if over > 0:
+                    self._db.execute("DELETE FROM llm_cache WHERE key IN "
+                                     "(SELECT key FROM llm_cache ORDER BY used LIMIT ?)", (over,))
+                size = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                self.evictions += self._size - size
+                self._size = size
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+            self._size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "saved_s": round(self.saved_s, 3),
+            }
+
+
+def _to_message(value: Dict) -> AIMessage:
+    calls = [{"name": tc["name"], "args": tc["args"], "id": f"call_{uuid.uuid4().hex[:24]}"}
+             for tc in value.get("tool_calls", [])]
+    return AIMessage(content=value["content"], tool_calls=calls, response_metadata={"llm_cache": "hit"})
+
+
+def _cacheable(message: AIMessage) -> bool:
+    # Never remember a broken reply: the next identical prompt should get a fresh try
+    return not getattr(message, "invalid_tool_calls", None) and bool(message.content or message.tool_calls)
+
+
+class CachedChatModel:
+    """
+    Wraps a chat model (anything with bind_tools/invoke/ainvoke) with an
+    LLMCache. Misses call the model with the caller's config, so streaming
+    callbacks still see the tokens; hits return the stored reply at once.
+    """
+
+    def __init__(self, llm, cache: LLMCache, model: Optional[str] = None, tools: str = ""):
+        self.llm = llm
+        self.cache = cache
+        # langchain's own cache keys on the same string: model name, temperature and other settings
+        self.model = model if model is not None else llm._get_llm_string()
+        self.tools = tools
+
+    def bind_tools(self, tools, **kwargs) -> "CachedChatModel":
+        schemas = json.dumps([convert_to_openai_tool(t) for t in tools], sort_keys=True)
+        return CachedChatModel(self.llm.bind_tools(tools, **kwargs), self.cache, self.model,
+                               hashlib.sha256(schemas.encode()).hexdigest())
+
+    def _lookup(self, messages: List[BaseMessage]) -> tuple:
+        key = cache_key(self.model, self.tools, messages)
+        value = self.cache.get(key)
+        tracing.record_llm_cache(value is not None)
+        return key, value
+
+    def _store(self, key: str, message: AIMessage, started: float):
+        if _cacheable(message):
+            self.cache.put(key, {"content": message.content, "elapsed_s": round(time.perf_counter() - started, 4),
+                                 "tool_calls": [{"name": tc["name"], "args": tc["args"]}
+                                                for tc in message.tool_calls]})
+
+    def invoke(self, messages: List[BaseMessage], config=None, **kwargs) -> AIMessage:
+        key, value = self._lookup(messages)
+        if value is not None:
+            return _to_message(value)
+        started = time.perf_counter()
+        message = self.llm.invoke(messages, config, **kwargs)
+        self._store(key, message, started)
+        return message
+
+    async def ainvoke(self, messages: List[BaseMessage], config=None, **kwargs) -> AIMessage:
+        key, value = self._lookup(messages)
+        if value is not None:
+            return _to_message(value)
+        started = time.perf_counter()
+        message = await self.llm.ainvoke(messages, config, **kwargs)
+        self._store(key, message, started)
+        return message
+
+
+def make_llm_cache(kind: Optional[str] = None, path: Optional[str] = None) -> Optional[LLMCache]:
+    """
+    kind: "none" (default), "memory" or "sqlite" — AGENT_LLM_CACHE when not given
+    path: SQLite database file — AGENT_LLM_CACHE_DB when not given
+    """
+    kind = (kind or os.getenv("AGENT_LLM_CACHE", "none")).lower()
+    if kind == "none":
+        return None
+    ttl = float(os.getenv("AGENT_LLM_CACHE_TTL", "21600"))
+    max_entries = int(os.getenv("AGENT_LLM_CACHE_SIZE", "5000"))
+    if kind == "memory":
+        return LLMCache(":memory:", ttl=ttl, max_entries=max_entries)
+    if kind == "sqlite":
+        path = path or os.getenv("AGENT_LLM_CACHE_DB", os.path.join(os.path.dirname(__file__), "llm_cache.sqlite"))
+        return LLMCache(path, ttl=ttl, max_entries=max_entries)
+    raise ValueError(f"Unknown AGENT_LLM_CACHE '{kind}'. Use memory, sqlite or none.")
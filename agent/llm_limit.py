@@ -0,0 +1,113 @@
+"""
+Process-wide cap on concurrent LLM requests.
+
+The agent API server (api_server.py) runs many sessions on one compiled
+graph. Without a cap, 50 concurrent investigations become 50 simultaneous
+provider requests and run into its rate limits; with it, calls beyond the
+limit wait for a free slot and the wait is visible in stats().
+
+LimitedChatModel wraps the chat model the way CachedChatModel does. Async
+callers queue on an asyncio.Semaphore, sync callers (CLI, Streamlit) on a
+threading one; a process uses one or the other.
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+
+class LLMLimiter:
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._sync_slots = threading.BoundedSemaphore(limit)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.waited = 0  # calls that found every slot taken
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def _acquired(self, started: float):
+        wait = time.perf_counter() - started
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            if wait > 0.001:
+                self.waited += 1
+                self.wait_s += wait
+                self.max_wait_s = max(self.max_wait_s, wait)
+
+    def _released(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def slot(self):
+        started = time.perf_counter()
+        with self._sync_slots:
+            self._acquired(started)
+            try:
+                yield
+            finally:
+                self._released()
+
+    @asynccontextmanager
+    async def aslot(self):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.limit)
+        started = time.perf_counter()
+        async with self._async_slots:
+            self._acquired(started)
+            try:
+                yield
+            finally:
+                self._released()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "calls": self.calls,
+                "in_flight": self.in_flight,
+                "peak": self.peak,
+                "waited": self.waited,
+                "wait_avg_s": round(self.wait_s / self.waited, 4) if self.waited else 0.0,
+                "wait_max_s": round(self.max_wait_s, 4),
+            }
+
+
+class LimitedChatModel:
+    """Wraps a chat model (anything with bind_tools/invoke/ainvoke); every call holds one limiter slot."""
+
+    def __init__(self, llm, limiter: LLMLimiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    def bind_tools(self, tools, **kwargs) -> "LimitedChatModel":
+        return LimitedChatModel(self.llm.bind_tools(tools, **kwargs), self.limiter)
+
+    def _get_llm_string(self, **kwargs) -> str:
+        # CachedChatModel keys on the wrapped model's settings
+        return self.llm._get_llm_string(**kwargs)
+
+    def invoke(self, messages: List[BaseMessage], config=None, **kwargs) -> AIMessage:
+        with self.limiter.slot():
+            return self.llm.invoke(messages, config, **kwargs)
+
+    async def ainvoke(self, messages: List[BaseMessage], config=None, **kwargs) -> AIMessage:
+        async with self.limiter.aslot():
+            return await self.llm.ainvoke(messages, config, **kwargs)
+
+
+def make_llm_limiter(limit: Optional[int] = None) -> Optional[LLMLimiter]:
+    """limit: concurrent LLM requests, AGENT_LLM_CONCURRENCY when not given; 0 = no cap."""
+    limit = int(os.getenv("AGENT_LLM_CONCURRENCY", "8")) if limit is None else limit
+    return LLMLimiter(limit) if limit > 0 else None
@@ -1,6 +1,9 @@
 import sys
+import uuid
 from langchain_core.messages import HumanMessage
 from graph import app
+from stream_events import iter_events
+from tracing import format_breakdown
 
 def main():
     print("==================================================")
@@ -8,6 +11,9 @@ def main():
     print(" Type 'quit' or 'exit' to stop.")
     print("==================================================")
 
+    # One conversation thread per CLI session; the checkpointer keeps its history
+    thread_id = str(uuid.uuid4())
+
     while True:
         try:
             user_input = input("\nUser (You): ")
@@ -18,38 +24,53 @@ def main():
             # Construct the input message
             inputs = {"messages": [HumanMessage(content=user_input)]}
             
-            # Stream the results so we can see the thought process
-            # stream_mode="values" will give us the updated state after each step
+            # Stream LLM tokens as they are generated, plus tool-call progress
             print("\nAgent Thinking...", flush=True)
-            
-            # Running the graph using app.stream
-            # config={"recursion_limit": 10} prevents infinite loops
-            for event in app.stream(inputs, config={"recursion_limit": 15}):
-                # Print the status at each step for easier debugging
-                for key, value in event.items():
-                    # The key here could be "agent" or "tools"
-                    # The value contains the latest messages
-                    last_msg = value["messages"][-1]
-                    
-                    if last_msg.type == "ai":
-                        # If the AI ​​decides to call tools
-                        if last_msg.tool_calls:
-                            print(f"\n[Step: Decided to Call Tool]")
-                            for tc in last_msg.tool_calls:
-                                print(f"  --> Tool: {tc['name']}")
-                                print(f"  --> Args: {tc['args']}")
-                        # If the AI ​​only provides a response
-                        else:
-                            print(f"\n[Step: Final Answer]\n{last_msg.content}")
-                            
-                    elif last_msg.type == "tool":
-                        print(f"\n[Step: Tool Output]")
-                        # The first 200 characters are extracted to prevent spamming
-                        output_preview = str(last_msg.content)[:200]
-                        print(f"  --> Result: {output_preview}...")
+            streaming = False  # True while a line of tokens is being printed
+
+            # config={"recursion_limit": 15} prevents infinite loops
+            config = {"recursion_limit": 15, "configurable": {"thread_id": thread_id}}
+            for event in iter_events(app, inputs, config=config):
+                if event["type"] == "token":
+                    if not streaming:
+                        print("\nAgent: ", end="", flush=True)
+                        streaming = True
+                    print(event["text"], end="", flush=True)
+                    continue
+                if streaming:
+                    print()
+                    streaming = False
+
+                if event["type"] == "tool_call":
+                    print(f"\n[Step: Decided to Call Tool]")
+                    print(f"  --> Tool: {event['name']}")
+                    print(f"  --> Args: {event['args']}")
+
+                elif event["type"] == "tool_result":
+                    print(f"\n[Step: Tool Output] {event['name']} ({event['elapsed_s']}s)")
+                    # The first 200 characters are extracted to prevent spamming
+                    print(f"  --> Result: {event['content'][:200]}...")
+
+                elif event["type"] == "tool_batch" and event["calls"] > 1:
+                    print(f"\n[Parallel tools] {event['calls']} calls in {event['wall_s']:.2f}s "
+                          f"(saved {event['saved_s']:.2f}s vs sequential)")
+
+                elif event["type"] == "triage":
+                    fallback = ", ".join(event["fallback"]) or "none"
+                    print(f"\n[Fast-path triage] {event['fast_path']}/{event['alerts']} alerts matched runbooks "
+                          f"in {event['elapsed_ms']:.1f}ms (LLM needed for: {fallback})")
+
+                elif event["type"] == "final" and not event["streamed"]:
+                    # Model did not stream (already printed token by token otherwise)
+                    print(f"\n[Step: Final Answer]\n{event['content']}")
+
+                elif event["type"] == "metrics":
+                    ttft = f"{event['ttft_s']:.2f}s" if event["ttft_s"] is not None else "n/a"
+                    print(f"\n[time to first token: {ttft}, total: {event['total_s']:.2f}s]")
+                    print(f"[breakdown: {format_breakdown(event['trace'])}]")
 
         except Exception as e:
             print(f"Error: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
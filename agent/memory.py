@@ -0,0 +1,162 @@
+"""
+Conversation memory for long-running agent sessions.
+
+- make_checkpointer(): pluggable LangGraph checkpointer ("memory", "sqlite"
+  or "none"), so a thread_id actually continues the conversation;
+  make_async_checkpointer() is the same for the async API server.
+- compact_history(): keeps the history sent to the LLM under a token budget.
+  Tool outputs (e.g. large Prometheus dumps) from older turns are truncated
+  first; if that is not enough, the oldest turns are folded into a short
+  extractive summary. Whole turns are dropped at a time so every tool call
+  keeps its tool result.
+- compaction_node(): graph node that writes the compacted history back into
+  the state, so both the prompt and the checkpoint stay bounded.
+"""
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+SUMMARY_HEADER = "Summary of earlier conversation (older turns were removed to save context):"
+
+# Rough chars-per-token ratio for English text / JSON; good enough for a budget
+CHARS_PER_TOKEN = 4
+
+
+def make_checkpointer(kind: Optional[str] = None, path: Optional[str] = None):
+    """
+    kind: "memory" (default), "sqlite" or "none" — AGENT_CHECKPOINTER when not given
+    path: SQLite database file — AGENT_CHECKPOINT_DB when not given
+    """
+    kind = (kind or os.getenv("AGENT_CHECKPOINTER", "memory")).lower()
+    if kind == "none":
+        return None
+    if kind == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+    if kind == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as e:
+            raise RuntimeError("AGENT_CHECKPOINTER=sqlite needs the langgraph-checkpoint-sqlite package.") from e
+        path = path or os.getenv("AGENT_CHECKPOINT_DB", os.path.join(os.path.dirname(__file__), "checkpoints.sqlite"))
+        # Tool calls run on worker threads; SqliteSaver serializes access with its own lock
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    raise ValueError(f"Unknown AGENT_CHECKPOINTER '{kind}'. Use memory, sqlite or none.")
+
+
+async def make_async_checkpointer(kind: Optional[str] = None, path: Optional[str] = None):
+    """make_checkpointer() for graphs run with astream (api_server.py): SqliteSaver has no async API."""
+    kind = (kind or os.getenv("AGENT_CHECKPOINTER", "memory")).lower()
+    if kind != "sqlite":
+        return make_checkpointer(kind, path)
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError as e:
+        raise RuntimeError("AGENT_CHECKPOINTER=sqlite needs the langgraph-checkpoint-sqlite package.") from e
+    path = path or os.getenv("AGENT_CHECKPOINT_DB", os.path.join(os.path.dirname(__file__), "checkpoints.sqlite"))
+    return AsyncSqliteSaver(await aiosqlite.connect(path))
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    chars = 0
+    for m in messages:
+        chars += len(m.content) if isinstance(m.content, str) else len(str(m.content))
+        for tc in getattr(m, "tool_calls", None) or []:
+            chars += len(tc["name"]) + len(str(tc["args"]))
+    return chars // CHARS_PER_TOKEN
+
+
+def _split_turns(messages: List[BaseMessage]) -> tuple:
+    """(prefix, turns): prefix is anything before the first user message (e.g. an old summary)."""
+    starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if not starts:
+        return list(messages), []
+    bounds = starts + [len(messages)]
+    return list(messages[:starts[0]]), [list(messages[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+
+def _truncate_tool_output(message: ToolMessage, max_chars: int) -> ToolMessage:
+    content = str(message.content)
+    if len(content) <= max_chars or message.response_metadata.get("compacted"):
+        return message
+    # Cut at a line boundary so tabular output (one series per line) stays readable
+    head = content[:max_chars]
+    if "\n" in head:
+        head = head[:head.rindex("\n")]
+    return message.model_copy(update={
+        "content": f"{head}\n... [{len(content) - len(head)} more chars of this earlier tool output truncated]",
+        "response_metadata": {**message.response_metadata, "compacted": True},
+    })
+
+
+def _summarize_turn(turn: List[BaseMessage]) -> str:
+    question = str(turn[0].content).replace("\n", " ")
+    answers = [m for m in turn if m.type == "ai" and not m.tool_calls and m.content]
+    tools = sorted({tc["name"] for m in turn if m.type == "ai" for tc in (m.tool_calls or [])})
+    line = f"- User: {question[:200]}"
+    if tools:
+        line += f" | tools: {', '.join(tools)}"
+    if answers:
+        line += f" | Agent: {str(answers[-1].content).replace(chr(10), ' ')[:300]}"
+    return line
+
+
+def compact_history(messages: List[BaseMessage], token_budget: int = 6000, tool_output_chars: int = 1500,
+                    keep_turns: int = 2, max_summary_lines: int = 20) -> List[BaseMessage]:
+    """Return a compacted copy of `messages` (unchanged if already within budget)."""
+    prefix, turns = _split_turns(messages)
+    if len(turns) <= keep_turns:
+        return list(messages)
+
+    split = len(turns) - keep_turns
+    old, recent = turns[:split], turns[split:]
+    # 1. Older turns keep their shape but lose the bulk of their tool output
+    old = [[_truncate_tool_output(m, tool_output_chars) if isinstance(m, ToolMessage) else m for m in turn]
+           for turn in old]
+
+    # 2. Still over budget: fold the oldest turns into the summary
+    summary = next((m for m in prefix if isinstance(m, SystemMessage) and m.content.startswith(SUMMARY_HEADER)), None)
+    lines = summary.content.split("\n")[1:] if summary else []
+    rest = [m for m in prefix if m is not summary]
+    dropped_ids = []
+
+    def total():
+        summary_text = [SystemMessage(content="\n".join([SUMMARY_HEADER] + lines))] if lines else []
+        return estimate_tokens(summary_text + rest + [m for t in old + recent for m in t])
+
+    while old and total() > token_budget:
+        turn = old.pop(0)
+        lines.append(_summarize_turn(turn))
+        dropped_ids.append(turn[0].id)
+
+    if not dropped_ids:
+        return prefix + [m for t in old + recent for m in t]
+
+    lines = lines[-max_summary_lines:]
+    # Reuse the summary's id (or the first dropped message's) so it stays at the front of the state
+    new_summary = SystemMessage(content="\n".join([SUMMARY_HEADER] + lines),
+                                id=summary.id if summary else dropped_ids[0])
+    return [new_summary] + rest + [m for t in old + recent for m in t]
+
+
+def compaction_node(token_budget: Optional[int] = None, tool_output_chars: Optional[int] = None,
+                    keep_turns: Optional[int] = None):
+    """Graph node: replace/remove messages in the state so the stored history matches compact_history()."""
+    token_budget = token_budget or int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "6000"))
+    tool_output_chars = tool_output_chars or int(os.getenv("AGENT_TOOL_OUTPUT_CHARS", "1500"))
+    keep_turns = keep_turns if keep_turns is not None else int(os.getenv("AGENT_HISTORY_KEEP_TURNS", "2"))
+
+    def compact(state: Dict) -> Dict:
+        messages = state["messages"]
+        compacted = compact_history(messages, token_budget, tool_output_chars, keep_turns)
+        before = {m.id: m for m in messages}
+        kept = {m.id for m in compacted}
+        updates = [RemoveMessage(id=m.id) for m in messages if m.id not in kept]
+        # Same id = replace in place (add_messages reducer)
+        updates += [m for m in compacted if before.get(m.id) is not m]
+        return {"messages": updates} if updates else {}
+
+    return compact
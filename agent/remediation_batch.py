@@ -0,0 +1,110 @@
+"""
+Batch remediation: run several (action, component) targets in one tool call.
+
+Targets are scheduled as a dependency graph. A target starts as soon as
+everything it depends on has finished successfully, independent targets run
+in parallel up to `max_concurrency`, and the dependents of a failed target
+are skipped rather than restarted against a broken prerequisite.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Start-up order from docker-compose.yml depends_on: value must be healthy before key
+COMPOSE_DEPENDENCIES: Dict[str, List[str]] = {
+    "kafka-exporter": ["kafka"],
+    "spark-worker": ["spark-master"],
+    "grafana": ["prometheus"],
+    "mcp-monitor": ["prometheus", "grafana", "alertmanager"],
+    "sre-agent": ["mcp-monitor"],
+    "triage-worker": ["mcp-monitor"],
+}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def build_dependencies(components: List[str], order: Optional[List[List[str]]] = None,
+                       defaults: Optional[Dict[str, List[str]]] = None) -> Dict[str, Set[str]]:
+    """
+    component -> components that must finish first, restricted to this batch.
+    `order` holds explicit [before, after] pairs; `defaults` adds known
+    ordering between components that are both in the batch.
+    """
+    deps: Dict[str, Set[str]] = {c: set() for c in components}
+    for component, before in (defaults or {}).items():
+        if component in deps:
+            deps[component].update(b for b in before if b in deps)
+    for pair in order or []:
+        if len(pair) != 2:
+            raise BatchError(f"Order entries must be [before, after] pairs, got {pair!r}.")
+        before, after = pair
+        for c in (before, after):
+            if c not in deps:
+                raise BatchError(f"Order mentions '{c}', which is not one of the batch targets.")
+        deps[after].add(before)
+
+    # Kahn's algorithm: anything left over sits on a cycle
+    remaining = {c: set(d) for c, d in deps.items()}
+    while True:
+        ready = [c for c, d in remaining.items() if not d]
+        if not ready:
+            break
+        for c in ready:
+            del remaining[c]
+        for d in remaining.values():
+            d.difference_update(ready)
+    if remaining:
+        raise BatchError(f"Dependency cycle between: {', '.join(sorted(remaining))}.")
+    return deps
+
+
+def run_batch(targets: List[Tuple[str, str]], run_one: Callable[[str, str], Tuple[bool, str]],
+              dependencies: Dict[str, Set[str]], max_concurrency: int = 4) -> Dict:
+    """
+    targets: (action, component) pairs, one per component
+    run_one: blocking call returning (succeeded, message) for one target
+    Returns {"results": [...] in target order, "wall_s", "sequential_s"}.
+    """
+    t0 = time.perf_counter()
+    by_component = {component: (action, component) for action, component in targets}
+    results: Dict[str, Dict] = {}
+    running = {}
+
+    def execute(action: str, component: str) -> Dict:
+        started = time.perf_counter()
+        try:
+            ok, message = run_one(action, component)
+        except Exception as e:
+            ok, message = False, f"CRITICAL ERROR: {e}"
+        return {"action": action, "component": component, "status": "succeeded" if ok else "failed",
+                "message": message, "start_s": round(started - t0, 2),
+                "elapsed_s": round(time.perf_counter() - started, 2)}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="remediate") as pool:
+        while len(results) < len(by_component):
+            for component, (action, _) in by_component.items():
+                if component in results or component in running:
+                    continue
+                prereqs = dependencies.get(component, set())
+                blocked = [p for p in prereqs if p in results and results[p]["status"] != "succeeded"]
+                if blocked:
+                    results[component] = {"action": action, "component": component, "status": "skipped",
+                                          "message": f"Skipped: dependency '{blocked[0]}' did not succeed.",
+                                          "start_s": None, "elapsed_s": 0.0}
+                elif all(p in results for p in prereqs):
+                    # The pool itself enforces max_concurrency; extra submissions just queue
+                    running[component] = pool.submit(execute, action, component)
+            if not running:
+                continue  # only skips were recorded this round
+            done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+            for component in [c for c, f in running.items() if f in done]:
+                results[component] = running.pop(component).result()
+
+    ordered = [results[component] for _, component in targets]
+    return {
+        "results": ordered,
+        "wall_s": round(time.perf_counter() - t0, 2),
+        "sequential_s": round(sum(r["elapsed_s"] for r in ordered), 2),
+    }
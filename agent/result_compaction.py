@@ -0,0 +1,240 @@
+"""
+Compaction of tool results before they reach the LLM.
+
+A cAdvisor-style query can return thousands of series; one line per series
+would flood the model's context. compact_series() turns query rows into a
+bounded text block:
+
+- numbers rounded to a few significant digits
+- labels shared by every series printed once instead of on every line
+- series ranked by how far their value is from the median (so an `up == 0`
+  target or a stalled consumer comes first, not last), or by value
+  descending/ascending; only the top k shown
+- optional group-by label: series aggregated per group (n, sum, avg, max)
+- a hard character budget; whatever does not fit is kept in a ResultPager
+  and the output ends with a handle the agent can page through.
+
+SessionPagers keeps one ResultPager per conversation thread, so concurrent
+sessions of the agent API neither read nor evict each other's handles.
+"""
+import itertools
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+MORE_HINT = '[more available: {remaining} more {unit} — call fetch_more_results(handle="{handle}")]'
+
+
+def round_value(value, digits: int = 4) -> str:
+    """'0.123456789' -> '0.1235', '123456.789' -> '1.235e+05'; non-numbers pass through."""
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if math.isnan(x):
+        return "NaN"
+    if math.isinf(x):
+        return "+Inf" if x > 0 else "-Inf"
+    if x == int(x) and abs(x) < 10 ** digits:
+        return str(int(x))
+    return format(x, f".{digits}g")
+
+
+# Ranking orders for compact_series(sort=...)
+SORTS = ("outliers", "desc", "asc")
+
+
+def _number(value) -> float:
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return -math.inf
+    return -math.inf if math.isnan(x) else x
+
+
+def _labels_text(labels: Dict[str, str]) -> str:
+    return ", ".join(f"{k}={v}" for k, v in labels.items() if k != "__name__")
+
+
+class ResultPager:
+    """Bounded LRU of result overflow, addressed by short handles (r1, r2, ...)."""
+
+    def __init__(self, max_results: int = 64):
+        self.max_results = max_results
+        self._results: "OrderedDict[str, Dict]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def store(self, lines: List[str], unit: str) -> str:
+        with self._lock:
+            handle = f"r{next(self._ids)}"
+            self._results[handle] = {"lines": lines, "offset": 0, "unit": unit}
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return handle
+
+    def next_page(self, handle: str, budget_chars: int, max_lines: int) -> Optional[str]:
+        """Next chunk of stored lines, or None for an unknown/expired handle."""
+        with self._lock:
+            entry = self._results.get(handle)
+            if entry is None:
+                return None
+            self._results.move_to_end(handle)
+            lines, start = entry["lines"], entry["offset"]
+            page = _fit(lines[start:start + max_lines], budget_chars)
+            entry["offset"] = start + len(page)
+            remaining = len(lines) - entry["offset"]
+            if remaining == 0:
+                del self._results[handle]
+        out = page or ["(no more results)"]
+        if remaining:
+            out.append(MORE_HINT.format(remaining=remaining, unit=entry["unit"], handle=handle))
+        return "\n".join(out)
+
+
+class SessionPagers:
+    """One ResultPager per conversation thread_id; the least recently used sessions are dropped."""
+
+    def __init__(self, max_sessions: int = 1024, max_results: int = 64):
+        self.max_sessions = max_sessions
+        self.max_results = max_results
+        self._pagers: "OrderedDict[str, ResultPager]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session: str) -> ResultPager:
+        with self._lock:
+            pager = self._pagers.get(session)
+            if pager is None:
+                pager = self._pagers[session] = ResultPager(self.max_results)
+                while len(self._pagers) > self.max_sessions:
+                    self._pagers.popitem(last=False)
+            self._pagers.move_to_end(session)
+            return pager
+
+    def drop(self, session: str):
+        with self._lock:
+            self._pagers.pop(session, None)
+
+    def __len__(self) -> int:
+        return len(self._pagers)
+
+
+def _fit(lines: List[str], budget_chars: int) -> List[str]:
+    """Longest prefix of lines within the budget (always at least one line, cut if needed)."""
+    out, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > budget_chars:
+            if not out:
+                out.append(line[:max(budget_chars - 3, 0)] + "...")
+            break
+        out.append(line)
+        used += len(line) + 1
+    return out
+
+
+def _median(values: List[float]) -> float:
+    finite = sorted(v for v in values if v != -math.inf)
+    if not finite:
+        return 0.0
+    mid = len(finite) // 2
+    return finite[mid] if len(finite) % 2 else (finite[mid - 1] + finite[mid]) / 2
+
+
+def _ranking(values: List[float], sort: str):
+    """Sort key for a value (lower = shown first); non-numeric values always go last."""
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort '{sort}'. Use {', '.join(SORTS)}.")
+    median = _median(values)
+
+    def key(x: float) -> tuple:
+        if x == -math.inf:
+            return (1, 0.0, 0.0)
+        if sort == "desc":
+            return (0, -x, 0.0)
+        if sort == "asc":
+            return (0, x, 0.0)
+        return (0, -abs(x - median), -x)
+
+    return key
+
+
+def _group(rows: List[Dict], label: str, sort_key: str, digits: int, sort: str) -> List[str]:
+    groups: Dict[str, List[float]] = {}
+    for row in rows:
+        groups.setdefault(row["labels"].get(label, "(none)"), []).append(_number(row["values"].get(sort_key)))
+    rank = _ranking([v for vals in groups.values() for v in vals], sort)
+    lines = []
+    # A group ranks by its member that ranks first
+    for name, vals in sorted(groups.items(), key=lambda kv: min(rank(v) for v in kv[1])):
+        finite = [v for v in vals if v != -math.inf]
+        if finite:
+            stats = (f"n={len(vals)} sum={round_value(sum(finite), digits)} "
+                     f"avg={round_value(sum(finite) / len(finite), digits)} min={round_value(min(finite), digits)} "
+                     f"max={round_value(max(finite), digits)}")
+        else:
+            stats = f"n={len(vals)}"
+        lines.append(f"Group({label}={name}) => {stats}")
+    return lines
+
+
+def compact_series(rows: List[Dict], pager: ResultPager, top_k: int = 20, group_by: str = "",
+                   budget_chars: int = 4000, digits: int = 4, sort_key: Optional[str] = None,
+                   sort: str = "outliers") -> str:
+    """
+    rows: [{"labels": {...}, "values": {"value": "1.5"} or {"max": ..., "avg": ...}}]
+    sort_key: which value to rank by (defaults to the first one)
+    sort: outliers (furthest from the median first), desc or asc; raises ValueError otherwise
+    """
+    if not rows:
+        return ""
+    sort_key = sort_key or next(iter(rows[0]["values"]), "value")
+    header = []
+
+    order = {"outliers": "furthest from median", "desc": "highest", "asc": "lowest"}.get(sort, sort)
+    if group_by:
+        lines = _group(rows, group_by, sort_key, digits, sort)
+        unit = "groups"
+        header.append(f"{len(rows)} series in {len(lines)} groups by {group_by} ({order} {sort_key} first)")
+    else:
+        rank = _ranking([_number(r["values"].get(sort_key)) for r in rows], sort)
+        rows = sorted(rows, key=lambda r: rank(_number(r["values"].get(sort_key))))
+        common = {}
+        if len(rows) > 1:
+            first = rows[0]["labels"]
+            common = {k: v for k, v in first.items()
+                      if k != "__name__" and all(r["labels"].get(k) == v for r in rows)}
+        lines = []
+        for row in rows:
+            labels = {k: v for k, v in row["labels"].items() if k not in common}
+            values = row["values"]
+            if list(values) == ["value"]:
+                shown = round_value(values["value"], digits)
+            else:
+                shown = " ".join(f"{k}={round_value(v, digits)}" for k, v in values.items())
+            lines.append(f"Metric({_labels_text(labels)}) => {shown}")
+        unit = "series"
+        if len(rows) > top_k:
+            header.append(f"{len(rows)} series, top {top_k} by {sort_key} ({order} first)")
+        if common:
+            header.append(f"common labels: {_labels_text(common)}")
+
+    head = [" | ".join(header)] if header else []
+    budget = budget_chars - sum(len(h) + 1 for h in head)
+    shown = _fit(lines[:top_k], budget - 120)  # leave room for the paging hint
+    rest = lines[len(shown):]
+    out = head + shown
+    if rest:
+        handle = pager.store(rest, unit)
+        out.append(MORE_HINT.format(remaining=len(rest), unit=unit, handle=handle))
+    return "\n".join(out)
+
+
+def compact_lines(lines: List[str], pager: ResultPager, max_lines: int = 50, budget_chars: int = 4000,
+                  unit: str = "lines") -> str:
+    """Budget + paging for results that are already one line per item (e.g. alerts)."""
+    shown = _fit(lines[:max_lines], budget_chars - 120)
+    rest = lines[len(shown):]
+    if rest:
+        shown.append(MORE_HINT.format(remaining=len(rest), unit=unit, handle=pager.store(rest, unit)))
+    return "\n".join(shown)
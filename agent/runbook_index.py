@@ -0,0 +1,179 @@
+"""
+In-memory search index over runbooks.yaml.
+
+- The YAML is parsed once and re-parsed only when the file's mtime/size changes.
+- Alert names resolve through a hash of the normalized key (KafkaBrokerDown,
+  kafka_broker_down and "kafka broker down" all hit the same entry).
+- Everything else goes through an inverted token index over the key, symptom,
+  diagnosis steps and remediation actions. Hits are ranked by field weight x
+  IDF, so "kafka lag" puts KafkaConsumerLag* ahead of entries that merely
+  mention Kafka in a diagnosis step.
+"""
+import bisect
+import heapq
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# CamelCase-aware word splitter: "HDFSNameNodeGCPause" -> HDFS, Name, Node, GC, Pause
+_WORD_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+_STOPWORDS = frozenset({"a", "an", "and", "are", "be", "by", "for", "if", "in", "is", "it",
+                        "of", "on", "or", "the", "to", "with"})
+
+# How much a query token counts depending on where it appears in an entry
+FIELD_WEIGHTS = {"key": 4.0, "symptom": 2.0, "diagnosis_steps": 1.0, "remediation_actions": 1.0}
+
+# Unknown query terms shorter than this are not prefix-expanded
+MIN_PREFIX = 3
+
+
+def normalize(s: str) -> str:
+    """Lowercase and strip underscores/hyphens/spaces (KafkaBrokerDown == kafka_broker_down)."""
+    return s.lower().replace("_", "").replace("-", "").replace(" ", "")
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in (m.lower() for m in _WORD_RE.findall(text)) if w not in _STOPWORDS]
+
+
+def key_terms(key: str) -> List[str]:
+    """Key words plus every run of adjacent words ("click"+"house" -> "clickhouse", ..., full name)."""
+    words = [m.lower() for m in _WORD_RE.findall(key)]
+    return [
+        "".join(words[i:j])
+        for i in range(len(words))
+        for j in range(i + 1, len(words) + 1)
+    ]
+
+
+def _flatten(value) -> str:
+    """Diagnosis steps / actions are lists of strings or dicts; index all their text."""
+    if isinstance(value, dict):
+        return " ".join(_flatten(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_flatten(v) for v in value)
+    return "" if value is None else str(value)
+
+
+class RunbookIndex:
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self.reloads = 0
+        self._build({})
+
+    @classmethod
+    def from_runbooks(cls, runbooks: Dict) -> "RunbookIndex":
+        """Index an already-loaded runbook dict (no file, no hot reload)."""
+        index = cls()
+        index._build(runbooks)
+        return index
+
+    # ---- loading -----------------------------------------------------------
+
+    def _build(self, runbooks: Dict):
+        by_name = {}
+        postings = defaultdict(dict)  # term -> {key: weight}
+        for key, content in runbooks.items():
+            content = content or {}
+            by_name[normalize(key)] = key
+            fields = {"key": key_terms(key)}
+            for field in ("symptom", "diagnosis_steps", "remediation_actions"):
+                fields[field] = tokenize(_flatten(content.get(field)))
+            for field, terms in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for term in set(terms):
+                    postings[term][key] = max(postings[term].get(key, 0.0), weight)
+
+        n = max(len(runbooks), 1)
+        idf = {term: math.log(1 + n / len(keys)) for term, keys in postings.items()}
+        # Swap everything in one assignment so concurrent readers never see a half-built index
+        self._state = (runbooks, by_name, dict(postings), idf, sorted(postings))
+
+    def refresh(self) -> bool:
+        """Re-parse the file if it changed since the last load; returns True when it did."""
+        if self.path is None:
+            return False
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._signature:
+            return False
+        with self._lock:
+            if signature == self._signature:
+                return False
+            runbooks = {}
+            if signature is not None:
+                import yaml
+                with open(self.path, "r", encoding="utf-8") as f:
+                    runbooks = yaml.safe_load(f) or {}
+            self._build(runbooks)
+            self._signature = signature
+            self.reloads += 1
+        return True
+
+    # ---- lookups -----------------------------------------------------------
+
+    @property
+    def runbooks(self) -> Dict:
+        self.refresh()
+        return self._state[0]
+
+    def __len__(self) -> int:
+        return len(self.runbooks)
+
+    def get(self, alertname: str) -> Optional[Tuple[str, Dict]]:
+        """Exact (normalized) alert-name lookup."""
+        self.refresh()
+        runbooks, by_name = self._state[0], self._state[1]
+        key = by_name.get(normalize(alertname))
+        return (key, runbooks[key]) if key is not None else None
+
+    def _expand(self, term: str, vocabulary: List[str]) -> List[str]:
+        """Terms that start with `term` (so "kafk" and "replica" still find something)."""
+        if len(term) < MIN_PREFIX:
+            return []
+        lo = bisect.bisect_left(vocabulary, term)
+        hi = bisect.bisect_left(vocabulary, term + "\uffff")
+        return vocabulary[lo:hi]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Ranked (key, score) hits for a free-text query or alert name, best first.
+        An exact alert-name match is always ranked first.
+        """
+        self.refresh()
+        _, by_name, postings, idf, vocabulary = self._state
+
+        # Each word also counts as a compound term ("kafka_broker_down", "ClickHouse")
+        terms = set(tokenize(query)) | {normalize(w) for w in re.split(r"[\s,;]+", query)}
+        terms.discard("")
+        scores = defaultdict(float)
+        for term in terms:
+            matched = [term] if term in postings else self._expand(term, vocabulary)
+            for t in matched:
+                for key, weight in postings[t].items():
+                    scores[key] += weight * idf[t]
+
+        exact = by_name.get(normalize(query))
+        if exact is not None:
+            scores[exact] = math.inf
+        rank = lambda kv: (-kv[1], kv[0])  # noqa: E731
+        if limit:
+            return heapq.nsmallest(limit, scores.items(), key=rank)
+        return sorted(scores.items(), key=rank)
+
+    def match(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Runbook keys for a query: just the entry when it names an alert, otherwise the ranked hits."""
+        exact = self.get(query)
+        if exact is not None:
+            return [exact[0]]
+        return [key for key, _ in self.search(query, limit)]
@@ -0,0 +1,182 @@
+"""
+Shared event adapter for the agent front ends (CLI and Streamlit).
+
+Runs the graph with stream_mode=["messages", "updates"] and turns the raw
+LangGraph output into a flat sequence of plain dict events:
+
+    {"type": "token",       "text": ...}                 LLM output as it is generated
+    {"type": "tool_call",   "name", "args", "id"}       the model decided to call a tool
+    {"type": "tool_result", "name", "content", "status", "elapsed_s"}
+    {"type": "tool_batch",  "calls", "wall_s", "sequential_s", "saved_s"}
+    {"type": "triage",      "alerts", "fast_path", "plans", "fallback", "elapsed_ms"}  pre-triage ran
+    {"type": "final",       "content", "streamed"}      the answer; streamed=False if no tokens preceded it
+    {"type": "step",        "node", "elapsed_s", "mcp_calls", "mcp_s", "upstream_s"}  a graph step finished
+    {"type": "metrics",     "ttft_s", "total_s", "tokens", "trace"}
+
+Time-to-first-token (TTFT) of every run is recorded in `ttft_metrics`.
+iter_events / aiter_events run the graph under a tracing.Trace: MCP calls
+carry its id, and "step" events plus the "trace" summary in "metrics" split
+the run into LLM, tool, MCP and upstream time.
+"""
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import tracing
+from tracing import Trace
+
+STREAM_MODES = ["messages", "updates"]
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+class TTFTTracker:
+    """Rolling window of time-to-first-token samples."""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.runs_without_tokens = 0
+
+    def record(self, ttft: Optional[float]):
+        with self._lock:
+            self.runs += 1
+            if ttft is None:
+                self.runs_without_tokens += 1
+            else:
+                self._samples.append(ttft)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            samples = list(self._samples)
+            runs, without = self.runs, self.runs_without_tokens
+        if not samples:
+            return {"runs": runs, "runs_without_tokens": without}
+        return {
+            "runs": runs,
+            "runs_without_tokens": without,
+            "ttft_avg_s": round(sum(samples) / len(samples), 3),
+            "ttft_p50_s": round(_percentile(samples, 50), 3),
+            "ttft_p95_s": round(_percentile(samples, 95), 3),
+        }
+
+
+ttft_metrics = TTFTTracker()
+
+
+def _text_of(content) -> str:
+    """Chunk content is a string, or a list of parts for some providers."""
+    if isinstance(content, str):
+        return content
+    return "".join(p.get("text", "") if isinstance(p, dict) else str(p) for p in content or [])
+
+
+class EventAdapter:
+    """Converts (mode, chunk) pairs from one graph run into events; tracks TTFT."""
+
+    def __init__(self, agent_node: str = "agent", tools_node: str = "tools", triage_node: str = "triage",
+                 tracker: TTFTTracker = ttft_metrics, trace: Optional[Trace] = None):
+        self.agent_node = agent_node
+        self.tools_node = tools_node
+        self.triage_node = triage_node
+        self.tracker = tracker
+        self.trace = trace  # when set, every graph step is timed and emitted as a "step" event
+        self.started = time.perf_counter()
+        self._step_started = self.started
+        self.ttft: Optional[float] = None
+        self.tokens = 0
+        self._step_tokens = 0  # tokens seen since the last agent step completed
+
+    def convert(self, mode: str, chunk) -> List[Dict]:
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != self.agent_node or message.type not in ("AIMessageChunk", "ai"):
+                return []
+            text = _text_of(message.content)
+            if not text:
+                return []
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - self.started
+            self.tokens += 1
+            self._step_tokens += 1
+            return [{"type": "token", "text": text}]
+
+        events = []
+        for node, update in (chunk or {}).items():
+            messages = (update or {}).get("messages", [])
+            if self.trace is not None:
+                events.append(self._step(node, messages))
+            if node == self.agent_node and messages:
+                last = messages[-1]
+                streamed, self._step_tokens = self._step_tokens > 0, 0
+                if last.tool_calls:
+                    events.extend({"type": "tool_call", "name": tc["name"], "args": tc["args"], "id": tc["id"]}
+                                  for tc in last.tool_calls)
+                else:
+                    events.append({"type": "final", "content": _text_of(last.content), "streamed": streamed})
+            elif node == self.tools_node:
+                for m in messages:
+                    events.append({"type": "tool_result", "name": m.name, "content": str(m.content),
+                                   "status": getattr(m, "status", "success"),
+                                   "elapsed_s": m.response_metadata.get("elapsed_s")})
+                batch = messages[-1].response_metadata.get("batch") if messages else None
+                if batch:
+                    events.append({"type": "tool_batch", **batch})
+            elif node == self.triage_node:
+                for m in messages:
+                    events.append({"type": "triage", **m.response_metadata["triage"]})
+                    if m.type == "ai":
+                        # Answered without the LLM: nothing was streamed
+                        events.append({"type": "final", "content": _text_of(m.content), "streamed": False})
+        return events
+
+    def _step(self, node: str, messages: List) -> Dict:
+        now = time.perf_counter()
+        extra = {}
+        if node == self.tools_node:
+            extra["calls"] = len(messages)
+        elif node == self.agent_node and messages and getattr(messages[-1], "tool_calls", None):
+            extra["tool_calls"] = len(messages[-1].tool_calls)
+        step = self.trace.record_step(node, now - self._step_started, **extra)
+        self._step_started = now
+        return {"type": "step", **step}
+
+    def finish(self) -> Dict:
+        self.tracker.record(self.ttft)
+        metrics = {
+            "type": "metrics",
+            "ttft_s": round(self.ttft, 3) if self.ttft is not None else None,
+            "total_s": round(time.perf_counter() - self.started, 3),
+            "tokens": self.tokens,
+        }
+        if self.trace is not None:
+            metrics["trace"] = self.trace.summary()
+        return metrics
+
+
+def iter_events(graph, inputs: Dict, config: Optional[Dict] = None) -> Iterator[Dict]:
+    trace, token = tracing.start()
+    adapter = EventAdapter(trace=trace)
+    try:
+        for mode, chunk in graph.stream(inputs, config=config, stream_mode=STREAM_MODES):
+            yield from adapter.convert(mode, chunk)
+        yield adapter.finish()
+    finally:
+        tracing.finish(token)
+
+
+async def aiter_events(graph, inputs: Dict, config: Optional[Dict] = None) -> AsyncIterator[Dict]:
+    trace, token = tracing.start()
+    adapter = EventAdapter(trace=trace)
+    try:
+        async for mode, chunk in graph.astream(inputs, config=config, stream_mode=STREAM_MODES):
+            for event in adapter.convert(mode, chunk):
+                yield event
+        yield adapter.finish()
+    finally:
+        tracing.finish(token)
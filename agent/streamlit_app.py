@@ -37,6 +37,8 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage
 from agents import get_agent
+from stream_events import iter_events
+from tracing import format_breakdown
 
 st.title("SRE Remediation Agent (Task 3)")
 
@@ -67,22 +69,45 @@ if prompt := st.chat_input("Enter command..."):
         st.markdown(prompt)
     
     with st.chat_message("assistant"):
-        with st.spinner("Agent is diagnosing..."):
-            # Config for the graph execution
-            config = {"configurable": {"thread_id": st.session_state.thread_id}}
-            
-            # Stream the response
-            full_response = ""
-            # IMPORTANT: Pass the new message into the graph
-            inputs = {"messages": [HumanMessage(content=prompt)]}
-            
-            for event in agent_graph.stream(inputs, config=config):
-                for key, value in event.items():
-                    # The value['messages'] is a LIST of messages. We want the last one.
-                    if "messages" in value and len(value["messages"]) > 0:
-                        last_msg = value["messages"][-1]
-                        if last_msg.type == "ai" and last_msg.content:
-                            full_response = last_msg.content
-            
-            st.markdown(full_response)
-            st.session_state.messages.append({"role": "assistant", "content": full_response})
+        # Config for the graph execution
+        config = {"configurable": {"thread_id": st.session_state.thread_id}}
+        # IMPORTANT: Pass the new message into the graph
+        inputs = {"messages": [HumanMessage(content=prompt)]}
+
+        # Tool progress goes in a collapsible status box, the answer streams below it
+        progress = st.status("Agent is diagnosing...", expanded=False)
+        answer = st.empty()
+        full_response = ""
+        step_text = ""  # tokens of the current model step
+
+        for event in iter_events(agent_graph, inputs, config=config):
+            if event["type"] == "token":
+                step_text += event["text"]
+                answer.markdown(step_text + "▌")
+            elif event["type"] == "tool_call":
+                # Text before a tool call is the model thinking out loud; keep it in the status box
+                if step_text:
+                    progress.markdown(step_text)
+                    step_text = ""
+                    answer.empty()
+                progress.update(label=f"Running {event['name']}...")
+                progress.write(f"🔧 `{event['name']}` {event['args']}")
+            elif event["type"] == "tool_result":
+                icon = "✅" if event["status"] == "success" else "⚠️"
+                progress.write(f"{icon} `{event['name']}` finished in {event['elapsed_s']}s")
+            elif event["type"] == "tool_batch" and event["calls"] > 1:
+                progress.write(f"⚡ {event['calls']} tools in parallel, saved {event['saved_s']:.2f}s")
+            elif event["type"] == "triage":
+                progress.write(f"⚡ Fast-path triage: {event['fast_path']}/{event['alerts']} alerts matched "
+                               f"runbooks in {event['elapsed_ms']:.1f}ms")
+            elif event["type"] == "final":
+                full_response = event["content"]
+                answer.markdown(full_response)
+                step_text = ""
+            elif event["type"] == "metrics":
+                progress.update(label="Diagnosis steps", state="complete")
+                ttft = f"{event['ttft_s']:.2f}s" if event["ttft_s"] is not None else "n/a"
+                st.caption(f"First token after {ttft} · total {event['total_s']:.1f}s · "
+                           f"{format_breakdown(event['trace'])}")
+
+        st.session_state.messages.append({"role": "assistant", "content": full_response})
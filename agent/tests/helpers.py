@@ -4,6 +4,8 @@ Shared helpers for all test files.
 import os
 import yaml
 
+from runbook_index import RunbookIndex
+
 # --- Path resolution ---
 # Priority: /rules/alerts.yml > local copy in tests/ > host relative path
 _PATHS = [
@@ -39,19 +41,6 @@ def get_all_alert_names():
     return [rule["alert"] for _, rule in get_all_rules()]
 
 
-def normalize(s: str) -> str:
-    return s.lower().replace("_", "").replace("-", "").replace(" ", "")
-
-
 def search_runbook(keyword: str, runbooks: dict) -> list:
-    results = []
-    keyword_norm = normalize(keyword)
-    for key, content in runbooks.items():
-        key_norm = normalize(key)
-        symptom_norm = normalize(content.get("symptom", ""))
-        if (keyword_norm == key_norm or
-            keyword_norm in key_norm or
-            keyword_norm in symptom_norm or
-            key_norm in keyword_norm):
-            results.append(key)
-    return results
\ No newline at end of file
+    """Same lookup consult_runbook uses, without its result limit."""
+    return RunbookIndex.from_runbooks(runbooks).match(keyword)
@@ -0,0 +1,156 @@
+"""
+Tests for the multi-session agent API — sessions sharing one graph with
+isolated histories, concurrent turns under the LLM concurrency cap, SSE
+streaming and session limits/expiry.
+"""
+import asyncio
+import json
+import time
+
+import httpx
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from api_server import SessionStore, create_app
+from llm_limit import LimitedChatModel, LLMLimiter
+from workflow import build_graph
+
+
+class EchoModel:
+    """Answers with the last user message and how many user turns the thread has seen."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        asked = [m.content for m in messages if isinstance(m, HumanMessage)]
+        return AIMessage(content=f"{asked[-1]} (turn {len(asked)})")
+
+
+def make_app(delay=0.0, limit=4, **store):
+    limiter = LLMLimiter(limit)
+    graph = build_graph(LimitedChatModel(EchoModel(delay), limiter), checkpointer=MemorySaver(), fast_triage=False)
+    return create_app(graph, limiter, SessionStore(**store)), limiter
+
+
+async def client_for(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://agent", timeout=30)
+
+
+async def new_session(client) -> str:
+    r = await client.post("/sessions")
+    assert r.status_code == 201
+    return r.json()["session_id"]
+
+
+class TestSessions:
+
+    def test_histories_are_isolated(self):
+        app, _ = make_app()
+
+        async def scenario():
+            async with await client_for(app) as client:
+                a, b = await new_session(client), await new_session(client)
+                await client.post(f"/sessions/{a}/messages", json={"content": "kafka lag?"})
+                second = (await client.post(f"/sessions/{a}/messages", json={"content": "and hdfs?"})).json()
+                other = (await client.post(f"/sessions/{b}/messages", json={"content": "spark?"})).json()
+                info = (await client.get(f"/sessions/{a}")).json()
+                return second, other, info
+
+        second, other, info = asyncio.run(scenario())
+        assert second["answer"] == "and hdfs? (turn 2)" and second["turn"] == 2
+        assert other["answer"] == "spark? (turn 1)"
+        assert info["turns"] == 2 and not info["running"]
+
+    def test_concurrent_sessions_share_capped_llm_slots(self):
+        app, limiter = make_app(delay=0.05, limit=4)
+
+        async def scenario():
+            async with await client_for(app) as client:
+                ids = [await new_session(client) for _ in range(12)]
+                started = time.perf_counter()
+                replies = await asyncio.gather(*(
+                    client.post(f"/sessions/{s}/messages", json={"content": f"q{i}"}) for i, s in enumerate(ids)))
+                return [r.json()["answer"] for r in replies], time.perf_counter() - started, \
+                    (await client.get("/stats")).json()
+
+        answers, elapsed, stats = asyncio.run(scenario())
+        assert answers == [f"q{i} (turn 1)" for i in range(12)]
+        assert limiter.peak == 4 and stats["llm"]["waited"] > 0
+        assert elapsed < 12 * 0.05  # 3 waves of 4, not one call after another
+        assert stats["turns"]["completed"] == 12 and stats["sessions"]["open"] == 12
+
+    def test_turns_of_one_session_are_serialized(self):
+        app, limiter = make_app(delay=0.02)
+
+        async def scenario():
+            async with await client_for(app) as client:
+                s = await new_session(client)
+                replies = await asyncio.gather(*(
+                    client.post(f"/sessions/{s}/messages", json={"content": f"q{i}"}) for i in range(3)))
+                return sorted(r.json()["answer"].split(" (")[1] for r in replies)
+
+        assert asyncio.run(scenario()) == ["turn 1)", "turn 2)", "turn 3)"]
+        assert limiter.peak == 1
+
+    def test_stream(self):
+        app, _ = make_app()
+
+        async def scenario():
+            async with await client_for(app) as client:
+                s = await new_session(client)
+                r = await client.post(f"/sessions/{s}/messages", params={"stream": "true"}, json={"content": "hi"})
+                return [json.loads(line[6:]) for line in r.text.splitlines() if line.startswith("data: ")]
+
+        events = asyncio.run(scenario())
+        assert [e["content"] for e in events if e["type"] == "final"] == ["hi (turn 1)"]
+        assert events[-1]["type"] == "metrics"
+
+
+class TestLimits:
+
+    def test_session_limit_and_unknown_session(self):
+        app, _ = make_app(max_sessions=1)
+
+        async def scenario():
+            async with await client_for(app) as client:
+                s = await new_session(client)
+                full = (await client.post("/sessions")).status_code
+                missing = (await client.post("/sessions/nope/messages", json={"content": "x"})).status_code
+                deleted = (await client.delete(f"/sessions/{s}")).status_code
+                return full, missing, deleted, (await client.post("/sessions")).status_code
+
+        assert asyncio.run(scenario()) == (429, 404, 200, 201)
+
+    def test_deleting_a_session_drops_its_result_pages(self):
+        import tools
+        app, _ = make_app()
+
+        async def scenario():
+            async with await client_for(app) as client:
+                s = await new_session(client)
+                tools.RESULT_PAGERS.get(s).store(["page"], "lines")
+                await client.delete(f"/sessions/{s}")
+                return s
+
+        session_id = asyncio.run(scenario())
+        assert tools.RESULT_PAGERS.get(session_id).next_page("r1", 100, 10) is None
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(ttl=10)
+        idle, busy, fresh = store.create(), store.create(), store.create()
+        idle.last_active = busy.last_active = time.time() - 60
+        busy.running = True
+        assert store.expire() == [idle.id]
+        assert store.get(busy.id) and store.get(fresh.id) and store.stats()["expired"] == 1
+
+    def test_sync_callers_are_capped_too(self):
+        limiter = LLMLimiter(1)
+        with limiter.slot():
+            assert limiter.stats()["in_flight"] == 1
+        assert limiter.stats() == {"limit": 1, "calls": 1, "in_flight": 0, "peak": 1, "waited": 0,
+                                   "wait_avg_s": 0.0, "wait_max_s": 0.0}
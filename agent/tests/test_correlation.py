@@ -0,0 +1,115 @@
+"""
+Tests for alert correlation — grouping an alert storm into incidents by
+container, topology, labels and timing, picking the probable root, and the
+incident view returned by list_active_alerts.
+"""
+import pytest
+import tools
+from correlation import AlertCorrelator, format_incidents, parse_time
+from runbook_index import RunbookIndex
+from tools import RUNBOOK_PATH, list_active_alerts
+
+
+def alert(alertname, at="2024-05-01T10:00:00Z", severity="critical", **labels):
+    return {"labels": {"alertname": alertname, "severity": severity, **labels}, "activeAt": at,
+            "annotations": {"description": f"{alertname} is firing"}}
+
+
+# What fires within a few minutes when the kafka container goes down
+KAFKA_STORM = [
+    alert("MonitoringTargetDown", "2024-05-01T10:00:30Z", "warning", job="kafka-exporter",
+          instance="kafka-exporter:9308"),
+    alert("KafkaConsumerLagHigh", "2024-05-01T10:01:00Z", "warning", service="kafka"),
+    alert("KafkaBrokerDown", "2024-05-01T10:00:05Z", service="kafka", job="kafka-exporter",
+          instance="kafka-exporter:9308"),
+    alert("MonitoringPartialOutage", "2024-05-01T10:01:10Z", "warning", component="monitoring"),
+    alert("SLOKafkaLagBudgetBurn", "2024-05-01T10:03:00Z", component="slo"),
+    alert("SLOHighErrorRate", "2024-05-01T10:04:00Z", component="slo"),
+]
+
+
+@pytest.fixture(scope="module")
+def correlator():
+    return AlertCorrelator(RunbookIndex(RUNBOOK_PATH))
+
+
+class TestCorrelate:
+
+    def test_kafka_storm_is_one_incident(self, correlator):
+        incidents = correlator.correlate(KAFKA_STORM)
+        assert len(incidents) == 1
+        incident = incidents[0]
+        assert (incident["root"], incident["root_alert"]) == ("kafka", "KafkaBrokerDown")
+        assert incident["components"] == ["kafka", "kafka-exporter"]
+        assert incident["alert_count"] == 6
+        assert incident["alerts"][0]["alertname"] == "KafkaBrokerDown"
+
+    def test_independent_failures_stay_separate(self, correlator):
+        incidents = correlator.correlate(KAFKA_STORM + [
+            alert("HDFSNameNodeDown", "2024-05-01T10:02:00Z", service="hdfs", instance="namenode:9981")])
+        assert sorted(inc["root"] for inc in incidents) == ["kafka", "namenode"]
+
+    def test_dependent_container_points_to_upstream_root(self, correlator):
+        incidents = correlator.correlate([
+            alert("SparkWorkerDown", "2024-05-01T10:00:00Z", instance="spark-worker:8081"),
+            alert("SparkMasterDown", "2024-05-01T10:00:20Z", instance="spark-master:8080"),
+        ])
+        assert len(incidents) == 1 and incidents[0]["root"] == "spark-master"
+
+    def test_late_symptom_starts_its_own_incident(self, correlator):
+        late = alert("MonitoringPartialOutage", "2024-05-01T11:00:00Z", "warning", component="monitoring")
+        incidents = correlator.correlate([alert("ClickHouseDown", service="clickhouse"), late])
+        assert len(incidents) == 2
+        assert incidents[1]["root"] is None and incidents[1]["root_alert"] == "MonitoringPartialOutage"
+
+    def test_node_alerts_grouped_by_instance(self, correlator):
+        incidents = correlator.correlate([
+            alert("NodeCPUHigh", severity="warning", service="node", instance="host-1:9100"),
+            alert("NodeMemoryHigh", severity="warning", service="node", instance="host-1:9100"),
+            alert("KafkaBrokerDown", service="kafka"),
+        ])
+        assert [inc["alert_count"] for inc in incidents] == [1, 2]
+
+    def test_duplicates_are_counted_once(self, correlator):
+        incidents = correlator.correlate([alert("ContainerCPUHigh", name="clickhouse", cpu=str(i)) for i in range(3)])
+        assert incidents[0]["alerts"][0]["count"] == 3
+        assert "ContainerCPUHigh x3" in "\n".join(format_incidents(incidents))
+
+    def test_parse_time(self):
+        assert parse_time("2024-05-01T10:00:00.500000000Z") - parse_time("2024-05-01T10:00:00Z") == 0.5
+        assert parse_time(None) is None and parse_time("garbage") is None
+
+
+class TestListActiveAlerts:
+
+    def test_incident_view(self, monkeypatch):
+        monkeypatch.setattr(tools, "_sync_alerts", lambda: KAFKA_STORM)
+        out = list_active_alerts.invoke({})
+        lines = out.split("\n")
+        assert lines[0].startswith("6 firing alerts correlated into 1 incident(s)")
+        assert lines[1].startswith("Incident 1 [critical] probable root: kafka (KafkaBrokerDown), 6 alerts")
+        assert out.count("[ALERT]") == 6
+
+    def test_filters_go_to_alertmanager(self, monkeypatch):
+        sent = []
+
+        class Response:
+            status_code = 200
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"status": "success", "data": {"alerts": KAFKA_STORM[:1]}}
+
+        def fake_request(method, path, **kwargs):
+            sent.append((path, kwargs["params"]))
+            return Response()
+
+        monkeypatch.setattr(tools, "_mcp_request", fake_request)
+        monkeypatch.setattr(tools, "_sync_alerts", lambda: pytest.fail("snapshot used for a filtered listing"))
+        out = list_active_alerts.invoke({"severity": "critical", "receiver": "critical, slo",
+                                         "matchers": "service=kafka"})
+        assert sent == [("/tools/alert_groups",
+                         {"severity": ["critical"], "receiver": ["critical", "slo"], "matcher": ["service=kafka"]})]
+        assert out.startswith("1 firing alerts correlated into 1 incident(s)")
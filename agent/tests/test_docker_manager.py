@@ -0,0 +1,275 @@
+"""
+Tests for the Docker client manager — name->ID cache invalidated by events,
+background restarts with stop timeout and health wait, and the remediation
+tools built on top of it.
+"""
+import queue
+import time
+
+import docker
+import pytest
+
+import tools
+from docker_manager import DockerManager
+
+
+class FakeContainer:
+
+    def __init__(self, cid, name, health_sequence=None):
+        self.id = cid
+        self.name = name
+        self.restart_calls = []
+        # Health statuses reported by successive reload() calls after a restart
+        self.health_sequence = list(health_sequence or [])
+        self.attrs = {"State": {"Status": "running"}}
+
+    def restart(self, timeout=None):
+        self.restart_calls.append(timeout)
+        time.sleep(0.05)
+
+    def reload(self):
+        if self.health_sequence:
+            status, health = self.health_sequence.pop(0)
+            self.attrs = {"State": {"Status": status, "ExitCode": 1, **({"Health": {"Status": health}} if health else {})}}
+
+
+class FakeEvents:
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def __iter__(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.queue.put(None)
+
+
+class FakeContainers:
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, ref):
+        self.client.gets.append(ref)
+        for c in self.client.by_name.values():
+            if ref in (c.id, c.name):
+                return c
+        raise docker.errors.NotFound(f"No such container: {ref}")
+
+
+class FakeAPI:
+    """Low-level API by container ID, as docker.APIClient: restart(), inspect_container()."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def _by_id(self, cid):
+        self.client.api_calls.append(cid)
+        for c in self.client.by_name.values():
+            if c.id == cid:
+                return c
+        raise docker.errors.NotFound(f"No such container: {cid}")
+
+    def restart(self, cid, timeout=None):
+        self._by_id(cid).restart(timeout=timeout)
+
+    def inspect_container(self, cid):
+        container = self._by_id(cid)
+        container.reload()
+        return container.attrs
+
+
+class FakeClient:
+
+    def __init__(self, *containers):
+        self.by_name = {c.name: c for c in containers}
+        self.gets = []
+        self.api_calls = []
+        self.stream = FakeEvents()
+        self.containers = FakeContainers(self)
+        self.api = FakeAPI(self)
+
+    def events(self, decode=True, filters=None):
+        return self.stream
+
+    def close(self):
+        pass
+
+
+def make_manager(client, **kwargs):
+    manager = DockerManager(client_factory=lambda: client, poll_interval=0.01, **kwargs)
+    manager.client  # start the event watcher
+    deadline = time.time() + 1
+    while not manager._watching and time.time() < deadline:
+        time.sleep(0.005)
+    return manager
+
+
+@pytest.fixture
+def client():
+    return FakeClient(FakeContainer("id-kafka", "kafka"), FakeContainer("id-spark", "spark-master"))
+
+
+@pytest.fixture
+def manager(client):
+    m = make_manager(client)
+    yield m
+    m.close()
+
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestNameCache:
+
+    def test_second_lookup_is_cached(self, manager, client):
+        assert manager.resolve("kafka") == "id-kafka"
+        assert manager.resolve("kafka") == "id-kafka"
+        assert client.gets == ["kafka"]
+        assert manager.cache_hits == 1
+
+    def test_destroy_event_invalidates(self, manager, client):
+        manager.resolve("kafka")
+        client.by_name["kafka"] = FakeContainer("id-kafka-2", "kafka")
+        client.stream.queue.put({"Type": "container", "Action": "destroy",
+                                 "Actor": {"ID": "id-kafka", "Attributes": {"name": "kafka"}}})
+        assert wait_until(lambda: "kafka" not in manager._ids)
+        assert manager.resolve("kafka") == "id-kafka-2"
+
+    def test_unrelated_event_keeps_entry(self, manager, client):
+        manager.resolve("kafka")
+        client.stream.queue.put({"Action": "create", "Actor": {"ID": "id-other", "Attributes": {"name": "other"}}})
+        time.sleep(0.05)
+        assert "kafka" in manager._ids
+
+    def test_cache_bypassed_without_event_stream(self, client):
+        manager = DockerManager(client_factory=lambda: client)
+        manager._watching = False
+        manager._client = client  # no watcher thread
+        manager.resolve("kafka")
+        manager.resolve("kafka")
+        assert client.gets == ["kafka", "kafka"]
+
+    def test_unknown_container_raises(self, manager):
+        with pytest.raises(docker.errors.NotFound):
+            manager.resolve("nope")
+
+
+class TestRestart:
+
+    def test_restart_returns_before_completion(self, manager, client):
+        t0 = time.perf_counter()
+        job = manager.restart("kafka", stop_timeout=3)
+        assert time.perf_counter() - t0 < 0.05
+        assert job.wait(1)
+        assert job.state == "succeeded"
+        assert client.by_name["kafka"].restart_calls == [3]
+
+    def test_default_stop_timeout(self, client):
+        manager = make_manager(client, stop_timeout=7)
+        manager.restart("kafka").wait(1)
+        assert client.by_name["kafka"].restart_calls == [7]
+        manager.close()
+
+    def test_waits_for_healthy(self, client):
+        client.by_name["kafka"].health_sequence = [("running", "starting"), ("running", "starting"),
+                                                   ("running", "healthy")]
+        manager = make_manager(client)
+        job = manager.restart("kafka")
+        assert job.wait(1)
+        assert job.state == "succeeded"
+        assert job.detail == "running and healthy"
+        manager.close()
+
+    def test_health_timeout(self, client):
+        client.by_name["kafka"].health_sequence = [("running", "unhealthy")] * 100
+        manager = make_manager(client, health_timeout=0.05)
+        job = manager.restart("kafka")
+        assert job.wait(1)
+        assert job.state == "timeout"
+        assert "unhealthy" in job.detail
+        manager.close()
+
+    def test_exited_container_fails(self, client):
+        client.by_name["kafka"].health_sequence = [("exited", None)]
+        manager = make_manager(client)
+        job = manager.restart("kafka")
+        job.wait(1)
+        assert job.state == "failed"
+        manager.close()
+
+    def test_concurrent_restart_of_same_container_is_shared(self, manager):
+        first = manager.restart("kafka")
+        assert manager.restart("kafka") is first
+        first.wait(1)
+
+    def test_cached_restart_needs_no_lookup(self, manager, client):
+        manager.restart("kafka").wait(1)
+        manager.restart("kafka").wait(1)
+        assert client.gets == ["kafka"]
+        assert set(client.api_calls) == {"id-kafka"}
+
+    def test_stale_id_is_resolved_again(self, manager, client):
+        manager.resolve("kafka")
+        # Recreated without the destroy event reaching the cache yet
+        client.by_name["kafka"] = FakeContainer("id-kafka-2", "kafka")
+        job = manager.restart("kafka")
+        assert job.wait(1) and job.state == "succeeded"
+        assert client.by_name["kafka"].restart_calls == [10]
+        assert manager._ids["kafka"] == "id-kafka-2"
+
+    def test_finished_jobs_expire(self, client):
+        manager = make_manager(client, job_ttl=0.05)
+        job = manager.restart("kafka")
+        job.wait(1)
+        assert manager.find_job(job.id) is job
+        time.sleep(0.06)
+        assert manager.find_job(job.id) is None
+        assert manager.jobs == {}
+        manager.close()
+
+    def test_find_job_by_id_and_name(self, manager):
+        job = manager.restart("spark-master")
+        assert manager.find_job(job.id) is job
+        assert manager.find_job("spark-master") is job
+        assert manager.find_job("nope") is None
+
+
+class TestRemediationTools:
+
+    @pytest.fixture
+    def docker_manager(self, monkeypatch, client):
+        manager = make_manager(client)
+        monkeypatch.setattr(tools, "DOCKER", manager)
+        yield manager
+        manager.close()
+
+    def test_restart_is_acknowledged_then_reported(self, docker_manager):
+        ack = tools.execute_remediation_action.invoke({"action": "restart_container", "component": "kafka"})
+        assert ack.startswith("ACCEPTED:")
+        job_id = docker_manager.find_job("kafka").id
+        assert job_id in ack
+        report = tools.check_remediation_status.invoke({"job_id": job_id, "wait_seconds": 2})
+        assert report.startswith("SUCCESS: Real Docker container 'kafka' has been restarted.")
+
+    def test_ack_wait_returns_final_result(self, docker_manager, monkeypatch):
+        monkeypatch.setattr(tools, "REMEDIATION_ACK_WAIT", 2)
+        out = tools.execute_remediation_action.invoke({"action": "restart_container", "component": "kafka"})
+        assert out.startswith("SUCCESS:")
+
+    def test_unknown_container(self, docker_manager):
+        out = tools.execute_remediation_action.invoke({"action": "restart_container", "component": "nope"})
+        assert out == "FAILURE: Container 'nope' not found. Cannot restart."
+
+    def test_unknown_job(self, docker_manager):
+        out = tools.check_remediation_status.invoke({"job_id": "restart-999", "wait_seconds": 0})
+        assert "No remediation job" in out
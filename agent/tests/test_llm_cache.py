@@ -0,0 +1,117 @@
+"""
+Tests for the LLM response cache — key normalization and masking, the SQLite
+store (TTL, LRU eviction, persistence), and the cached model in a traced run.
+"""
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import START, MessagesState, StateGraph
+
+import tracing
+from llm_cache import CachedChatModel, LLMCache, cache_key, make_llm_cache, mask_volatile
+from stream_events import iter_events
+from test_stream_events import INPUTS, ScriptedChatModel
+
+
+def history(value="93.4", started="2026-03-01T10:15:02Z", call_id="call_1"):
+    return [
+        SystemMessage(content="You are an SRE agent."),
+        HumanMessage(content="Why is the host slow?"),
+        AIMessage(content="", tool_calls=[{"name": "query_prometheus", "args": {"query": "node_cpu"}, "id": call_id}]),
+        ToolMessage(content=f"node-exporter: {value}% since {started}", tool_call_id=call_id),
+    ]
+
+
+class TestKey:
+
+    def test_volatile_values_are_masked(self):
+        assert mask_volatile("at 2026-03-01T10:15:02Z (1772360102) took 0.42s, now 10:15:09Z") == \
+            "at <ts> (<epoch>) took <dur>, now <time>"
+        assert mask_volatile('{"elapsed_s": 1.5, "value": 0.97}') == '{"elapsed_s": <dur>, "value": 0.97}'
+        assert mask_volatile("job restart-3, 5 alerts") == "job restart-3, 5 alerts"
+
+    def test_repeated_diagnosis_has_the_same_key(self):
+        assert cache_key("m", "t", history()) == \
+            cache_key("m", "t", history(started="2026-03-02T08:00:00Z", call_id="call_9"))
+
+    @pytest.mark.parametrize("critical,healthy", [("0.97", "0.12"), ("97.5", "3.25"), ("1.235e+05", "9.1e+09")])
+    def test_metric_values_change_the_key(self, critical, healthy):
+        assert cache_key("m", "t", history(value=critical)) != cache_key("m", "t", history(value=healthy))
+
+    def test_model_tools_and_kept_values_change_the_key(self):
+        base = cache_key("m", "t", history())
+        assert cache_key("m2", "t", history()) != base
+        assert cache_key("m", "t2", history()) != base
+        changed = history()
+        changed[1] = HumanMessage(content="Why is host 2 slow?")
+        assert cache_key("m", "t", changed) != base
+
+
+class TestLLMCache:
+
+    def test_hit_and_miss_counts(self):
+        cache = LLMCache()
+        assert cache.get("k") is None
+        cache.put("k", {"content": "ok", "elapsed_s": 1.5})
+        assert cache.get("k")["content"] == "ok"
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"], stats["saved_s"]) == (1, 1, 0.5, 1.5)
+
+    def test_expired_entries_are_not_served(self):
+        cache = LLMCache(ttl=0)
+        cache.put("k", {"content": "old"})
+        assert cache.get("k") is None
+        assert cache.stats()["expired"] == 1 and cache.stats()["entries"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LLMCache(max_entries=2)
+        cache.put("a", {"content": "a"})
+        cache.put("b", {"content": "b"})
+        cache.get("a")
+        cache.put("c", {"content": "c"})
+        assert cache.get("b") is None and cache.get("a") and cache.get("c")
+        assert cache.stats()["evictions"] == 1
+
+    def test_sqlite_file_survives_restarts(self, tmp_path):
+        path = str(tmp_path / "llm_cache.sqlite")
+        make_llm_cache("sqlite", path).put("k", {"content": "persisted"})
+        cache = make_llm_cache("sqlite", path)
+        assert cache.stats()["entries"] == 1 and cache.get("k")["content"] == "persisted"
+        assert make_llm_cache("none") is None
+
+
+class TestCachedChatModel:
+
+    def test_hit_replays_tool_calls_with_fresh_ids(self):
+        reply = AIMessage(content="", tool_calls=[{"name": "query_prometheus", "args": {"query": "up"}, "id": "c1"}])
+        llm = ScriptedChatModel(script=[reply])
+        cached = CachedChatModel(llm, LLMCache(), model="m")
+        first = cached.invoke(history())
+        second = cached.invoke(history(started="2026-03-02T08:00:00Z", call_id="call_2"))
+        assert llm.turn == 1
+        assert second.tool_calls[0]["args"] == {"query": "up"} and second.response_metadata["llm_cache"] == "hit"
+        assert second.tool_calls[0]["id"] != first.tool_calls[0]["id"]
+
+    def test_empty_replies_are_not_cached(self):
+        llm = ScriptedChatModel(script=[AIMessage(content=""), AIMessage(content="fine")])
+        cached = CachedChatModel(llm, LLMCache(), model="m")
+        cached.invoke(history())
+        assert cached.invoke(history()).content == "fine"
+        assert llm.turn == 2
+
+    def test_traced_run_reports_hits(self):
+        cache = LLMCache()
+
+        def build():
+            model = CachedChatModel(ScriptedChatModel(script=[AIMessage(content="all fine")]), cache, model="m")
+            workflow = StateGraph(MessagesState)
+            workflow.add_node("agent", RunnableLambda(lambda state, config: {
+                "messages": [model.invoke(state["messages"], config)]}))
+            workflow.add_edge(START, "agent")
+            return workflow.compile()
+
+        cold = list(iter_events(build(), INPUTS))
+        warm = list(iter_events(build(), INPUTS))
+        assert cold[-1]["trace"]["llm_cache_misses"] == 1 and warm[-1]["trace"]["llm_cache_hits"] == 1
+        assert [e["content"] for e in warm if e["type"] == "final"] == ["all fine"]
+        assert "LLM cache 1/1 hits" in tracing.format_breakdown(warm[-1]["trace"])
@@ -0,0 +1,154 @@
+"""
+Tests for conversation memory — checkpointer selection, history compaction
+under a token budget, and bounded prompt size over a long checkpointed session.
+"""
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, MessagesState, StateGraph
+
+from memory import (SUMMARY_HEADER, compact_history, compaction_node, estimate_tokens, make_checkpointer)
+
+DUMP = "\n".join(f'container_cpu{{name="c{i}"}} => {i}.0' for i in range(400))  # ~12k chars
+
+
+def turn(n, dump=DUMP):
+    """One incident-style turn: question, tool call, big tool output, answer."""
+    return [
+        HumanMessage(content=f"question {n}", id=f"h{n}"),
+        AIMessage(content="", id=f"a{n}", tool_calls=[{"name": "query_prometheus", "args": {"query": "cpu"},
+                                                        "id": f"call{n}"}]),
+        ToolMessage(content=dump, id=f"t{n}", tool_call_id=f"call{n}", name="query_prometheus"),
+        AIMessage(content=f"answer {n}", id=f"r{n}"),
+    ]
+
+
+def history(turns):
+    return [m for n in range(turns) for m in turn(n)]
+
+
+def assert_tool_pairs_intact(messages):
+    call_ids = {tc["id"] for m in messages if m.type == "ai" for tc in m.tool_calls}
+    result_ids = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    assert call_ids == result_ids
+
+
+class TestCompactHistory:
+
+    def test_short_history_unchanged(self):
+        messages = history(2)
+        assert compact_history(messages, keep_turns=2) == messages
+
+    def test_old_tool_outputs_truncated_recent_kept(self):
+        out = compact_history(history(3), token_budget=100_000, tool_output_chars=500, keep_turns=2)
+        tools = [m for m in out if isinstance(m, ToolMessage)]
+        assert len(tools[0].content) < 600
+        assert "truncated" in tools[0].content
+        assert tools[1].content == DUMP and tools[2].content == DUMP
+
+    def test_truncation_is_idempotent(self):
+        once = compact_history(history(3), token_budget=100_000, tool_output_chars=500)
+        twice = compact_history(once, token_budget=100_000, tool_output_chars=500)
+        assert [m.content for m in once] == [m.content for m in twice]
+
+    def test_over_budget_drops_oldest_turns_into_summary(self):
+        out = compact_history(history(10), token_budget=8000, tool_output_chars=500, keep_turns=2)
+        assert isinstance(out[0], SystemMessage)
+        assert out[0].content.startswith(SUMMARY_HEADER)
+        assert "question 0" in out[0].content and "answer 0" in out[0].content
+        assert estimate_tokens(out) <= 8000
+        # The two most recent turns are untouched
+        assert out[-8:] == history(10)[-8:]
+        assert_tool_pairs_intact(out)
+
+    def test_summary_is_merged_on_later_compactions(self):
+        first = compact_history(history(6), token_budget=7000, tool_output_chars=500)
+        second = compact_history(first + turn(6) + turn(7), token_budget=7000, tool_output_chars=500)
+        summaries = [m for m in second if isinstance(m, SystemMessage)]
+        assert len(summaries) == 1
+        assert summaries[0].id == first[0].id
+        assert "question 0" in summaries[0].content and "question 4" in summaries[0].content
+
+    def test_summary_lines_capped(self):
+        out = compact_history(history(40), token_budget=6500, tool_output_chars=100, max_summary_lines=5)
+        assert len(out[0].content.split("\n")) == 6
+
+
+class TestCheckpointer:
+
+    def test_kinds(self, tmp_path):
+        assert make_checkpointer("none") is None
+        assert isinstance(make_checkpointer("memory"), MemorySaver)
+        sqlite = pytest.importorskip("langgraph.checkpoint.sqlite")
+        assert isinstance(make_checkpointer("sqlite", str(tmp_path / "c.sqlite")), sqlite.SqliteSaver)
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError):
+            make_checkpointer("redis")
+
+
+class FakeAgent:
+    """Agent node that records the prompt size and always runs one big tool call, then answers."""
+
+    def __init__(self):
+        self.prompt_tokens = []
+
+    def __call__(self, state):
+        messages = state["messages"]
+        if isinstance(messages[-1], HumanMessage):
+            self.prompt_tokens.append(estimate_tokens(messages))
+            n = len(self.prompt_tokens)
+            return {"messages": [AIMessage(content="", tool_calls=[
+                {"name": "query_prometheus", "args": {"query": "cpu"}, "id": f"call-{n}"}])]}
+        return {"messages": [AIMessage(content="done")]}
+
+
+def build_graph(agent, checkpointer, **compaction):
+    def tools(state):
+        call = state["messages"][-1].tool_calls[0]
+        return {"messages": [ToolMessage(content=DUMP, tool_call_id=call["id"], name=call["name"])]}
+
+    def route(state):
+        return "tools" if state["messages"][-1].tool_calls else "__end__"
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("compact", compaction_node(**compaction))
+    workflow.add_node("agent", agent)
+    workflow.add_node("tools", tools)
+    workflow.add_edge(START, "compact")
+    workflow.add_edge("compact", "agent")
+    workflow.add_conditional_edges("agent", route)
+    workflow.add_edge("tools", "agent")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def ask(graph, thread, text):
+    return graph.invoke({"messages": [HumanMessage(content=text)]}, config={"configurable": {"thread_id": thread}})
+
+
+class TestCheckpointedSession:
+
+    def test_prompt_size_stays_flat_over_long_session(self):
+        agent = FakeAgent()
+        graph = build_graph(agent, make_checkpointer("memory"), token_budget=6000, tool_output_chars=500)
+        for i in range(30):
+            state = ask(graph, "incident-1", f"check {i}")
+        assert max(agent.prompt_tokens[10:]) <= 6000 + estimate_tokens([HumanMessage(content="check 99")])
+        assert agent.prompt_tokens[-1] <= agent.prompt_tokens[5] * 1.5
+        assert_tool_pairs_intact(state["messages"])
+
+    def test_thread_continuity_and_isolation(self):
+        graph = build_graph(FakeAgent(), make_checkpointer("memory"))
+        ask(graph, "a", "first")
+        state = ask(graph, "a", "second")
+        assert [m.content for m in state["messages"] if isinstance(m, HumanMessage)] == ["first", "second"]
+        other = ask(graph, "b", "hello")
+        assert [m.content for m in other["messages"] if isinstance(m, HumanMessage)] == ["hello"]
+
+    def test_sqlite_checkpoints_survive_restart(self, tmp_path):
+        pytest.importorskip("langgraph.checkpoint.sqlite")
+        path = str(tmp_path / "checkpoints.sqlite")
+        ask(build_graph(FakeAgent(), make_checkpointer("sqlite", path)), "t", "before restart")
+        state = ask(build_graph(FakeAgent(), make_checkpointer("sqlite", path)), "t", "after restart")
+        assert [m.content for m in state["messages"] if isinstance(m, HumanMessage)] == ["before restart",
+                                                                                         "after restart"]
@@ -0,0 +1,101 @@
+"""
+Tests for query_prometheus routing — current-value questions go to the instant
+endpoint, summaries over time go to query_range with server-side reduction —
+and for check_component_health, which sends a whole bundle as one query_batch.
+"""
+import pytest
+import tools
+from health_bundles import HEALTH_BUNDLES, resolve_component
+from tools import check_component_health, query_prometheus
+
+
+class FakeResponse:
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+    responses = {
+        "/tools/query": {"data": {"resultType": "vector", "result": [
+            {"metric": {"__name__": "up", "job": "kafka-exporter"}, "value": [1700000000, "0"]}]}},
+        "/tools/query_range": {"data": {"resultType": "summary", "result": [
+            {"metric": {"topic": "orders"}, "stats": {"max": "1200", "avg": "800"}}]}},
+    }
+
+    def fake_post(url, json=None, headers=None, timeout=None):
+        path = url.replace(tools.MCP_URL, "")
+        recorded.append((path, json))
+        return FakeResponse(responses[path])
+
+    monkeypatch.setattr(tools.MCP_SESSION, "post", fake_post)
+    return recorded
+
+
+class TestQueryRouting:
+
+    def test_current_value_uses_instant_query(self, calls):
+        result = query_prometheus.invoke({"query": 'up{job="kafka-exporter"}'})
+        assert calls == [("/tools/query", {"query": 'up{job="kafka-exporter"}'})]
+        assert result == "Metric(job=kafka-exporter) => 0"
+
+    def test_stats_use_reduced_range_query(self, calls):
+        result = query_prometheus.invoke({"query": "sum(kafka_consumergroup_lag) by (topic)",
+                                          "stats": "max, avg"})
+        path, payload = calls[0]
+        assert path == "/tools/query_range"
+        assert payload["reduce"] == ["max", "avg"]
+        assert result == "Metric(topic=orders) => max=1200 avg=800"
+
+    def test_empty_result(self, monkeypatch):
+        monkeypatch.setattr(tools.MCP_SESSION, "post",
+                            lambda *a, **k: FakeResponse({"data": {"resultType": "vector", "result": []}}))
+        assert query_prometheus.invoke({"query": "nothing"}) == "No data returned for query: nothing"
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    recorded = []
+
+    def fake_post(url, json=None, headers=None, timeout=None):
+        recorded.append((url.replace(tools.MCP_URL, ""), json, timeout))
+        results = [{"query": q, "resultType": "summary",
+                    "result": [{"metric": {"job": "hdfs"}, "stats": {"last": "0.93", "max": "0.97"}}]}
+                   for q in json["queries"]]
+        results[1] = {"query": json["queries"][1], "error": "parse error"}
+        results[2]["result"] = []
+        return FakeResponse({"status": "partial", "results": results})
+
+    monkeypatch.setattr(tools.MCP_SESSION, "post", fake_post)
+    return recorded
+
+
+class TestComponentHealth:
+
+    def test_aliases(self):
+        assert [resolve_component(c) for c in ("HDFS", "namenode", "spark-worker", "zookeeper")] == \
+            ["hdfs", "hdfs", "spark", None]
+
+    def test_whole_bundle_in_one_request(self, batch):
+        result = check_component_health.invoke({"component": "namenode", "stats": "last,max"})
+        [(path, payload, timeout)] = batch
+        assert path == "/tools/query_batch" and timeout == 15
+        assert payload["queries"] == [q for _, q in HEALTH_BUNDLES["hdfs"]]
+        assert payload["reduce"] == ["last", "max"]
+        lines = result.splitlines()
+        assert lines[0] == "Health of hdfs (last 15m, last, max):"
+        assert lines[1:3] == ["== namenode up", "Metric(job=hdfs) => last=0.93 max=0.97"]
+        assert "== heap used ratio: error: parse error" in lines
+        assert "== GC seconds per second: no data" in lines
+
+    def test_unknown_component(self, batch):
+        assert check_component_health.invoke({"component": "zookeeper"}).startswith("No health bundle")
+        assert batch == []
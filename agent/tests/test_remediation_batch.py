@@ -0,0 +1,141 @@
+"""
+Tests for batch remediation — dependency resolution, parallel execution under
+a concurrency cap, skipping dependents of failed targets, and the batch tool.
+"""
+import threading
+import time
+
+import pytest
+
+import tools
+from remediation_batch import COMPOSE_DEPENDENCIES, BatchError, build_dependencies, run_batch
+
+
+class Recorder:
+    """run_one stand-in: sleeps, records start/end times and peak concurrency."""
+
+    def __init__(self, delay=0.1, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.events = {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, action, component):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        start = time.perf_counter()
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        self.events[component] = (start, time.perf_counter())
+        return component not in self.fail, f"{action} {component}"
+
+
+class TestBuildDependencies:
+
+    def test_compose_defaults_apply_within_batch(self):
+        deps = build_dependencies(["kafka", "kafka-exporter", "spark-worker"], defaults=COMPOSE_DEPENDENCIES)
+        assert deps["kafka-exporter"] == {"kafka"}
+        assert deps["spark-worker"] == set()  # spark-master is not in this batch
+
+    def test_explicit_order(self):
+        deps = build_dependencies(["namenode", "spark-master"], order=[["namenode", "spark-master"]])
+        assert deps["spark-master"] == {"namenode"}
+
+    def test_cycle_rejected(self):
+        with pytest.raises(BatchError, match="cycle"):
+            build_dependencies(["a", "b"], order=[["a", "b"], ["b", "a"]])
+
+    def test_unknown_component_in_order_rejected(self):
+        with pytest.raises(BatchError, match="not one of the batch targets"):
+            build_dependencies(["a"], order=[["a", "zzz"]])
+
+    def test_malformed_pair_rejected(self):
+        with pytest.raises(BatchError):
+            build_dependencies(["a", "b"], order=[["a"]])
+
+
+class TestRunBatch:
+
+    def test_independent_targets_run_in_parallel(self):
+        run = Recorder(delay=0.2)
+        targets = [("restart_container", c) for c in ("kafka", "namenode", "clickhouse")]
+        t0 = time.perf_counter()
+        batch = run_batch(targets, run, build_dependencies([c for _, c in targets]), max_concurrency=4)
+        assert time.perf_counter() - t0 < 0.45
+        assert batch["sequential_s"] >= 0.55
+        assert [r["status"] for r in batch["results"]] == ["succeeded"] * 3
+
+    def test_dependency_order_is_respected(self):
+        run = Recorder(delay=0.05)
+        targets = [("restart_container", "kafka-exporter"), ("restart_container", "kafka")]
+        deps = build_dependencies(["kafka-exporter", "kafka"], defaults=COMPOSE_DEPENDENCIES)
+        batch = run_batch(targets, run, deps)
+        assert run.events["kafka"][1] <= run.events["kafka-exporter"][0]
+        # Results stay in the order the targets were given
+        assert [r["component"] for r in batch["results"]] == ["kafka-exporter", "kafka"]
+
+    def test_concurrency_cap(self):
+        run = Recorder(delay=0.05)
+        targets = [("restart_container", f"c{i}") for i in range(6)]
+        run_batch(targets, run, build_dependencies([c for _, c in targets]), max_concurrency=2)
+        assert run.peak == 2
+
+    def test_dependents_of_failed_target_are_skipped(self):
+        run = Recorder(delay=0.01, fail={"spark-master"})
+        targets = [("restart_container", "spark-master"), ("restart_container", "spark-worker"),
+                   ("restart_container", "kafka")]
+        deps = build_dependencies([c for _, c in targets], defaults=COMPOSE_DEPENDENCIES)
+        results = {r["component"]: r for r in run_batch(targets, run, deps)["results"]}
+        assert results["spark-master"]["status"] == "failed"
+        assert results["spark-worker"]["status"] == "skipped"
+        assert "spark-master" in results["spark-worker"]["message"]
+        assert results["kafka"]["status"] == "succeeded"
+        assert "spark-worker" not in run.events
+
+    def test_exception_is_a_failure(self):
+        def boom(action, component):
+            raise RuntimeError("docker down")
+        result = run_batch([("restart_container", "kafka")], boom, {"kafka": set()})["results"][0]
+        assert result["status"] == "failed"
+        assert "docker down" in result["message"]
+
+
+class TestBatchTool:
+
+    @pytest.fixture
+    def run(self, monkeypatch):
+        recorder = Recorder(delay=0.01, fail={"kafka"})
+        monkeypatch.setattr(tools, "_remediate_and_wait", recorder)
+        return recorder
+
+    def test_report_has_one_line_per_target(self, run):
+        out = tools.execute_remediation_batch.invoke({"targets": [
+            {"action": "restart_container", "component": "kafka"},
+            {"action": "restart_container", "component": "kafka-exporter"},
+            {"action": "restart_container", "component": "namenode"},
+        ]})
+        assert out.startswith("BATCH REMEDIATION: 3 targets, 1 succeeded, 1 failed, 1 skipped")
+        assert "- kafka-exporter [restart_container] SKIPPED" in out
+        assert "after=kafka" in out
+
+    def test_requires_confirmation(self, run):
+        out = tools.execute_remediation_batch.invoke({"targets": [{"action": "restart", "component": "a"}],
+                                                      "confirm_token": "NO"})
+        assert out.startswith("Action Aborted")
+        assert run.events == {}
+
+    def test_duplicate_component_rejected(self, run):
+        out = tools.execute_remediation_batch.invoke({"targets": [{"action": "restart", "component": "a"},
+                                                                  {"action": "restart", "component": "a"}]})
+        assert out.startswith("FAILURE")
+
+    def test_cycle_reported(self, run):
+        out = tools.execute_remediation_batch.invoke({
+            "targets": [{"action": "restart", "component": "a"}, {"action": "restart", "component": "b"}],
+            "order": [["a", "b"], ["b", "a"]],
+        })
+        assert "cycle" in out
@@ -0,0 +1,142 @@
+"""
+Tests for tool-result compaction — rounding, top-k, shared labels, group-by,
+the character budget and paging the overflow through fetch_more_results.
+"""
+import pytest
+import tools
+from result_compaction import ResultPager, SessionPagers, compact_lines, compact_series, round_value
+from tools import fetch_more_results, query_prometheus
+
+
+def cadvisor_rows(n, job="cadvisor"):
+    return [{"labels": {"__name__": "container_memory_usage_bytes", "job": job, "instance": "node-1:8080",
+                        "name": f"container-{i}", "namespace": f"ns-{i % 3}"},
+             "values": {"value": str(i * 1048576.123)}} for i in range(n)]
+
+
+class TestRounding:
+
+    @pytest.mark.parametrize("raw,expected", [
+        ("0", "0"), ("1200", "1200"), ("0.123456789", "0.1235"), ("123456.789", "1.235e+05"),
+        ("NaN", "NaN"), ("+Inf", "+Inf"), ("-Inf", "-Inf"), ("n/a", "n/a"),
+    ])
+    def test_round_value(self, raw, expected):
+        assert round_value(raw) == expected
+
+
+class TestCompactSeries:
+
+    def test_single_series_unchanged(self):
+        rows = [{"labels": {"__name__": "up", "job": "kafka-exporter"}, "values": {"value": "0"}}]
+        assert compact_series(rows, ResultPager()) == "Metric(job=kafka-exporter) => 0"
+
+    def test_top_k_sorted_by_value(self):
+        out = compact_series(cadvisor_rows(100), ResultPager(), top_k=5).split("\n")
+        assert out[0].startswith("100 series, top 5 by value")
+        assert out[1].startswith("Metric(name=container-99,")
+        assert len([line for line in out if line.startswith("Metric(")]) == 5
+        assert "95 more series" in out[-1]
+
+    def test_down_target_ranks_first(self):
+        rows = [{"labels": {"__name__": "up", "job": "node", "instance": f"node-{i}:9100"},
+                 "values": {"value": "0" if i == 37 else "1"}} for i in range(60)]
+        out = compact_series(rows, ResultPager(), top_k=5).split("\n")
+        assert out[0].startswith("60 series, top 5 by value (furthest from median first)")
+        assert out[1] == "Metric(instance=node-37:9100) => 0"
+
+    def test_sort_orders(self):
+        rows = [{"labels": {"name": n}, "values": {"value": v}} for n, v in [("a", "5"), ("b", "1"), ("c", "9")]]
+        assert compact_series(rows, ResultPager(), sort="asc").split("\n")[0] == "Metric(name=b) => 1"
+        assert compact_series(rows, ResultPager(), sort="desc").split("\n")[0] == "Metric(name=c) => 9"
+        with pytest.raises(ValueError):
+            compact_series(rows, ResultPager(), sort="random")
+
+    def test_zero_throughput_group_ranks_first(self):
+        rows = [{"labels": {"group": g}, "values": {"value": v}}
+                for g, v in [("billing", "120"), ("billing", "130"), ("audit", "0"), ("orders", "110")]]
+        out = compact_series(rows, ResultPager(), group_by="group").split("\n")
+        assert out[1].startswith("Group(group=audit) => n=1 sum=0")
+
+    def test_common_labels_factored_out(self):
+        out = compact_series(cadvisor_rows(3), ResultPager()).split("\n")
+        assert out[0] == "common labels: job=cadvisor, instance=node-1:8080"
+        assert all("job=" not in line for line in out[1:])
+
+    def test_group_by_label(self):
+        out = compact_series(cadvisor_rows(9), ResultPager(), group_by="namespace").split("\n")
+        assert out[0].startswith("9 series in 3 groups by namespace")
+        assert out[1].startswith("Group(namespace=ns-2) => n=3 ")
+        assert len(out) == 4
+
+    def test_budget_is_hard_limit(self):
+        out = compact_series(cadvisor_rows(5000), ResultPager(), top_k=5000, budget_chars=2000)
+        assert len(out) <= 2000
+        assert out.endswith('call fetch_more_results(handle="r1")]')
+
+
+class TestPager:
+
+    def test_pages_until_exhausted(self):
+        pager = ResultPager()
+        first = compact_lines([f"line {i}" for i in range(120)], pager, max_lines=50)
+        assert "70 more lines" in first
+        second = pager.next_page("r1", budget_chars=4000, max_lines=50)
+        assert second.split("\n")[0] == "line 50" and "20 more lines" in second
+        third = pager.next_page("r1", budget_chars=4000, max_lines=50)
+        assert third.split("\n")[-1] == "line 119"
+        assert pager.next_page("r1", budget_chars=4000, max_lines=50) is None
+
+    def test_oldest_results_evicted(self):
+        pager = ResultPager(max_results=2)
+        handles = [pager.store(["x"], "lines") for _ in range(3)]
+        assert pager.next_page(handles[0], 100, 10) is None
+        assert pager.next_page(handles[2], 100, 10) == "x"
+
+    def test_session_pagers_are_separate_and_bounded(self):
+        pagers = SessionPagers(max_sessions=2)
+        pagers.get("a").store(["from a"], "lines")
+        assert pagers.get("b").next_page("r1", 100, 10) is None
+        pagers.get("c")
+        assert len(pagers) == 2 and pagers.get("a").next_page("r1", 100, 10) is None  # "a" was evicted
+
+
+class FakeResponse:
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class TestQueryPrometheusTool:
+
+    @pytest.fixture
+    def big_result(self, monkeypatch):
+        result = [{"metric": row["labels"], "value": [1700000000, row["values"]["value"]]}
+                  for row in cadvisor_rows(3000)]
+        monkeypatch.setattr(tools.MCP_SESSION, "post", lambda *a, **k: FakeResponse(
+            {"data": {"resultType": "vector", "result": result}}))
+        monkeypatch.setattr(tools, "RESULT_PAGERS", SessionPagers())
+
+    def test_large_result_is_compacted_and_pageable(self, big_result):
+        out = query_prometheus.invoke({"query": "container_memory_usage_bytes", "top_k": 10, "sort": "desc"})
+        assert len(out) <= tools.TOOL_OUTPUT_BUDGET
+        assert out.count("Metric(") == 10
+        page = fetch_more_results.invoke({"handle": "r1"})
+        assert page.startswith("Metric(name=container-2989,")
+
+    def test_handles_belong_to_their_session(self, big_result):
+        session = {"configurable": {"thread_id": "session-a"}}
+        query_prometheus.invoke({"query": "container_memory_usage_bytes", "top_k": 10}, session)
+        other = fetch_more_results.invoke({"handle": "r1"}, {"configurable": {"thread_id": "session-b"}})
+        assert "No stored results" in other
+        assert fetch_more_results.invoke({"handle": "r1"}, session).startswith("Metric(")
+        tools.RESULT_PAGERS.drop("session-a")
+        assert "No stored results" in fetch_more_results.invoke({"handle": "r1"}, session)
+
+    def test_unknown_handle(self):
+        assert "No stored results" in fetch_more_results.invoke({"handle": "r999"})
@@ -0,0 +1,113 @@
+"""
+Tests for the runbook index — exact alert-name lookup, ranked token search,
+and hot reload when runbooks.yaml changes on disk.
+"""
+import os
+
+import pytest
+import yaml
+
+from helpers import RUNBOOK_PATH
+from runbook_index import RunbookIndex, key_terms, tokenize
+
+
+@pytest.fixture(scope="module")
+def index():
+    return RunbookIndex(RUNBOOK_PATH)
+
+
+def write_runbooks(path, runbooks, mtime_ns=None):
+    path.write_text(yaml.safe_dump(runbooks))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+ENTRY = {"symptom": "Broker is down", "diagnosis_steps": ["Check logs"],
+         "remediation_actions": [{"action": "restart_container"}]}
+
+
+class TestTokenizer:
+
+    def test_camel_case_is_split(self):
+        assert tokenize("HDFSNameNodeGCPause") == ["hdfs", "name", "node", "gc", "pause"]
+
+    def test_stopwords_dropped(self):
+        assert tokenize("CPU is above the limit") == ["cpu", "above", "limit"]
+
+    def test_key_terms_include_compounds(self):
+        terms = key_terms("ClickHouseDown")
+        assert {"click", "house", "clickhouse", "clickhousedown"} <= set(terms)
+
+
+class TestExactLookup:
+
+    @pytest.mark.parametrize("name", ["KafkaBrokerDown", "kafka_broker_down", "kafka-broker-down",
+                                      "kafka broker down", "KAFKABROKERDOWN"])
+    def test_normalized_variants_hit_same_entry(self, index, name):
+        key, content = index.get(name)
+        assert key == "KafkaBrokerDown"
+        assert "symptom" in content
+
+    def test_unknown_name_is_none(self, index):
+        assert index.get("NoSuchAlert") is None
+
+    def test_match_returns_only_the_named_runbook(self, index):
+        assert index.match("HDFSNameNodeHighHeap") == ["HDFSNameNodeHighHeap"]
+
+
+class TestRankedSearch:
+
+    def test_key_hits_rank_above_body_mentions(self, index):
+        top = [key for key, _ in index.search("kafka lag", limit=3)]
+        assert set(top) == {"KafkaConsumerLagDetected", "KafkaConsumerLagHigh", "SLOKafkaLagBudgetBurn"}
+
+    def test_compound_word_matches_camel_case_key(self, index):
+        keys = index.match("clickhouse")
+        assert keys and all(k.startswith("ClickHouse") for k in keys)
+
+    def test_prefix_fallback(self, index):
+        assert "KafkaBrokerDown" in index.match("kafk")
+
+    def test_limit(self, index):
+        assert len(index.match("down", limit=2)) == 2
+
+    def test_no_hits(self, index):
+        assert index.search("zzz_nonexistent_xyz") == []
+
+    def test_results_are_deterministic(self, index):
+        assert index.search("cpu high") == index.search("cpu high")
+
+
+class TestHotReload:
+
+    def test_loaded_once_until_file_changes(self, tmp_path):
+        path = tmp_path / "runbooks.yaml"
+        write_runbooks(path, {"KafkaBrokerDown": ENTRY}, mtime_ns=1_000_000_000)
+        index = RunbookIndex(str(path))
+        index.match("kafka")
+        index.match("kafka")
+        assert index.reloads == 1
+
+        write_runbooks(path, {"KafkaBrokerDown": ENTRY, "SparkMasterDown": ENTRY}, mtime_ns=2_000_000_000)
+        assert index.match("spark") == ["SparkMasterDown"]
+        assert index.reloads == 2
+
+    def test_missing_file_is_empty(self, tmp_path):
+        index = RunbookIndex(str(tmp_path / "absent.yaml"))
+        assert len(index) == 0
+        assert index.match("kafka") == []
+
+
+class TestConsultRunbook:
+
+    def test_keyword_results_are_limited(self, monkeypatch):
+        import tools
+        monkeypatch.setattr(tools, "RUNBOOK_RESULT_LIMIT", 2)
+        out = tools.consult_runbook.invoke({"keyword": "down"})
+        assert out.count("=== RUNBOOK:") == 2
+
+    def test_alert_name_returns_single_runbook(self):
+        import tools
+        out = tools.consult_runbook.invoke({"keyword": "kafka_broker_down"})
+        assert out.count("=== RUNBOOK:") == 1
+        assert "=== RUNBOOK: KafkaBrokerDown ===" in out
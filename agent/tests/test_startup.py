@@ -0,0 +1,87 @@
+"""
+Tests for deferred agent startup — importing the entry modules loads no model
+SDK, graph or docker client, and the graph is built once on first use.
+"""
+import json
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+from langchain_core.messages import AIMessage
+
+AGENT_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def loaded_after_import(module: str) -> set:
+    code = f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=AGENT_DIR, capture_output=True,
+                         text=True, check=True).stdout
+    return set(json.loads(out.splitlines()[-1]))
+
+
+class FakeChatOpenAI:
+    """Stands in for langchain_openai.ChatOpenAI; records the settings it was built with."""
+
+    built = []
+
+    def __init__(self, **settings):
+        self.settings = settings
+        FakeChatOpenAI.built.append(self)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def invoke(self, messages, config=None, **kwargs):
+        return AIMessage(content="ok")
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    monkeypatch.setitem(sys.modules, "langchain_openai", types.SimpleNamespace(ChatOpenAI=FakeChatOpenAI))
+    monkeypatch.setenv("AGENT_LLM_CACHE", "none")
+    monkeypatch.setenv("AGENT_CHECKPOINTER", "memory")
+    import agents
+    factories = (agents.get_llm, agents.get_llm_limiter, agents.get_llm_cache, agents.get_tool_executor,
+                 agents.get_agent)
+    for factory in factories:
+        factory.cache_clear()
+    FakeChatOpenAI.built.clear()
+    yield agents
+    for factory in factories:
+        factory.cache_clear()
+
+
+class TestImports:
+
+    @pytest.mark.parametrize("module", ["agents", "graph"])
+    def test_entry_modules_defer_sdk_graph_and_docker(self, module):
+        loaded = loaded_after_import(module)
+        assert not loaded & {"langchain_openai", "langgraph", "workflow", "tools", "docker"}
+
+    def test_tools_do_not_load_docker_or_yaml(self):
+        loaded = loaded_after_import("tools")
+        assert "tools" in loaded
+        assert not loaded & {"docker", "yaml"}
+
+
+class TestGraphFactory:
+
+    def test_graph_is_built_once(self, agents):
+        import graph
+        first = agents.get_agent()
+        assert agents.get_agent() is first
+        assert agents.agent_runnable is first and graph.app is first
+        assert len(FakeChatOpenAI.built) == 1
+        assert FakeChatOpenAI.built[0].settings["temperature"] == 0
+
+    def test_module_attributes_resolve_to_the_shared_objects(self, agents):
+        from llm_limit import LimitedChatModel
+        assert agents.llm is agents.get_llm()
+        assert isinstance(agents.llm, LimitedChatModel) and agents.llm.limiter is agents.llm_limiter
+        assert agents.tool_executor is agents.get_tool_executor()
+        assert [t.name for t in agents.tools][0] == "list_active_alerts"
+        assert agents.checkpointer is agents.get_agent().checkpointer
+        with pytest.raises(AttributeError):
+            agents.missing
@@ -0,0 +1,160 @@
+"""
+Tests for the stream event adapter — incremental tokens, tool-call progress,
+final answer and time-to-first-token tracking, driven through a real graph
+with a fake streaming chat model.
+"""
+import asyncio
+import time
+from typing import Iterator, List
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import tools_condition
+
+from stream_events import EventAdapter, TTFTTracker, aiter_events, iter_events
+from tool_executor import ParallelToolExecutor
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replies with the scripted messages in turn; text is streamed word by word."""
+
+    script: List[AIMessage]
+    delay: float = 0.0
+    turn: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _next(self) -> AIMessage:
+        message = self.script[self.turn]
+        self.turn += 1
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._next()
+        time.sleep(self.delay)
+        for i, word in enumerate(message.content.split(" ") if message.content else []):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": tc["name"], "args": str(tc["args"]).replace("'", '"'), "id": tc["id"], "index": i}
+                for i, tc in enumerate(message.tool_calls)]))
+
+
+@tool
+def query_prometheus(query: str) -> str:
+    """Fake metric query."""
+    return f"{query} => 0"
+
+
+def build_graph(script, delay=0.0):
+    llm = ScriptedChatModel(script=script, delay=delay)
+
+    def call_model(state, config):
+        return {"messages": [llm.invoke(state["messages"], config)]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("agent", RunnableLambda(call_model))
+    workflow.add_node("tools", ParallelToolExecutor([query_prometheus]).as_node())
+    workflow.add_edge(START, "agent")
+    workflow.add_conditional_edges("agent", tools_condition)
+    workflow.add_edge("tools", "agent")
+    return workflow.compile()
+
+
+SCRIPT = [
+    AIMessage(content="Checking both metrics", tool_calls=[
+        {"name": "query_prometheus", "args": {"query": "kafka_lag"}, "id": "c1"},
+        {"name": "query_prometheus", "args": {"query": "hdfs_heap"}, "id": "c2"},
+    ]),
+    AIMessage(content="Kafka lag is zero and HDFS heap is fine"),
+]
+
+INPUTS = {"messages": [HumanMessage(content="status?")]}
+
+
+@pytest.fixture
+def events():
+    return list(iter_events(build_graph(SCRIPT), INPUTS))
+
+
+class TestEventSequence:
+
+    def test_tokens_are_streamed_incrementally(self, events):
+        tokens = [e["text"] for e in events if e["type"] == "token"]
+        assert len(tokens) > 5
+        assert "".join(tokens).endswith("Kafka lag is zero and HDFS heap is fine")
+
+    def test_tool_calls_then_results_in_order(self, events):
+        calls = [e for e in events if e["type"] == "tool_call"]
+        results = [e for e in events if e["type"] == "tool_result"]
+        assert [c["args"]["query"] for c in calls] == ["kafka_lag", "hdfs_heap"]
+        assert [r["content"] for r in results] == ["kafka_lag => 0", "hdfs_heap => 0"]
+        assert events.index(calls[-1]) < events.index(results[0])
+
+    def test_parallel_batch_reported(self, events):
+        batch = next(e for e in events if e["type"] == "tool_batch")
+        assert batch["calls"] == 2
+
+    def test_final_answer_marked_streamed(self, events):
+        final = next(e for e in events if e["type"] == "final")
+        assert final["content"] == "Kafka lag is zero and HDFS heap is fine"
+        assert final["streamed"] is True
+
+    def test_metrics_event_is_last(self, events):
+        assert events[-1]["type"] == "metrics"
+        assert events[-1]["tokens"] == len([e for e in events if e["type"] == "token"])
+
+    def test_async_stream_matches_sync(self, events):
+        async def collect():
+            return [e async for e in aiter_events(build_graph(SCRIPT), INPUTS)]
+
+        async_events = asyncio.run(collect())
+        assert [e["type"] for e in async_events] == [e["type"] for e in events]
+
+
+class TestTimeToFirstToken:
+
+    def test_ttft_measures_delay_before_first_token(self):
+        events = list(iter_events(build_graph([AIMessage(content="all good")], delay=0.1), INPUTS))
+        metrics = events[-1]
+        assert 0.1 <= metrics["ttft_s"] < metrics["total_s"] + 1e-9
+
+    def test_tracker_summary(self):
+        tracker = TTFTTracker()
+        for ttft in (0.1, 0.2, 0.3, None):
+            tracker.record(ttft)
+        summary = tracker.summary()
+        assert summary["runs"] == 4
+        assert summary["runs_without_tokens"] == 1
+        assert summary["ttft_p50_s"] == 0.2
+
+    def test_non_streaming_answer_has_no_ttft(self):
+        adapter = EventAdapter(tracker=TTFTTracker())
+        events = adapter.convert("updates", {"agent": {"messages": [AIMessage(content="done")]}})
+        assert events == [{"type": "final", "content": "done", "streamed": False}]
+        assert adapter.finish()["ttft_s"] is None
+
+    def test_tool_node_messages_are_not_tokens(self):
+        adapter = EventAdapter(tracker=TTFTTracker())
+        chunk = (AIMessageChunk(content="hello"), {"langgraph_node": "tools"})
+        assert adapter.convert("messages", chunk) == []
+
+    def test_triage_answer_is_final(self):
+        adapter = EventAdapter(tracker=TTFTTracker())
+        report = {"alerts": 1, "fast_path": 1, "plans": 1, "fallback": [], "elapsed_ms": 0.4}
+        message = AIMessage(content="plan", response_metadata={"triage": report})
+        events = adapter.convert("updates", {"triage": {"messages": [message]}})
+        assert events == [{"type": "triage", **report}, {"type": "final", "content": "plan", "streamed": False}]
@@ -0,0 +1,149 @@
+"""
+Tests for the parallel tool-execution node — concurrency, stable result
+ordering, per-tool timeouts and time-saved reporting.
+"""
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from tool_executor import ParallelToolExecutor
+
+
+@tool
+def slow_query(query: str) -> str:
+    """Sleeps 0.2s and echoes the query."""
+    time.sleep(0.2)
+    return f"result for {query}"
+
+
+@tool
+def hang(query: str) -> str:
+    """Sleeps past any reasonable timeout."""
+    time.sleep(1.0)
+    return "too late"
+
+
+@tool
+def broken(query: str) -> str:
+    """Always raises."""
+    raise RuntimeError("boom")
+
+
+def state_with(*calls):
+    tool_calls = [{"name": name, "args": {"query": q}, "id": f"call_{i}"} for i, (name, q) in enumerate(calls)]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+@pytest.fixture
+def executor():
+    return ParallelToolExecutor([slow_query, hang, broken], max_workers=4, timeout=5,
+                                timeouts={"hang": 0.3})
+
+
+class TestParallelExecution:
+
+    def test_independent_calls_run_concurrently(self, executor):
+        t0 = time.perf_counter()
+        out = executor.invoke(state_with(("slow_query", "kafka"), ("slow_query", "hdfs"), ("slow_query", "spark")))
+        wall = time.perf_counter() - t0
+        assert len(out["messages"]) == 3
+        assert wall < 0.5  # sequential would be ~0.6s
+
+    def test_results_keep_call_order(self, executor):
+        out = executor.invoke(state_with(("slow_query", "a"), ("slow_query", "b"), ("slow_query", "c")))
+        assert [m.tool_call_id for m in out["messages"]] == ["call_0", "call_1", "call_2"]
+        assert [m.content for m in out["messages"]] == ["result for a", "result for b", "result for c"]
+
+    def test_worker_bound_is_respected(self):
+        executor = ParallelToolExecutor([slow_query], max_workers=1)
+        t0 = time.perf_counter()
+        executor.invoke(state_with(("slow_query", "a"), ("slow_query", "b")))
+        assert time.perf_counter() - t0 >= 0.4
+
+    def test_async_path_runs_concurrently_in_order(self, executor):
+        t0 = time.perf_counter()
+        out = asyncio.run(executor.ainvoke(state_with(("slow_query", "x"), ("slow_query", "y"))))
+        assert time.perf_counter() - t0 < 0.35
+        assert [m.content for m in out["messages"]] == ["result for x", "result for y"]
+
+
+class TestFailures:
+
+    def test_timeout_becomes_error_message(self, executor):
+        t0 = time.perf_counter()
+        out = executor.invoke(state_with(("hang", "a"), ("slow_query", "b")))
+        assert time.perf_counter() - t0 < 0.9
+        timed_out, ok = out["messages"]
+        assert timed_out.status == "error"
+        assert "timed out after 0.3s" in timed_out.content
+        assert ok.status == "success"
+
+    def test_async_timeout(self, executor):
+        out = asyncio.run(executor.ainvoke(state_with(("hang", "a"))))
+        assert "timed out" in out["messages"][0].content
+
+    def test_timed_out_call_is_reported_as_possibly_running(self, executor):
+        msg = executor.invoke(state_with(("hang", "a")))["messages"][0]
+        assert "may still be in progress" in msg.content
+        assert executor.summary()["abandoned"] == 1
+
+    def test_hung_calls_do_not_starve_the_pool(self):
+        executor = ParallelToolExecutor([slow_query, hang], max_workers=1, timeouts={"hang": 0.1})
+        executor.invoke(state_with(("hang", "a")))
+        t0 = time.perf_counter()
+        msg = executor.invoke(state_with(("slow_query", "b")))["messages"][0]
+        assert msg.content == "result for b"
+        assert time.perf_counter() - t0 < 0.5  # not queued behind the abandoned thread
+
+    def test_queued_call_that_times_out_did_not_run(self):
+        executor = ParallelToolExecutor([hang], max_workers=1, timeouts={"hang": 0.2})
+        first, second = executor.invoke(state_with(("hang", "a"), ("hang", "b")))["messages"]
+        assert "may still be in progress" in first.content
+        assert "it did not run" in second.content
+        assert executor.abandoned == 1
+
+    def test_async_deadline_includes_waiting_for_a_slot(self):
+        executor = ParallelToolExecutor([hang], max_workers=1, timeouts={"hang": 0.3})
+
+        async def timed():
+            t0 = time.perf_counter()
+            out = await executor.ainvoke(state_with(("hang", "a"), ("hang", "b")))
+            return out["messages"], time.perf_counter() - t0
+
+        # Timed inside the loop: asyncio.run() waits for the abandoned thread on shutdown
+        (first, second), wall = asyncio.run(timed())
+        assert wall < 0.6
+        assert "may still be in progress" in first.content
+        assert "it did not run" in second.content
+
+    def test_tool_exception_is_reported(self, executor):
+        msg = executor.invoke(state_with(("broken", "a")))["messages"][0]
+        assert msg.status == "error"
+        assert "boom" in msg.content
+
+    def test_unknown_tool_lists_valid_tools(self, executor):
+        msg = executor.invoke(state_with(("nope", "a")))["messages"][0]
+        assert msg.status == "error"
+        assert "slow_query" in msg.content
+
+
+class TestTimingReport:
+
+    def test_batch_reports_time_saved(self, executor):
+        out = executor.invoke(state_with(("slow_query", "a"), ("slow_query", "b"), ("slow_query", "c")))
+        batch = out["messages"][0].response_metadata["batch"]
+        assert batch["calls"] == 3
+        assert batch["sequential_s"] >= 0.6
+        assert batch["saved_s"] > 0.2
+        assert out["messages"][0].response_metadata["elapsed_s"] >= 0.2
+
+    def test_summary_accumulates_turns(self, executor):
+        executor.invoke(state_with(("slow_query", "a")))
+        executor.invoke(state_with(("slow_query", "a"), ("slow_query", "b")))
+        summary = executor.summary()
+        assert summary["batches"] == 2
+        assert summary["parallel_batches"] == 1
+        assert summary["saved_s"] > 0
@@ -0,0 +1,128 @@
+"""
+Tests for per-investigation tracing — trace ids on MCP requests, Server-Timing
+parsing, and the LLM / tool / MCP / upstream breakdown of a streamed run.
+"""
+import asyncio
+
+import pytest
+import tools
+import tracing
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import tools_condition
+from stream_events import aiter_events, iter_events
+from test_stream_events import INPUTS, ScriptedChatModel
+from tool_executor import ParallelToolExecutor
+from tracing import Trace, parse_server_timing
+
+
+class FakeResponse:
+
+    def __init__(self, payload, server_timing="upstream;dur=40;desc=\"1 calls\", pool;dur=0.1, total;dur=45"):
+        self.payload = payload
+        self.headers = {"server-timing": server_timing}
+        self.content = b"x" * 100
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Headers of every MCP POST; responses report 40ms upstream / 45ms total server time."""
+    recorded = []
+
+    def fake_post(url, json=None, headers=None, timeout=None):
+        recorded.append(headers)
+        return FakeResponse({"data": {"resultType": "vector", "result": [
+            {"metric": {"job": "kafka"}, "value": [1700000000, "1"]}]}})
+
+    monkeypatch.setattr(tools.MCP_SESSION, "post", fake_post)
+    return recorded
+
+
+@tool
+def check(query: str) -> str:
+    """Fake tool doing one MCP query."""
+    return tools._query_mcp(query, ["last"])["data"]["resultType"]
+
+
+def build_graph(script):
+    llm = ScriptedChatModel(script=script)
+
+    def call_model(state, config):
+        return {"messages": [llm.invoke(state["messages"], config)]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("agent", RunnableLambda(call_model))
+    workflow.add_node("tools", ParallelToolExecutor([check]).as_node())
+    workflow.add_edge(START, "agent")
+    workflow.add_conditional_edges("agent", tools_condition)
+    workflow.add_edge("tools", "agent")
+    return workflow.compile()
+
+
+def script():
+    return [
+        AIMessage(content="", tool_calls=[{"name": "check", "args": {"query": "kafka_lag"}, "id": "c1"},
+                                          {"name": "check", "args": {"query": "hdfs_heap"}, "id": "c2"}]),
+        AIMessage(content="all fine"),
+    ]
+
+
+class TestServerTiming:
+
+    def test_parse(self):
+        timing = parse_server_timing('upstream;dur=12.5;desc="2 calls", pool;dur=0, total;dur=14')
+        assert timing == {"upstream": 0.0125, "pool": 0.0, "total": 0.014}
+        assert parse_server_timing(None) == {}
+
+
+class TestTrace:
+
+    def test_mcp_calls_are_attributed_to_the_step_that_made_them(self):
+        trace = Trace("t1")
+        trace.record_step("agent", 1.0)
+        trace.record_mcp("/tools/query", 0.05, "upstream;dur=30, total;dur=35")
+        trace.record_mcp("/tools/query", 0.02, None, error="ConnectionError")
+        step = trace.record_step("tools", 0.06)
+        assert (step["mcp_calls"], step["mcp_s"], step["upstream_s"]) == (2, 0.07, 0.03)
+        summary = trace.summary()
+        assert (summary["llm_s"], summary["tools_s"], summary["mcp_errors"]) == (1.0, 0.06, 1)
+
+    def test_no_trace_header_outside_a_run(self, sent):
+        tools._query_mcp("up", ["last"])
+        assert tracing.TRACE_HEADER not in sent[0]
+
+
+class TestTracedRun:
+
+    def test_trace_id_reaches_mcp_from_tool_threads(self, sent):
+        events = list(iter_events(build_graph(script()), INPUTS))
+        trace = events[-1]["trace"]
+        assert [h[tracing.TRACE_HEADER] for h in sent] == [trace["trace_id"]] * 2
+        assert tracing.current() is None
+
+    def test_breakdown(self, sent):
+        events = list(iter_events(build_graph(script()), INPUTS))
+        steps = [e for e in events if e["type"] == "step"]
+        assert [s["node"] for s in steps] == ["agent", "tools", "agent"]
+        assert steps[0]["tool_calls"] == 2
+        assert (steps[1]["calls"], steps[1]["mcp_calls"], steps[1]["upstream_s"]) == (2, 2, 0.08)
+        trace = events[-1]["trace"]
+        assert trace["mcp_calls"] == 2 and trace["upstream_s"] == 0.08 and trace["mcp_server_s"] == 0.09
+        assert trace["mcp_bytes"] == 200
+        assert trace["llm_s"] == round(steps[0]["elapsed_s"] + steps[2]["elapsed_s"], 3)
+
+    def test_async_run_is_traced_too(self, sent):
+        async def collect():
+            return [e async for e in aiter_events(build_graph(script()), INPUTS)]
+
+        events = asyncio.run(collect())
+        assert events[-1]["trace"]["mcp_calls"] == 2
+        assert {h[tracing.TRACE_HEADER] for h in sent} == {events[-1]["trace"]["trace_id"]}
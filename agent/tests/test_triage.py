@@ -0,0 +1,155 @@
+"""
+Tests for deterministic pre-triage — runbook matching, fallback rules, the
+graph fast path that skips the LLM, and the hit-rate counters.
+"""
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from runbook_index import RunbookIndex
+from tools import RUNBOOK_PATH, format_dry_run_plan
+from triage import TriageEngine, TriageStats, route_after_triage, triage_node
+
+
+def alert(alertname, **labels):
+    return {"labels": {"alertname": alertname, "severity": "critical", **labels},
+            "annotations": {"description": f"{alertname} is firing"}}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return TriageEngine(RunbookIndex(RUNBOOK_PATH))
+
+
+class TestTriageEngine:
+
+    def test_runbook_component_gives_plan(self, engine):
+        report = engine.triage([alert("KafkaBrokerDown")])
+        assert report.fallback == []
+        plan = report.plans[0]
+        assert (plan["component"], plan["action"]) == ("kafka", "restart_container")
+        assert plan["plan"] == format_dry_run_plan("restart_container", "KafkaBrokerDown: KafkaBrokerDown is firing",
+                                                   "kafka")
+
+    def test_component_from_labels(self, engine):
+        report = engine.triage([alert("ContainerMemoryHigh", name="spark-worker"),
+                                alert("MonitoringTargetDown", instance="namenode:9981")])
+        assert sorted(p["component"] for p in report.plans) == ["namenode", "spark-worker"]
+
+    def test_alerts_on_one_container_share_a_plan(self, engine):
+        report = engine.triage([alert("HDFSNameNodeHighHeap"), alert("HDFSNameNodeGCPause")])
+        assert len(report.plans) == 1
+        assert report.plans[0]["alertnames"] == ["HDFSNameNodeHighHeap", "HDFSNameNodeGCPause"]
+        assert report.fast_path == 2
+
+    @pytest.mark.parametrize("firing,reason", [
+        (alert("TestAlertUpZero"), "no runbook entry"),
+        (alert("KafkaConsumerLagHigh"), "runbook lists 2 remediation actions"),
+        (alert("NodeCPUHigh", instance="host-1:9100"), "target container not identifiable"),
+        (alert("MonitoringTargetDown", instance="clickhouse-exporter:9116"), "target container not identifiable"),
+    ])
+    def test_falls_back_to_llm(self, engine, firing, reason):
+        report = engine.triage([firing])
+        assert report.plans == [] and report.needs_llm
+        assert report.fallback[0]["reason"].startswith(reason)
+
+    def test_conflicting_actions_fall_back(self):
+        runbooks = {"A": {"remediation_actions": [{"action": "restart_container", "component": "kafka"}]},
+                    "B": {"remediation_actions": [{"action": "clear_logs", "component": "kafka"}]}}
+        report = TriageEngine(RunbookIndex.from_runbooks(runbooks)).triage([alert("A"), alert("B")])
+        assert report.plans == [] and len(report.fallback) == 2
+
+    def test_stats_hit_rate(self, engine):
+        stats = TriageStats()
+        stats.record(engine.triage([alert("KafkaBrokerDown")]))
+        stats.record(engine.triage([alert("KafkaBrokerDown"), alert("TestAlertUpZero")]))
+        assert stats.summary() == {"runs": 2, "runs_without_llm": 1, "alerts": 3, "fast_path_alerts": 2,
+                                   "hit_rate": 0.667}
+
+
+def build_graph(engine, alerts, llm_calls):
+    def agent(state):
+        llm_calls.append(state["messages"])
+        return {"messages": [AIMessage(content="llm answer")]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("triage", triage_node(engine, lambda: alerts, stats=TriageStats()))
+    workflow.add_node("agent", agent)
+    workflow.add_edge(START, "triage")
+    workflow.add_conditional_edges("triage", route_after_triage)
+    return workflow.compile()
+
+
+def ask(graph, text):
+    return graph.invoke({"messages": [HumanMessage(content=text)]})["messages"]
+
+
+class TestTriageNode:
+
+    def test_known_alerts_skip_the_llm(self, engine):
+        llm_calls = []
+        messages = ask(build_graph(engine, [alert("KafkaBrokerDown")], llm_calls), "What alerts are firing?")
+        assert llm_calls == []
+        assert "DRY-RUN REMEDIATION PLAN" in messages[-1].content
+        assert messages[-1].content.endswith("(yes/no)")
+
+    def test_no_alerts_answered_directly(self, engine):
+        llm_calls = []
+        messages = ask(build_graph(engine, [], llm_calls), "any incidents?")
+        assert llm_calls == [] and "No active alerts" in messages[-1].content
+
+    def test_partial_match_hands_rest_to_llm(self, engine):
+        llm_calls = []
+        ask(build_graph(engine, [alert("KafkaBrokerDown"), alert("TestAlertUpZero")], llm_calls), "triage please")
+        handoff = llm_calls[0][-1]
+        assert isinstance(handoff, SystemMessage)
+        assert "Component: kafka" in handoff.content and "- TestAlertUpZero (no runbook entry)" in handoff.content
+
+    @pytest.mark.parametrize("text", ["/triage", "What alerts are firing?", "any incidents?", "check the cluster",
+                                      "Triage the active alerts now", "what's firing right now?",
+                                      "Are there any alerts firing?", "show me the firing alerts"])
+    def test_explicit_triage_requests_take_the_fast_path(self, engine, text):
+        llm_calls = []
+        ask(build_graph(engine, [alert("KafkaBrokerDown")], llm_calls), text)
+        assert llm_calls == []
+
+    @pytest.mark.parametrize("text", ["Create an alert rule for disk usage above 90%",
+                                      "Why is the KafkaBrokerDown alert firing?",
+                                      "Are there any alerts for kafka?",
+                                      "Summarize the incident timeline for kafka"])
+    def test_questions_mentioning_alerts_reach_the_agent(self, engine, text):
+        llm_calls = []
+        messages = ask(build_graph(engine, [alert("KafkaBrokerDown")], llm_calls), text)
+        assert len(llm_calls) == 1 and llm_calls[0][-1].content == text
+        assert messages[-1].content == "llm answer"
+
+    def test_other_messages_pass_through(self, engine):
+        llm_calls = []
+        ask(build_graph(engine, [alert("KafkaBrokerDown")], llm_calls), "yes")
+        assert len(llm_calls) == 1 and isinstance(llm_calls[0][-1], HumanMessage)
+
+
+class TestWorkflowDefault:
+
+    class Model:
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def invoke(self, messages, config=None, **kwargs):
+            return AIMessage(content="llm answer")
+
+    def test_fast_triage_is_on_by_default(self, monkeypatch):
+        import workflow
+        monkeypatch.delenv("AGENT_FAST_TRIAGE", raising=False)
+        monkeypatch.setattr("tools._sync_alerts", lambda: [])
+        graph = workflow.build_graph(self.Model())
+        messages = graph.invoke({"messages": [HumanMessage(content="What alerts are firing?")]})["messages"]
+        assert "No active alerts" in messages[-1].content
+
+    def test_fast_triage_can_be_disabled(self, monkeypatch):
+        import workflow
+        monkeypatch.setenv("AGENT_FAST_TRIAGE", "0")
+        monkeypatch.setattr("tools._sync_alerts", lambda: pytest.fail("triage ran with AGENT_FAST_TRIAGE=0"))
+        graph = workflow.build_graph(self.Model())
+        messages = graph.invoke({"messages": [HumanMessage(content="What alerts are firing?")]})["messages"]
+        assert messages[-1].content == "llm answer"
@@ -0,0 +1,102 @@
+"""
+Tests for the triage worker pool — triaging a queued Alertmanager notification
+against the live alert snapshot, and the claim / report protocol with MCP.
+"""
+import time
+
+import pytest
+
+from runbook_index import RunbookIndex
+from tools import RUNBOOK_PATH
+from triage import TriageEngine, TriageStats
+from triage_worker import TriageWorker, TriageWorkerPool, notification_alerts
+
+
+def am_alert(alertname, status="firing", **labels):
+    return {"status": status, "labels": {"alertname": alertname, "severity": "critical", **labels},
+            "annotations": {"description": f"{alertname} is firing"}, "startsAt": "2026-01-01T00:00:00Z"}
+
+
+NOTIFICATION = {"groupKey": "{}:{service=\"kafka\"}", "status": "firing", "alerts": [
+    am_alert("KafkaBrokerDown"), am_alert("KafkaExporterDown"), am_alert("KafkaTopicMissing", status="resolved")]}
+
+
+def item(notification=NOTIFICATION, item_id=7):
+    return {"id": item_id, "group_key": notification["groupKey"], "severity": "critical", "received": 0,
+            "notification": notification}
+
+
+@pytest.fixture
+def engine():
+    return TriageEngine(RunbookIndex(RUNBOOK_PATH))
+
+
+class TestTriageWorker:
+
+    def test_only_still_active_alerts_are_triaged(self, engine):
+        snapshot = notification_alerts({"alerts": [am_alert("KafkaBrokerDown")]})
+        result = TriageWorker(engine, lambda: snapshot, TriageStats()).process(item())
+        assert [(p["component"], p["action"]) for p in result["plans"]] == [("kafka", "restart_container")]
+        assert result["skipped"] == 1 and result["alerts_from"] == "snapshot"
+
+    def test_notification_is_used_when_mcp_is_down(self, engine):
+        def down():
+            raise ConnectionError("mcp-monitor unreachable")
+
+        stats = TriageStats()
+        result = TriageWorker(engine, down, stats).process(item())
+        assert result["alerts_from"] == "notification" and result["triage"]["alerts"] == 2
+        assert stats.summary()["runs"] == 1
+
+
+class FakeMCP:
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.results = {}
+
+    def __call__(self, method, path, **kwargs):
+        mcp = self
+
+        class Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"item": mcp.items.pop(0) if mcp.items else None}
+
+        if path.endswith("/result"):
+            self.results[int(path.split("/")[-2])] = kwargs["json"]
+        return Response()
+
+
+class TestTriageWorkerPool:
+
+    def test_claim_triage_report(self, engine):
+        mcp = FakeMCP([item()])
+        worker = TriageWorker(engine, lambda: notification_alerts(NOTIFICATION), TriageStats())
+        pool = TriageWorkerPool(workers=1, wait=0, worker=worker, request=mcp)
+        assert pool.run_once("w") is True and pool.run_once("w") is False
+        assert mcp.results[7]["ok"] and mcp.results[7]["result"]["plans"][0]["component"] == "kafka"
+        assert pool.processed == 1
+
+    def test_failed_triage_is_reported(self, engine):
+        mcp = FakeMCP([item(notification={"groupKey": "g"})])
+        worker = TriageWorker(engine, lambda: [], TriageStats())
+        worker.process = lambda claimed: 1 / 0
+        pool = TriageWorkerPool(workers=1, wait=0, worker=worker, request=mcp)
+        pool.run_once("w")
+        assert mcp.results[7] == {"ok": False, "error": "ZeroDivisionError: division by zero"}
+        assert pool.failed == 1
+
+    def test_threads_drain_the_queue(self, engine):
+        mcp = FakeMCP([item(item_id=i) for i in range(5)])
+        pool = TriageWorkerPool(workers=3, wait=0, worker=TriageWorker(engine, lambda: [], TriageStats()),
+                                request=mcp)
+        pool.start()
+        for _ in range(200):
+            if len(mcp.results) == 5:
+                break
+            time.sleep(0.01)
+        pool.stop(timeout=1)
+        assert sorted(mcp.results) == list(range(5))
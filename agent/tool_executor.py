@@ -0,0 +1,183 @@
+"""
+Parallel tool-execution node for the agent graph.
+
+When the model emits several tool calls in one message (e.g. Kafka lag, HDFS
+heap and Spark CPU queries together), they run concurrently on a bounded
+thread pool (or with asyncio.gather in async mode) instead of back to back.
+Each call gets its own timeout, results come back in the order the model
+asked for them, and every batch records how much wall-clock time it saved
+compared to running the calls sequentially.
+
+A Python thread cannot be stopped, so a call that times out while running is
+abandoned, not cancelled: its result says the action may still be in
+progress, and the sync pool is replaced so the abandoned thread does not keep
+one of the `max_workers` slots (later calls would otherwise time out while
+queued behind hung tools). A call that times out before it started did not run.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+
+class ParallelToolExecutor:
+
+    def __init__(self, tools: List, max_workers: int = 8, timeout: float = 30.0,
+                 timeouts: Optional[Dict[str, float]] = None):
+        """
+        tools:       LangChain tools the model may call
+        max_workers: upper bound on tool calls running at the same time
+        timeout:     default per-call timeout in seconds
+        timeouts:    per-tool overrides, e.g. {"execute_remediation_action": 120}
+        """
+        self.tools_by_name = {t.name: t for t in tools}
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._pool_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Calls that timed out while running and were left to finish on their own
+        self.abandoned = 0
+        # One timing record per executed batch (most recent ones; the executor lives as long as the process)
+        self.turns: deque = deque(maxlen=1000)
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.timeout)
+
+    # ---- single call -------------------------------------------------------
+
+    def _message(self, call: Dict, content, elapsed: float, status: str = "success") -> ToolMessage:
+        return ToolMessage(
+            content=str(content),
+            name=call["name"],
+            tool_call_id=call["id"],
+            status=status,
+            response_metadata={"elapsed_s": round(elapsed, 4)},
+        )
+
+    def _timed_out(self, call: Dict, timeout: float, started: bool) -> ToolMessage:
+        if started:
+            text = (f"Error: tool '{call['name']}' timed out after {timeout:g}s and was abandoned while still "
+                    f"running; its action may still be in progress. Check the current state before retrying.")
+        else:
+            text = (f"Error: tool '{call['name']}' timed out after {timeout:g}s waiting for a free worker; "
+                    f"it did not run.")
+        return self._message(call, text, timeout, "error")
+
+    def _abandon(self, pool: ThreadPoolExecutor):
+        """A thread of `pool` is stuck in a timed-out call: later calls go to a fresh pool."""
+        with self._pool_lock:
+            self.abandoned += 1
+            if self._pool is pool:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        # Queued and running calls of the old pool still finish; its threads exit afterwards
+        pool.shutdown(wait=False)
+
+    def _unknown(self, call: Dict) -> Optional[ToolMessage]:
+        if call["name"] in self.tools_by_name:
+            return None
+        valid = ", ".join(self.tools_by_name)
+        return self._message(call, f"Error: {call['name']} is not a valid tool, try one of [{valid}].", 0.0, "error")
+
+    def _run_one(self, call: Dict, config) -> ToolMessage:
+        t0 = time.perf_counter()
+        try:
+            result = self.tools_by_name[call["name"]].invoke(call["args"], config)
+            return self._message(call, result, time.perf_counter() - t0)
+        except Exception as e:
+            return self._message(call, f"Error: {e!r}\n Please fix your mistakes.", time.perf_counter() - t0, "error")
+
+    async def _arun_one(self, call: Dict, config) -> ToolMessage:
+        t0 = time.perf_counter()
+        timeout = self.timeout_for(call["name"])
+        started = False
+
+        async def run():
+            nonlocal started
+            async with self._slots:
+                started = True
+                return await self.tools_by_name[call["name"]].ainvoke(call["args"], config)
+
+        try:
+            # One deadline for waiting for a slot and running, as in the sync path
+            result = await asyncio.wait_for(run(), timeout)
+            return self._message(call, result, time.perf_counter() - t0)
+        except asyncio.TimeoutError:
+            # Sync tools run on a thread that keeps going after the await is cancelled
+            self.abandoned += started
+            return self._timed_out(call, timeout, started)
+        except Exception as e:
+            return self._message(call, f"Error: {e!r}\n Please fix your mistakes.", time.perf_counter() - t0, "error")
+
+    # ---- batch -------------------------------------------------------------
+
+    def _record(self, messages: List[ToolMessage], wall: float) -> Dict:
+        sequential = sum(m.response_metadata.get("elapsed_s", 0.0) for m in messages)
+        batch = {
+            "calls": len(messages),
+            "wall_s": round(wall, 4),
+            "sequential_s": round(sequential, 4),
+            "saved_s": round(max(sequential - wall, 0.0), 4),
+        }
+        self.turns.append(batch)
+        for m in messages:
+            m.response_metadata["batch"] = batch
+        return {"messages": messages}
+
+    def invoke(self, state: Dict, config=None) -> Dict:
+        calls = state["messages"][-1].tool_calls
+        t0 = time.perf_counter()
+        pool = self._pool
+        # Each call runs in a copy of this context, so tools see the caller's trace (tracing.py)
+        pending = [(call, self._unknown(call) or
+                    pool.submit(contextvars.copy_context().run, self._run_one, call, config))
+                   for call in calls]
+
+        messages = []
+        for call, job in pending:
+            if isinstance(job, ToolMessage):
+                messages.append(job)
+                continue
+            # Deadline counts from batch start, so queueing behind max_workers is included
+            timeout = self.timeout_for(call["name"])
+            try:
+                messages.append(job.result(timeout=max(t0 + timeout - time.perf_counter(), 0)))
+            except FutureTimeout:
+                started = not job.cancel()
+                if started:
+                    self._abandon(pool)
+                messages.append(self._timed_out(call, timeout, started))
+        return self._record(messages, time.perf_counter() - t0)
+
+    async def ainvoke(self, state: Dict, config=None) -> Dict:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        calls = state["messages"][-1].tool_calls
+        t0 = time.perf_counter()
+        messages = await asyncio.gather(*(
+            self._async_unknown(call) if call["name"] not in self.tools_by_name else self._arun_one(call, config)
+            for call in calls
+        ))
+        return self._record(list(messages), time.perf_counter() - t0)
+
+    async def _async_unknown(self, call: Dict) -> ToolMessage:
+        return self._unknown(call)
+
+    def as_node(self) -> RunnableLambda:
+        """Graph node running this executor in both sync (.stream) and async (.astream) modes."""
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="tools")
+
+    def summary(self) -> Dict:
+        return {
+            "batches": len(self.turns),
+            "parallel_batches": sum(1 for t in self.turns if t["calls"] > 1),
+            "saved_s": round(sum(t["saved_s"] for t in self.turns), 4),
+            "abandoned": self.abandoned,
+        }
@@ -1,10 +1,20 @@
-import docker
 import os
+import threading
+import time
 import requests
-import yaml
+from requests.adapters import HTTPAdapter
 from typing import Optional, List, Dict
+from langchain_core.runnables.config import ensure_config
 from langchain_core.tools import tool
 
+from correlation import AlertCorrelator, format_incidents
+from docker_manager import DockerManager, RestartJob, docker_errors
+from health_bundles import HEALTH_BUNDLES, resolve_component
+from result_compaction import ResultPager, SessionPagers, compact_lines, compact_series
+from remediation_batch import COMPOSE_DEPENDENCIES, BatchError, build_dependencies, run_batch
+from runbook_index import RunbookIndex
+import tracing
+
 # MCP Server 的地址 (根据 docker-compose 配置)
 # Agent 在宿主机运行, 访问 Docker 容器暴露的端口用 localhost
 MCP_URL = os.getenv("MCP_URL", "http://localhost:8000")
@@ -14,82 +24,237 @@ HEADERS = {
     "x-api-token": "change-me"
 }
 
+# One keep-alive pool to MCP for every session and tool thread in the process
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "32"))
+MCP_SESSION = requests.Session()
+MCP_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=MCP_POOL_SIZE))
+MCP_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MCP_POOL_SIZE))
+
 # Runbook Path
 RUNBOOK_PATH = os.path.join(os.path.dirname(__file__), "runbooks.yaml")
 
-def _load_runbooks() -> Dict:
-    """Helper to load the YAML runbook file."""
-    if not os.path.exists(RUNBOOK_PATH):
-        return {}
-    with open(RUNBOOK_PATH, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+# Parsed once; re-parsed automatically when runbooks.yaml is edited
+RUNBOOK_INDEX = RunbookIndex(RUNBOOK_PATH)
+
+# Ranked keyword searches return at most this many runbooks
+RUNBOOK_RESULT_LIMIT = int(os.getenv("RUNBOOK_RESULT_LIMIT", "5"))
+
+# Firing alerts are grouped into incidents (one per probable root cause) before the LLM sees them
+ALERT_CORRELATOR = AlertCorrelator(RUNBOOK_INDEX, window=float(os.getenv("ALERT_CORRELATION_WINDOW", "300")))
+
+# Large tool results are cut to this budget; the rest is kept for fetch_more_results,
+# in a pager of the conversation thread that produced it
+TOOL_OUTPUT_BUDGET = int(os.getenv("TOOL_OUTPUT_BUDGET", "4000"))
+RESULT_PAGERS = SessionPagers()
+
+
+def _result_pager() -> ResultPager:
+    """Pager of the calling tool run's thread_id (tools see their config through ensure_config())."""
+    thread_id = ensure_config().get("configurable", {}).get("thread_id")
+    return RESULT_PAGERS.get(str(thread_id) if thread_id is not None else "default")
+
+# One Docker client per process; restarts run as background jobs (see docker_manager.py)
+REMEDIATION_MAX_CONCURRENCY = int(os.getenv("REMEDIATION_MAX_CONCURRENCY", "4"))
+DOCKER = DockerManager(
+    stop_timeout=int(os.getenv("DOCKER_STOP_TIMEOUT", "10")),
+    health_timeout=float(os.getenv("REMEDIATION_HEALTH_TIMEOUT", "60")),
+    max_workers=REMEDIATION_MAX_CONCURRENCY,
+)
+
+# How long execute_remediation_action waits for a restart before acknowledging it as in progress
+REMEDIATION_ACK_WAIT = float(os.getenv("REMEDIATION_ACK_WAIT", "0"))
+
+# Last alert state seen by this process. After the first call, list_active_alerts
+# only asks MCP for what changed since `version` and patches this dict.
+_alert_state = {"version": None, "alerts": {}}
+# Sessions and triage workers call list_active_alerts concurrently; one delta sync at a time
+_alert_lock = threading.Lock()
+
+
+def _mcp_request(method: str, path: str, **kwargs):
+    """Call an MCP endpoint with the API token and the active trace id; the call is timed on the trace."""
+    started = time.perf_counter()
+    kwargs.setdefault("timeout", 5)
+    try:
+        response = getattr(MCP_SESSION, method)(f"{MCP_URL}{path}", headers=tracing.mcp_headers(HEADERS), **kwargs)
+    except Exception as e:
+        tracing.record_mcp(path, started, error=e)
+        raise
+    tracing.record_mcp(path, started, response)
+    return response
+
+
+def _sync_alerts() -> List[Dict]:
+    """Bring _alert_state up to date with the MCP alert snapshot and return the alerts."""
+    with _alert_lock:
+        return _sync_alerts_locked()
+
+
+def _sync_alerts_locked() -> List[Dict]:
+    params = {} if _alert_state["version"] is None else {"since": _alert_state["version"]}
+    # This interface is defined in server.py
+    response = _mcp_request("get", "/tools/list_alerts", params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    alerts = _alert_state["alerts"]
+    if "data" in data:
+        # Full list (first call, or a server without snapshot support)
+        alerts.clear()
+        for i, a in enumerate(data.get("data", {}).get("alerts", [])):
+            alerts[a.get("fingerprint", i)] = a
+    else:
+        if data.get("full"):
+            alerts.clear()
+        for a in data.get("added", []) + data.get("changed", []):
+            alerts[a["fingerprint"]] = a
+        for r in data.get("resolved", []):
+            alerts.pop(r["fingerprint"], None)
+    _alert_state["version"] = data.get("version")
+    return list(alerts.values())
+
+
+def _filtered_alerts(severity: str, receiver: str, matchers: str) -> List[Dict]:
+    """Active alerts matching the filters, from MCP's /tools/alert_groups (bypasses the snapshot)."""
+    def split(text: str) -> List[str]:
+        return [part.strip() for part in text.split(",") if part.strip()]
+
+    params = {"severity": split(severity), "receiver": split(receiver), "matcher": split(matchers)}
+    response = _mcp_request("get", "/tools/alert_groups", params=params)
+    if response.status_code == 400:
+        raise ValueError(response.json().get("detail", response.text))
+    response.raise_for_status()
+    return response.json().get("data", {}).get("alerts", [])
+
 
 @tool
-def list_active_alerts() -> str:
+def list_active_alerts(severity: str = "", receiver: str = "", matchers: str = "") -> str:
     """
     Fetch currently firing alerts from the monitoring system (Alertmanager/Prometheus).
     Use this tool FIRST to see what is wrong with the cluster.
+    Alerts are grouped into incidents, each with its probable root cause.
+    Silenced and inhibited alerts are left out. Optional comma-separated filters:
+    severity ("critical,warning"), receiver ("critical", "slo"), matchers ("service=kafka").
     """
     try:
-        url = f"{MCP_URL}/tools/list_alerts"
-        # This interface is defined in server.py
-        response = requests.get(url, headers=HEADERS, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        
-        alerts = data.get("data", {}).get("alerts", [])
+        if severity or receiver or matchers:
+            alerts = _filtered_alerts(severity, receiver, matchers)
+        else:
+            alerts = _sync_alerts()
         if not alerts:
             return "No active alerts found. The system appears healthy."
         
-        summary = []
-        for a in alerts:
-            name = a.get("labels", {}).get("alertname", "Unknown")
-            severity = a.get("labels", {}).get("severity", "Unknown")
-            desc = a.get("annotations", {}).get("description", "")
-            summary.append(f"- [ALERT] {name} (Severity: {severity}): {desc}")
-        
-        return "\n".join(summary)
+        summary = format_incidents(ALERT_CORRELATOR.correlate(alerts))
+        return compact_lines(summary, _result_pager(), budget_chars=TOOL_OUTPUT_BUDGET, unit="alerts")
     except Exception as e:
         return f"Error connecting to MCP Monitor: {str(e)}"
 
 
+def _query_mcp(query: str, stat_names: List[str]) -> Dict:
+    """
+    Route a query to the cheapest MCP endpoint for the question being asked:
+    - current value only -> /tools/query (instant, one evaluation in Prometheus)
+    - anything over time -> /tools/query_range, reduced server-side to the requested stats
+    """
+    if stat_names == ["last"]:
+        path, payload = "/tools/query", {"query": query}
+    else:
+        path, payload = "/tools/query_range", {"query": query, "step": "30s", "reduce": stat_names}
+    # The interface requires a POST request with JSON data
+    response = _mcp_request("post", path, json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+def _series_rows(data_result: List[Dict]) -> List[Dict]:
+    """Instant or summarized series -> rows for compact_series."""
+    rows = []
+    for item in data_result:
+        if "value" in item:
+            # Instant vector: [timestamp, "value"]
+            rows.append({"labels": item.get("metric", {}), "values": {"value": item["value"][1]}})
+        elif "stats" in item:
+            rows.append({"labels": item.get("metric", {}), "values": item["stats"]})
+    return rows
+
+
 @tool
-def query_prometheus(query: str) -> str:
+def query_prometheus(query: str, stats: str = "last", top_k: int = 20, group_by: str = "", sort: str = "outliers") -> str:
     """
     Query specific metrics from Prometheus to diagnose the root cause.
     Input example: 'sum(kafka_consumergroup_lag) by (topic)' or 'up{job="datanode"}'
+    Optional 'stats' summarizes the last 15 minutes per series, comma-separated:
+    last, min, max, avg, rate, p95 (e.g. 'last,max,avg'). Default is the current value.
+    Only the top_k series are shown, furthest from the median first (e.g. a 0 among 1s);
+    sort='desc'/'asc' ranks by value instead. group_by='label' aggregates series per
+    label value. Use fetch_more_results for the rest.
     """
     try:
-        url = f"{MCP_URL}/tools/query_range"
-        # The interface requires a POST request with JSON data
-        payload = {
-            "query": query,
-            "step": "30s"
-        }
-        response = requests.post(url, json=payload, headers=HEADERS, timeout=5)
-        response.raise_for_status()
-        result = response.json()
-        
-        data_result = result.get("data", {}).get("result", [])
+        stat_names = [s.strip() for s in stats.split(",") if s.strip()] or ["last"]
+        result = _query_mcp(query, stat_names)
+
+        data = result.get("data", {})
+        data_result = data.get("result", [])
         if not data_result:
             return f"No data returned for query: {query}"
+        if data.get("resultType") in ("scalar", "string"):
+            return f"Scalar => {data_result[1]}"
         
-        output = []
-        for item in data_result:
-            metric = item.get("metric", {})
-            # value is a tuple [timestamp, "value"]
-            # Only take the latest value
-            values = item.get("values", [])
-            if values:
-                last_val = values[-1][1]
-                # Format the metric labels to make the output look better
-                labels = ", ".join([f"{k}={v}" for k, v in metric.items() if k != "__name__"])
-                output.append(f"Metric({labels}) => {last_val}")
-            
-        return "\n".join(output)
+        # Sorted, rounded, top-k and within budget; the rest stays pageable
+        return compact_series(_series_rows(data_result), _result_pager(), top_k=max(top_k, 1), group_by=group_by,
+                              budget_chars=TOOL_OUTPUT_BUDGET, sort=sort)
+    except Exception as e:
+        return f"Error querying Prometheus: {str(e)}"
+
+
+@tool
+def check_component_health(component: str, stats: str = "last,min,max") -> str:
+    """
+    Get the whole health picture of one component in a single step: every key signal
+    (up, lag, heap, GC, CPU, memory, ...) over the last 15 minutes, fetched in one request.
+    component: kafka, hdfs, spark, clickhouse, node, containers or monitoring
+    (container names like 'namenode' or 'spark-worker' work too).
+    Prefer this over several query_prometheus calls when looking at a component as a whole.
+    """
+    name = resolve_component(component)
+    if name is None:
+        return (f"No health bundle for '{component}'. Known components: {', '.join(HEALTH_BUNDLES)}. "
+                f"Use query_prometheus for anything else.")
+    bundle = HEALTH_BUNDLES[name]
+    stat_names = [s.strip() for s in stats.split(",") if s.strip()] or ["last"]
+    try:
+        # One MCP request; mcp-monitor fans the expressions out to Prometheus concurrently
+        response = _mcp_request("post", "/tools/query_batch", timeout=15, json={
+            "queries": [q for _, q in bundle], "step": "30s", "reduce": stat_names})
+        response.raise_for_status()
+        results = response.json()["results"]
     except Exception as e:
         return f"Error querying Prometheus: {str(e)}"
 
+    sections = [f"Health of {name} (last 15m, {', '.join(stat_names)}):"]
+    budget = max(TOOL_OUTPUT_BUDGET // len(bundle), 200)
+    for (label, _), result in zip(bundle, results):
+        if "error" in result:
+            sections.append(f"== {label}: error: {result['error']}")
+        elif not result.get("result"):
+            sections.append(f"== {label}: no data")
+        else:
+            rows = _series_rows(result["result"])
+            sections.append(f"== {label}\n" + compact_series(rows, _result_pager(), top_k=5, budget_chars=budget))
+    return "\n".join(sections)
+
+
+@tool
+def fetch_more_results(handle: str) -> str:
+    """
+    Get the next page of a large tool result.
+    Use the handle from a '[more available: ...]' line, e.g. fetch_more_results(handle="r3").
+    """
+    page = _result_pager().next_page(handle, TOOL_OUTPUT_BUDGET, max_lines=50)
+    if page is None:
+        return f"No stored results for handle '{handle}' (it may have expired). Re-run the query."
+    return page
+
 @tool
 def consult_runbook(keyword: str) -> str:
     """
@@ -97,45 +262,25 @@ def consult_runbook(keyword: str) -> str:
     Use this to find 'safe' actions to perform.
     Input can be an alert name like 'KafkaBrokerDown' or a keyword like 'kafka', 'cpu', 'hdfs'.
     """
-    runbooks = _load_runbooks()
+    runbooks = RUNBOOK_INDEX.runbooks
     results = []
 
-    # Normalize: lowercase and strip underscores/hyphens/spaces for fuzzy matching
-    def normalize(s: str) -> str:
-        return s.lower().replace("_", "").replace("-", "").replace(" ", "")
-
-    keyword_norm = normalize(keyword)
-
-    for key, content in runbooks.items():
-        key_norm = normalize(key)
-        symptom_norm = normalize(content.get("symptom", ""))
-
-        # Match if:
-        # 1. Exact normalized match (KafkaBrokerDown == kafkabrokerdown)
-        # 2. Keyword is a substring of the key (e.g. "kafka" in "kafkabrokerdown")
-        # 3. Keyword is a substring of the symptom
-        # 4. Key contains the keyword
-        if (keyword_norm == key_norm or
-            keyword_norm in key_norm or
-            keyword_norm in symptom_norm or
-            key_norm in keyword_norm):
-            results.append(f"=== RUNBOOK: {key} ===\n"
-                           f"Symptom: {content.get('symptom')}\n"
-                           f"Diagnosis Steps: {content.get('diagnosis_steps')}\n"
-                           f"Allowed Actions: {content.get('remediation_actions')}\n")
+    # Alert names ('KafkaBrokerDown', 'kafka_broker_down') resolve to their runbook directly;
+    # anything else is a ranked keyword search over symptoms, diagnosis steps and actions
+    for key in RUNBOOK_INDEX.match(keyword, limit=RUNBOOK_RESULT_LIMIT):
+        content = runbooks[key]
+        results.append(f"=== RUNBOOK: {key} ===\n"
+                       f"Symptom: {content.get('symptom')}\n"
+                       f"Diagnosis Steps: {content.get('diagnosis_steps')}\n"
+                       f"Allowed Actions: {content.get('remediation_actions')}\n")
 
     if not results:
         return f"No runbook entries found for keyword '{keyword}'. Please analyze based on general SRE principles."
 
     return "\n".join(results)
 
-@tool
-def generate_dry_run_plan(action: str, reason: str, affected_component: str) -> str:
-    """
-    Generate a formatted DRY-RUN report for a proposed remediation action.
-    ALWAYS use this tool before declaring the task finished. 
-    This does NOT execute the command, it only creates the plan for approval.
-    """
+def format_dry_run_plan(action: str, reason: str, affected_component: str) -> str:
+    """The DRY-RUN report text; shared by generate_dry_run_plan and the triage fast path."""
     return f"""
     #######################################################
     #              DRY-RUN REMEDIATION PLAN               #
@@ -156,6 +301,16 @@ def generate_dry_run_plan(action: str, reason: str, affected_component: str) ->
     """
 
 
+@tool
+def generate_dry_run_plan(action: str, reason: str, affected_component: str) -> str:
+    """
+    Generate a formatted DRY-RUN report for a proposed remediation action.
+    ALWAYS use this tool before declaring the task finished. 
+    This does NOT execute the command, it only creates the plan for approval.
+    """
+    return format_dry_run_plan(action, reason, affected_component)
+
+
 @tool
 def execute_remediation_action(action: str, component: str, confirm_token: str = "YES") -> str:
     """
@@ -166,18 +321,19 @@ def execute_remediation_action(action: str, component: str, confirm_token: str =
         return "Action Aborted: Confirmation token missing."
 
     try:
-        client = docker.from_env()
-        
         # Action: Restart Container
         if "restart" in action:
-            # Try to find the container. The 'component' string usually matches the container name
+            # The 'component' string usually matches the container name
             # e.g., 'spark-master', 'kafka', 'namenode'
             try:
-                container = client.containers.get(component)
-                container.restart()
-                return f"SUCCESS: Real Docker container '{component}' has been restarted."
-            except docker.errors.NotFound:
+                job = DOCKER.restart(component)
+            except docker_errors().NotFound:
                 return f"FAILURE: Container '{component}' not found. Cannot restart."
+            # Don't hold the graph step for the whole restart + health wait
+            if job.wait(REMEDIATION_ACK_WAIT):
+                return _restart_report(job)
+            return (f"ACCEPTED: Restart of Docker container '{component}' is in progress (job {job.id}). "
+                    f"Call check_remediation_status('{job.id}') to get the result.")
 
         # Action: Scale Up (Simulated via logs only, as scaling requires compose V2 API complexity)
         if "scale" in action:
@@ -186,4 +342,83 @@ def execute_remediation_action(action: str, component: str, confirm_token: str =
         return f"SUCCESS: Executed logic for '{action}' on '{component}'."
 
     except Exception as e:
-        return f"CRITICAL ERROR: Failed to execute Docker command. {str(e)}"
\ No newline at end of file
+        return f"CRITICAL ERROR: Failed to execute Docker command. {str(e)}"
+
+
+def _restart_report(job: RestartJob) -> str:
+    if job.state == "succeeded":
+        return (f"SUCCESS: Real Docker container '{job.component}' has been restarted. "
+                f"It is {job.detail} after {job.elapsed:.1f}s.")
+    if job.state == "timeout":
+        return f"WARNING: Docker container '{job.component}' was restarted but is {job.detail}."
+    if job.state == "failed":
+        return f"FAILURE: Restart of Docker container '{job.component}' failed: {job.detail}"
+    return (f"IN PROGRESS: Restart of Docker container '{job.component}' is {job.state.replace('_', ' ')} "
+            f"({job.elapsed:.0f}s so far, job {job.id}).")
+
+
+@tool
+def check_remediation_status(job_id: str, wait_seconds: int = 30) -> str:
+    """
+    Get the result of a restart started by execute_remediation_action.
+    Pass the job ID it returned (or the container name). Waits up to wait_seconds for the restart to finish.
+    """
+    job = DOCKER.find_job(job_id)
+    if job is None:
+        return f"No remediation job found for '{job_id}'."
+    job.wait(max(wait_seconds, 0))
+    return _restart_report(job)
+
+
+def _remediate_and_wait(action: str, component: str) -> tuple:
+    """One batch target, run to completion: (succeeded, report)."""
+    if "restart" in action:
+        try:
+            job = DOCKER.restart(component)
+        except docker_errors().NotFound:
+            return False, f"FAILURE: Container '{component}' not found. Cannot restart."
+        job.wait()
+        return job.state == "succeeded", _restart_report(job)
+    if "scale" in action:
+        return True, f"SIMULATION: Scaling requires Kubernetes. Logged scaling request for '{component}'."
+    return True, f"SUCCESS: Executed logic for '{action}' on '{component}'."
+
+
+@tool
+def execute_remediation_batch(targets: List[Dict[str, str]], order: Optional[List[List[str]]] = None,
+                              confirm_token: str = "YES", max_concurrency: int = 0) -> str:
+    """
+    EXECUTES several REAL remediation actions in one call (e.g. a cascading failure).
+    targets: list of {"action": ..., "component": ...}, one per container.
+    order: optional [before, after] pairs, e.g. [["kafka", "kafka-exporter"]]; known
+    docker-compose start-up dependencies are applied automatically.
+    Independent targets run in parallel; dependents wait until their prerequisites are healthy.
+    Requires user confirmation.
+    """
+    if confirm_token != "YES":
+        return "Action Aborted: Confirmation token missing."
+
+    pairs = [(t.get("action", ""), t.get("component", "")) for t in targets]
+    components = [c for _, c in pairs]
+    if not pairs or not all(a and c for a, c in pairs):
+        return "FAILURE: Every target needs an 'action' and a 'component'."
+    if len(set(components)) != len(components):
+        return "FAILURE: Each component may appear only once per batch."
+    try:
+        deps = build_dependencies(components, order, COMPOSE_DEPENDENCIES)
+    except BatchError as e:
+        return f"FAILURE: {e}"
+
+    cap = min(max_concurrency, REMEDIATION_MAX_CONCURRENCY) if max_concurrency > 0 else REMEDIATION_MAX_CONCURRENCY
+    batch = run_batch(pairs, _remediate_and_wait, deps, max_concurrency=cap)
+
+    counts = {s: sum(1 for r in batch["results"] if r["status"] == s) for s in ("succeeded", "failed", "skipped")}
+    lines = [f"BATCH REMEDIATION: {len(pairs)} targets, {counts['succeeded']} succeeded, {counts['failed']} failed, "
+             f"{counts['skipped']} skipped in {batch['wall_s']:.1f}s (sequential: {batch['sequential_s']:.1f}s)"]
+    for r in batch["results"]:
+        after = ", ".join(sorted(deps[r["component"]]))
+        start = f"+{r['start_s']:.1f}s" if r["start_s"] is not None else "-"
+        lines.append(f"- {r['component']} [{r['action']}] {r['status'].upper()} start={start} took={r['elapsed_s']:.1f}s"
+                     + (f" after={after}" if after else "")
+                     + f"\n  {r['message']}")
+    return "\n".join(lines)
@@ -0,0 +1,153 @@
+"""
+Per-investigation tracing for the agent.
+
+One Trace covers one graph run (one user question). Every MCP call made by a
+tool while the trace is active carries its id in X-Trace-Id, and records how
+long it took from the agent's side plus what mcp-monitor reported in its
+Server-Timing header (upstream time, connection-pool wait, total). The stream
+loop records how long each LLM step and each tool step took, so a slow
+diagnosis breaks down into LLM, tool, MCP and upstream (Prometheus/Grafana)
+time, and the trace id can be looked up in the MCP logs.
+
+The active trace lives in a ContextVar; graph nodes and the tool executor
+run in copies of the caller's context, so tools see the trace without any
+change to their signatures.
+"""
+import contextvars
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+TRACE_HEADER = "X-Trace-Id"
+
+_SERVER_TIMING = re.compile(r"([\w-]+)\s*;[^,]*?dur=([\d.]+)")
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """'upstream;dur=12.5, total;dur=14' -> {"upstream": 0.0125, "total": 0.014} (seconds)"""
+    return {name: float(ms) / 1000 for name, ms in _SERVER_TIMING.findall(header or "")}
+
+
+class Trace:
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.steps: List[Dict] = []
+        self.mcp_calls: List[Dict] = []
+        self._attributed = 0  # mcp_calls already assigned to a step
+        self.llm_cache_hits = 0
+        self.llm_cache_misses = 0
+        self._lock = threading.Lock()  # tools record MCP calls from worker threads
+
+    def record_mcp(self, path: str, elapsed: float, server_timing: Optional[str] = None, error: str = "",
+                   size: int = 0):
+        timing = parse_server_timing(server_timing)
+        call = {"path": path, "elapsed_s": round(elapsed, 4), "bytes": size,
+                "upstream_s": round(timing.get("upstream", 0.0), 4),
+                "server_s": round(timing.get("total", 0.0), 4)}
+        if error:
+            call["error"] = error
+        with self._lock:
+            self.mcp_calls.append(call)
+
+    def record_step(self, node: str, elapsed: float, **extra) -> Dict:
+        """One graph step; MCP calls made since the previous step are attributed to it."""
+        with self._lock:
+            calls = self.mcp_calls[self._attributed:]
+            self._attributed = len(self.mcp_calls)
+        step = {"node": node, "elapsed_s": round(elapsed, 4), "mcp_calls": len(calls),
+                "mcp_s": round(sum(c["elapsed_s"] for c in calls), 4),
+                "upstream_s": round(sum(c["upstream_s"] for c in calls), 4), **extra}
+        self.steps.append(step)
+        return step
+
+    def summary(self) -> Dict:
+        """Where the time of this run went. mcp_s and upstream_s are summed over calls (parallel calls overlap)."""
+        by_node: Dict[str, float] = {}
+        for s in self.steps:
+            by_node[s["node"]] = by_node.get(s["node"], 0.0) + s["elapsed_s"]
+        with self._lock:
+            calls = list(self.mcp_calls)
+        return {
+            "trace_id": self.trace_id,
+            "total_s": round(time.perf_counter() - self.started, 3),
+            "llm_s": round(by_node.get("agent", 0.0), 3),
+            "tools_s": round(by_node.get("tools", 0.0), 3),
+            "triage_s": round(by_node.get("triage", 0.0), 3),
+            "mcp_calls": len(calls),
+            "mcp_s": round(sum(c["elapsed_s"] for c in calls), 3),
+            "mcp_bytes": sum(c["bytes"] for c in calls),
+            "mcp_server_s": round(sum(c["server_s"] for c in calls), 3),
+            "upstream_s": round(sum(c["upstream_s"] for c in calls), 3),
+            "mcp_errors": sum(1 for c in calls if "error" in c),
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_cache_misses": self.llm_cache_misses,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("agent_trace", default=None)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+def start(trace_id: Optional[str] = None) -> tuple:
+    """Make a new trace the active one; returns (trace, token) for finish()."""
+    trace = Trace(trace_id)
+    return trace, _current.set(trace)
+
+
+def finish(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # A generator closed from another context (e.g. abandoned mid-stream): just clear it here
+        _current.set(None)
+
+
+def mcp_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """`headers` plus the active trace id, if any."""
+    trace = _current.get()
+    return {**headers, TRACE_HEADER: trace.trace_id} if trace else headers
+
+
+def record_mcp(path: str, started: float, response=None, error: Optional[Exception] = None):
+    """Record one finished MCP call (started = time.perf_counter() before sending) on the active trace."""
+    trace = _current.get()
+    if trace is None:
+        return
+    elapsed = time.perf_counter() - started
+    if response is None:
+        trace.record_mcp(path, elapsed, error=type(error).__name__ if error else "")
+    else:
+        trace.record_mcp(path, elapsed, response.headers.get("server-timing"), size=len(response.content))
+
+
+def record_llm_cache(hit: bool):
+    """Count one LLM response cache lookup on the active trace."""
+    trace = _current.get()
+    if trace is None:
+        return
+    with trace._lock:
+        if hit:
+            trace.llm_cache_hits += 1
+        else:
+            trace.llm_cache_misses += 1
+
+
+def format_breakdown(summary: Dict) -> str:
+    """One line for the CLI / Streamlit: where the time of a run went."""
+    parts = [f"LLM {summary['llm_s']:.2f}s", f"tools {summary['tools_s']:.2f}s"]
+    if summary["mcp_calls"]:
+        parts[-1] += (f" (MCP {summary['mcp_s']:.2f}s, upstream {summary['upstream_s']:.2f}s "
+                      f"over {summary['mcp_calls']} calls)")
+    if summary["triage_s"]:
+        parts.append(f"triage {summary['triage_s']:.2f}s")
+    if summary.get("llm_cache_hits"):
+        lookups = summary["llm_cache_hits"] + summary["llm_cache_misses"]
+        parts.append(f"LLM cache {summary['llm_cache_hits']}/{lookups} hits")
+    return ", ".join(parts) + f"; trace {summary['trace_id']}"
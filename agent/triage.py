@@ -0,0 +1,225 @@
+"""
+Deterministic pre-triage of firing alerts, in front of the LLM.
+
+Most incidents take the same path through the ReAct loop — list alerts,
+consult the runbook, propose a dry-run plan — even when the alert maps to
+exactly one runbook action on one known container. TriageEngine does that
+mapping directly. An alert takes the fast path when:
+
+- its alertname is a runbooks.yaml key with a single remediation action
+- the target container comes from the action's `component` field, or from the
+  alert's `name` / `instance` label (cAdvisor and scrape-target alerts)
+- that container is one of the known container names (prompts.CONTAINERS)
+
+Everything else (no runbook, several candidate actions, unknown target,
+conflicting actions for one container) falls back to the LLM. triage_node()
+runs the engine only for messages that are nothing but a triage request
+("/triage", "what alerts are firing?"); a question that merely mentions an
+alert ("create an alert rule for ...", "why is the kafka alert firing?")
+goes to the LLM untouched. triage_stats keeps the hit rate.
+"""
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.graph import END
+
+from prompts import CONTAINERS
+
+# Whole user messages that ask for triage and nothing else (anchored: a keyword alone is not enough)
+TRIAGE_INTENT = re.compile(os.getenv(
+    "AGENT_TRIAGE_INTENT",
+    r"^\s*(please )?(/triage|triage( the)?( current| active| firing)?( alerts| incidents)?( now| please)?"
+    r"|(what|which) alerts are (firing|active)( now| right now)?|(what'?s|what is|is anything) firing( now| right now)?"
+    r"|(are there )?any (firing |active )?(alerts|incidents)( firing)?( now| right now)?"
+    r"|(show|list)( me)? (the )?(firing|active) alerts|check (the )?(alerts|cluster|system|services))\s*[?.!]*\s*$",
+), re.I)
+
+APPROVAL_QUESTION = "Do you want me to execute this plan? (yes/no)"
+
+
+class TriageReport:
+    """Outcome of one triage run: ready plans plus the alerts left for the LLM."""
+
+    def __init__(self, alerts: int):
+        self.alerts = alerts
+        self.plans: List[Dict] = []     # {"component", "action", "alertnames", "reason", "plan"}
+        self.fallback: List[Dict] = []  # {"alertname", "reason"}
+        self.elapsed = 0.0
+
+    @property
+    def fast_path(self) -> int:
+        return self.alerts - len(self.fallback)
+
+    @property
+    def needs_llm(self) -> bool:
+        return bool(self.fallback)
+
+    def to_dict(self) -> Dict:
+        return {"alerts": self.alerts, "fast_path": self.fast_path, "plans": len(self.plans),
+                "fallback": [f["alertname"] for f in self.fallback], "elapsed_ms": round(self.elapsed * 1000, 2)}
+
+
+class TriageEngine:
+
+    def __init__(self, index, containers: Iterable[str] = CONTAINERS.values(),
+                 plan_formatter: Optional[Callable[[str, str, str], str]] = None):
+        """
+        index: RunbookIndex (exact alertname lookup)
+        plan_formatter: (action, reason, component) -> text; the generate_dry_run_plan format by default
+        """
+        self.index = index
+        self.containers = set(containers)
+        if plan_formatter is None:
+            from tools import format_dry_run_plan as plan_formatter
+        self.plan_formatter = plan_formatter
+
+    def _target(self, alert: Dict, action: Dict) -> Optional[str]:
+        if action.get("component"):
+            return action["component"]
+        labels = alert.get("labels", {})
+        for candidate in (labels.get("name"), labels.get("container"), labels.get("instance", "").split(":")[0]):
+            if candidate in self.containers:
+                return candidate
+        return None
+
+    def _classify(self, alert: Dict) -> Dict:
+        """{"component", "action"} for a fast-path alert, {"reason"} otherwise."""
+        alertname = alert.get("labels", {}).get("alertname", "")
+        found = self.index.get(alertname) if alertname else None
+        if found is None:
+            return {"reason": "no runbook entry"}
+        actions = found[1].get("remediation_actions") or []
+        if len(actions) != 1:
+            return {"reason": f"runbook lists {len(actions)} remediation actions"}
+        component = self._target(alert, actions[0])
+        if component is None:
+            return {"reason": "target container not identifiable from runbook or labels"}
+        if component not in self.containers:
+            return {"reason": f"'{component}' is not a known container"}
+        return {"component": component, "action": actions[0]["action"]}
+
+    def triage(self, alerts: List[Dict]) -> TriageReport:
+        started = time.perf_counter()
+        report = TriageReport(len(alerts))
+        by_component: Dict[str, List] = {}
+        for alert in alerts:
+            decision = self._classify(alert)
+            if "component" in decision:
+                by_component.setdefault(decision["component"], []).append((alert, decision["action"]))
+            else:
+                report.fallback.append({"alertname": alert.get("labels", {}).get("alertname", "Unknown"),
+                                        "reason": decision["reason"]})
+
+        for component, matched in by_component.items():
+            names = list(dict.fromkeys(a.get("labels", {}).get("alertname") for a, _ in matched))
+            actions = {action for _, action in matched}
+            if len(actions) > 1:
+                report.fallback.extend({"alertname": a.get("labels", {}).get("alertname"),
+                                        "reason": f"conflicting actions for '{component}'"} for a, _ in matched)
+                continue
+            action = actions.pop()
+            reason = "; ".join(f"{name}: {self._symptom(matched, name)}" for name in names)
+            report.plans.append({"component": component, "action": action, "alertnames": names, "reason": reason,
+                                 "plan": self.plan_formatter(action, reason, component)})
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _symptom(self, matched: List, alertname: str) -> str:
+        alert = next(a for a, _ in matched if a.get("labels", {}).get("alertname") == alertname)
+        annotations = alert.get("annotations", {})
+        if annotations.get("description") or annotations.get("summary"):
+            return annotations.get("description") or annotations.get("summary")
+        return self.index.get(alertname)[1].get("symptom", "")
+
+
+class TriageStats:
+    """Fast-path hit rate, per alert and per run (runs that needed no LLM call)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.runs_without_llm = 0
+        self.alerts = 0
+        self.fast_path = 0
+
+    def record(self, report: TriageReport):
+        with self._lock:
+            self.runs += 1
+            self.runs_without_llm += not report.needs_llm
+            self.alerts += report.alerts
+            self.fast_path += report.fast_path
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "runs_without_llm": self.runs_without_llm,
+                "alerts": self.alerts,
+                "fast_path_alerts": self.fast_path,
+                "hit_rate": round(self.fast_path / self.alerts, 3) if self.alerts else None,
+            }
+
+
+triage_stats = TriageStats()
+
+
+def _answer(report: TriageReport) -> str:
+    if not report.alerts:
+        return "No active alerts are firing right now."
+    lines = [f"Fast-path triage matched {report.alerts} firing alert(s) to runbooks:"]
+    lines += [p["plan"] for p in report.plans]
+    if len(report.plans) > 1:
+        lines.append("Several containers are affected; they can be restarted together with one batch.")
+    lines.append(APPROVAL_QUESTION)
+    return "\n".join(lines)
+
+
+def _handoff(report: TriageReport) -> str:
+    lines = ["Deterministic pre-triage already ran on the firing alerts."]
+    if report.plans:
+        lines.append("These dry-run plans are ready; include them in your answer as-is, do not redo them:")
+        lines += [p["plan"] for p in report.plans]
+    lines.append("Investigate ONLY these alerts with the usual workflow:")
+    lines += [f"- {f['alertname']} ({f['reason']})" for f in report.fallback]
+    return "\n".join(lines)
+
+
+def triage_node(engine: Optional[TriageEngine] = None, fetch_alerts: Optional[Callable[[], List[Dict]]] = None,
+                intent=TRIAGE_INTENT, stats: TriageStats = triage_stats):
+    """
+    Graph node in front of the agent. For explicit triage requests it answers directly when
+    every firing alert takes the fast path, otherwise it hands the remaining alerts to the
+    LLM together with the plans already made. Other messages pass through untouched.
+    """
+    if engine is None or fetch_alerts is None:
+        import tools
+        engine = engine or TriageEngine(tools.RUNBOOK_INDEX)
+        fetch_alerts = fetch_alerts or tools._sync_alerts
+
+    def triage(state: Dict) -> Dict:
+        last = state["messages"][-1]
+        if not isinstance(last, HumanMessage) or not intent.search(str(last.content)):
+            return {}
+        try:
+            alerts = fetch_alerts()
+        except Exception:
+            return {}  # MCP unreachable: the agent reports the error through its own tools
+        report = engine.triage(alerts)
+        stats.record(report)
+        metadata = {"triage": report.to_dict()}
+        if not report.needs_llm:
+            return {"messages": [AIMessage(content=_answer(report), response_metadata=metadata)]}
+        if not report.plans:
+            return {}  # nothing matched: the agent starts from scratch
+        return {"messages": [SystemMessage(content=_handoff(report), response_metadata=metadata)]}
+
+    return triage
+
+
+def route_after_triage(state: Dict) -> str:
+    """The triage node answered the turn itself -> END, otherwise on to the agent."""
+    return END if isinstance(state["messages"][-1], AIMessage) else "agent"
@@ -0,0 +1,153 @@
+"""
+Push-based triage: a bounded pool of workers draining mcp-monitor's triage queue.
+
+Alertmanager sends every alert-group notification to mcp-monitor's
+/webhook/alertmanager, where it waits in a durable queue (deduplicated by
+group key, critical first; see mcp-monitor/app/triage_queue.py). Each worker
+long-polls /tools/triage_queue/claim, triages the group the way an alert-check
+question is answered — list_active_alerts, runbook lookup, dry-run plan — and
+posts the plans back. Nothing is executed: the plans still need a human.
+
+- Only alerts of the notification that are still active in the MCP alert
+  snapshot are triaged, so alerts silenced or resolved while the group waited
+  are skipped. If the snapshot cannot be read, the notification's alerts are used.
+- Alerts the deterministic TriageEngine cannot map to a single runbook action
+  are reported as needing investigation instead of being handed to the LLM,
+  so the pool's cost is bounded by its size.
+
+Run: python triage_worker.py   (TRIAGE_WORKERS, TRIAGE_CLAIM_WAIT)
+"""
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from triage import TriageEngine, TriageStats, triage_stats
+
+TRIAGE_WORKERS = int(os.getenv("TRIAGE_WORKERS", "2"))
+# Seconds one claim request long-polls mcp-monitor for work
+TRIAGE_CLAIM_WAIT = float(os.getenv("TRIAGE_CLAIM_WAIT", "20"))
+# Pause after a failed claim (MCP down) before polling again, and after an empty one
+TRIAGE_RETRY_SECONDS = 5.0
+TRIAGE_IDLE_SECONDS = 1.0
+
+
+def notification_alerts(notification: Dict) -> List[Dict]:
+    """Firing alerts of an Alertmanager webhook notification, in the Prometheus alert shape."""
+    return [{"labels": a.get("labels", {}), "annotations": a.get("annotations", {}), "state": "firing",
+             "activeAt": a.get("startsAt")}
+            for a in notification.get("alerts", []) if a.get("status", "firing") == "firing"]
+
+
+def _labels_key(alert: Dict) -> tuple:
+    return tuple(sorted(alert.get("labels", {}).items()))
+
+
+class TriageWorker:
+    """Triage of one claimed queue item; shared by all threads of a pool."""
+
+    def __init__(self, engine: Optional[TriageEngine] = None,
+                 fetch_alerts: Optional[Callable[[], List[Dict]]] = None, stats: TriageStats = triage_stats):
+        if engine is None or fetch_alerts is None:
+            import tools
+            engine = engine or TriageEngine(tools.RUNBOOK_INDEX)
+            fetch_alerts = fetch_alerts or tools._sync_alerts
+        self.engine = engine
+        self.fetch_alerts = fetch_alerts
+        self.stats = stats
+
+    def process(self, item: Dict) -> Dict:
+        notified = notification_alerts(item["notification"])
+        try:
+            active = {_labels_key(a): a for a in self.fetch_alerts()}
+            alerts = [active[_labels_key(a)] for a in notified if _labels_key(a) in active]
+            source = "snapshot"
+        except Exception:
+            alerts, source = notified, "notification"
+        report = self.engine.triage(alerts)
+        self.stats.record(report)
+        return {"plans": report.plans, "needs_investigation": report.fallback,
+                "skipped": len(notified) - len(alerts), "alerts_from": source, "triage": report.to_dict()}
+
+
+class TriageWorkerPool:
+    """`workers` threads, each claiming and triaging one queue item at a time."""
+
+    def __init__(self, workers: int = TRIAGE_WORKERS, wait: float = TRIAGE_CLAIM_WAIT,
+                 worker: Optional[TriageWorker] = None, request: Optional[Callable] = None):
+        """request: (method, path, **kwargs) -> response; tools._mcp_request by default"""
+        if request is None:
+            from tools import _mcp_request as request
+        self.workers = workers
+        self.wait = wait
+        self.worker = worker or TriageWorker()
+        self.request = request
+        self.name = socket.gethostname()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.processed = 0
+        self.failed = 0
+
+    def run_once(self, name: str) -> bool:
+        """Claim one item (long-polling up to `wait`), triage it and report back. False when idle."""
+        response = self.request("post", "/tools/triage_queue/claim", params={"worker": name, "wait": self.wait},
+                                timeout=self.wait + 5)
+        response.raise_for_status()
+        item = response.json().get("item")
+        if item is None:
+            return False
+        try:
+            payload = {"ok": True, "result": self.worker.process(item)}
+        except Exception as e:
+            payload = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.request("post", f"/tools/triage_queue/{item['id']}/result", json=payload).raise_for_status()
+        if payload["ok"]:
+            self.processed += 1
+            result = payload["result"]
+            print(f"[triage] {item['severity'] or 'unknown'} group {item['group_key']}: "
+                  f"{len(result['plans'])} plan(s), {len(result['needs_investigation'])} alert(s) to investigate "
+                  f"({time.time() - item['received']:.1f}s after the alert)")
+        else:
+            self.failed += 1
+            print(f"[triage] group {item['group_key']} failed: {payload['error']}")
+        return True
+
+    def _loop(self, name: str):
+        while not self._stop.is_set():
+            try:
+                if not self.run_once(name):
+                    # Normally the claim already long-polled; this only matters when MCP answers at once
+                    self._stop.wait(TRIAGE_IDLE_SECONDS)
+            except Exception as e:
+                print(f"[triage] {name}: {e}; retrying in {TRIAGE_RETRY_SECONDS:.0f}s")
+                self._stop.wait(TRIAGE_RETRY_SECONDS)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, args=(f"{self.name}-{i}",), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the current claims (a long-poll can take up to `wait` seconds)."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+
+def main():
+    import tools
+    pool = TriageWorkerPool()
+    print(f"Triage workers: {pool.workers}, queue at {tools.MCP_URL}")
+    pool.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop(timeout=1)
+
+
+if __name__ == "__main__":
+    main()
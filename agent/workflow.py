@@ -0,0 +1,99 @@
+"""
+Agent graph assembly, independent of the LLM provider.
+
+agents.py builds the production graph with ChatOpenAI; the offline replay
+benchmark (benchmarks/bench_replay.py) builds the very same graph around a
+scripted chat model, so both exercise identical nodes and routing.
+"""
+import os
+from typing import List, Optional
+
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.graph import StateGraph, MessagesState, START
+from langgraph.prebuilt import tools_condition
+
+from prompts import SYSTEM_PROMPT
+from tools import (
+    list_active_alerts,
+    query_prometheus,
+    check_component_health,
+    fetch_more_results,
+    consult_runbook,
+    generate_dry_run_plan,
+    execute_remediation_action,
+    execute_remediation_batch,
+    check_remediation_status
+)
+from tool_executor import ParallelToolExecutor
+from memory import compaction_node
+from triage import route_after_triage, triage_node
+
+TOOLS = [
+    list_active_alerts,
+    query_prometheus,
+    check_component_health,
+    fetch_more_results,
+    consult_runbook,
+    generate_dry_run_plan,
+    execute_remediation_action,
+    execute_remediation_batch,
+    check_remediation_status
+]
+
+
+def make_tool_executor(tools: List = TOOLS) -> ParallelToolExecutor:
+    """Tool calls from one AI message run concurrently, each with its own timeout."""
+    return ParallelToolExecutor(
+        tools,
+        max_workers=int(os.getenv("AGENT_TOOL_WORKERS", "8")),
+        timeout=float(os.getenv("AGENT_TOOL_TIMEOUT", "30")),
+        timeouts={
+            "execute_remediation_action": float(os.getenv("AGENT_REMEDIATION_TIMEOUT", "120")),
+            "check_remediation_status": float(os.getenv("AGENT_REMEDIATION_TIMEOUT", "120")),
+            "execute_remediation_batch": float(os.getenv("AGENT_BATCH_REMEDIATION_TIMEOUT", "600")),
+        },
+    )
+
+
+def _with_system_prompt(state: MessagesState):
+    return [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
+
+
+def build_graph(llm, tools: List = TOOLS, tool_executor: Optional[ParallelToolExecutor] = None,
+                checkpointer=None, fast_triage: Optional[bool] = None):
+    """
+    Compile the agent graph around `llm` (any chat model supporting bind_tools).
+    fast_triage: route explicit triage requests through deterministic triage first (AGENT_FAST_TRIAGE, on by default)
+    """
+    llm_with_tools = llm.bind_tools(tools)
+    tool_executor = tool_executor or make_tool_executor(tools)
+    if fast_triage is None:
+        fast_triage = os.getenv("AGENT_FAST_TRIAGE", "1") == "1"
+
+    # config carries the stream callbacks, so tokens reach stream_mode="messages"
+    def call_model(state: MessagesState, config: RunnableConfig):
+        return {"messages": [llm_with_tools.invoke(_with_system_prompt(state), config)]}
+
+    async def acall_model(state: MessagesState, config: RunnableConfig):
+        return {"messages": [await llm_with_tools.ainvoke(_with_system_prompt(state), config)]}
+
+    # Creating an Agent (ReAct mode)
+    # The cycle "Think -> Find a tool -> Observe the result -> Think again", with the
+    # tools step replaced by the parallel executor. Each user turn first compacts the
+    # stored history so prompt size stays flat over long incident sessions, then
+    # with fast_triage, explicit triage requests go through deterministic triage first.
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("compact", compaction_node())
+    workflow.add_node("triage", triage_node())
+    workflow.add_node("agent", RunnableLambda(call_model, afunc=acall_model))
+    workflow.add_node("tools", tool_executor.as_node())
+    workflow.add_edge(START, "compact")
+    if fast_triage:
+        workflow.add_edge("compact", "triage")
+        workflow.add_conditional_edges("triage", route_after_triage)
+    else:
+        workflow.add_edge("compact", "agent")
+    workflow.add_conditional_edges("agent", tools_condition)
+    workflow.add_edge("tools", "agent")
+    return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,100 @@
+"""
+Benchmark: prompt size and agent step latency of query_prometheus results with
+the old one-line-per-series output vs the compacted output (top-k, rounding,
+shared labels, character budget), on synthetic cAdvisor-like result sets
+served by a stub MCP endpoint.
+
+Step latency = tool call (HTTP + formatting) + the time the LLM needs to read
+the tool output. The second part is modeled from --prefill-tps (prompt tokens
+per second of the serving LLM) and tokens ~= chars / 4, so it is an estimate.
+
+Usage:
+    python benchmarks/bench_compaction.py [--series 100 1000 5000] [--prefill-tps 2000]
+"""
+import argparse
+import time
+
+import requests
+
+from common import percentile, use_agent
+from stubs import StubPrometheus
+
+use_agent()
+import tools  # noqa: E402
+from result_compaction import ResultPager, SessionPagers, compact_series  # noqa: E402
+
+QUERY = "container_memory_usage_bytes"
+
+
+def cadvisor_payload(series: int) -> dict:
+    result = [{"metric": {"__name__": QUERY, "job": "cadvisor", "instance": f"node-{i % 8}:8080",
+                          "id": f"/docker/{i:064x}", "image": f"bigdata/service-{i % 40}:latest",
+                          "name": f"container-{i}", "namespace": f"ns-{i % 12}"},
+               "value": [1700000000.123, str(i * 1048576.123456 + 0.000789)]} for i in range(series)]
+    return {"status": "success", "data": {"resultType": "vector", "result": result}}
+
+
+def legacy_format(result: dict) -> str:
+    """The previous query_prometheus output: one line per series, raw values."""
+    output = []
+    for item in result["data"]["result"]:
+        labels = ", ".join(f"{k}={v}" for k, v in item.get("metric", {}).items() if k != "__name__")
+        output.append(f"Metric({labels}) => {item['value'][1]}")
+    return "\n".join(output)
+
+
+def legacy_tool() -> str:
+    response = requests.post(f"{tools.MCP_URL}/tools/query", json={"query": QUERY}, headers=tools.HEADERS, timeout=30)
+    return legacy_format(response.json())
+
+
+def compacted_tool() -> str:
+    return tools.query_prometheus.invoke({"query": QUERY})
+
+
+def grouped_tool() -> str:
+    return tools.query_prometheus.invoke({"query": QUERY, "group_by": "namespace"})
+
+
+def measure(fn, iterations: int) -> tuple:
+    times, out = [], ""
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return out, percentile(times, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--prefill-tps", type=float, default=2000.0,
+                        help="assumed LLM prompt processing speed in tokens/s")
+    args = parser.parse_args()
+
+    print(f"{'series':>7s} {'output':12s} {'chars':>8s} {'~tokens':>8s} {'tool ms':>8s} {'~step ms':>9s}")
+    for n in args.series:
+        payload = cadvisor_payload(n)
+        stub = StubPrometheus(latency=0.0)
+        # The stub forks on __enter__, so the route must be registered before
+        stub.routes["/tools/query"] = lambda params, payload=payload: payload
+        with stub:
+            tools.MCP_URL = stub.url
+            tools.RESULT_PAGERS = SessionPagers()
+            for name, fn in (("legacy", legacy_tool), ("compacted", compacted_tool), ("group_by", grouped_tool)):
+                out, tool_s = measure(fn, args.iterations)
+                tokens = len(out) / 4
+                step_s = tool_s + tokens / args.prefill_tps
+                print(f"{n:7d} {name:12s} {len(out):8d} {tokens:8.0f} {tool_s * 1000:8.1f} {step_s * 1000:9.0f}")
+
+    # Formatting cost alone, without HTTP
+    rows = [{"labels": item["metric"], "values": {"value": item["value"][1]}}
+            for item in cadvisor_payload(max(args.series))["data"]["result"]]
+    t0 = time.perf_counter()
+    compact_series(rows, ResultPager())
+    print(f"\ncompact_series on {len(rows)} series: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: alert storms as a flat list vs correlated incidents — how many
+investigations the agent is asked to run, the size of the list_active_alerts
+output, and the correlation cost.
+
+Each failed service fires its own alert plus the usual cascade (scrape target
+down, lag/SLO burn, partial outage); replicas of a storm repeat the cascade
+with distinct label sets, as when several exporters or instances are affected.
+
+Usage:
+    python benchmarks/bench_correlation.py [--failures 1 2 4] [--replicas 1 10 50]
+"""
+import argparse
+import time
+
+from common import use_agent
+
+use_agent()
+from correlation import AlertCorrelator, format_incidents  # noqa: E402
+from runbook_index import RunbookIndex  # noqa: E402
+from tools import RUNBOOK_PATH  # noqa: E402
+
+# root alert, its labels, and the cascade that follows it
+CASCADES = [
+    ("KafkaBrokerDown", {"service": "kafka", "instance": "kafka-exporter:9308"},
+     ["KafkaConsumerLagHigh", "SLOKafkaLagBudgetBurn", "MonitoringPartialOutage"]),
+    ("HDFSNameNodeDown", {"service": "hdfs", "instance": "namenode:9981"}, ["SLOHighErrorRate"]),
+    ("SparkMasterDown", {"service": "spark", "instance": "spark-master:8080"}, ["SparkWorkerDown"]),
+    ("ClickHouseDown", {"service": "clickhouse", "instance": "clickhouse-exporter:9116"},
+     ["ClickHouseSlowInserts", "MonitoringTargetDown"]),
+]
+SYMPTOM_LABELS = {"MonitoringPartialOutage": {"component": "monitoring"}, "SLOKafkaLagBudgetBurn": {"component": "slo"},
+                  "SLOHighErrorRate": {"component": "slo"}, "MonitoringTargetDown": {"component": "monitoring"},
+                  "KafkaConsumerLagHigh": {"service": "kafka"}, "SparkWorkerDown": {"instance": "spark-worker:8081"},
+                  "ClickHouseSlowInserts": {"service": "clickhouse"}}
+
+
+def storm(failures: int, replicas: int) -> list:
+    alerts = []
+    for f, (root, labels, cascade) in enumerate(CASCADES[:failures]):
+        minute = f * 10  # failures further apart than the correlation window
+        for r in range(replicas):
+            stamp = f"2024-05-01T10:{minute:02d}:{r % 60:02d}Z"
+            alerts.append({"labels": {"alertname": root, "severity": "critical", "replica": str(r), **labels},
+                           "activeAt": stamp, "annotations": {"description": f"{root} is firing"}})
+            for name in cascade:
+                alerts.append({"labels": {"alertname": name, "severity": "warning", "replica": str(r),
+                                          **SYMPTOM_LABELS[name]},
+                               "activeAt": f"2024-05-01T10:{minute + 1:02d}:{r % 60:02d}Z",
+                               "annotations": {"description": f"{name} is firing"}})
+    return alerts
+
+
+def flat(alerts: list) -> str:
+    """The previous list_active_alerts output."""
+    return "\n".join(f"- [ALERT] {a['labels']['alertname']} (Severity: {a['labels']['severity']}): "
+                     f"{a['annotations']['description']}" for a in alerts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--failures", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    correlator = AlertCorrelator(RunbookIndex(RUNBOOK_PATH))
+    correlator.correlate(storm(1, 1))  # loads the runbook index
+    print(f"{'failures':>8s} {'replicas':>8s} {'alerts':>7s} {'incidents':>9s} {'flat chars':>11s} "
+          f"{'incident chars':>15s} {'correlate ms':>13s}")
+    for failures in args.failures:
+        for replicas in args.replicas:
+            alerts = storm(failures, replicas)
+            t0 = time.perf_counter()
+            incidents = correlator.correlate(alerts)
+            text = "\n".join(format_incidents(incidents))
+            elapsed = time.perf_counter() - t0
+            print(f"{failures:8d} {replicas:8d} {len(alerts):7d} {len(incidents):9d} {len(flat(alerts)):11d} "
+                  f"{len(text):15d} {elapsed * 1000:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: provisioning the repo's dashboards (monitoring/grafana/dashboards,
+_community and infra_synced.json) into a stub Grafana, one sync_dashboard
+call per file vs one sync_dashboards call, through the real FastAPI app.
+
+Bulk runs: first sync (everything new), re-sync with nothing changed, and
+re-sync after editing a couple of dashboards; the per-file baseline uploads
+every dashboard on every run. `--copies` repeats the set
+with distinct uids/titles to show how concurrent uploads scale.
+
+Usage:
+    python benchmarks/bench_dashboard_sync.py [--latency 0.02] [--copies 1 5] [--changed 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from common import ROOT, use_mcp_app
+from stubs import StubGrafana
+
+TOKEN = "bench"
+SOURCES = [Path(ROOT, "monitoring", "grafana", "dashboards"), Path(ROOT, "infra_synced.json")]
+
+
+def build_tree(target: Path, copies: int) -> list[Path]:
+    files = []
+    for source in SOURCES:
+        files.extend(sorted(source.rglob("*.json")) if source.is_dir() else [source])
+    written = []
+    for copy in range(copies):
+        for f in files:
+            dashboard = json.loads(f.read_text(encoding="utf-8"))
+            if copy:
+                dashboard["title"] = f"{dashboard.get('title')} #{copy}"
+                if dashboard.get("uid"):
+                    dashboard["uid"] = f"{dashboard['uid'][:30]}-{copy}"
+            out = target / f"copy{copy}" / f.name
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(json.dumps(dashboard), encoding="utf-8")
+            written.append(out)
+    return written
+
+
+def edit(files: list[Path], count: int):
+    for f in files[:count]:
+        dashboard = json.loads(f.read_text(encoding="utf-8"))
+        dashboard["description"] = f"edited {time.time()}"
+        f.write_text(json.dumps(dashboard), encoding="utf-8")
+
+
+async def per_file(client, files: list[Path]) -> float:
+    """The old way: one sync_dashboard call per file, each one uploading."""
+    t0 = time.perf_counter()
+    for f in files:
+        r = await client.post("/tools/sync_dashboard", headers={"x-api-token": TOKEN},
+                              json={"dashboard_json": json.loads(f.read_text(encoding="utf-8"))})
+        r.raise_for_status()
+    return time.perf_counter() - t0
+
+
+async def bulk(client) -> tuple[float, dict]:
+    t0 = time.perf_counter()
+    r = await client.post("/tools/sync_dashboards", headers={"x-api-token": TOKEN}, json={})
+    r.raise_for_status()
+    return time.perf_counter() - t0, r.json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02, help="stub Grafana latency per request (s)")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--changed", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"grafana latency={args.latency * 1000:.0f}ms")
+    print(f"{'dashboards':>10s} {'case':28s} {'wall ms':>9s} {'uploads':>8s} {'outcomes'}")
+    for copies in args.copies:
+        with StubGrafana(latency=args.latency) as grafana, tempfile.TemporaryDirectory() as tmp:
+            files = build_tree(Path(tmp), copies)
+            os.environ["GRAFANA_URL"] = grafana.url
+            os.environ["API_TOKEN"] = TOKEN
+            os.environ["DASHBOARD_DIR"] = tmp
+            os.environ["LOCAL_METRICS_EXPRESSIONS"] = ""
+            use_mcp_app()
+            import server
+            server.API_TOKEN, server.DASHBOARD_DIR = TOKEN, Path(tmp)
+            server.upstreams.register("grafana", grafana.url, timeout=15)
+
+            async def run_all():
+                rows = []
+                transport = httpx.ASGITransport(app=server.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://mcp", timeout=120) as client:
+                    for case, prepare in (("bulk, first sync", None), ("bulk, unchanged", None),
+                                          (f"bulk, {args.changed} changed", lambda: edit(files, args.changed))):
+                        if prepare:
+                            prepare()
+                        before = grafana.uploads
+                        wall, report = await bulk(client)
+                        rows.append((case, wall, grafana.uploads - before, report["outcomes"]))
+                    before = grafana.uploads
+                    wall = await per_file(client, files)
+                    rows.append(("per-file sync_dashboard", wall, grafana.uploads - before, {}))
+                await server.upstreams.aclose()
+                return rows
+
+            for case, wall, uploads, outcomes in asyncio.run(run_all()):
+                print(f"{len(files):10d} {case:28s} {wall * 1000:9.1f} {uploads:8d} {outcomes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: "what's the current value" answered by an instant query (/tools/query)
+vs the old 15-minute range evaluation (/tools/query_range), against a stub
+Prometheus whose evaluation cost grows with the number of range steps.
+
+Usage:
+    python benchmarks/bench_instant.py [--iterations 200] [--per-step 0.001] [--series 50]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from common import use_mcp_app, percentile
+from stubs import StubPrometheus
+
+TOKEN = "bench"
+
+CASES = [
+    ("range 15m/30s (full matrix)", "/tools/query_range", {"query": "up", "step": "30s"}),
+    ("range 15m/30s reduce=last", "/tools/query_range", {"query": "up", "step": "30s", "reduce": ["last"]}),
+    ("instant", "/tools/query", {"query": "up"}),
+]
+
+
+async def bench(app, iterations: int) -> list:
+    rows = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://mcp", timeout=60) as client:
+        for name, path, payload in CASES:
+            latencies, size = [], 0
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                r = await client.post(path, json=payload, headers={"x-api-token": TOKEN})
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+                size = len(r.content)
+            rows.append((name, size, percentile(latencies, 50), percentile(latencies, 99)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--per-step", type=float, default=0.001, help="stub evaluation cost per step (s)")
+    parser.add_argument("--series", type=int, default=50)
+    args = parser.parse_args()
+
+    with StubPrometheus(latency=0.002, series=args.series, per_step=args.per_step) as prom:
+        os.environ["PROMETHEUS_URL"] = prom.url
+        os.environ["API_TOKEN"] = TOKEN
+        os.environ["QUERY_CACHE_TTL"] = "0"  # every call evaluates upstream
+        use_mcp_app()
+        import server
+
+        async def run_all():
+            rows = await bench(server.app, args.iterations)
+            await server.upstreams.aclose()
+            return rows
+
+        rows = asyncio.run(run_all())
+
+    print(f"series={args.series} per-step cost={args.per_step * 1000:.1f}ms iterations={args.iterations}")
+    print(f"{'case':30s} {'bytes':>9s} {'p50 ms':>9s} {'p99 ms':>9s}")
+    for name, size, p50, p99 in rows:
+        print(f"{name:30s} {size:9d} {p50 * 1000:9.2f} {p99 * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: hot-metric queries answered from the local ring buffers vs going
+to (stub) Prometheus, through the real FastAPI app, plus ring-buffer memory.
+
+The local store is filled with `retention / interval` scrapes of history
+before measuring, as if the server had been running for a while.
+
+Usage:
+    python benchmarks/bench_local_metrics.py [--series 50] [--latency 0.005] [--iterations 200]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from common import percentile, use_mcp_app
+from stubs import StubPrometheus
+
+TOKEN = "bench"
+LOCAL = "up"
+UPSTREAM = 'up{job!=""}'  # not in LOCAL_METRICS_EXPRESSIONS; the stub answers it the same way
+
+CASES = [
+    ("query_range raw", "/tools/query_range", {}),
+    ("query_range reduce=last,max,avg", "/tools/query_range", {"reduce": ["last", "max", "avg"]}),
+    ("query (instant)", "/tools/query", None),
+]
+
+
+async def bench(server, iterations: int) -> list:
+    rows = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://mcp", timeout=60) as client:
+        for name, path, extra in CASES:
+            for source, query in (("upstream", UPSTREAM), ("local", LOCAL)):
+                payload = {"query": query} if extra is None else {"query": query, "step": "15s", **extra}
+                latencies, served_by = [], ""
+                for _ in range(iterations):
+                    t0 = time.perf_counter()
+                    r = await client.post(path, json=payload, headers={"x-api-token": TOKEN})
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - t0)
+                    served_by = r.headers.get("x-served-by", "prometheus")
+                rows.append((f"{name} [{source}]", served_by, percentile(latencies, 50), percentile(latencies, 95)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="stub Prometheus latency per request (s)")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with StubPrometheus(latency=args.latency, series=args.series) as prom:
+        os.environ["PROMETHEUS_URL"] = prom.url
+        os.environ["API_TOKEN"] = TOKEN
+        os.environ["QUERY_CACHE_TTL"] = "0"  # compare against the uncached upstream path
+        os.environ["LOCAL_METRICS_EXPRESSIONS"] = LOCAL
+        use_mcp_app()
+        import server
+
+        store = server.local_metrics
+
+        async def run_all():
+            now = time.time()
+            scrapes = store.capacity
+            t0 = time.perf_counter()
+            for n in range(scrapes):
+                await store.scrape(now=now - store.retention + n * store.interval)
+            fill = (time.perf_counter() - t0) / scrapes
+            await store.scrape()
+            rows = await bench(server, args.iterations)
+
+            # The store on its own, without HTTP/JSON around it
+            start, end = server.align(time.time() - 15 * 60, time.time(), "15s")
+            direct = []
+            for name, call in (("query_range", lambda: store.query_range(LOCAL, start, end, 15.0)),
+                               ("summarize last,max,avg", lambda: store.summarize(LOCAL, start, end, 15.0,
+                                                                                   ["last", "max", "avg"])),
+                               ("query (instant)", lambda: store.query(LOCAL))):
+                latencies = []
+                for _ in range(args.iterations):
+                    t0 = time.perf_counter()
+                    call()
+                    latencies.append(time.perf_counter() - t0)
+                direct.append((name, percentile(latencies, 50), percentile(latencies, 95)))
+            await server.upstreams.aclose()
+            return rows, fill, direct
+
+        rows, fill, direct = asyncio.run(run_all())
+
+    stats = store.stats()
+    print(f"series={args.series} upstream latency={args.latency * 1000:.1f}ms iterations={args.iterations}")
+    print(f"{'case':44s} {'served by':>10s} {'p50 ms':>8s} {'p95 ms':>8s}")
+    for name, served_by, p50, p95 in rows:
+        print(f"{name:44s} {served_by:>10s} {p50 * 1000:8.3f} {p95 * 1000:8.3f}")
+    print(f"\nLocalMetricsStore alone ({args.series} series x 61 steps):")
+    for name, p50, p95 in direct:
+        print(f"  {name:42s} {'':>10s} {p50 * 1000:8.3f} {p95 * 1000:8.3f}")
+    print(f"scrape (incl. HTTP to stub): {fill * 1000:.2f} ms")
+    print(f"ring capacity {stats['capacity_samples']} samples = {stats['bytes_per_series']} bytes/series; "
+          f"{stats['series']} series = {stats['sample_bytes_total'] / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
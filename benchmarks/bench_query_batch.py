@@ -0,0 +1,92 @@
+"""
+Benchmark: a component health bundle (N related expressions over one 15m
+window) fetched as N /tools/query_range calls, one after the other and all
+at once, vs one /tools/query_batch call, against a stub Prometheus.
+
+Usage:
+    python benchmarks/bench_query_batch.py [--queries 5 10] [--latency 0.02] [--concurrency 8] [--iterations 20]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from common import percentile, use_mcp_app
+from stubs import StubPrometheus
+
+TOKEN = "bench"
+HEADERS = {"x-api-token": TOKEN}
+REDUCE = ["last", "min", "max", "avg"]
+
+
+async def sequential(client, queries: list) -> int:
+    size = 0
+    for q in queries:
+        r = await client.post("/tools/query_range", headers=HEADERS, json={"query": q, "reduce": REDUCE})
+        r.raise_for_status()
+        size += len(r.content)
+    return size
+
+
+async def concurrent(client, queries: list) -> int:
+    responses = await asyncio.gather(*(
+        client.post("/tools/query_range", headers=HEADERS, json={"query": q, "reduce": REDUCE}) for q in queries))
+    for r in responses:
+        r.raise_for_status()
+    return sum(len(r.content) for r in responses)
+
+
+async def batch(client, queries: list) -> int:
+    r = await client.post("/tools/query_batch", headers=HEADERS, json={"queries": queries, "reduce": REDUCE})
+    r.raise_for_status()
+    return len(r.content)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--latency", type=float, default=0.02, help="stub Prometheus latency per request (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="QUERY_BATCH_CONCURRENCY")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    with StubPrometheus(latency=args.latency, series=5) as prom:
+        os.environ["PROMETHEUS_URL"] = prom.url
+        os.environ["API_TOKEN"] = TOKEN
+        os.environ["QUERY_CACHE_TTL"] = "0"  # every call evaluates upstream
+        os.environ["LOCAL_METRICS_EXPRESSIONS"] = ""
+        os.environ["QUERY_BATCH_CONCURRENCY"] = str(args.concurrency)
+        use_mcp_app()
+        import server
+
+        async def run_all():
+            rows = []
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://mcp", timeout=60) as client:
+                for n in args.queries:
+                    queries = [f"signal_{i}" for i in range(n)]
+                    for name, fn, calls in (("query_range, sequential", sequential, n),
+                                            ("query_range, concurrent", concurrent, n),
+                                            ("query_batch", batch, 1)):
+                        latencies, size = [], 0
+                        for _ in range(args.iterations):
+                            t0 = time.perf_counter()
+                            size = await fn(client, queries)
+                            latencies.append(time.perf_counter() - t0)
+                        rows.append((n, name, calls, size, percentile(latencies, 50), percentile(latencies, 99)))
+            await server.upstreams.aclose()
+            return rows
+
+        rows = asyncio.run(run_all())
+
+    print(f"prometheus latency={args.latency * 1000:.0f}ms batch concurrency={args.concurrency} "
+          f"iterations={args.iterations}")
+    print(f"{'queries':>7s} {'case':26s} {'requests':>8s} {'bytes':>7s} {'p50 ms':>9s} {'p99 ms':>9s}")
+    for n, name, calls, size, p50, p99 in rows:
+        print(f"{n:7d} {name:26s} {calls:8d} {size:7d} {p50 * 1000:9.2f} {p99 * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: bytes on the wire and client-side JSON parse time for /tools/query_range
+with and without server-side reduction, on a high-cardinality (cAdvisor-like) matrix.
+
+Usage:
+    python benchmarks/bench_reduce.py [--series 2000] [--iterations 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from common import use_mcp_app
+from stubs import StubPrometheus
+
+TOKEN = "bench"
+
+CASES = [
+    ("raw matrix", {}),
+    ("reduce=last", {"reduce": ["last"]}),
+    ("reduce=min,max,avg,p95", {"reduce": ["min", "max", "avg", "p95"]}),
+    ("points=10 (LTTB)", {"points": 10}),
+]
+
+
+async def bench(app, iterations: int) -> list:
+    rows = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://mcp", timeout=60) as client:
+        for name, extra in CASES:
+            payload = {"query": "container_cpu_usage_seconds_total", "step": "30s", **extra}
+            server_times, parse_times, size = [], [], 0
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                r = await client.post("/tools/query_range", json=payload, headers={"x-api-token": TOKEN})
+                r.raise_for_status()
+                server_times.append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                json.loads(r.content)
+                parse_times.append(time.perf_counter() - t0)
+                size = len(r.content)
+            rows.append((name, size, sum(server_times) / iterations, sum(parse_times) / iterations))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    with StubPrometheus(latency=0, series=args.series) as prom:
+        os.environ["PROMETHEUS_URL"] = prom.url
+        os.environ["API_TOKEN"] = TOKEN
+        os.environ["QUERY_CACHE_TTL"] = "0"  # measure the full path every time
+        use_mcp_app()
+        import server
+
+        async def run_all():
+            rows = await bench(server.app, args.iterations)
+            await server.upstreams.aclose()
+            return rows
+
+        rows = asyncio.run(run_all())
+
+    raw_size = rows[0][1]
+    print(f"series={args.series} samples/series=31 iterations={args.iterations}")
+    print(f"{'case':26s} {'bytes':>10s} {'saved':>7s} {'request ms':>11s} {'parse ms':>9s}")
+    for name, size, server_s, parse_s in rows:
+        print(f"{name:26s} {size:10d} {100 * (1 - size / raw_size):6.1f}% {server_s * 1000:11.2f} {parse_s * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
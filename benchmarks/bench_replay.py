@@ -0,0 +1,211 @@
+"""
+Benchmark: full incident investigations replayed offline, end to end.
+
+Each scenario in benchmarks/fixtures/replay/ holds a recorded incident:
+the alerts Prometheus was firing, the metric series the investigation
+looks at, the state of the Docker containers, and a scripted LLM
+conversation (list alerts -> query metrics / runbooks -> plan -> restart ->
+confirm -> answer). The replay runs the real agent graph (workflow.py) with
+the real tools against a real mcp-monitor process, which talks to a stub
+Prometheus/Alertmanager/Grafana serving the fixture. Docker is an in-process
+stub. Only the model is fake, so nothing needs network access or an API key.
+
+Per scenario it reports wall time, LLM calls, tool calls, bytes moved at each
+hop (tool output fed back to the LLM, MCP responses, upstream responses),
+estimated prompt/completion tokens, and the LLM / tool / MCP / upstream time
+split from the trace. Expectations in the fixture (containers restarted,
+text that must show up in tool results) are checked on every run.
+
+`--baseline` compares the deterministic counters (calls, bytes, tokens) with
+a saved `--json` report and exits non-zero on a regression beyond
+`--tolerance`, so the replay can gate CI. `--llm-cache` replays every
+scenario a second time through the LLM response cache (llm_cache.py) to show
+what a repeated diagnosis costs.
+
+Usage:
+    python benchmarks/bench_replay.py [--scenarios kafka hdfs] [--latency 0.005] [--llm-latency 0.2]
+                                      [--json out.json] [--baseline benchmarks/fixtures/replay_baseline.json]
+                                      [--llm-cache]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+from common import MCP_APP_DIR, ROOT, use_agent
+from fake_llm import ScriptedChatModel
+from stubs import StubDockerClient, StubMonitoringStack
+
+FIXTURES = Path(ROOT, "benchmarks", "fixtures", "replay")
+TOKEN = "bench"
+
+# Counters that only depend on the fixture and the code, not on machine speed
+DETERMINISTIC = ("llm_calls", "tool_calls", "tool_bytes", "mcp_calls", "mcp_bytes", "upstream_bytes",
+                 "input_tokens", "output_tokens")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MCPServer:
+    """mcp-monitor under uvicorn in a subprocess, pointed at the stub stack."""
+
+    def __init__(self, upstream_url: str):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        # The alert snapshot is fetched once at startup; no background refresh adds upstream traffic
+        # mid-run, so byte counts don't depend on how slow the (scripted) LLM is
+        self.env = {**os.environ, "PROMETHEUS_URL": upstream_url, "ALERTMANAGER_URL": upstream_url,
+                    "GRAFANA_URL": upstream_url, "API_TOKEN": TOKEN, "LOCAL_METRICS_EXPRESSIONS": "",
+                    "QUERY_CACHE_TTL": "0", "ALERT_REFRESH_INTERVAL": "3600"}
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"], cwd=MCP_APP_DIR, env=self.env)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).ok:
+                    return self
+            except requests.ConnectionError:
+                pass
+            if self.proc.poll() is not None:
+                break
+            time.sleep(0.1)
+        self.proc.kill()
+        raise RuntimeError("mcp-monitor did not start")
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+def replay(fixture: dict, mcp_url: str, stack: StubMonitoringStack, llm_latency: float, llm_cache=None) -> dict:
+    use_agent()
+    import tools
+    import workflow
+    from llm_cache import CachedChatModel
+    from docker_manager import DockerManager
+    from result_compaction import SessionPagers
+    from stream_events import iter_events
+
+    # Fresh per-process agent state, so scenarios don't see each other's alerts or jobs
+    docker_client = StubDockerClient(fixture.get("containers", {}))
+    tools.MCP_URL, tools.HEADERS = mcp_url, {"x-api-token": TOKEN}
+    tools._alert_state = {"version": None, "alerts": {}}
+    tools.RESULT_PAGERS = SessionPagers()
+    tools.DOCKER = DockerManager(client_factory=lambda: docker_client, poll_interval=0.01, health_timeout=5)
+
+    llm = ScriptedChatModel(script=fixture["llm"], latency=llm_latency)
+    model = CachedChatModel(llm, llm_cache, model="replay") if llm_cache is not None else llm
+    graph = workflow.build_graph(model, fast_triage=False)
+    upstream_before = stack.bytes_sent
+
+    t0 = time.perf_counter()
+    events = list(iter_events(graph, {"messages": [("user", fixture["question"])]},
+                              {"recursion_limit": 2 * len(fixture["llm"]) + 5}))
+    wall = time.perf_counter() - t0
+    tools.DOCKER.close()
+
+    results = [e for e in events if e["type"] == "tool_result"]
+    final = next((e["content"] for e in reversed(events) if e["type"] == "final"), "")
+    trace = events[-1]["trace"]
+    expect = fixture.get("expect", {})
+    outputs = "\n".join(r["content"] for r in results) + "\n" + final
+    failures = [f"missing {text!r} in tool output" for text in expect.get("outputs", []) if text not in outputs]
+    failures += [f"{r['name']} failed: {r['content'][:80]}" for r in results
+                 if r["status"] != "success" or r["content"].lstrip().startswith("Error")]
+    if "restarts" in expect and docker_client.restarted != sorted(expect["restarts"]):
+        failures.append(f"restarted {docker_client.restarted}, expected {sorted(expect['restarts'])}")
+    if llm.overruns:
+        failures.append(f"{llm.overruns} LLM calls past the end of the script")
+    return {
+        "scenario": fixture["scenario"] + (" (cached)" if trace["llm_cache_hits"] else ""),
+        "wall_s": round(wall, 3),
+        "llm_calls": llm.calls,
+        "tool_calls": len(results),
+        "tool_bytes": sum(len(r["content"].encode()) for r in results),
+        "mcp_calls": trace["mcp_calls"],
+        "mcp_bytes": trace["mcp_bytes"],
+        "upstream_bytes": stack.bytes_sent - upstream_before,
+        "input_tokens": llm.input_tokens,
+        "output_tokens": llm.output_tokens,
+        "llm_s": trace["llm_s"],
+        "tools_s": trace["tools_s"],
+        "mcp_s": trace["mcp_s"],
+        "upstream_s": trace["upstream_s"],
+        "llm_cache_hits": trace["llm_cache_hits"],
+        "ok": not failures,
+        "failures": failures,
+    }
+
+
+def regressions(rows: list, baseline: dict, tolerance: float) -> list:
+    problems = []
+    for row in rows:
+        base = baseline.get(row["scenario"])
+        if base is None:
+            continue
+        for key in DETERMINISTIC:
+            if key in base and row[key] > base[key] * (1 + tolerance):
+                problems.append(f"{row['scenario']}: {key} {row[key]} > baseline {base[key]} (+{tolerance:.0%})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", default=sorted(p.stem for p in FIXTURES.glob("*.json")))
+    parser.add_argument("--latency", type=float, default=0.005, help="stub upstream latency per request (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="scripted LLM time to first token (s)")
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--baseline", help="report to compare the deterministic counters with")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--llm-cache", action="store_true", help="replay each scenario again from the LLM cache")
+    args = parser.parse_args()
+
+    rows = []
+    for name in args.scenarios:
+        fixture = json.loads((FIXTURES / f"{name}.json").read_text(encoding="utf-8"))
+        with StubMonitoringStack(fixture, latency=args.latency) as stack, MCPServer(stack.url) as mcp:
+            if not args.llm_cache:
+                rows.append(replay(fixture, mcp.url, stack, args.llm_latency))
+                continue
+            use_agent()
+            from llm_cache import LLMCache
+            cache = LLMCache()
+            rows.append(replay(fixture, mcp.url, stack, args.llm_latency, cache))
+            rows.append(replay(fixture, mcp.url, stack, args.llm_latency, cache))
+
+    print(f"upstream latency={args.latency * 1000:.0f}ms, llm latency={args.llm_latency * 1000:.0f}ms")
+    print(f"{'scenario':19s} {'wall ms':>8s} {'llm':>4s} {'tools':>5s} {'tool B':>7s} {'mcp':>4s} {'mcp B':>7s} "
+          f"{'upstr B':>8s} {'in tok':>7s} {'out tok':>7s} {'llm ms':>7s} {'tools ms':>8s} {'upstr ms':>8s}  ok")
+    for r in rows:
+        print(f"{r['scenario']:19s} {r['wall_s'] * 1000:8.0f} {r['llm_calls']:4d} {r['tool_calls']:5d} "
+              f"{r['tool_bytes']:7d} {r['mcp_calls']:4d} {r['mcp_bytes']:7d} {r['upstream_bytes']:8d} "
+              f"{r['input_tokens']:7d} {r['output_tokens']:7d} {r['llm_s'] * 1000:7.0f} "
+              f"{r['tools_s'] * 1000:8.0f} {r['upstream_s'] * 1000:8.0f}  {'yes' if r['ok'] else 'NO'}")
+        for failure in r["failures"]:
+            print(f"    {failure}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({r["scenario"]: r for r in rows}, indent=2) + "\n", encoding="utf-8")
+    problems = regressions(rows, json.loads(Path(args.baseline).read_text()), args.tolerance) \
+        if args.baseline else []
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems or not all(r["ok"] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
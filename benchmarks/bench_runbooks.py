@@ -0,0 +1,102 @@
+"""
+Benchmark: consult_runbook lookups with the old per-call YAML load + linear
+substring scan vs the preloaded runbook index, on synthetic runbook files of
+increasing size.
+
+Usage:
+    python benchmarks/bench_runbooks.py [--sizes 1000 5000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import yaml
+
+from common import use_agent
+
+use_agent()
+from runbook_index import RunbookIndex, normalize  # noqa: E402
+
+COMPONENTS = ["Kafka", "HDFS", "Spark", "ClickHouse", "Node", "Container", "Zookeeper", "Flink",
+              "Redis", "Postgres", "Hive", "Trino", "Cassandra", "Elastic", "Nginx", "Airflow"]
+PARTS = ["Broker", "NameNode", "DataNode", "Master", "Worker", "Replica", "Consumer", "Coordinator",
+         "Scheduler", "Executor", "Shard", "Partition", "Gateway", "Cache", "Disk", "Queue"]
+CONDITIONS = ["Down", "HighHeap", "CPUHigh", "MemoryHigh", "LagHigh", "GCPause", "SlowInserts",
+              "TooManyConnections", "Restarting", "DiskFull", "LatencyP99", "ErrorRate"]
+WORDS = ["latency", "throughput", "saturation", "errors", "timeout", "network", "leader", "election",
+         "checkpoint", "backpressure", "replication", "heap", "threads", "connections", "queue", "quota"]
+
+
+def synthetic_runbooks(n: int, seed: int = 7) -> dict:
+    rnd = random.Random(seed)
+    runbooks = {}
+    while len(runbooks) < n:
+        name = f"{rnd.choice(COMPONENTS)}{rnd.choice(PARTS)}{rnd.choice(CONDITIONS)}{len(runbooks)}"
+        runbooks[name] = {
+            "symptom": " ".join(rnd.sample(WORDS, 6)),
+            "diagnosis_steps": [" ".join(rnd.sample(WORDS, 5)) for _ in range(3)],
+            "remediation_actions": [{"action": "restart_container", "description": " ".join(rnd.sample(WORDS, 4)),
+                                     "safety": "SAFE"}],
+        }
+    return runbooks
+
+
+def legacy_lookup(path: str, keyword: str) -> list:
+    """The previous consult_runbook: parse the YAML, then substring-scan every entry."""
+    with open(path, "r", encoding="utf-8") as f:
+        runbooks = yaml.safe_load(f)
+    keyword_norm = normalize(keyword)
+    results = []
+    for key, content in runbooks.items():
+        key_norm = normalize(key)
+        symptom_norm = normalize(content.get("symptom", ""))
+        if (keyword_norm == key_norm or keyword_norm in key_norm or
+                keyword_norm in symptom_norm or key_norm in keyword_norm):
+            results.append(key)
+    return results
+
+
+def time_per_call(fn, queries: list) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t0) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8s} {'build ms':>9s} {'legacy ms':>10s} {'exact us':>9s} {'keyword us':>11s} {'speedup':>8s}")
+    for n in args.sizes:
+        runbooks = synthetic_runbooks(n)
+        rnd = random.Random(n)
+        names = rnd.sample(list(runbooks), min(args.queries, n))
+        keywords = [f"{rnd.choice(COMPONENTS).lower()} {rnd.choice(WORDS)}" for _ in range(args.queries)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runbooks.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                yaml.safe_dump(runbooks, f, sort_keys=False)
+
+            # The legacy path re-parses the file per call, so a few calls are enough
+            legacy_queries = (names + keywords)[:3]
+            legacy = time_per_call(lambda q: legacy_lookup(path, q), legacy_queries)
+
+            t0 = time.perf_counter()
+            index = RunbookIndex(path)
+            index.refresh()
+            build = time.perf_counter() - t0
+            exact = time_per_call(lambda q: index.match(q, limit=5), names)
+            keyword = time_per_call(lambda q: index.match(q, limit=5), keywords)
+
+        print(f"{n:8d} {build * 1000:9.1f} {legacy * 1000:10.2f} {exact * 1e6:9.1f} {keyword * 1e6:11.1f} "
+              f"{legacy / keyword:7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
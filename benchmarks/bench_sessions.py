@@ -0,0 +1,153 @@
+"""
+Benchmark: concurrent investigations through the multi-session agent API.
+
+Runs agent/api_server.py in process (httpx ASGI transport) on one compiled
+graph, against a real mcp-monitor process and the stub monitoring stack of
+a replay fixture (see bench_replay.py). Each session is one full scripted
+investigation — list alerts, metrics, runbooks, plan, answer — sent as a
+single POST /sessions/{id}/messages; `--concurrency` of them are in flight
+at a time. The scripted model sleeps `--llm-latency` per call and every call
+holds one of `--llm-concurrency` limiter slots, so the run shows how the LLM
+cap shapes throughput and latency.
+
+Reports sessions/sec and p50/p95/p99 investigation latency, plus the
+limiter's peak, the number of calls that waited for a slot and for how
+long. Turns are streamed (server-sent events) and every session's tool
+results are checked against the fixture's expectations; the default
+scenario only plans (dry run), so concurrent sessions don't race to
+restart the same container.
+
+Usage:
+    python benchmarks/bench_sessions.py [--scenario kafka-lag] [--sessions 50] [--concurrency 50]
+                                        [--llm-concurrency 8] [--llm-latency 0.2] [--latency 0.005]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from bench_replay import FIXTURES, TOKEN, MCPServer
+from common import percentile, run_load, use_agent
+from fake_llm import ScriptedChatModel
+from stubs import StubMonitoringStack
+
+
+async def investigate(client: httpx.AsyncClient, question: str) -> list:
+    """One session, one streamed turn; returns the turn's events."""
+    r = await client.post("/sessions")
+    r.raise_for_status()
+    session_id = r.json()["session_id"]
+    events = []
+    try:
+        async with client.stream("POST", f"/sessions/{session_id}/messages", params={"stream": "true"},
+                                 json={"content": question}) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if line.startswith("data: "):
+                    events.append(json.loads(line[6:]))
+        return events
+    finally:
+        await client.delete(f"/sessions/{session_id}")
+
+
+def check(events: list, fixture: dict) -> list:
+    """What is wrong with one session's events (as in bench_replay's checks)."""
+    results = [e for e in events if e["type"] == "tool_result"]
+    outputs = "\n".join(r["content"] for r in results)
+    problems = [e["detail"] for e in events if e["type"] == "error"]
+    problems += [f"missing {text!r} in tool output" for text in fixture.get("expect", {}).get("outputs", [])
+                 if text not in outputs]
+    problems += [f"{r['name']} failed: {r['content'][:80]}" for r in results
+                 if r["status"] != "success" or r["content"].lstrip().startswith("Error")]
+    if not any(e["type"] == "final" and e["content"] for e in events):
+        problems.append("no final answer")
+    return problems
+
+
+async def run(fixture: dict, mcp_url: str, args) -> dict:
+    use_agent()
+    import tools
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from api_server import SessionStore, create_app
+    from llm_limit import LimitedChatModel, LLMLimiter
+    from result_compaction import SessionPagers
+    from workflow import build_graph
+
+    tools.MCP_URL, tools.HEADERS = mcp_url, {"x-api-token": TOKEN}
+    tools._alert_state = {"version": None, "alerts": {}}
+    tools.RESULT_PAGERS = SessionPagers()
+
+    limiter = LLMLimiter(args.llm_concurrency)
+    llm = ScriptedChatModel(script=fixture["llm"], latency=args.llm_latency, per_conversation=True)
+    graph = build_graph(LimitedChatModel(llm, limiter), fast_triage=False, checkpointer=MemorySaver())
+    app = create_app(graph, limiter, SessionStore(max_sessions=args.concurrency), threads=args.threads)
+
+    failures = []
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://agent",
+                                     timeout=600) as client:
+
+            async def call():
+                problems = check(await investigate(client, fixture["question"]), fixture)
+                if problems:
+                    failures.append("; ".join(problems))
+
+            latencies, wall = await run_load(call, args.sessions, args.concurrency)
+            stats = (await client.get("/stats")).json()
+
+    return {
+        "sessions": len(latencies),
+        "sessions_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "wall_s": wall,
+        "llm": stats["llm"],
+        "turns": stats["turns"],
+        "overruns": llm.overruns,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", default="kafka-lag")
+    parser.add_argument("--sessions", type=int, default=50, help="investigations to run")
+    parser.add_argument("--concurrency", type=int, default=50, help="investigations in flight at a time")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="LLM limiter slots")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="scripted LLM time per call (s)")
+    parser.add_argument("--latency", type=float, default=0.005, help="stub upstream latency per request (s)")
+    parser.add_argument("--threads", type=int, default=64, help="executor threads for sync nodes and tools")
+    args = parser.parse_args()
+
+    fixture = json.loads((FIXTURES / f"{args.scenario}.json").read_text(encoding="utf-8"))
+    with StubMonitoringStack(fixture, latency=args.latency) as stack, MCPServer(stack.url) as mcp:
+        t0 = time.perf_counter()
+        r = asyncio.run(run(fixture, mcp.url, args))
+        total = time.perf_counter() - t0
+
+    llm = r["llm"]
+    print(f"scenario={args.scenario} sessions={r['sessions']} concurrency={args.concurrency} "
+          f"llm slots={args.llm_concurrency} llm latency={args.llm_latency * 1000:.0f}ms "
+          f"upstream latency={args.latency * 1000:.0f}ms")
+    print(f"{'sessions/s':>10s} {'p50 s':>7s} {'p95 s':>7s} {'p99 s':>7s} {'llm calls':>9s} {'peak':>5s} "
+          f"{'waited':>6s} {'wait avg':>8s} {'wait max':>8s} {'failed':>6s}")
+    print(f"{r['sessions_per_s']:10.2f} {r['p50_s']:7.2f} {r['p95_s']:7.2f} {r['p99_s']:7.2f} {llm['calls']:9d} "
+          f"{llm['peak']:5d} {llm['waited']:6d} {llm['wait_avg_s']:8.3f} {llm['wait_max_s']:8.3f} "
+          f"{r['turns']['failed'] + len(r['failures']):6d}")
+    print(f"total {total:.1f}s including mcp-monitor startup")
+    for failure in sorted(set(r["failures"]))[:10]:
+        print(f"    {failure}")
+    if r["overruns"]:
+        print(f"    {r['overruns']} LLM calls past the end of the script")
+    if r["failures"] or r["overruns"] or r["turns"]["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
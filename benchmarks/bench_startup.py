@@ -0,0 +1,150 @@
+"""
+Benchmark: agent cold start — import time per entry module, and what it pulls in.
+
+Every entry point (agents / graph for the CLI and Streamlit, api_server,
+triage_worker, and the tools/workflow modules underneath) is imported in a
+fresh interpreter `--repeat` times. For each one it reports the median import
+time, the packages that cost the most (self time from `python -X importtime`,
+summed per top-level package), and which of the heavy dependencies that
+should only load on first use (model SDK, docker, YAML, async SQLite) were
+imported anyway.
+
+First use is timed separately: compiling the graph around a scripted model
+(workflow.build_graph) and, when langchain_openai is installed, the first and
+the memoized second agents.get_agent().
+
+BUDGETS holds the startup budget: a max median import time and the modules
+that must stay unimported. The run exits non-zero when a module is over
+budget or loads a deferred dependency; `--scale` stretches the time budgets
+for slow machines (the deferred-import check does not depend on speed).
+
+Usage:
+    python benchmarks/bench_startup.py [--modules agents api_server] [--repeat 5] [--scale 1.0] [--top 6]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from common import AGENT_DIR
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imported on first use, never by importing an entry point
+SDKS = ["langchain_openai", "openai", "docker", "yaml", "aiosqlite"]
+
+# module -> (max median import ms, modules that must not be imported)
+BUDGETS = {
+    "agents": (150, SDKS + ["langgraph", "langchain_core", "tools", "workflow"]),
+    "graph": (150, SDKS + ["langgraph", "langchain_core", "tools", "workflow"]),
+    "tools": (3000, SDKS),
+    "workflow": (3000, SDKS),
+    "api_server": (4000, SDKS + ["tools", "workflow"]),
+    "triage_worker": (3000, SDKS + ["tools", "workflow"]),
+}
+
+IMPORT = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - t0) * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+FIRST_USE = """
+import json, sys, time
+sys.path.insert(0, {bench_dir!r})
+from fake_llm import ScriptedChatModel
+import workflow
+t0 = time.perf_counter()
+workflow.build_graph(ScriptedChatModel(script=[]), fast_triage=False)
+out = {{"build_graph_ms": (time.perf_counter() - t0) * 1000}}
+try:
+    import langchain_openai  # noqa: F401
+except ImportError:
+    pass
+else:
+    import agents
+    t0 = time.perf_counter()
+    first = agents.get_agent()
+    out["get_agent_first_ms"] = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    out["get_agent_again_same"] = agents.get_agent() is first
+    out["get_agent_again_ms"] = (time.perf_counter() - t0) * 1000
+print(json.dumps(out))
+"""
+
+
+def python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    # Env vars the agent reads at import time keep their defaults; -W ignore keeps stderr to importtime lines
+    return subprocess.run([sys.executable, *flags, "-W", "ignore", "-c", code], cwd=AGENT_DIR,
+                          capture_output=True, text=True, check=True)
+
+
+def import_profile(module: str, top: int) -> list:
+    """[(package, self ms)] of the `top` most expensive top-level packages while importing `module`."""
+    stderr = python(f"import {module}", "-X", "importtime").stderr
+    by_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+    ranked = sorted(by_package.items(), key=lambda kv: -kv[1])[:top]
+    return [(name, us / 1000) for name, us in ranked]
+
+
+def measure(module: str, repeat: int, top: int) -> dict:
+    runs = [json.loads(python(IMPORT.format(module=module)).stdout.splitlines()[-1]) for _ in range(repeat)]
+    loaded = set(runs[-1]["modules"])
+    budget_ms, deferred = BUDGETS.get(module, (None, SDKS))
+    return {
+        "module": module,
+        "import_ms": statistics.median(r["ms"] for r in runs),
+        "modules": len(loaded),
+        "budget_ms": budget_ms,
+        "eager": [m for m in deferred if m in loaded],
+        "profile": import_profile(module, top),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs="+", default=list(BUDGETS))
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the import time budgets")
+    parser.add_argument("--top", type=int, default=6, help="packages listed per module")
+    args = parser.parse_args()
+
+    rows = [measure(module, args.repeat, args.top) for module in args.modules]
+    problems = []
+    print(f"{'module':15s} {'import ms':>9s} {'budget':>7s} {'modules':>7s}  heaviest packages (self ms)")
+    for r in rows:
+        budget = r["budget_ms"] * args.scale if r["budget_ms"] else None
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in r["profile"])
+        print(f"{r['module']:15s} {r['import_ms']:9.0f} {budget or 0:7.0f} {r['modules']:7d}  {heaviest}")
+        if budget and r["import_ms"] > budget:
+            problems.append(f"{r['module']}: import took {r['import_ms']:.0f}ms > budget {budget:.0f}ms")
+        if r["eager"]:
+            problems.append(f"{r['module']}: imports {', '.join(r['eager'])} at import time")
+
+    first_use = json.loads(python(FIRST_USE.format(bench_dir=BENCH_DIR)).stdout.splitlines()[-1])
+    print(f"\nfirst use: workflow.build_graph {first_use['build_graph_ms']:.0f}ms", end="")
+    if "get_agent_first_ms" in first_use:
+        print(f", agents.get_agent() {first_use['get_agent_first_ms']:.0f}ms, "
+              f"again {first_use['get_agent_again_ms']:.3f}ms")
+        if not first_use["get_agent_again_same"]:
+            problems.append("agents.get_agent() built a second graph")
+    else:
+        print(" (langchain_openai not installed: agents.get_agent() not timed)")
+
+    for problem in problems:
+        print(f"OVER BUDGET {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
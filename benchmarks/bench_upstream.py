@@ -0,0 +1,87 @@
+"""
+Load benchmark: /tools/query_range before (sync handler + requests, new TCP
+connection per call) vs after (async handler + pooled keep-alive client),
+both against a local stub Prometheus.
+
+Usage:
+    python benchmarks/bench_upstream.py [--total 2000] [--concurrency 64] [--latency 0.02]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+import requests
+from fastapi import FastAPI, Header
+
+from common import use_mcp_app, run_load, summarize, print_table
+from stubs import StubPrometheus
+
+TOKEN = "bench"
+
+
+def legacy_app(prom_url: str) -> FastAPI:
+    """The pre-pool query_range handler, kept verbatim for comparison."""
+    from server import QueryRangeReq, auth
+
+    app = FastAPI()
+
+    @app.post("/tools/query_range")
+    def query_range(req: QueryRangeReq, x_api_token: str | None = Header(default=None)):
+        auth(x_api_token)
+        now = time.time()
+        start = req.start or (now - 15 * 60)
+        end = req.end or now
+        r = requests.get(
+            f"{prom_url}/api/v1/query_range",
+            params={"query": req.query, "start": start, "end": end, "step": req.step},
+            timeout=10,
+        )
+        r.raise_for_status()
+        return r.json()
+
+    return app
+
+
+async def bench(name: str, app: FastAPI, total: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+        async def call():
+            r = await client.post("/tools/query_range", json={"query": "up", "step": "30s"},
+                                  headers={"x-api-token": TOKEN})
+            r.raise_for_status()
+
+        latencies, wall = await run_load(call, total, concurrency)
+    return summarize(name, latencies, wall)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--total", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub Prometheus latency (s)")
+    args = parser.parse_args()
+
+    with StubPrometheus(latency=args.latency) as prom:
+        os.environ["PROMETHEUS_URL"] = prom.url
+        os.environ["API_TOKEN"] = TOKEN
+        use_mcp_app()
+        import server
+
+        async def run_all():
+            rows = [
+                await bench("before: sync + requests", legacy_app(prom.url), args.total, args.concurrency),
+                await bench("after: async + pooled httpx", server.app, args.total, args.concurrency),
+            ]
+            await server.upstreams.aclose()
+            return rows
+
+        rows = asyncio.run(run_all())
+
+    print(f"stub latency={args.latency * 1000:.0f}ms concurrency={args.concurrency}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
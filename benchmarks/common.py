@@ -0,0 +1,65 @@
+"""
+Shared helpers for the benchmark scripts: import paths, load generation, reporting.
+"""
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MCP_APP_DIR = os.path.join(ROOT, "mcp-monitor", "app")
+AGENT_DIR = os.path.join(ROOT, "agent")
+
+
+def use_mcp_app():
+    """Make mcp-monitor/app modules (server, upstream, ...) importable."""
+    if MCP_APP_DIR not in sys.path:
+        sys.path.insert(0, MCP_APP_DIR)
+
+
+def use_agent():
+    """Make agent modules (tools, agents, ...) importable."""
+    if AGENT_DIR not in sys.path:
+        sys.path.insert(0, AGENT_DIR)
+
+
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(name: str, latencies: list, wall: float) -> dict:
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_table(rows: list):
+    print(f"{'case':32s} {'reqs':>6s} {'req/s':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for r in rows:
+        print(f"{r['name']:32s} {r['requests']:6d} {r['rps']:9.1f} "
+              f"{r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f}")
+
+
+async def run_load(call, total: int, concurrency: int) -> tuple[list, float]:
+    """Fire `total` calls of the coroutine factory `call` with `concurrency` workers."""
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            t0 = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - t0
@@ -0,0 +1,131 @@
+"""
+Scripted chat model for offline replays of the agent.
+
+Plays back a fixed list of assistant turns (text and/or tool calls), one per
+LLM call, streaming the text word by word like a real provider. Token usage
+is estimated the same way memory.py budgets history (chars / 4) for the
+prompt the graph actually sent, plus the bound tool schemas, so prompt-size
+regressions show up without a live model.
+
+With per_conversation=True every conversation plays the script from the top
+(the turn is picked by the number of assistant messages since the last user
+message), so many sessions can share one model. The async methods wait with
+asyncio.sleep, like a provider's async HTTP client.
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Iterator, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+from common import use_agent
+
+use_agent()
+from memory import CHARS_PER_TOKEN, estimate_tokens
+
+EXHAUSTED = "(replay script exhausted)"
+
+
+def turn_message(turn: dict, index: int) -> AIMessage:
+    """Fixture turn {"content": ..., "tool_calls": [{"name", "args"}]} -> AIMessage."""
+    calls = [{"name": tc["name"], "args": tc.get("args", {}), "id": f"call_{index}_{i}"}
+             for i, tc in enumerate(turn.get("tool_calls", []))]
+    return AIMessage(content=turn.get("content", ""), tool_calls=calls)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    script:        assistant turns, played in order
+    latency:       seconds before the first token (time to first token)
+    token_latency: seconds per generated token
+    per_conversation: pick the turn from the conversation instead of a global call counter
+    """
+
+    script: List[dict]
+    latency: float = 0.0
+    token_latency: float = 0.0
+    per_conversation: bool = False
+    tool_schema_tokens: int = 0
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    overruns: int = 0
+    prompts: List[int] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        # Real providers send the tool schemas with every request; count them once here
+        schemas = json.dumps([convert_to_openai_tool(t) for t in tools])
+        self.tool_schema_tokens = len(schemas) // CHARS_PER_TOKEN
+        return self
+
+    def _next(self, messages) -> AIMessage:
+        prompt = estimate_tokens(messages) + self.tool_schema_tokens
+        self.prompts.append(prompt)
+        self.input_tokens += prompt
+        turn = self.calls
+        if self.per_conversation:
+            last_user = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+            turn = sum(1 for m in messages[last_user + 1:] if m.type == "ai")
+        if turn < len(self.script):
+            message = turn_message(self.script[turn], turn)
+        else:
+            self.overruns += 1
+            message = AIMessage(content=EXHAUSTED)
+        self.calls += 1
+        self.output_tokens += estimate_tokens([message])
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._next(messages)
+        time.sleep(self.latency + self.token_latency * estimate_tokens([message]))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _words(self, message: AIMessage) -> tuple:
+        words = message.content.split(" ") if message.content else []
+        return words, self.token_latency * estimate_tokens([message]) / max(len(words), 1)
+
+    @staticmethod
+    def _tool_chunk(message: AIMessage) -> ChatGenerationChunk:
+        return ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+            {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+            for i, tc in enumerate(message.tool_calls)]))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._next(messages)
+        time.sleep(self.latency)
+        words, per_word = self._words(message)
+        for i, word in enumerate(words):
+            time.sleep(per_word)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + word))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield self._tool_chunk(message)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._next(messages)
+        await asyncio.sleep(self.latency + self.token_latency * estimate_tokens([message]))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._next(messages)
+        await asyncio.sleep(self.latency)
+        words, per_word = self._words(message)
+        for i, word in enumerate(words):
+            await asyncio.sleep(per_word)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield self._tool_chunk(message)
@@ -0,0 +1,306 @@
+"""
+Local stub upstreams for the benchmarks — no Docker stack needed.
+
+StubPrometheus serves canned /api/v1/* responses over HTTP/1.1 keep-alive
+with a configurable per-request latency, plus an optional per-evaluation-step
+cost, that stand in for query evaluation. StubGrafana keeps uploaded
+dashboards so they can be read back. StubMonitoringStack replays a recorded
+incident (alerts + metric series) as Prometheus, Alertmanager and Grafana;
+StubDockerClient is an in-process fake Docker daemon for the remediation tools.
+The HTTP stubs run in a forked process so they do not compete with the code under
+test for the GIL.
+"""
+import hashlib
+import json
+import multiprocessing
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def matrix_payload(series: int = 5, points: int = 31, start: float = 0.0, step: float = 30.0) -> dict:
+    result = []
+    for i in range(series):
+        result.append({
+            "metric": {"__name__": "up", "job": f"job-{i}", "instance": f"host-{i}:9100"},
+            "values": [[start + n * step, str(float(i + n % 3))] for n in range(points)],
+        })
+    return {"status": "success", "data": {"resultType": "matrix", "result": result}}
+
+
+def vector_payload(series: int = 5, at: float = 0.0) -> dict:
+    result = [{"metric": {"__name__": "up", "job": f"job-{i}", "instance": f"host-{i}:9100"},
+               "value": [at, str(float(i))]} for i in range(series)]
+    return {"status": "success", "data": {"resultType": "vector", "result": result}}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops SYNs under load
+
+
+class StubPrometheus:
+    """Threaded HTTP server pretending to be Prometheus."""
+
+    def __init__(self, latency: float = 0.02, series: int = 5, per_step: float = 0.0):
+        self.latency = latency
+        self.series = series
+        self.per_step = per_step
+        self._requests = multiprocessing.Value("i", 0)
+        self._bytes = multiprocessing.Value("q", 0)
+        self.routes = {
+            "/api/v1/query_range": self._query_range,
+            "/api/v1/query": self._query,
+            "/api/v1/alerts": lambda params: {"status": "success", "data": {"alerts": []}},
+            "/-/reload": lambda params: {},
+        }
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._proc = multiprocessing.get_context("fork").Process(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        """Number of upstream requests served so far."""
+        return self._requests.value
+
+    @property
+    def bytes_sent(self) -> int:
+        """Response body bytes served so far."""
+        return self._bytes.value
+
+    def _query_range(self, params: dict) -> dict:
+        start = float(params.get("start", [0])[0])
+        end = float(params.get("end", [start])[0])
+        step = float(str(params.get("step", ["30"])[0]).rstrip("s"))
+        points = max(int((end - start) // step) + 1, 1)
+        time.sleep(self.per_step * points)  # range queries evaluate the expression once per step
+        return matrix_payload(self.series, points, start, step)
+
+    def _query(self, params: dict) -> dict:
+        time.sleep(self.per_step)
+        return vector_payload(self.series, float(params.get("time", [time.time()])[0]))
+
+    def _dispatch(self, method: str, path: str, params: dict, payload) -> tuple[int, object]:
+        route = self.routes.get(path)
+        if route is None:
+            return 404, {"status": "error"}
+        return 200, route(params)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length)) if length else None
+                url = urlparse(self.path)
+                with stub._requests.get_lock():
+                    stub._requests.value += 1
+                time.sleep(stub.latency)
+                status, data = stub._dispatch(self.command, url.path, parse_qs(url.query), payload)
+                body = json.dumps(data).encode()
+                with stub._bytes.get_lock():
+                    stub._bytes.value += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._proc.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._proc.terminate()
+        self._proc.join()
+        self._server.server_close()
+
+
+class StubGrafana(StubPrometheus):
+    """
+    Stateful stand-in for the Grafana dashboard API (search, get by uid, save).
+    Dashboards live in the forked server process; `uploads` counts saves.
+    """
+
+    def __init__(self, latency: float = 0.02):
+        super().__init__(latency=latency, series=0)
+        self._uploads = multiprocessing.Value("i", 0)
+        self._stored: dict[str, dict] = {}
+
+    @property
+    def uploads(self) -> int:
+        return self._uploads.value
+
+    def _dispatch(self, method: str, path: str, params: dict, payload) -> tuple[int, object]:
+        if path == "/api/search":
+            query = params.get("query", [""])[0].lower()
+            return 200, [{"uid": uid, "title": d.get("title")} for uid, d in self._stored.items()
+                         if query in str(d.get("title", "")).lower()]
+        if path.startswith("/api/dashboards/uid/"):
+            found = self._stored.get(path.rsplit("/", 1)[1])
+            if found is None:
+                return 404, {"message": "Dashboard not found"}
+            return 200, {"dashboard": found, "meta": {"folderUid": "", "version": found["version"]}}
+        if path == "/api/dashboards/db" and method == "POST":
+            with self._uploads.get_lock():
+                self._uploads.value += 1
+            dashboard = payload["dashboard"]
+            uid = dashboard.get("uid") or f"stub-{len(self._stored)}"
+            version = self._stored.get(uid, {}).get("version", 0) + 1
+            self._stored[uid] = {**dashboard, "uid": uid, "id": len(self._stored) + 1, "version": version}
+            return 200, {"status": "success", "uid": uid, "version": version}
+        return super()._dispatch(method, path, params, payload)
+
+
+class StubMonitoringStack(StubGrafana):
+    """
+    Prometheus + Alertmanager + Grafana on one port, replaying a recorded incident:
+
+        fixture["alerts"]   Prometheus /api/v1/alerts entries (also served as v2 groups)
+        fixture["metrics"]  {promql: [{"metric": {...}, "values": [v0, v1, ...]}]}
+
+    Instant queries return each series' last value; range queries stretch the
+    recorded values over the requested window. Unknown queries return no data.
+    """
+
+    def __init__(self, fixture: dict, latency: float = 0.005):
+        super().__init__(latency=latency)
+        self.fixture = fixture
+        self._metrics = {" ".join(q.split()): series for q, series in fixture.get("metrics", {}).items()}
+
+    def _series(self, params: dict) -> list:
+        return self._metrics.get(" ".join(params.get("query", [""])[0].split()), [])
+
+    def _alert_groups(self, params: dict) -> list:
+        """Fixture alerts as Alertmanager v2 groups (by service), all active; label filters applied."""
+        groups: dict = {}
+        for alert in self.fixture.get("alerts", []):
+            labels = alert["labels"]
+            if not all(self._matches(labels, f) for f in params.get("filter", [])):
+                continue
+            receiver = "critical" if labels.get("severity") == "critical" else "default"
+            if not re.fullmatch(params.get("receiver", [".*"])[0], receiver):
+                continue
+            group = groups.setdefault((labels.get("service", ""), receiver), {
+                "labels": {"service": labels.get("service", "")}, "receiver": {"name": receiver}, "alerts": []})
+            fingerprint = hashlib.sha1(json.dumps(labels, sort_keys=True).encode()).hexdigest()[:16]
+            group["alerts"].append({
+                "labels": labels, "annotations": alert.get("annotations", {}), "startsAt": alert.get("activeAt"),
+                "fingerprint": fingerprint, "receivers": [{"name": receiver}],
+                "status": {"state": "active", "silencedBy": [], "inhibitedBy": []}})
+        return list(groups.values())
+
+    @staticmethod
+    def _matches(labels: dict, matcher: str) -> bool:
+        name, op, value = re.match(r'(\w+)(=~|!~|!=|=)"(.*)"$', matcher).groups()
+        actual = labels.get(name, "")
+        matched = re.fullmatch(value, actual) is not None if "~" in op else actual == value
+        return matched != op.startswith("!")
+
+    def _dispatch(self, method: str, path: str, params: dict, payload) -> tuple[int, object]:
+        if path == "/api/v1/alerts":
+            return 200, {"status": "success", "data": {"alerts": self.fixture.get("alerts", [])}}
+        if path == "/api/v1/query":
+            at = float(params.get("time", [time.time()])[0])
+            result = [{"metric": s["metric"], "value": [at, str(s["values"][-1])]} for s in self._series(params)]
+            return 200, {"status": "success", "data": {"resultType": "vector", "result": result}}
+        if path == "/api/v1/query_range":
+            start = float(params["start"][0])
+            end = float(params.get("end", [start])[0])
+            step = float(str(params.get("step", ["30"])[0]).rstrip("s"))
+            points = max(int((end - start) // step) + 1, 1)
+            result = []
+            for s in self._series(params):
+                values = s["values"]
+                result.append({"metric": s["metric"], "values": [
+                    [start + n * step, str(values[min(n * len(values) // points, len(values) - 1)])]
+                    for n in range(points)]})
+            return 200, {"status": "success", "data": {"resultType": "matrix", "result": result}}
+        if path == "/api/v2/alerts/groups":
+            return 200, self._alert_groups(params)
+        if path.startswith("/api/v2/alerts"):
+            return 200, []
+        if path == "/api/health":
+            return 200, {"database": "ok"}
+        return super()._dispatch(method, path, params, payload)
+
+
+class StubContainer:
+
+    def __init__(self, name: str, status: str = "running", restart_seconds: float = 0.05):
+        self.id = f"{abs(hash(name)):012x}"
+        self.name = name
+        self.restart_seconds = restart_seconds
+        self.restarts = 0
+        self.attrs = {"State": {"Status": status}}
+
+    def restart(self, timeout=None):
+        time.sleep(self.restart_seconds)
+        self.restarts += 1
+        self.attrs = {"State": {"Status": "running"}}
+
+    def reload(self):
+        pass
+
+
+class StubDockerClient:
+    """In-process stand-in for docker.DockerClient: containers.get(), api.restart/inspect_container(), events()."""
+
+    def __init__(self, containers: dict, restart_seconds: float = 0.05):
+        """containers: {name: status}, e.g. {"kafka": "exited", "zookeeper": "running"}"""
+        self.by_name = {n: StubContainer(n, status, restart_seconds) for n, status in containers.items()}
+        self.containers = self
+        self.api = self
+        self._closed = threading.Event()
+
+    def restart(self, ref: str, timeout=None):
+        self.get(ref).restart(timeout=timeout)
+
+    def inspect_container(self, ref: str) -> dict:
+        return self.get(ref).attrs
+
+    def get(self, ref: str):
+        import docker
+
+        for c in self.by_name.values():
+            if ref in (c.id, c.name):
+                return c
+        raise docker.errors.NotFound(f"No such container: {ref}")
+
+    def events(self, decode=True, filters=None):
+        client = self
+
+        class Events:
+            def __iter__(self):
+                client._closed.wait()
+                return iter(())
+
+            def close(self):
+                client._closed.set()
+
+        return Events()
+
+    def close(self):
+        self._closed.set()
+
+    @property
+    def restarted(self) -> list:
+        return sorted(n for n, c in self.by_name.items() if c.restarts)
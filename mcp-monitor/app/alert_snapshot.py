@@ -0,0 +1,151 @@
+"""
+Versioned, fingerprint-indexed snapshot of the active alerts.
+
+The snapshot is refreshed in the background (and on demand when stale). Every
+refresh that adds, changes or resolves an alert bumps `version` and appends to
+a bounded change log, so clients can ask for "what changed since version N"
+instead of re-downloading the full alert list, and can long-poll / stream
+until the next change.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import deque
+
+
+def fingerprint(labels: dict) -> str:
+    """Stable identity of an alert: alertname + full label set."""
+    raw = json.dumps(labels, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _state_of(alert: dict) -> tuple:
+    # `value` changes on every evaluation; only track what changes an alert's meaning
+    return alert.get("state"), alert.get("activeAt"), json.dumps(alert.get("annotations", {}), sort_keys=True)
+
+
+class AlertSnapshot:
+
+    def __init__(self, fetch, interval: float = 10.0, log_size: int = 1000):
+        """
+        fetch:    async callable returning the list of alerts, in Prometheus /api/v1/alerts format
+        interval: seconds between background refreshes; also the staleness bound for on-demand refresh
+        log_size: how many versions of changes are kept for `since=` queries
+        """
+        self._fetch = fetch
+        self.interval = interval
+        self.version = 0
+        self.alerts: dict[str, dict] = {}
+        self.refreshed_at = 0.0
+        self._log: deque = deque(maxlen=log_size)  # (version, [(kind, fingerprint, alert), ...])
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+
+    # ---- refresh -----------------------------------------------------------
+
+    async def refresh(self) -> int:
+        """Fetch alerts once and fold the differences into the snapshot. Returns the new version."""
+        async with self._lock:
+            return await self._refresh_locked()
+
+    async def _refresh_locked(self) -> int:
+        current = {}
+        for alert in await self._fetch():
+            alert["fingerprint"] = fingerprint(alert.get("labels", {}))
+            current[alert["fingerprint"]] = alert
+        changes = []
+        for fp, alert in current.items():
+            old = self.alerts.get(fp)
+            if old is None:
+                changes.append(("added", fp, alert))
+            elif _state_of(old) != _state_of(alert):
+                changes.append(("changed", fp, alert))
+        for fp, alert in self.alerts.items():
+            if fp not in current:
+                changes.append(("resolved", fp, alert))
+
+        self.alerts = current
+        self.refreshed_at = time.monotonic()
+        if changes:
+            self.version += 1
+            self._log.append((self.version, changes))
+            async with self._changed:
+                self._changed.notify_all()
+        return self.version
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.refreshed_at >= self.interval
+
+    async def ensure_fresh(self):
+        """Refresh inline if the background loop is not running or has fallen behind."""
+        if self.is_stale():
+            async with self._lock:
+                # Concurrent callers queue on the lock; only the first one refetches
+                if self.is_stale():
+                    await self._refresh_locked()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[alert-snapshot] refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---- queries -----------------------------------------------------------
+
+    def full(self) -> dict:
+        return {"version": self.version, "full": True, "alerts": list(self.alerts.values())}
+
+    def since(self, version: int) -> dict:
+        """Added / changed / resolved alerts after `version` (full snapshot if the log no longer covers it)."""
+        oldest = self._log[0][0] if self._log else self.version + 1
+        if version > self.version or (version < self.version and version < oldest - 1):
+            # Unknown (e.g. server restarted) or too old for the log: resend everything
+            return {"version": self.version, "full": True,
+                    "added": list(self.alerts.values()), "changed": [], "resolved": []}
+
+        latest: dict[str, tuple] = {}
+        for v, changes in self._log:
+            if v <= version:
+                continue
+            for kind, fp, alert in changes:
+                first_kind = latest[fp][0] if fp in latest else kind
+                latest[fp] = (first_kind, kind, alert)
+
+        added, changed, resolved = [], [], []
+        for fp, (first_kind, kind, alert) in latest.items():
+            if kind == "resolved":
+                if first_kind != "added":  # appeared and vanished in between: client never saw it
+                    resolved.append({"fingerprint": fp, "labels": alert.get("labels", {})})
+            elif first_kind == "added":
+                added.append(alert)
+            else:
+                changed.append(alert)
+        return {"version": self.version, "full": False, "added": added, "changed": changed, "resolved": resolved}
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Block until the snapshot moves past `version` or `timeout` elapses."""
+        if self.version > version:
+            return True
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.version > version), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
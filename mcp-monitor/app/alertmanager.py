@@ -0,0 +1,95 @@
+"""
+Alert listing from Alertmanager's v2 API (/api/v2/alerts/groups).
+
+Prometheus' /api/v1/alerts returns every rule-evaluation alert, including
+pending ones and alerts that are silenced or inhibited (e.g. Kafka lag while
+the broker is down). Alertmanager knows which of them are actionable, routes
+them to receivers (default / critical / slo) and filters server-side, so the
+agent only downloads what it should act on.
+
+- group_params(): Alertmanager query parameters for a state (active /
+  suppressed / all), severities, receivers and label matchers.
+- to_prometheus(): v2 alert -> the /api/v1/alerts shape the agent already
+  understands (labels, annotations, state, activeAt), plus its receivers and
+  what silences/inhibits it.
+- flatten() / compact_groups(): alerts deduplicated across groups (one alert
+  can be routed to several receivers), or kept per group.
+"""
+import re
+
+# state -> the active/silenced/inhibited filters of /api/v2/alerts/groups (it has no unprocessed filter)
+STATES = {
+    # Firing and neither silenced nor inhibited: what someone should act on
+    "active": {"active": "true", "silenced": "false", "inhibited": "false"},
+    "suppressed": {"active": "false", "silenced": "true", "inhibited": "true"},
+    "all": {"active": "true", "silenced": "true", "inhibited": "true"},
+}
+
+_MATCHER = re.compile(r'^\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*(=~|!~|!=|=)\s*"?(.*?)"?\s*$')
+
+
+class AlertFilterError(ValueError):
+    pass
+
+
+def parse_matcher(text: str) -> str:
+    """'service=kafka' / 'severity =~ "critical|warning"' -> Alertmanager filter 'service="kafka"'."""
+    m = _MATCHER.match(text)
+    if not m or not m.group(3):
+        raise AlertFilterError(f"Invalid label matcher '{text}'; expected e.g. service=kafka or job=~\"spark.*\"")
+    name, op, value = m.groups()
+    return f'{name}{op}"{value}"'
+
+
+def group_params(state: str = "active", severity: list[str] | None = None, receiver: list[str] | None = None,
+                 matchers: list[str] | None = None) -> list[tuple[str, str]]:
+    """Query parameters for GET /api/v2/alerts/groups; raises AlertFilterError."""
+    if state not in STATES:
+        raise AlertFilterError(f"Unknown state '{state}'. Use {', '.join(STATES)}.")
+    params = list(STATES[state].items())
+    for matcher in matchers or []:
+        params.append(("filter", parse_matcher(matcher)))
+    if severity:
+        params.append(("filter", f'severity=~"{"|".join(re.escape(s) for s in severity)}"'))
+    if receiver:
+        # Alertmanager matches the receiver name against this regex
+        params.append(("receiver", f'^(?:{"|".join(re.escape(r) for r in receiver)})$'))
+    return params
+
+
+def to_prometheus(alert: dict) -> dict:
+    status = alert.get("status", {})
+    state = status.get("state", "active")
+    out = {
+        "labels": alert.get("labels", {}),
+        "annotations": alert.get("annotations", {}),
+        "state": "firing" if state == "active" else state,
+        "activeAt": alert.get("startsAt"),
+        "receivers": sorted(r["name"] for r in alert.get("receivers", [])),
+    }
+    if status.get("silencedBy"):
+        out["silencedBy"] = status["silencedBy"]
+    if status.get("inhibitedBy"):
+        out["inhibitedBy"] = status["inhibitedBy"]
+    return out
+
+
+def flatten(groups: list) -> list[dict]:
+    """Alerts of all groups, each once; receivers merged for alerts routed more than once."""
+    alerts: dict[str, dict] = {}
+    for group in groups:
+        for alert in group.get("alerts", []):
+            key = alert.get("fingerprint") or repr(sorted(alert.get("labels", {}).items()))
+            converted = to_prometheus(alert)
+            if key in alerts:
+                alerts[key]["receivers"] = sorted(set(alerts[key]["receivers"]) | set(converted["receivers"]))
+            else:
+                alerts[key] = converted
+    return list(alerts.values())
+
+
+def compact_groups(groups: list) -> list[dict]:
+    """Groups as Alertmanager routed them: group labels, receiver and converted alerts."""
+    return [{"labels": g.get("labels", {}), "receiver": g.get("receiver", {}).get("name"),
+             "alerts": [to_prometheus(a) for a in g.get("alerts", [])]}
+            for g in groups if g.get("alerts")]
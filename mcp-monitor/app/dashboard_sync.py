@@ -0,0 +1,166 @@
+"""
+Bulk Grafana dashboard sync.
+
+Each dashboard is hashed after normalization (sorted keys, without the fields
+Grafana rewrites on every save: id, uid, version, iteration) and compared with
+the copy Grafana currently serves; only new or changed dashboards are
+uploaded. Lookups and uploads run concurrently through the pooled Grafana
+client, and every dashboard gets its own outcome and timings, so one bad file
+does not fail the whole batch.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+
+# Rewritten by Grafana on save (or by exports), not part of the content
+VOLATILE_KEYS = ("id", "uid", "version", "iteration")
+
+
+class DashboardSyncError(Exception):
+    pass
+
+
+def normalize(dashboard: dict) -> dict:
+    return {k: v for k, v in dashboard.items() if k not in VOLATILE_KEYS}
+
+
+def dashboard_hash(dashboard: dict) -> str:
+    blob = json.dumps(normalize(dashboard), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def load_dashboards(paths: list[str], root: Path) -> list[tuple[str, dict | Exception]]:
+    """
+    (name, dashboard) for every *.json under `paths` (files or directories,
+    searched recursively), relative to `root`; paths outside `root` are refused.
+    A file that cannot be parsed yields (name, exception) instead.
+    """
+    root = root.resolve()
+    files = []
+    for raw in paths:
+        path = (root / raw).resolve()
+        if path != root and root not in path.parents:
+            raise DashboardSyncError(f"'{raw}' is outside {root}")
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.json")))
+        elif path.is_file():
+            files.append(path)
+        else:
+            raise DashboardSyncError(f"'{raw}' not found under {root}")
+
+    loaded, seen = [], set()
+    for path in files:
+        if path in seen:
+            continue
+        seen.add(path)
+        name = str(path.relative_to(root))
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            # Accept both bare dashboards and {"dashboard": ..., "meta": ...} exports
+            if "dashboard" in data and "panels" not in data:
+                data = data["dashboard"]
+            if not isinstance(data, dict):
+                raise DashboardSyncError("not a dashboard object")
+            loaded.append((name, data))
+        except (ValueError, DashboardSyncError) as e:
+            loaded.append((name, e))
+    return loaded
+
+
+def _ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 2)
+
+
+class DashboardSync:
+
+    def __init__(self, request, concurrency: int = 8):
+        """
+        request:     async (method, url, **kwargs) -> httpx.Response against Grafana
+        concurrency: dashboards looked up / uploaded at the same time
+        """
+        self._request = request
+        self.concurrency = concurrency
+
+    async def current(self, dashboard: dict) -> tuple[dict | None, dict]:
+        """(dashboard, meta) Grafana currently serves for this one, or (None, {}) if it has none."""
+        uid = dashboard.get("uid")
+        if not uid:
+            # No uid: Grafana matches by title on overwrite, so look it up the same way
+            r = await self._request("GET", "/api/search", params={"query": dashboard.get("title", ""),
+                                                                 "type": "dash-db"})
+            r.raise_for_status()
+            uid = next((hit["uid"] for hit in r.json() if hit.get("title") == dashboard.get("title")), None)
+            if uid is None:
+                return None, {}
+        r = await self._request("GET", f"/api/dashboards/uid/{uid}")
+        if r.status_code == 404:
+            return None, {}
+        r.raise_for_status()
+        body = r.json()
+        return body.get("dashboard"), body.get("meta", {})
+
+    async def _upload(self, dashboard: dict, folder_uid: str | None) -> dict:
+        payload = {"dashboard": {**dashboard, "id": None}, "overwrite": True}
+        if folder_uid is not None:
+            payload["folderUid"] = folder_uid
+        r = await self._request("POST", "/api/dashboards/db", json=payload)
+        if r.status_code not in (200, 202):
+            raise DashboardSyncError(f"Grafana returned {r.status_code}: {r.text[:200]}")
+        return r.json() if r.text else {}
+
+    async def sync_one(self, name: str, dashboard: dict, folder_uid: str | None = None,
+                       dry_run: bool = False, force: bool = False) -> dict:
+        started = time.perf_counter()
+        digest = dashboard_hash(dashboard)
+        result = {"name": name, "title": dashboard.get("title"), "uid": dashboard.get("uid"), "hash": digest[:12]}
+        try:
+            remote, meta = await self.current(dashboard)
+            result["lookup_ms"] = _ms(started)
+            moved = folder_uid is not None and meta.get("folderUid", "") != folder_uid
+            if remote is not None and not force and not moved and dashboard_hash(remote) == digest:
+                result["outcome"] = "unchanged"
+            else:
+                action = "created" if remote is None else "updated"
+                if dry_run:
+                    result["outcome"] = f"would_{action[:-1]}"
+                else:
+                    uploaded = time.perf_counter()
+                    saved = await self._upload(dashboard, folder_uid)
+                    result.update(outcome=action, upload_ms=_ms(uploaded),
+                                  uid=saved.get("uid", result["uid"]), version=saved.get("version"))
+        except Exception as e:
+            result.update(outcome="error", error=str(e) or type(e).__name__)
+        result["total_ms"] = _ms(started)
+        return result
+
+    async def sync(self, dashboards: list[tuple[str, dict | Exception]], folder_uid: str | None = None,
+                   dry_run: bool = False, force: bool = False) -> dict:
+        """Sync (name, dashboard) pairs concurrently; results keep the input order."""
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        claimed: dict[str, str] = {}
+
+        async def one(name, dashboard):
+            if isinstance(dashboard, Exception):
+                return {"name": name, "outcome": "error", "error": f"invalid dashboard: {dashboard}"}
+            # Two files for the same dashboard would race each other's overwrite
+            key = dashboard.get("uid") or f"title:{dashboard.get('title')}"
+            if claimed.setdefault(key, name) != name:
+                return {"name": name, "title": dashboard.get("title"), "uid": dashboard.get("uid"),
+                        "outcome": "error", "error": f"same dashboard as {claimed[key]}"}
+            async with slots:
+                return await self.sync_one(name, dashboard, folder_uid, dry_run, force)
+
+        results = await asyncio.gather(*(one(name, d) for name, d in dashboards))
+        outcomes: dict[str, int] = {}
+        for r in results:
+            outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+        return {
+            "status": "error" if outcomes.get("error") else "ok",
+            "dashboards": len(results),
+            "outcomes": outcomes,
+            "elapsed_ms": _ms(started),
+            "results": results,
+        }
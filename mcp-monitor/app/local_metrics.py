@@ -0,0 +1,256 @@
+"""
+Local copy of the hot metrics, scraped in the background.
+
+A fixed set of PromQL expressions (LOCAL_METRICS_EXPRESSIONS) is evaluated
+against Prometheus every `interval` seconds. All series of one expression are
+scraped at the same timestamp, so each expression keeps an ExpressionRing:
+one circular float64 array of scrape timestamps plus one fixed-size row of
+values per series (a 2-D NumPy array, NaN where a series was absent; a NaN
+sample therefore counts as absent too). Memory per series is 8 bytes *
+capacity, no matter how long the server runs, and no Python object is
+created per sample.
+
+Range and instant queries for those expressions, within the retained window,
+are answered from memory. Every scrape is already an evaluated instant query,
+so Prometheus' own lookback and staleness handling have been applied: a step
+is answered by the scrape that covers it (the newest one at most `interval`
+before it), and a series missing from that scrape is absent at that step.
+"""
+import asyncio
+import math
+import time
+
+import numpy as np
+
+from query_cache import normalize_query
+from reduce import format_value, summarize_packed
+
+def _series_key(metric: dict) -> tuple:
+    return tuple(sorted(metric.items()))
+
+
+class ExpressionRing:
+    """Circular buffer of scrapes of one expression: shared timestamps, one value row per series."""
+
+    def __init__(self, capacity: int, rows: int = 8):
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((rows, capacity), np.nan)
+        self._rows: dict[tuple, int] = {}
+        self.metrics: list[dict] = []
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Number of series."""
+        return len(self.metrics)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._ts)
+
+    @property
+    def last_ts(self) -> float:
+        return float(self._ts[self._next - 1]) if self._size else -math.inf
+
+    def _row(self, metric: dict) -> int:
+        key = _series_key(metric)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self.metrics)
+            self.metrics.append(metric)
+            if row == len(self._values):
+                # Grow by doubling; rows are preallocated, never per sample
+                self._values = np.vstack((self._values, np.full_like(self._values, np.nan)))
+        return row
+
+    def append(self, ts: float, samples: list[tuple[dict, float]]) -> bool:
+        """Add one scrape; out-of-order or repeated timestamps are ignored."""
+        if ts <= self.last_ts:
+            return False
+        col = self._next
+        self._values[:, col] = np.nan
+        for metric, value in samples:
+            row = self._row(metric)  # may reallocate self._values
+            self._values[row, col] = value
+        self._ts[col] = ts
+        self._next = (col + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._drop_vanished()
+        return True
+
+    def _drop_vanished(self):
+        """Forget series without any sample left in the ring."""
+        n = len(self.metrics)
+        alive = ~np.all(np.isnan(self._values[:n]), axis=1)
+        if alive.all():
+            return
+        keep = np.flatnonzero(alive)
+        self._values[:len(keep)] = self._values[keep]
+        self._values[len(keep):n] = np.nan
+        self.metrics = [self.metrics[i] for i in keep]
+        self._rows = {_series_key(m): i for i, m in enumerate(self.metrics)}
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values[series, time]), oldest first."""
+        n = len(self.metrics)
+        if self._size < self.capacity:
+            return self._ts[:self._size], self._values[:n, :self._size]
+        order = np.roll(np.arange(self.capacity), -self._next)
+        return self._ts[order], self._values[:n, order]
+
+    def at(self, steps: np.ndarray, max_age: float) -> np.ndarray:
+        """values[series, step] from the newest scrape at or before each step, if at most `max_age` old, else NaN."""
+        ts, values = self.arrays()
+        n, width = values.shape
+        if not n or not width:
+            return np.full((n, len(steps)), np.nan)
+        # No forward fill across scrapes: a series missing from the covering scrape is gone
+        col = np.searchsorted(ts, steps, side="right") - 1
+        safe = np.maximum(col, 0)
+        ok = (col >= 0) & (steps - ts[safe] <= max_age)
+        return np.where(ok, values[:, safe], np.nan)
+
+
+class LocalMetricsStore:
+
+    def __init__(self, expressions: list[str], fetch, interval: float = 15.0, retention: float = 1200.0):
+        """
+        expressions: PromQL expressions to keep locally
+        fetch:       async (query, time) -> Prometheus instant query JSON
+        interval:    seconds between scrapes
+        retention:   seconds of history kept per series (sets the ring capacity)
+        """
+        self.expressions = [normalize_query(e) for e in expressions if e.strip()]
+        self._fetch = fetch
+        self.interval = interval
+        self.retention = retention
+        self.capacity = int(math.ceil(retention / interval)) + 1
+        self._rings = {e: ExpressionRing(self.capacity) for e in self.expressions}
+        self._first_scrape: dict[str, float] = {}
+        self._last_scrape: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self.scrapes = 0
+        self.scrape_errors = 0
+        self.served = 0
+        self.last_scrape_ms = 0.0
+
+    # ---- scraping ----------------------------------------------------------
+
+    async def _scrape_one(self, expr: str, now: float):
+        try:
+            data = await self._fetch(expr, now)
+        except Exception as e:
+            self.scrape_errors += 1
+            print(f"[local-metrics] scrape of '{expr}' failed: {e}")
+            return
+        samples = [(item.get("metric", {}), float(item["value"][1]))
+                   for item in data.get("data", {}).get("result", [])]
+        self._rings[expr].append(now, samples)
+        self._first_scrape.setdefault(expr, now)
+        self._last_scrape[expr] = now
+
+    async def scrape(self, now: float | None = None):
+        """Evaluate every expression once, all at the same timestamp."""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        await asyncio.gather(*(self._scrape_one(e, now) for e in self.expressions))
+        self.scrapes += 1
+        self.last_scrape_ms = (time.perf_counter() - started) * 1000
+
+    async def _run(self):
+        # Scrapes are stamped on a fixed grid, `interval` apart, so every step is covered by one
+        at = time.time()
+        while True:
+            await self.scrape(now=at)
+            at = max(at + self.interval, time.time())
+            await asyncio.sleep(max(at - time.time(), 0))
+
+    def start(self):
+        if self.expressions and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---- queries -----------------------------------------------------------
+
+    def covers(self, query: str, start: float, end: float, now: float | None = None) -> bool:
+        """True if [start, end] of `query` can be answered from local samples."""
+        query = normalize_query(query)
+        if query not in self._last_scrape:
+            return False
+        now = time.time() if now is None else now
+        oldest = max(self._first_scrape[query], now - self.retention)
+        # Local data must reach back to `start` and be fresh up to `end`
+        return start >= oldest and end <= self._last_scrape[query] + self.interval
+
+    def fresh(self, query: str, now: float | None = None) -> bool:
+        """True if the latest scrape of `query` is recent enough to answer an instant "now" query."""
+        last = self._last_scrape.get(normalize_query(query))
+        now = time.time() if now is None else now
+        return last is not None and now - last <= self.interval
+
+    def _evaluate(self, query: str, start: float, end: float, step: float) -> tuple:
+        ring = self._rings[normalize_query(query)]
+        steps = np.arange(start, end + step / 2, step, dtype=np.float64)
+        self.served += 1
+        return ring.metrics, steps, ring.at(steps, self.interval)
+
+    def query_range(self, query: str, start: float, end: float, step: float) -> dict:
+        """Prometheus /api/v1/query_range response built from the ring."""
+        metrics, steps, values = self._evaluate(query, start, end, step)
+        result = []
+        for metric, row in zip(metrics, values):
+            ok = ~np.isnan(row)
+            if ok.any():
+                result.append({"metric": metric, "values": [[t, format_value(v)] for t, v in
+                                                            zip(steps[ok].tolist(), row[ok].tolist())]})
+        return {"status": "success", "data": {"resultType": "matrix", "result": result}}
+
+    def summarize(self, query: str, start: float, end: float, step: float, stats: list[str]) -> dict:
+        """query_range + reduce.summarize, computed on the arrays without building the matrix JSON."""
+        metrics, steps, values = self._evaluate(query, start, end, step)
+        present = ~np.isnan(values)
+        lengths = present.sum(axis=1)
+        keep = np.flatnonzero(lengths)
+        # Left-align each series' samples, NaN-padded, as reduce.pack() does
+        order = np.argsort(~present[keep], axis=1, kind="stable")
+        vals = np.take_along_axis(values[keep], order, axis=1)
+        ts = np.where(np.take_along_axis(present[keep], order, axis=1), steps[order], np.nan)
+        result = summarize_packed([metrics[i] for i in keep], ts, vals, lengths[keep], stats)
+        return {"status": "success", "data": {"resultType": "summary", "result": result}}
+
+    def query(self, query: str, now: float | None = None) -> dict:
+        """Prometheus /api/v1/query response: every series evaluated at `now`."""
+        now = time.time() if now is None else now
+        ring = self._rings[normalize_query(query)]
+        values = ring.at(np.array([now]), self.interval)[:, 0]
+        self.served += 1
+        result = [{"metric": metric, "value": [now, format_value(v)]}
+                  for metric, v in zip(ring.metrics, values.tolist()) if not math.isnan(v)]
+        return {"status": "success", "data": {"resultType": "vector", "result": result}}
+
+    def stats(self) -> dict:
+        series = sum(len(r) for r in self._rings.values())
+        per_series = 8 * self.capacity
+        return {
+            "expressions": {e: len(r) for e, r in self._rings.items()},
+            "series": series,
+            "capacity_samples": self.capacity,
+            "bytes_per_series": per_series,
+            # Value rows of all series plus one shared timestamp ring per expression
+            "sample_bytes_total": series * per_series + len(self._rings) * per_series,
+            "allocated_bytes": sum(r._values.nbytes + r._ts.nbytes for r in self._rings.values()),
+            "interval_seconds": self.interval,
+            "retention_seconds": self.retention,
+            "scrapes": self.scrapes,
+            "scrape_errors": self.scrape_errors,
+            "last_scrape_ms": round(self.last_scrape_ms, 2),
+            "served_locally": self.served,
+        }
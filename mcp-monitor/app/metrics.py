@@ -0,0 +1,263 @@
+"""
+Request metrics and tracing for mcp-monitor, exposed at /metrics.
+
+- Counter / Gauge / Histogram: minimal Prometheus text-format metrics (no client
+  library; labels are tuples of strings, values live in plain dicts).
+- RequestMetrics: ASGI middleware timing every HTTP request per route. It
+  takes the caller's X-Trace-Id (or makes one), echoes it back, and adds a
+  Server-Timing header splitting the request into upstream time, time spent
+  waiting for a pooled upstream connection, and total time, so the agent can
+  tell MCP overhead from Prometheus/Grafana latency.
+- observe_upstream: UpstreamPool hook recording upstream latency and errors,
+  and charging them to the request being served.
+"""
+import contextvars
+import threading
+import time
+import uuid
+
+TRACE_HEADER = "x-trace-id"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Requests slower than this are logged with their trace id
+SLOW_REQUEST_SECONDS = 1.0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labels, k)} {_format_number(v)}" for k, v in items)
+        return lines
+
+
+class Gauge:
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labels, k)} {_format_number(v)}" for k, v in items)
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (non-cumulative, last one is +Inf), sum, count]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        # Linear scan: a dozen buckets, cheaper than bisect's call overhead
+        idx = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            idx += 1
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "mcp_request_duration_seconds", "Time to serve an MCP request, per route", ("path", "method", "status")))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "mcp_response_size_bytes", "Response body size, per route", ("path",), buckets=SIZE_BUCKETS))
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    "mcp_request_errors_total", "MCP requests answered with a 4xx/5xx status", ("path", "status")))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "mcp_upstream_request_duration_seconds", "Latency of requests to Prometheus/Alertmanager/Grafana",
+    ("upstream", "method", "status")))
+UPSTREAM_WAIT = REGISTRY.register(Histogram(
+    "mcp_upstream_pool_wait_seconds", "Time spent waiting for a pooled upstream connection", ("upstream",)))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "mcp_upstream_errors_total", "Failed upstream requests (transport errors and 5xx)", ("upstream", "reason")))
+
+
+class RequestTiming:
+    """What one MCP request spent on upstreams; filled in by observe_upstream."""
+
+    __slots__ = ("trace_id", "upstream_s", "wait_s", "upstream_calls")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.upstream_s = 0.0
+        self.wait_s = 0.0
+        self.upstream_calls = 0
+
+    def server_timing(self, total_s: float) -> str:
+        return (f"upstream;dur={self.upstream_s * 1000:.2f};desc=\"{self.upstream_calls} calls\", "
+                f"pool;dur={self.wait_s * 1000:.2f}, total;dur={total_s * 1000:.2f}")
+
+
+_current: contextvars.ContextVar[RequestTiming | None] = contextvars.ContextVar("mcp_request", default=None)
+
+
+def current_trace_id() -> str | None:
+    timing = _current.get()
+    return timing.trace_id if timing else None
+
+
+def observe_upstream(name: str, method: str, status: int | None, elapsed: float, wait: float,
+                     error: Exception | None = None):
+    """UpstreamPool hook: one finished (or failed) upstream request."""
+    label = str(status) if status is not None else "error"
+    UPSTREAM_DURATION.observe(elapsed, name, method, label)
+    UPSTREAM_WAIT.observe(wait, name)
+    if error is not None:
+        UPSTREAM_ERRORS.inc(name, type(error).__name__)
+    elif status >= 500:
+        UPSTREAM_ERRORS.inc(name, label)
+    # Background refreshes (alert snapshot, local metrics) have no request to charge
+    timing = _current.get()
+    if timing is not None:
+        timing.upstream_s += elapsed
+        timing.wait_s += wait
+        timing.upstream_calls += 1
+
+
+class RequestMetrics:
+    """ASGI middleware: per-route latency/size/error metrics, trace ids and Server-Timing."""
+
+    def __init__(self, app, slow_seconds: float = SLOW_REQUEST_SECONDS):
+        self.app = app
+        self.slow_seconds = slow_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace_id = ""
+        for key, value in scope["headers"]:
+            if key == b"x-trace-id":
+                trace_id = value.decode("latin-1")[:64]
+                break
+        timing = RequestTiming(trace_id or uuid.uuid4().hex)
+        token = _current.set(timing)
+        started = time.perf_counter()
+        status, size = 500, None
+
+        async def send_with_headers(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                for key, value in headers:
+                    if key == b"content-length":
+                        size = int(value)
+                headers.append((b"x-trace-id", timing.trace_id.encode("latin-1")))
+                headers.append((b"server-timing", timing.server_timing(time.perf_counter() - started).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            # Route template (e.g. /tools/query_range), not the raw path, to keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_DURATION.observe(elapsed, path, scope["method"], str(status))
+            if size is not None:
+                RESPONSE_SIZE.observe(size, path)
+            if status >= 400:
+                REQUEST_ERRORS.inc(path, str(status))
+            if elapsed >= self.slow_seconds:
+                print(f"[trace {timing.trace_id}] {scope['method']} {scope['path']} {status} "
+                      f"{elapsed * 1000:.0f}ms (upstream {timing.upstream_s * 1000:.0f}ms "
+                      f"in {timing.upstream_calls} calls)")
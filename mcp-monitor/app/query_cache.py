@@ -0,0 +1,135 @@
+"""
+In-process result cache for /tools/query_range.
+
+Bounded LRU with TTL eviction, keyed by (normalized query, step-aligned
+start, step-aligned end, step). Identical requests that arrive while the
+first one is still waiting on Prometheus are coalesced onto that single
+upstream call (single-flight).
+"""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+_STEP_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)")
+
+
+def step_seconds(step: str) -> float | None:
+    """Parse a Prometheus step ('30', '30s', '1m30s') into seconds, or None if unparseable."""
+    step = str(step).strip()
+    try:
+        return float(step)
+    except ValueError:
+        pass
+    parts = _STEP_RE.findall(step)
+    if not parts or "".join(n + u for n, u in parts) != step:
+        return None
+    return sum(float(n) * _UNITS[u] for n, u in parts)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so cosmetic differences share a cache entry."""
+    return " ".join(query.split())
+
+
+def align(start: float, end: float, step: str) -> tuple[float, float]:
+    """Snap start/end down to a multiple of step (no-op if step is unparseable)."""
+    seconds = step_seconds(step)
+    if not seconds:
+        return start, end
+    return start - start % seconds, end - end % seconds
+
+
+def make_key(query: str, start: float, end: float, step: str) -> tuple:
+    start, end = align(start, end, step)
+    return normalize_query(query), start, end, step_seconds(step) or str(step)
+
+
+class QueryCache:
+    """Bounded LRU + TTL cache with single-flight coalescing of in-flight fetches."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 15.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: dict = {}  # key -> asyncio.Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, value):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, key, fetch):
+        """Return the cached value for `key`, or await `fetch()` once for all concurrent callers."""
+        while True:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leading request was cancelled (client went away) — retry as leader
+                if not pending.cancelled():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(value)
+            self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
@@ -0,0 +1,143 @@
+"""
+Server-side reduction of Prometheus range-query matrices.
+
+Series are packed into a NaN-padded (series x samples) NumPy matrix once, and
+every statistic is then computed for all series at once along axis 1, so the
+agent receives one small number (or a handful of downsampled points) per
+series instead of the full matrix.
+"""
+import math
+import re
+import warnings
+
+import numpy as np
+
+_PERCENTILE_RE = re.compile(r"p(\d{1,2}(?:\.\d+)?)$")
+STATS = ("last", "first", "min", "max", "avg", "count", "rate")
+
+
+class ReduceError(ValueError):
+    pass
+
+
+def validate_stats(stats: list[str]) -> list[str]:
+    for s in stats:
+        if s not in STATS and not _PERCENTILE_RE.match(s):
+            raise ReduceError(f"Unknown stat '{s}'. Use one of {', '.join(STATS)} or a percentile like p95.")
+    return stats
+
+
+def format_value(x: float) -> str:
+    """Prometheus-style sample string."""
+    if math.isnan(x):
+        return "NaN"
+    if math.isinf(x):
+        return "+Inf" if x > 0 else "-Inf"
+    return format(x, ".10g")
+
+
+def pack(result: list[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Matrix result -> (timestamps, values, lengths); both matrices NaN-padded to the longest series."""
+    lengths = np.array([len(item.get("values", [])) for item in result], dtype=np.int64)
+    width = max(int(lengths.max()) if len(lengths) else 0, 1)
+    ts = np.full((len(result), width), np.nan)
+    vals = np.full((len(result), width), np.nan)
+    samples = [s for item in result for s in item.get("values", [])]
+    if samples:
+        # Scatter the flat sample list into the padded matrices in one vectorized step
+        rows = np.repeat(np.arange(len(result)), lengths)
+        cols = np.arange(len(samples)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        ts[rows, cols] = np.fromiter((s[0] for s in samples), dtype=np.float64, count=len(samples))
+        vals[rows, cols] = np.array([s[1] for s in samples], dtype=np.float64)
+    return ts, vals, lengths
+
+
+def summarize(result: list[dict], stats: list[str]) -> list[dict]:
+    """One {"metric", "stats"} entry per series with the requested statistics."""
+    ts, vals, lengths = pack(result)
+    return summarize_packed([item.get("metric", {}) for item in result], ts, vals, lengths, stats)
+
+
+def summarize_packed(metrics: list[dict], ts: np.ndarray, vals: np.ndarray, lengths: np.ndarray,
+                     stats: list[str]) -> list[dict]:
+    """summarize() for series that are already packed like pack() does (left-aligned, NaN-padded)."""
+    rows = np.arange(len(metrics))
+    last = np.maximum(lengths - 1, 0)
+
+    columns = {}
+    # All-NaN rows (series without samples) just produce NaN; silence numpy's warnings about them
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for s in stats:
+            if s == "last":
+                columns[s] = vals[rows, last]
+            elif s == "first":
+                columns[s] = vals[:, 0]
+            elif s == "min":
+                columns[s] = np.nanmin(vals, axis=1)
+            elif s == "max":
+                columns[s] = np.nanmax(vals, axis=1)
+            elif s == "avg":
+                columns[s] = np.nanmean(vals, axis=1)
+            elif s == "count":
+                columns[s] = lengths.astype(np.float64)
+            elif s == "rate":
+                # Per-second change between the first and last sample of the window
+                dt = ts[rows, last] - ts[:, 0]
+                columns[s] = np.where(dt > 0, (vals[rows, last] - vals[:, 0]) / dt, np.nan)
+            else:
+                q = float(_PERCENTILE_RE.match(s).group(1))
+                columns[s] = np.nanpercentile(vals, q, axis=1)
+
+    return [
+        {"metric": metric,
+         "stats": {s: format_value(float(columns[s][i])) for s in stats}}
+        for i, metric in enumerate(metrics)
+    ]
+
+
+def lttb(ts: np.ndarray, vals: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets over a batch of equal-length series.
+
+    ts, vals: (series x n) matrices. Returns a (series x n_out) matrix of the
+    sample indices that best keep each series' visual shape. The bucket loop
+    runs once per batch; each step is vectorized across all series.
+    """
+    k, n = vals.shape
+    if n_out >= n or n_out < 3:
+        return np.tile(np.arange(n), (k, 1))
+    rows = np.arange(k)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty((k, n_out), dtype=np.int64)
+    selected[:, 0], selected[:, -1] = 0, n - 1
+    a = np.zeros(k, dtype=np.int64)
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nxt_hi = edges[b + 2] if b + 2 < len(edges) else n
+        # Third triangle vertex: average of the next bucket
+        cx = ts[:, hi:nxt_hi].mean(axis=1, keepdims=True)
+        cy = vals[:, hi:nxt_hi].mean(axis=1, keepdims=True)
+        ax, ay = ts[rows, a][:, None], vals[rows, a][:, None]
+        area = np.abs((ax - cx) * (vals[:, lo:hi] - ay) - (ax - ts[:, lo:hi]) * (cy - ay))
+        a = lo + np.argmax(area, axis=1)
+        selected[:, b + 1] = a
+    return selected
+
+
+def downsample(result: list[dict], points: int) -> list[dict]:
+    """Matrix result with every series reduced to at most `points` samples (LTTB)."""
+    ts, vals, lengths = pack(result)
+    finite = np.nan_to_num(vals, nan=0.0, posinf=0.0, neginf=0.0)
+    out = [None] * len(result)
+    # Series over the same window usually share a length: run LTTB once per length group
+    for n in np.unique(lengths):
+        group = np.flatnonzero(lengths == n)
+        idx = lttb(ts[group, :n], finite[group, :n], points)
+        for row, picks in zip(group, idx):
+            out[row] = {
+                "metric": result[row].get("metric", {}),
+                "values": [[float(ts[row, j]), format_value(float(vals[row, j]))] for j in picks],
+            }
+    return out
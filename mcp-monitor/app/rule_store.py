@@ -0,0 +1,155 @@
+"""
+Single-writer store for the dynamic Prometheus rule file.
+
+- One writer task owns every load-modify-write, so concurrent create_alert
+  calls can no longer lose each other's rules. Requests queued while a write
+  is in progress are applied together in the next write (group commit).
+- Writes go to a temp file in the same directory and are renamed over the
+  rule file, so Prometheus never reads a half-written YAML.
+- Rules are upserted by alert name (existing duplicates are collapsed).
+- Prometheus reloads are debounced: every write within the window shares a
+  single POST /-/reload, and every caller gets that reload's outcome.
+"""
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+import yaml
+
+DYNAMIC_GROUP = "dynamic-alerts"
+
+
+class DebouncedReloader:
+    """Coalesce reload requests: fire `delay` s after the last request, at most `max_delay` s after the first."""
+
+    def __init__(self, reload, delay: float = 0.5, max_delay: float = 2.0):
+        self._reload = reload
+        self.delay = delay
+        self.max_delay = max_delay
+        self._future: asyncio.Future | None = None
+        self._task: asyncio.Task | None = None
+        self._first = 0.0
+        self._deadline = 0.0
+        self.requests = 0
+        self.reloads = 0
+
+    def request(self) -> asyncio.Future:
+        """Schedule a reload and return the future of the (shared) reload that will cover it."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._future is None:
+            self._future = loop.create_future()
+            self._first = now
+            self._task = asyncio.create_task(self._run())
+        self._deadline = min(now + self.delay, self._first + self.max_delay)
+        self.requests += 1
+        return self._future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while (remaining := self._deadline - loop.time()) > 0:
+            await asyncio.sleep(remaining)
+        # Writes arriving from here on need a fresh reload, so start a new window
+        future, self._future = self._future, None
+        self.reloads += 1
+        try:
+            await self._reload()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+        else:
+            future.set_result(None)
+
+
+class RuleStore:
+
+    def __init__(self, path: Path, reloader: DebouncedReloader, group: str = DYNAMIC_GROUP):
+        self.path = Path(path)
+        self.group = group
+        self.reloader = reloader
+        self._pending: list[tuple[list[dict], asyncio.Future]] = []
+        self._writer: asyncio.Task | None = None
+        self.writes = 0
+
+    # ---- file I/O (runs in a worker thread) --------------------------------
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        return yaml.safe_load(self.path.read_text()) or {}
+
+    def _write_atomic(self, data: dict):
+        text = yaml.safe_dump(data, sort_keys=False)
+        mode = self.path.stat().st_mode & 0o777 if self.path.exists() else 0o644
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates 0600; keep the rule file readable by the Prometheus container
+            os.chmod(tmp, mode)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _apply(self, batches: list[list[dict]]) -> list[dict]:
+        """Upsert several requests' rules in one write; returns created/updated per request."""
+        data = self._load()
+        groups = data.setdefault("groups", [])
+        group = next((g for g in groups if g.get("name") == self.group), None)
+        if group is None:
+            group = {"name": self.group, "rules": []}
+            groups.append(group)
+
+        # Upsert by alert name; collapse duplicates left by the old append-only writer
+        merged: dict = {}
+        for rule in group.get("rules") or []:
+            # Recording rules have no alert name; keep each of them as-is
+            merged.setdefault(rule.get("alert") or id(rule), rule)
+        results = []
+        for rules in batches:
+            created, updated = [], []
+            for rule in rules:
+                name = rule["alert"]
+                if name not in created and name not in updated:
+                    (updated if name in merged else created).append(name)
+                merged[name] = rule
+            results.append({"created": created, "updated": updated})
+        group["rules"] = list(merged.values())
+
+        self._write_atomic(data)
+        return results
+
+    # ---- single writer -----------------------------------------------------
+
+    async def _drain(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                results = await asyncio.to_thread(self._apply, [rules for rules, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                    future.exception()
+            else:
+                self.writes += 1
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+    # ---- public API --------------------------------------------------------
+
+    async def upsert(self, rules: list[dict]) -> dict:
+        """Write `rules` into the dynamic group and wait for the (debounced) Prometheus reload."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((rules, future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._drain())
+        result = await asyncio.shield(future)
+        await asyncio.shield(self.reloader.request())
+        return result
+
+    def stats(self) -> dict:
+        return {"writes": self.writes, "reload_requests": self.reloader.requests, "reloads": self.reloader.reloads}
@@ -1,10 +1,23 @@
+import asyncio
+import json
 import os
 import time
-import requests
-import yaml
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, Header, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from alert_snapshot import AlertSnapshot
+from alertmanager import AlertFilterError, compact_groups, flatten, group_params
+from dashboard_sync import DashboardSync, DashboardSyncError, load_dashboards
+from local_metrics import LocalMetricsStore
+from metrics import REGISTRY, Counter, Gauge, Histogram, RequestMetrics, observe_upstream
+from query_cache import QueryCache, align, make_key, normalize_query, step_seconds
+from reduce import ReduceError, downsample, summarize, validate_stats
+from rule_store import DebouncedReloader, RuleStore
+from triage_queue import QueueFull, TriageQueue
+from upstream import UpstreamPool
 
 PROM = os.getenv("PROMETHEUS_URL", "http://prometheus:9090")
 ALERTM = os.getenv("ALERTMANAGER_URL", "http://alertmanager:9093")
@@ -14,7 +27,86 @@ API_TOKEN = os.getenv("API_TOKEN", "change-me")
 GRAF_USER = os.getenv("GRAFANA_USER", "admin")
 GRAF_PASS = os.getenv("GRAFANA_PASS", "admin")
 
-app = FastAPI(title="MCP-Monitor (Task 3)", version="0.1.0")
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "15"))
+
+# query_batch: expressions per request, and how many of them are in flight at once
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "20"))
+QUERY_BATCH_CONCURRENCY = int(os.getenv("QUERY_BATCH_CONCURRENCY", "8"))
+
+# Root for sync_dashboards paths (the repo's dashboards are mounted here)
+DASHBOARD_DIR = Path(os.getenv("DASHBOARD_DIR", "/dashboards"))
+DASHBOARD_SYNC_CONCURRENCY = int(os.getenv("DASHBOARD_SYNC_CONCURRENCY", "8"))
+
+# Requests slower than this are logged with their trace id
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1"))
+
+ALERT_REFRESH_INTERVAL = float(os.getenv("ALERT_REFRESH_INTERVAL", "10"))
+# Where list_alerts reads from: "alertmanager" (v2 API; only active, unsilenced, uninhibited alerts)
+# or "prometheus" (/api/v1/alerts: every rule alert, including pending and suppressed ones)
+ALERT_SOURCE = os.getenv("ALERT_SOURCE", "alertmanager")
+ALERT_WAIT_MAX = float(os.getenv("ALERT_WAIT_MAX", "60"))
+
+# One keep-alive pool per upstream, shared by all handlers; every request is timed for /metrics
+upstreams = UpstreamPool(observer=observe_upstream)
+upstreams.register("prometheus", PROM)
+upstreams.register("alertmanager", ALERTM)
+upstreams.register("grafana", GRAF, auth=(GRAF_USER, GRAF_PASS), timeout=15)
+
+# Shared across agent sessions: identical range queries within the TTL hit Prometheus once
+query_cache = QueryCache(max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+async def fetch_prometheus_alerts() -> list:
+    r = await upstreams.request("prometheus", "GET", "/api/v1/alerts")
+    r.raise_for_status()
+    return r.json().get("data", {}).get("alerts", [])
+
+async def fetch_alert_groups(params: list[tuple[str, str]]) -> list:
+    r = await upstreams.request("alertmanager", "GET", "/api/v2/alerts/groups", params=params)
+    r.raise_for_status()
+    return r.json()
+
+async def fetch_actionable_alerts() -> list:
+    return flatten(await fetch_alert_groups(group_params("active")))
+
+# Background-refreshed alert state, served to clients as versioned deltas
+alert_snapshot = AlertSnapshot(
+    fetch_prometheus_alerts if ALERT_SOURCE == "prometheus" else fetch_actionable_alerts,
+    interval=ALERT_REFRESH_INTERVAL,
+)
+
+# Hot expressions the agent asks about again and again; ';'-separated, empty to disable
+LOCAL_METRICS_EXPRESSIONS = os.getenv(
+    "LOCAL_METRICS_EXPRESSIONS",
+    'up;sum(kafka_consumergroup_lag) by (consumergroup, topic);'
+    'jvm_memory_bytes_used{job="hdfs",area="heap"};ClickHouseMetrics_Query',
+).split(";")
+LOCAL_METRICS_INTERVAL = float(os.getenv("LOCAL_METRICS_INTERVAL", "15"))
+LOCAL_METRICS_RETENTION = float(os.getenv("LOCAL_METRICS_RETENTION", "1200"))
+
+async def fetch_instant(query: str, at: float) -> dict:
+    r = await upstreams.request("prometheus", "GET", "/api/v1/query", params={"query": query, "time": at})
+    r.raise_for_status()
+    return r.json()
+
+# Ring buffers of the hot expressions; their recent range/instant queries never reach Prometheus
+local_metrics = LocalMetricsStore(
+    LOCAL_METRICS_EXPRESSIONS, fetch_instant,
+    interval=LOCAL_METRICS_INTERVAL, retention=LOCAL_METRICS_RETENTION,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    alert_snapshot.start()
+    local_metrics.start()
+    yield
+    await local_metrics.stop()
+    await alert_snapshot.stop()
+    await upstreams.aclose()
+
+app = FastAPI(title="MCP-Monitor (Task 3)", version="0.1.0", lifespan=lifespan)
+# Per-route latency/size/error metrics, X-Trace-Id and Server-Timing on every response
+app.add_middleware(RequestMetrics, slow_seconds=SLOW_REQUEST_SECONDS)
 
 def auth(x_api_token: str | None):
     if API_TOKEN and x_api_token != API_TOKEN:
@@ -24,102 +116,311 @@ def auth(x_api_token: str | None):
 def health():
     return {"status": "ok", "time": time.time()}
 
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 class QueryRangeReq(BaseModel):
     query: str
     start: float | None = None
     end: float | None = None
     step: str = "30s"
+    # Optional server-side reduction: per-series stats (last, min, max, avg, count, rate, p95, ...)
+    reduce: list[str] | None = None
+    # ...or LTTB downsampling of every series to at most this many points
+    points: int | None = Field(default=None, ge=3)
+
+def reduce_matrix(body: bytes, stats: list[str] | None, points: int | None) -> dict:
+    return reduce_result(json.loads(body), stats, points)
+
+def reduce_result(data: dict, stats: list[str] | None, points: int | None) -> dict:
+    inner = data.get("data", {})
+    if inner.get("resultType") != "matrix":
+        return data
+    if stats:
+        inner["result"] = summarize(inner["result"], stats)
+        inner["resultType"] = "summary"
+    else:
+        inner["result"] = downsample(inner["result"], points)
+    return data
+
+async def fetch_range(query: str, start: float, end: float, step: str) -> bytes:
+    """Raw /api/v1/query_range body, through the shared query cache."""
+    async def fetch() -> bytes:
+        r = await upstreams.request(
+            "prometheus", "GET", "/api/v1/query_range",
+            params={"query": query, "start": start, "end": end, "step": step},
+        )
+        r.raise_for_status()
+        return r.content
+
+    return await query_cache.get_or_fetch(make_key(query, start, end, step), fetch)
 
 @app.post("/tools/query_range")
-def query_range(req: QueryRangeReq, x_api_token: str | None = Header(default=None)):
+async def query_range(req: QueryRangeReq, x_api_token: str | None = Header(default=None)):
     auth(x_api_token)
+    try:
+        validate_stats(req.reduce or [])
+    except ReduceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     now = time.time()
-    start = req.start or (now - 15 * 60)
-    end = req.end or now
-    r = requests.get(
-        f"{PROM}/api/v1/query_range",
-        params={"query": req.query, "start": start, "end": end, "step": req.step},
-        timeout=10,
-    )
-    r.raise_for_status()
-    return r.json()
+    # Step-aligned window so requests a few seconds apart share a cache entry
+    start, end = align(req.start or (now - 15 * 60), req.end or now, req.step)
+    query = normalize_query(req.query)
 
-@app.get("/tools/list_alerts")
-def list_alerts(x_api_token: str | None = Header(default=None)):
+    step = step_seconds(req.step)
+    if step and local_metrics.covers(query, start, end, now):
+        if req.reduce:
+            data = local_metrics.summarize(query, start, end, step, req.reduce)
+        else:
+            data = local_metrics.query_range(query, start, end, step)
+            if req.points:
+                data = reduce_result(data, None, req.points)
+        return Response(content=json.dumps(data), media_type="application/json", headers={"X-Served-By": "local"})
+
+    body = await fetch_range(query, start, end, req.step)
+    if req.reduce or req.points:
+        reduced = await asyncio.to_thread(reduce_matrix, body, req.reduce, req.points)
+        return Response(content=json.dumps(reduced), media_type="application/json")
+    # Pass the upstream body through as-is instead of decoding and re-encoding it
+    return Response(content=body, media_type="application/json")
+
+class QueryReq(BaseModel):
+    query: str
+    # Evaluation timestamp; defaults to "now" on the Prometheus side
+    time: float | None = None
+
+@app.post("/tools/query")
+async def query(req: QueryReq, x_api_token: str | None = Header(default=None)):
+    """Instant query (/api/v1/query): one evaluation instead of one per range step."""
     auth(x_api_token)
-    r = requests.get(f"{PROM}/api/v1/alerts", timeout=10)
-    r.raise_for_status()
-    return r.json()
+    query = normalize_query(req.query)
+    if req.time is None and local_metrics.fresh(query):
+        return Response(content=json.dumps(local_metrics.query(query)), media_type="application/json",
+                        headers={"X-Served-By": "local"})
+    params = {"query": query}
+    if req.time is not None:
+        params["time"] = req.time
 
-RULES_FILE = Path("/rules/alerts.dynamic.yml")
+    async def fetch() -> bytes:
+        r = await upstreams.request("prometheus", "GET", "/api/v1/query", params=params)
+        r.raise_for_status()
+        return r.content
 
-class CreateAlertReq(BaseModel):
-    alert_name: str
-    expr: str
-    duration: str = "1m"
-    severity: str = "warning"
-    priority: str = "P2"
-    summary: str = ""
-    description: str = ""
+    # "now" queries share an entry for the cache TTL; explicit timestamps are keyed by time
+    body = await query_cache.get_or_fetch(("instant", query, req.time), fetch)
+    return Response(content=body, media_type="application/json")
 
-@app.post("/tools/create_alert")
-def create_alert(req: CreateAlertReq, x_api_token: str | None = Header(default=None)):
-    auth(x_api_token)
-
-    group = {
-        "name": "dynamic-alerts",
-        "rules": [
-            {
-                "alert": req.alert_name,
-                "expr": req.expr,
-                "for": req.duration,
-                "labels": {
-                    "severity": req.severity,
-                    "priority": req.priority
-                },
-                "annotations": {
-                    "summary": req.summary or req.alert_name,
-                    "description": req.description or f"Auto-generated alert: {req.alert_name}",
-                },
-            }
-        ],
+class QueryBatchReq(BaseModel):
+    queries: list[str] = Field(min_length=1)
+    # One window for every expression
+    start: float | None = None
+    end: float | None = None
+    step: str = "30s"
+    # Per-series stats keep the combined response compact; set points for LTTB-downsampled series instead
+    reduce: list[str] = ["last", "min", "max", "avg"]
+    points: int | None = Field(default=None, ge=3)
+
+def _upstream_error(e: Exception) -> str:
+    """Prometheus' own message for a rejected query (bad PromQL, timeout), else the exception."""
+    response = getattr(e, "response", None)
+    if response is not None:
+        try:
+            return response.json().get("error") or f"HTTP {response.status_code}"
+        except ValueError:
+            return f"HTTP {response.status_code}"
+    return f"{type(e).__name__}: {e}"
+
+@app.post("/tools/query_batch")
+async def query_batch(req: QueryBatchReq, x_api_token: str | None = Header(default=None)):
+    """
+    Several range queries over one window in a single request, evaluated
+    concurrently (at most QUERY_BATCH_CONCURRENCY at a time). Each expression
+    gets its own entry in `results`; one failing expression does not fail the
+    others.
+    """
+    auth(x_api_token)
+    if len(req.queries) > QUERY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {QUERY_BATCH_MAX} queries per batch")
+    stats = None if req.points else req.reduce
+    try:
+        validate_stats(stats or [])
+    except ReduceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    started = time.perf_counter()
+    now = time.time()
+    end = now if req.end is None else req.end
+    start, end = align(end - 15 * 60 if req.start is None else req.start, end, req.step)
+    step = step_seconds(req.step)
+    semaphore = asyncio.Semaphore(QUERY_BATCH_CONCURRENCY)
+
+    async def evaluate(expression: str) -> dict:
+        query = normalize_query(expression)
+        try:
+            if step and local_metrics.covers(query, start, end, now):
+                if stats:
+                    data = local_metrics.summarize(query, start, end, step, stats)
+                else:
+                    data = reduce_result(local_metrics.query_range(query, start, end, step), None, req.points)
+            else:
+                async with semaphore:
+                    body = await fetch_range(query, start, end, req.step)
+                data = await asyncio.to_thread(reduce_matrix, body, stats, req.points)
+        except Exception as e:
+            return {"query": expression, "error": _upstream_error(e)}
+        inner = data.get("data", {})
+        return {"query": expression, "resultType": inner.get("resultType"), "result": inner.get("result", [])}
+
+    results = await asyncio.gather(*(evaluate(q) for q in req.queries))
+    errors = sum(1 for r in results if "error" in r)
+    return {
+        "status": "success" if not errors else ("error" if errors == len(results) else "partial"),
+        "window": {"start": start, "end": end, "step": req.step},
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
     }
 
-    # Load existing rules
-    if RULES_FILE.exists():
-        data = yaml.safe_load(RULES_FILE.read_text()) or {}
-    else:
-        data = {}
+@app.get("/tools/query_cache/stats")
+def query_cache_stats(x_api_token: str | None = Header(default=None)):
+    auth(x_api_token)
+    return query_cache.stats()
 
-    groups = data.get("groups", [])
+@app.get("/tools/local_metrics/stats")
+def local_metrics_stats(x_api_token: str | None = Header(default=None)):
+    """Locally kept expressions, series counts and ring-buffer memory per series."""
+    auth(x_api_token)
+    return local_metrics.stats()
 
-    # Dynamic-alerts group
-    dynamic_group = None
-    for g in groups:
-        if g.get("name") == "dynamic-alerts":
-            dynamic_group = g
-            break
+@app.get("/tools/list_alerts")
+async def list_alerts(
+    since: int | None = None,
+    wait: float = 0,
+    x_api_token: str | None = Header(default=None),
+):
+    """
+    Actionable alerts (ALERT_SOURCE; Alertmanager by default), in Prometheus' alert format.
+    Without `since`: the full list (plus `version`).
+    With `since=<version>`: only alerts added / changed / resolved after that version.
+    `wait=<seconds>` long-polls until something changes (or the wait runs out).
+    """
+    auth(x_api_token)
+    await alert_snapshot.ensure_fresh()
+    if since is None:
+        return {"status": "success", "version": alert_snapshot.version,
+                "data": {"alerts": list(alert_snapshot.alerts.values())}}
+    if wait > 0:
+        await alert_snapshot.wait_for_change(since, min(wait, ALERT_WAIT_MAX))
+    return alert_snapshot.since(since)
 
-    if dynamic_group is None:
-        groups.append(group)
-    else:
-        dynamic_group.setdefault("rules", [])
-        dynamic_group["rules"].append(group["rules"][0])
+@app.get("/tools/alert_groups")
+async def alert_groups(
+    state: str = "active",
+    severity: list[str] = Query(default=[]),
+    receiver: list[str] = Query(default=[]),
+    matcher: list[str] = Query(default=[]),
+    grouped: bool = False,
+    x_api_token: str | None = Header(default=None),
+):
+    """
+    Alerts from Alertmanager, filtered there: state (active / suppressed / all),
+    severity and receiver (repeatable, e.g. receiver=critical&receiver=slo) and
+    label matchers (matcher=service=kafka). Active alerts exclude silenced and
+    inhibited ones. grouped=true keeps Alertmanager's grouping per receiver.
+    """
+    auth(x_api_token)
+    try:
+        params = group_params(state, severity, receiver, matcher)
+    except AlertFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    groups = await fetch_alert_groups(params)
+    if grouped:
+        compact = compact_groups(groups)
+        return {"status": "success", "groups": compact, "alert_count": sum(len(g["alerts"]) for g in compact)}
+    alerts = flatten(groups)
+    return {"status": "success", "data": {"alerts": alerts}, "alert_count": len(alerts)}
+
+@app.get("/tools/list_alerts/stream")
+async def stream_alerts(since: int = 0, x_api_token: str | None = Header(default=None)):
+    """Server-sent events: one `alerts` event per snapshot version, starting after `since`."""
+    auth(x_api_token)
+    await alert_snapshot.ensure_fresh()
 
-    data["groups"] = groups
-    RULES_FILE.write_text(yaml.safe_dump(data, sort_keys=False))
+    async def events():
+        version = since
+        while True:
+            if await alert_snapshot.wait_for_change(version, ALERT_WAIT_MAX):
+                delta = alert_snapshot.since(version)
+                version = delta["version"]
+                yield f"id: {version}\nevent: alerts\ndata: {json.dumps(delta)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
 
-    # Reload Prometheus configuration
-    r = requests.post(f"{PROM}/-/reload", timeout=10)
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+RULES_FILE = Path(os.getenv("RULES_FILE", "/rules/alerts.dynamic.yml"))
+RULE_RELOAD_DEBOUNCE = float(os.getenv("RULE_RELOAD_DEBOUNCE", "0.5"))
+RULE_RELOAD_MAX_DELAY = float(os.getenv("RULE_RELOAD_MAX_DELAY", "2"))
+
+async def reload_prometheus():
+    r = await upstreams.request("prometheus", "POST", "/-/reload")
     if r.status_code not in (200, 204):
         raise HTTPException(
             status_code=500,
             detail=f"Prometheus reload failed: {r.text}"
         )
 
+# Single writer for the dynamic rule file; bursts of writes share one Prometheus reload
+rule_store = RuleStore(
+    RULES_FILE,
+    DebouncedReloader(reload_prometheus, delay=RULE_RELOAD_DEBOUNCE, max_delay=RULE_RELOAD_MAX_DELAY),
+)
+
+class CreateAlertReq(BaseModel):
+    alert_name: str
+    expr: str
+    duration: str = "1m"
+    severity: str = "warning"
+    priority: str = "P2"
+    summary: str = ""
+    description: str = ""
+
+    def to_rule(self) -> dict:
+        return {
+            "alert": self.alert_name,
+            "expr": self.expr,
+            "for": self.duration,
+            "labels": {
+                "severity": self.severity,
+                "priority": self.priority
+            },
+            "annotations": {
+                "summary": self.summary or self.alert_name,
+                "description": self.description or f"Auto-generated alert: {self.alert_name}",
+            },
+        }
+
+@app.post("/tools/create_alert")
+async def create_alert(req: CreateAlertReq, x_api_token: str | None = Header(default=None)):
+    auth(x_api_token)
+    result = await rule_store.upsert([req.to_rule()])
     return {
         "status": "ok",
         "alert": req.alert_name,
+        "action": "updated" if result["updated"] else "created",
+        "rules_file": str(RULES_FILE)
+    }
+
+class CreateAlertsReq(BaseModel):
+    alerts: list[CreateAlertReq]
+
+@app.post("/tools/create_alerts")
+async def create_alerts(req: CreateAlertsReq, x_api_token: str | None = Header(default=None)):
+    """Batch variant of create_alert: one rule-file write and one Prometheus reload."""
+    auth(x_api_token)
+    result = await rule_store.upsert([a.to_rule() for a in req.alerts])
+    return {
+        "status": "ok",
+        **result,
         "rules_file": str(RULES_FILE)
     }
 
@@ -130,7 +431,7 @@ class SyncDashboardReq(BaseModel):
     overwrite: bool = True
 
 @app.post("/tools/sync_dashboard")
-def sync_dashboard(
+async def sync_dashboard(
     req: SyncDashboardReq,
     x_api_token: str | None = Header(default=None)
 ):
@@ -142,12 +443,7 @@ def sync_dashboard(
         "overwrite": req.overwrite,
     }
 
-    r = requests.post(
-        f"{GRAF}/api/dashboards/db",
-        json=payload,
-        auth=(GRAF_USER, GRAF_PASS),
-        timeout=15,
-    )
+    r = await upstreams.request("grafana", "POST", "/api/dashboards/db", json=payload)
 
     if r.status_code not in (200, 202):
         raise HTTPException(status_code=500, detail=r.text)
@@ -165,3 +461,123 @@ def sync_dashboard(
     }
 
 
+async def grafana_request(method: str, url: str, **kwargs):
+    return await upstreams.request("grafana", method, url, **kwargs)
+
+dashboard_sync = DashboardSync(grafana_request, concurrency=DASHBOARD_SYNC_CONCURRENCY)
+
+class SyncDashboardsReq(BaseModel):
+    dashboards: list[dict] = []
+    # Files or directories (recursive *.json) under DASHBOARD_DIR; default: all of it
+    paths: list[str] = []
+    folderUid: str | None = None
+    dry_run: bool = False
+    # Upload even when the content hash matches Grafana's copy
+    force: bool = False
+
+@app.post("/tools/sync_dashboards")
+async def sync_dashboards(req: SyncDashboardsReq, x_api_token: str | None = Header(default=None)):
+    """Bulk variant of sync_dashboard: only new or changed dashboards are uploaded, concurrently."""
+    auth(x_api_token)
+    items = [(f"dashboards[{i}]", d) for i, d in enumerate(req.dashboards)]
+    if req.paths or not items:
+        try:
+            items += await asyncio.to_thread(load_dashboards, req.paths or ["."], DASHBOARD_DIR)
+        except DashboardSyncError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=400, detail=f"No dashboards found under {DASHBOARD_DIR}")
+    return await dashboard_sync.sync(items, folder_uid=req.folderUid, dry_run=req.dry_run, force=req.force)
+
+# Alertmanager webhook -> durable triage queue, drained by the agent's triage workers
+TRIAGE_QUEUE_DB = os.getenv("TRIAGE_QUEUE_DB", "/data/triage_queue.sqlite")
+TRIAGE_QUEUE_MAX_DEPTH = int(os.getenv("TRIAGE_QUEUE_MAX_DEPTH", "1000"))
+TRIAGE_LEASE_SECONDS = float(os.getenv("TRIAGE_LEASE_SECONDS", "300"))
+TRIAGE_CLAIM_WAIT_MAX = float(os.getenv("TRIAGE_CLAIM_WAIT_MAX", "30"))
+
+triage_queue = TriageQueue(TRIAGE_QUEUE_DB, max_depth=TRIAGE_QUEUE_MAX_DEPTH, lease_seconds=TRIAGE_LEASE_SECONDS)
+
+TRIAGE_DEPTH = REGISTRY.register(Gauge(
+    "mcp_triage_queue_depth", "Alert groups waiting for (pending) or in (running) automatic triage", ("state",)))
+TRIAGE_NOTIFICATIONS = REGISTRY.register(Counter(
+    "mcp_triage_notifications_total", "Alertmanager webhook notifications, by what the queue did with them",
+    ("outcome",)))
+TRIAGE_ALERT_TO_PLAN = REGISTRY.register(Histogram(
+    "mcp_triage_alert_to_plan_seconds", "Time from the first webhook notification of a group to its triage plan",
+    ("severity",), buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)))
+
+async def update_triage_depth():
+    for state, n in (await asyncio.to_thread(triage_queue.depth)).items():
+        TRIAGE_DEPTH.set(n, state)
+
+class AlertmanagerNotification(BaseModel):
+    """Alertmanager webhook payload (version 4); unknown fields are kept."""
+    model_config = {"extra": "allow"}
+
+    groupKey: str = ""
+    status: str = "firing"
+    receiver: str = ""
+    groupLabels: dict = {}
+    commonLabels: dict = {}
+    alerts: list[dict] = []
+
+@app.post("/webhook/alertmanager", status_code=202)
+async def alertmanager_webhook(
+    req: AlertmanagerNotification,
+    response: Response,
+    x_api_token: str | None = Header(default=None),
+    authorization: str | None = Header(default=None),
+):
+    """
+    Receiver for Alertmanager's webhook_configs. Alertmanager cannot send
+    x-api-token, so `Authorization: Bearer <API_TOKEN>` is accepted as well.
+    Answers 503 (Alertmanager retries) when the triage queue is full.
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        x_api_token = x_api_token or authorization[7:].strip()
+    auth(x_api_token)
+    try:
+        result = await asyncio.to_thread(triage_queue.push, req.model_dump())
+    except QueueFull as e:
+        TRIAGE_NOTIFICATIONS.inc("rejected")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    TRIAGE_NOTIFICATIONS.inc(result["outcome"])
+    await update_triage_depth()
+    return {"status": "ok", **result}
+
+@app.post("/tools/triage_queue/claim")
+async def claim_triage(worker: str = "worker", wait: float = 0, x_api_token: str | None = Header(default=None)):
+    """Lease the most urgent queued alert group; `wait` long-polls for one. {"item": null} when idle."""
+    auth(x_api_token)
+    item = await triage_queue.claim_wait(worker, min(max(wait, 0), TRIAGE_CLAIM_WAIT_MAX))
+    await update_triage_depth()
+    return {"item": item}
+
+class TriageResultReq(BaseModel):
+    ok: bool = True
+    # Dry-run plans and alerts left for a human, as produced by the agent's TriageEngine
+    result: dict = {}
+    error: str = ""
+
+@app.post("/tools/triage_queue/{item_id}/result")
+async def triage_result(item_id: int, req: TriageResultReq, x_api_token: str | None = Header(default=None)):
+    """Report a claimed item: its plans (ok) or the error (the item is retried up to its attempt limit)."""
+    auth(x_api_token)
+    if req.ok:
+        item = await asyncio.to_thread(triage_queue.complete, item_id, req.result)
+    else:
+        item = await asyncio.to_thread(triage_queue.fail, item_id, req.error)
+    if item is None:
+        raise HTTPException(status_code=409, detail=f"Triage item {item_id} is not claimed (lease expired?)")
+    if item["status"] == "done":
+        TRIAGE_ALERT_TO_PLAN.observe(item["updated"] - item["received"], item["severity"])
+    await update_triage_depth()
+    return {"status": item["status"], "id": item_id}
+
+@app.get("/tools/triage_queue")
+async def list_triage(status: str | None = None, limit: int = 50, x_api_token: str | None = Header(default=None)):
+    """Queue depth and the most recently updated items (status: pending, running, done, failed, dropped)."""
+    auth(x_api_token)
+    depth = await asyncio.to_thread(triage_queue.depth)
+    items = await asyncio.to_thread(triage_queue.items, status, min(max(limit, 1), 500))
+    return {"depth": depth, "items": items}
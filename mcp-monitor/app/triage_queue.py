@@ -0,0 +1,230 @@
+"""
+Durable queue of Alertmanager notifications waiting for automatic triage.
+
+Alertmanager POSTs a notification per alert group to /webhook/alertmanager;
+the agent's triage workers (agent/triage_worker.py) claim them one at a time
+and post back the dry-run plans. The queue lives in SQLite so notifications
+received while the workers are down, or while mcp-monitor restarts, are not
+lost.
+
+- Deduplication: at most one pending item per Alertmanager group key. A
+  repeated notification for a group still waiting updates that item (latest
+  alerts, highest severity) instead of queueing the group twice. A group that
+  resolves before a worker gets to it is dropped.
+- Priority: critical before warning before info, oldest first within a level.
+- Backpressure: at most `max_depth` pending items. When full, a new item
+  displaces the newest pending item of a lower severity; if there is none,
+  QueueFull is raised and the webhook answers 503 so Alertmanager retries.
+- Leases: a claimed item that is not reported back within `lease_seconds`
+  (worker crashed) is handed out again, up to `max_attempts` times.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SEVERITY_PRIORITY = {"critical": 0, "warning": 1, "info": 2}
+UNKNOWN_PRIORITY = 3
+
+# Finished items kept for GET /tools/triage_queue
+KEEP_FINISHED = 500
+
+
+class QueueFull(Exception):
+    pass
+
+
+def notification_severity(notification: dict) -> str:
+    """Most severe `severity` label among the notification's firing alerts."""
+    severities = [a.get("labels", {}).get("severity", "") for a in notification.get("alerts", [])
+                  if a.get("status", "firing") == "firing"]
+    severities = severities or [notification.get("commonLabels", {}).get("severity", "")]
+    return min(severities, key=lambda s: SEVERITY_PRIORITY.get(s, UNKNOWN_PRIORITY))
+
+
+def _row(row: sqlite3.Row) -> dict:
+    item = dict(row)
+    item["notification"] = json.loads(item.pop("payload"))
+    item["result"] = json.loads(item["result"]) if item["result"] else None
+    return item
+
+
+class TriageQueue:
+
+    def __init__(self, path: str = ":memory:", max_depth: int = 1000, lease_seconds: float = 300.0,
+                 max_attempts: int = 3):
+        self.path = path
+        self.max_depth = max_depth
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        # Set on the loop of the claim_wait() callers, never from the worker threads running push()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ready = asyncio.Event()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the server does not touch the database file
+        if self._db is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            # WAL + NORMAL: committed items survive a process crash without an fsync per webhook
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS triage_queue (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                       "group_key TEXT NOT NULL, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+                       "severity TEXT NOT NULL, payload TEXT NOT NULL, received REAL NOT NULL, "
+                       "updated REAL NOT NULL, notifications INTEGER NOT NULL DEFAULT 1, "
+                       "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_until REAL, "
+                       "result TEXT, error TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS triage_queue_next ON triage_queue (status, priority, received)")
+            db.execute("CREATE INDEX IF NOT EXISTS triage_queue_group ON triage_queue (group_key, status)")
+            self._db = db
+        return self._db
+
+    # ---- producer ----------------------------------------------------------
+
+    def push(self, notification: dict) -> dict:
+        """
+        Queue one webhook notification. Returns {"outcome", "id"}; outcome is
+        queued / merged / resolved (pending item dropped) / ignored. Raises QueueFull.
+        """
+        group_key = notification.get("groupKey") or json.dumps(notification.get("groupLabels", {}), sort_keys=True)
+        firing = notification.get("status", "firing") == "firing"
+        severity = notification_severity(notification)
+        priority = SEVERITY_PRIORITY.get(severity, UNKNOWN_PRIORITY)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            pending = db.execute("SELECT id, priority FROM triage_queue WHERE group_key = ? AND status = 'pending'",
+                                 (group_key,)).fetchone()
+            if not firing:
+                if pending is None:
+                    return {"outcome": "ignored", "id": None}
+                db.execute("UPDATE triage_queue SET status = 'dropped', error = 'resolved before triage', "
+                           "updated = ? WHERE id = ?", (now, pending["id"]))
+                return {"outcome": "resolved", "id": pending["id"]}
+            payload = json.dumps(notification)
+            if pending is not None:
+                # Keeps `received` (alert-to-plan time counts from the first notification)
+                db.execute("UPDATE triage_queue SET payload = ?, updated = ?, notifications = notifications + 1, "
+                           "priority = MIN(priority, ?), severity = CASE WHEN ? < priority THEN ? ELSE severity END "
+                           "WHERE id = ?", (payload, now, priority, priority, severity, pending["id"]))
+                return {"outcome": "merged", "id": pending["id"]}
+            if self._depth(db) >= self.max_depth:
+                victim = db.execute("SELECT id FROM triage_queue WHERE status = 'pending' AND priority > ? "
+                                    "ORDER BY priority DESC, received DESC LIMIT 1", (priority,)).fetchone()
+                if victim is None:
+                    raise QueueFull(f"{self.max_depth} notifications are already waiting for triage")
+                db.execute("UPDATE triage_queue SET status = 'dropped', error = 'displaced by a more severe alert', "
+                           "updated = ? WHERE id = ?", (now, victim["id"]))
+            item_id = db.execute("INSERT INTO triage_queue (group_key, status, priority, severity, payload, "
+                                 "received, updated) VALUES (?, 'pending', ?, ?, ?, ?, ?)",
+                                 (group_key, priority, severity, payload, now, now)).lastrowid
+        self._wake()
+        return {"outcome": "queued", "id": item_id}
+
+    # ---- consumers ---------------------------------------------------------
+
+    def claim(self, worker: str) -> dict | None:
+        """Lease the most urgent pending item to `worker`, or None when the queue is empty."""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            self._expire_leases(db, now)
+            row = db.execute("SELECT id FROM triage_queue WHERE status = 'pending' "
+                             "ORDER BY priority, received LIMIT 1").fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE triage_queue SET status = 'running', worker = ?, lease_until = ?, "
+                       "attempts = attempts + 1, updated = ? WHERE id = ?",
+                       (worker, now + self.lease_seconds, now, row["id"]))
+            return _row(db.execute("SELECT * FROM triage_queue WHERE id = ?", (row["id"],)).fetchone())
+
+    def _wake(self):
+        """Wake claim_wait(); safe from any thread (asyncio.Event itself is not)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._ready.set)
+
+    async def claim_wait(self, worker: str, timeout: float) -> dict | None:
+        """claim(), waiting up to `timeout` seconds for an item to arrive. SQLite runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._ready = loop, asyncio.Event()
+        deadline = time.monotonic() + timeout
+        while True:
+            # Cleared before claiming, so an item pushed while claim() runs still wakes the wait
+            self._ready.clear()
+            item = await asyncio.to_thread(self.claim, worker)
+            remaining = deadline - time.monotonic()
+            if item is not None or remaining <= 0:
+                return item
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def complete(self, item_id: int, result: dict) -> dict | None:
+        """Store the worker's plans; returns the finished item (None if it was not running)."""
+        return self._finish(item_id, "done", result=json.dumps(result))
+
+    def fail(self, item_id: int, error: str) -> dict | None:
+        """Hand the item out again, or mark it failed once it has used up its attempts."""
+        return self._finish(item_id, None, error=error)
+
+    def _finish(self, item_id: int, status: str | None, result: str | None = None,
+                error: str | None = None) -> dict | None:
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT * FROM triage_queue WHERE id = ? AND status = 'running'", (item_id,)).fetchone()
+            if row is None:
+                return None
+            if status is None:
+                status = "failed" if row["attempts"] >= self.max_attempts else "pending"
+            db.execute("UPDATE triage_queue SET status = ?, result = ?, error = ?, lease_until = NULL, updated = ? "
+                       "WHERE id = ?", (status, result, error, now, item_id))
+            self._prune(db)
+            item = _row(db.execute("SELECT * FROM triage_queue WHERE id = ?", (item_id,)).fetchone())
+        if status == "pending":
+            self._wake()
+        return item
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float):
+        db.execute("UPDATE triage_queue SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                   "error = 'lease expired', lease_until = NULL, updated = ? "
+                   "WHERE status = 'running' AND lease_until < ?", (self.max_attempts, now, now))
+
+    def _prune(self, db: sqlite3.Connection):
+        db.execute("DELETE FROM triage_queue WHERE status IN ('done', 'failed', 'dropped') AND id NOT IN "
+                   "(SELECT id FROM triage_queue WHERE status IN ('done', 'failed', 'dropped') "
+                   "ORDER BY updated DESC LIMIT ?)", (KEEP_FINISHED,))
+
+    # ---- introspection -----------------------------------------------------
+
+    @staticmethod
+    def _depth(db: sqlite3.Connection) -> int:
+        return db.execute("SELECT COUNT(*) FROM triage_queue WHERE status = 'pending'").fetchone()[0]
+
+    def depth(self) -> dict:
+        """{"pending": n, "running": n}"""
+        with self._lock:
+            rows = self._conn().execute("SELECT status, COUNT(*) FROM triage_queue "
+                                        "WHERE status IN ('pending', 'running') GROUP BY status").fetchall()
+        return {"pending": 0, "running": 0, **{status: n for status, n in rows}}
+
+    def items(self, status: str | None = None, limit: int = 50) -> list[dict]:
+        """Most recently updated items, optionally of one status."""
+        with self._lock:
+            db = self._conn()
+            if status:
+                rows = db.execute("SELECT * FROM triage_queue WHERE status = ? ORDER BY updated DESC LIMIT ?",
+                                  (status, limit)).fetchall()
+            else:
+                rows = db.execute("SELECT * FROM triage_queue ORDER BY updated DESC LIMIT ?", (limit,)).fetchall()
+        return [_row(r) for r in rows]
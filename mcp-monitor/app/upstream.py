@@ -0,0 +1,84 @@
+"""
+Shared async HTTP clients for the upstreams mcp-monitor talks to.
+
+One httpx.AsyncClient (and therefore one keep-alive connection pool) is kept
+per upstream (Prometheus, Alertmanager, Grafana) for the lifetime of the app,
+instead of opening a fresh TCP connection on every tool call. Callers beyond
+the pool size wait on a FIFO semaphore rather than inside httpcore's pool,
+whose scheduling cost grows with the number of queued requests.
+"""
+import asyncio
+import os
+import time
+import httpx
+
+# Defaults, overridable per upstream with <NAME>_POOL_SIZE / <NAME>_KEEPALIVE / <NAME>_TIMEOUT
+POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "20"))
+KEEPALIVE = int(os.getenv("UPSTREAM_KEEPALIVE", str(POOL_SIZE)))
+TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3"))
+
+
+def _env(name: str, key: str, default, cast):
+    return cast(os.getenv(f"{name.upper()}_{key}", default))
+
+
+class UpstreamPool:
+    """Registry of named, long-lived async clients."""
+
+    def __init__(self, observer=None):
+        """observer: optional callback(name, method, status, elapsed_s, wait_s, error) per request"""
+        self._observer = observer
+        self._specs: dict[str, dict] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    def register(self, name: str, base_url: str, auth=None, timeout: float | None = None):
+        self._specs[name] = {"base_url": base_url, "auth": auth, "timeout": timeout}
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        spec = self._specs[name]
+        read_timeout = _env(name, "TIMEOUT", spec["timeout"] or TIMEOUT, float)
+        pool_size = _env(name, "POOL_SIZE", POOL_SIZE, int)
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=min(pool_size, _env(name, "KEEPALIVE", KEEPALIVE, int)),
+        )
+        self._slots[name] = asyncio.Semaphore(pool_size)
+        return httpx.AsyncClient(
+            base_url=spec["base_url"],
+            auth=spec["auth"],
+            limits=limits,
+            timeout=httpx.Timeout(read_timeout, connect=CONNECT_TIMEOUT),
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the client for `name`, creating it on first use."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            if name not in self._specs:
+                raise KeyError(f"Unknown upstream '{name}'")
+            client = self._clients[name] = self._build(name)
+        return client
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the `name` pool, waiting for a free connection slot."""
+        client = self.get(name)
+        if self._observer is None:
+            async with self._slots[name]:
+                return await client.request(method, url, **kwargs)
+        queued = time.perf_counter()
+        async with self._slots[name]:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except Exception as e:
+                self._observer(name, method, None, time.perf_counter() - started, started - queued, e)
+                raise
+        self._observer(name, method, response.status_code, time.perf_counter() - started, started - queued)
+        return response
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
@@ -0,0 +1,8 @@
+"""
+Pytest conftest — adds mcp-monitor/app to sys.path so server modules are importable.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+sys.path.insert(0, os.path.dirname(__file__))
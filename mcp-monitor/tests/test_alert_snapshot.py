@@ -0,0 +1,143 @@
+"""
+Tests for the versioned alert snapshot — fingerprinting, deltas since a
+version, and long-poll wake-ups.
+"""
+import asyncio
+import pytest
+from alert_snapshot import AlertSnapshot, fingerprint
+
+
+def alert(name, state="firing", **labels):
+    return {"labels": {"alertname": name, **labels}, "state": state,
+            "annotations": {"summary": name}, "activeAt": "2026-01-01T00:00:00Z", "value": "1"}
+
+
+class FakeSource:
+
+    def __init__(self):
+        self.alerts = []
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return [dict(a) for a in self.alerts]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestFingerprint:
+
+    def test_label_order_does_not_matter(self):
+        assert fingerprint({"a": "1", "b": "2"}) == fingerprint({"b": "2", "a": "1"})
+
+    def test_different_labels_differ(self):
+        assert fingerprint({"alertname": "KafkaBrokerDown"}) != fingerprint({"alertname": "SparkMasterDown"})
+
+
+class TestSnapshotDeltas:
+
+    @pytest.fixture
+    def source(self):
+        return FakeSource()
+
+    def test_version_only_moves_on_change(self, source):
+        snap = AlertSnapshot(source)
+        source.alerts = [alert("KafkaBrokerDown")]
+
+        async def scenario():
+            assert await snap.refresh() == 1
+            assert await snap.refresh() == 1
+
+        run(scenario())
+
+    def test_value_jitter_is_not_a_change(self, source):
+        snap = AlertSnapshot(source)
+        source.alerts = [alert("NodeCPUHigh")]
+
+        async def scenario():
+            await snap.refresh()
+            source.alerts[0]["value"] = "97.3"
+            return await snap.refresh()
+
+        assert run(scenario()) == 1
+
+    def test_added_changed_resolved(self, source):
+        snap = AlertSnapshot(source)
+
+        async def scenario():
+            source.alerts = [alert("KafkaBrokerDown", "pending"), alert("NodeCPUHigh")]
+            v1 = await snap.refresh()
+            source.alerts = [alert("KafkaBrokerDown", "firing"), alert("SparkMasterDown")]
+            await snap.refresh()
+            return snap.since(v1)
+
+        delta = run(scenario())
+        assert not delta["full"]
+        assert [a["labels"]["alertname"] for a in delta["added"]] == ["SparkMasterDown"]
+        assert [a["labels"]["alertname"] for a in delta["changed"]] == ["KafkaBrokerDown"]
+        assert [r["labels"]["alertname"] for r in delta["resolved"]] == ["NodeCPUHigh"]
+
+    def test_transient_alert_is_invisible(self, source):
+        snap = AlertSnapshot(source)
+
+        async def scenario():
+            v0 = await snap.refresh()
+            source.alerts = [alert("ContainerRestarting")]
+            await snap.refresh()
+            source.alerts = []
+            await snap.refresh()
+            return snap.since(v0)
+
+        delta = run(scenario())
+        assert delta["added"] == delta["changed"] == delta["resolved"] == []
+
+    def test_unknown_version_gets_full_snapshot(self, source):
+        snap = AlertSnapshot(source)
+        source.alerts = [alert("KafkaBrokerDown")]
+        run(snap.refresh())
+        delta = snap.since(99)
+        assert delta["full"]
+        assert len(delta["added"]) == 1
+
+    def test_version_older_than_log_gets_full_snapshot(self, source):
+        snap = AlertSnapshot(source, log_size=2)
+
+        async def scenario():
+            for i in range(5):
+                source.alerts = [alert(f"Alert{i}")]
+                await snap.refresh()
+
+        run(scenario())
+        assert snap.since(1)["full"]
+        assert not snap.since(3)["full"]
+
+    def test_ensure_fresh_refetches_only_when_stale(self, source):
+        snap = AlertSnapshot(source, interval=60)
+
+        async def scenario():
+            await asyncio.gather(*(snap.ensure_fresh() for _ in range(5)))
+
+        run(scenario())
+        assert source.calls == 1
+
+
+class TestLongPoll:
+
+    def test_wait_times_out_without_change(self):
+        snap = AlertSnapshot(FakeSource())
+        assert run(snap.wait_for_change(0, 0.01)) is False
+
+    def test_wait_wakes_on_change(self):
+        source = FakeSource()
+        snap = AlertSnapshot(source)
+
+        async def scenario():
+            waiter = asyncio.create_task(snap.wait_for_change(0, 5))
+            await asyncio.sleep(0.01)
+            source.alerts = [alert("HDFSNameNodeDown")]
+            await snap.refresh()
+            return await waiter
+
+        assert run(scenario()) is True
@@ -0,0 +1,99 @@
+"""
+Tests for the Alertmanager v2 alert source — filter parameters, conversion to
+the Prometheus alert shape, deduplication across groups, and /tools/alert_groups.
+"""
+import asyncio
+
+import httpx
+import pytest
+import server
+from alertmanager import AlertFilterError, flatten, group_params, parse_matcher, to_prometheus
+
+
+def am_alert(alertname, fingerprint, receivers=("default",), state="active", **labels):
+    return {"labels": {"alertname": alertname, **labels}, "annotations": {"summary": alertname},
+            "startsAt": "2026-01-01T00:00:00Z", "fingerprint": fingerprint,
+            "receivers": [{"name": r} for r in receivers],
+            "status": {"state": state, "silencedBy": [], "inhibitedBy": ["abc"] if state == "suppressed" else []}}
+
+
+GROUPS = [
+    {"labels": {"service": "kafka"}, "receiver": {"name": "critical"},
+     "alerts": [am_alert("KafkaBrokerDown", "f1", ("critical",), severity="critical", service="kafka")]},
+    {"labels": {"service": "kafka"}, "receiver": {"name": "default"},
+     "alerts": [am_alert("KafkaBrokerDown", "f1", ("default",), severity="critical", service="kafka"),
+                am_alert("NodeCPUHigh", "f2", severity="warning", service="node")]},
+    {"labels": {"component": "slo"}, "receiver": {"name": "slo"}, "alerts": []},
+]
+
+
+class TestParams:
+
+    def test_active_excludes_silenced_and_inhibited(self):
+        params = dict(group_params("active"))
+        assert (params["active"], params["silenced"], params["inhibited"]) == ("true", "false", "false")
+
+    def test_filters(self):
+        params = group_params("all", severity=["critical", "warning"], receiver=["critical", "slo"],
+                              matchers=["service=kafka", 'job =~ "spark.*"'])
+        assert ("filter", 'service="kafka"') in params and ("filter", 'job=~"spark.*"') in params
+        assert ("filter", 'severity=~"critical|warning"') in params
+        assert ("receiver", "^(?:critical|slo)$") in params
+
+    def test_invalid_filters(self):
+        with pytest.raises(AlertFilterError):
+            parse_matcher("service")
+        with pytest.raises(AlertFilterError):
+            group_params("firing")
+
+
+class TestConversion:
+
+    def test_prometheus_shape(self):
+        alert = to_prometheus(am_alert("KafkaBrokerDown", "f1", state="suppressed"))
+        assert alert["state"] == "suppressed" and alert["activeAt"] == "2026-01-01T00:00:00Z"
+        assert alert["inhibitedBy"] == ["abc"] and "silencedBy" not in alert
+        assert to_prometheus(am_alert("X", "f"))["state"] == "firing"
+
+    def test_alert_routed_twice_is_listed_once(self):
+        alerts = flatten(GROUPS)
+        assert [a["labels"]["alertname"] for a in alerts] == ["KafkaBrokerDown", "NodeCPUHigh"]
+        assert alerts[0]["receivers"] == ["critical", "default"]
+
+
+def get(path, **params):
+    async def send():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+            return await client.get(path, params=params, headers={"x-api-token": "t"})
+
+    return asyncio.run(send())
+
+
+class TestAlertGroupsEndpoint:
+
+    @pytest.fixture
+    def sent(self, monkeypatch):
+        recorded = []
+
+        async def fake_fetch(params):
+            recorded.append(params)
+            return GROUPS
+
+        monkeypatch.setattr(server, "fetch_alert_groups", fake_fetch)
+        monkeypatch.setattr(server, "API_TOKEN", "t")
+        return recorded
+
+    def test_filters_are_passed_to_alertmanager(self, sent):
+        body = get("/tools/alert_groups", severity=["critical"], receiver="critical", matcher="service=kafka").json()
+        assert ("filter", 'severity=~"critical"') in [tuple(p) for p in sent[0]]
+        assert body["alert_count"] == 2 and body["data"]["alerts"][0]["labels"]["alertname"] == "KafkaBrokerDown"
+
+    def test_grouped(self, sent):
+        body = get("/tools/alert_groups", grouped="true").json()
+        assert [g["receiver"] for g in body["groups"]] == ["critical", "default"]
+        assert body["alert_count"] == 3
+
+    def test_bad_filter(self, sent):
+        assert get("/tools/alert_groups", matcher="nope").status_code == 400
+        assert sent == []
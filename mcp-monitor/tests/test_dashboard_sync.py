@@ -0,0 +1,157 @@
+"""
+Tests for the bulk dashboard sync — content hashing, skip-if-unchanged,
+lookup by uid or title, directory loading and per-dashboard outcomes.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from dashboard_sync import DashboardSync, DashboardSyncError, dashboard_hash, load_dashboards
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def dashboard(uid, title=None, panels=1):
+    return {"uid": uid, "title": title or uid, "panels": [{"id": n, "type": "timeseries"} for n in range(panels)]}
+
+
+class FakeGrafana:
+    """Keeps dashboards by uid and answers the three endpoints the sync uses."""
+
+    def __init__(self, *dashboards):
+        self.stored = {}
+        self.calls = []
+        for d in dashboards:
+            self.save(d)
+
+    def save(self, d, folder_uid=""):
+        uid = d.get("uid") or f"gen-{len(self.stored)}"
+        version = self.stored.get(uid, ({}, {"version": 0}))[1]["version"] + 1
+        self.stored[uid] = ({**d, "uid": uid, "id": 42, "version": version},
+                            {"folderUid": folder_uid, "version": version})
+        return {"status": "success", "uid": uid, "version": version}
+
+    async def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        request = httpx.Request(method, "http://grafana" + url)
+        if url == "/api/search":
+            hits = [{"uid": uid, "title": d["title"]} for uid, (d, _) in self.stored.items()
+                    if kwargs["params"]["query"].lower() in d["title"].lower()]
+            return httpx.Response(200, json=hits, request=request)
+        if url.startswith("/api/dashboards/uid/"):
+            found = self.stored.get(url.rsplit("/", 1)[1])
+            if found is None:
+                return httpx.Response(404, json={"message": "Dashboard not found"}, request=request)
+            return httpx.Response(200, json={"dashboard": found[0], "meta": found[1]}, request=request)
+        if url == "/api/dashboards/db":
+            payload = kwargs["json"]
+            if payload["dashboard"].get("title") == "broken":
+                return httpx.Response(400, json={"message": "bad panel"}, request=request)
+            return httpx.Response(200, json=self.save(payload["dashboard"], payload.get("folderUid", "")),
+                                  request=request)
+        raise AssertionError(url)
+
+    def uploads(self):
+        return sum(1 for method, _ in self.calls if method == "POST")
+
+
+class TestHash:
+
+    def test_ignores_key_order_and_volatile_fields(self):
+        a = {"uid": "x", "title": "T", "panels": [], "version": 3, "id": 7}
+        b = {"panels": [], "title": "T", "version": 9}
+        assert dashboard_hash(a) == dashboard_hash(b)
+        assert dashboard_hash(a) != dashboard_hash({**a, "title": "U"})
+
+
+class TestSync:
+
+    def test_only_new_and_changed_are_uploaded(self):
+        grafana = FakeGrafana(dashboard("same"), dashboard("changed"))
+        sync = DashboardSync(grafana)
+        report = run(sync.sync([("a", dashboard("same")), ("b", dashboard("changed", panels=2)),
+                                ("c", dashboard("new"))]))
+        assert [r["outcome"] for r in report["results"]] == ["unchanged", "updated", "created"]
+        assert report["outcomes"] == {"unchanged": 1, "updated": 1, "created": 1}
+        assert grafana.uploads() == 2
+        assert grafana.stored["changed"][1]["version"] == 2
+        assert all("total_ms" in r for r in report["results"])
+
+    def test_second_sync_is_a_no_op(self):
+        grafana = FakeGrafana()
+        sync = DashboardSync(grafana)
+        items = [(f"d{i}", dashboard(f"d{i}")) for i in range(5)]
+        run(sync.sync(items))
+        report = run(sync.sync(items))
+        assert report["outcomes"] == {"unchanged": 5}
+        assert grafana.uploads() == 5
+
+    def test_dashboard_without_uid_is_found_by_title(self):
+        grafana = FakeGrafana({"uid": "infra1", "title": "Infra", "panels": []})
+        report = run(DashboardSync(grafana).sync([("infra", {"title": "Infra", "panels": []})]))
+        assert report["results"][0]["outcome"] == "unchanged"
+        assert ("GET", "/api/dashboards/uid/infra1") in grafana.calls
+
+    def test_dry_run_force_and_folder_move(self):
+        grafana = FakeGrafana(dashboard("a"))
+        sync = DashboardSync(grafana)
+        assert run(sync.sync([("a", dashboard("a", panels=3))], dry_run=True))["outcomes"] == {"would_update": 1}
+        assert run(sync.sync([("a", dashboard("a"))], force=True))["outcomes"] == {"updated": 1}
+        assert run(sync.sync([("a", dashboard("a"))], folder_uid="ops"))["outcomes"] == {"updated": 1}
+        assert grafana.stored["a"][1]["folderUid"] == "ops"
+
+    def test_errors_are_per_dashboard(self):
+        grafana = FakeGrafana()
+        report = run(DashboardSync(grafana).sync([
+            ("ok", dashboard("ok")), ("bad", dashboard("bad", title="broken")),
+            ("dup", dashboard("ok")), ("unreadable", ValueError("Expecting value"))]))
+        outcomes = {r["name"]: r["outcome"] for r in report["results"]}
+        assert outcomes == {"ok": "created", "bad": "error", "dup": "error", "unreadable": "error"}
+        assert report["status"] == "error"
+        assert "400" in report["results"][1]["error"]
+
+    def test_concurrency_is_bounded(self):
+        active, peak = 0, 0
+
+        async def slow(method, url, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(404, request=httpx.Request(method, "http://grafana" + url)) \
+                if method == "GET" else httpx.Response(200, json={}, request=httpx.Request(method, "http://g"))
+
+        report = run(DashboardSync(slow, concurrency=3).sync([(f"d{i}", dashboard(f"d{i}")) for i in range(12)]))
+        assert report["outcomes"] == {"created": 12}
+        assert peak == 3
+
+
+class TestLoad:
+
+    @pytest.fixture
+    def root(self, tmp_path):
+        (tmp_path / "_community").mkdir()
+        (tmp_path / "kafka.json").write_text(json.dumps(dashboard("kafka")))
+        (tmp_path / "_community" / "spark.json").write_text(json.dumps({"dashboard": dashboard("spark"), "meta": {}}))
+        (tmp_path / "_community" / "broken.json").write_text("{")
+        (tmp_path / "notes.txt").write_text("ignored")
+        return tmp_path
+
+    def test_directory_is_searched_recursively(self, root):
+        loaded = dict(load_dashboards(["."], root))
+        assert sorted(loaded) == ["_community/broken.json", "_community/spark.json", "kafka.json"]
+        assert loaded["_community/spark.json"]["uid"] == "spark"
+        assert isinstance(loaded["_community/broken.json"], ValueError)
+
+    def test_files_and_dirs_are_deduplicated(self, root):
+        assert len(load_dashboards(["kafka.json", "."], root)) == 3
+
+    def test_paths_outside_root_are_refused(self, root):
+        with pytest.raises(DashboardSyncError):
+            load_dashboards(["../"], root)
+        with pytest.raises(DashboardSyncError):
+            load_dashboards(["missing.json"], root)
@@ -0,0 +1,164 @@
+"""
+Tests for the local metrics ring buffer — fixed-size circular storage,
+Prometheus-style step evaluation, scraping and coverage checks.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+from local_metrics import ExpressionRing, LocalMetricsStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+KAFKA, HDFS = {"job": "kafka"}, {"job": "hdfs"}
+
+
+class TestExpressionRing:
+
+    def test_wraps_and_keeps_newest(self):
+        ring = ExpressionRing(capacity=4)
+        for t in range(10):
+            ring.append(float(t), [(KAFKA, t * 10.0)])
+        ts, values = ring.arrays()
+        assert ts.tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert values.tolist() == [[60.0, 70.0, 80.0, 90.0]]
+
+    def test_rows_grow_and_share_timestamps(self):
+        ring = ExpressionRing(capacity=4, rows=1)
+        ring.append(1.0, [(KAFKA, 1.0)])
+        ring.append(2.0, [(KAFKA, 2.0), (HDFS, 5.0)])
+        ts, values = ring.arrays()
+        assert len(ring) == 2 and ts.tolist() == [1.0, 2.0]
+        assert np.isnan(values[1, 0]) and values[1, 1] == 5.0
+
+    def test_out_of_order_scrapes_ignored(self):
+        ring = ExpressionRing(capacity=4)
+        assert ring.append(10.0, [(KAFKA, 1.0)])
+        assert not ring.append(10.0, [(KAFKA, 2.0)])
+        assert not ring.append(5.0, [(KAFKA, 3.0)])
+        assert ring.arrays()[1].tolist() == [[1.0]]
+
+    def test_vanished_series_dropped_when_out_of_ring(self):
+        ring = ExpressionRing(capacity=2)
+        ring.append(1.0, [(KAFKA, 1.0), (HDFS, 1.0)])
+        ring.append(2.0, [(KAFKA, 1.0)])
+        assert len(ring) == 2
+        ring.append(3.0, [(KAFKA, 1.0)])
+        assert ring.metrics == [KAFKA]
+
+    def test_step_evaluation_uses_covering_scrape_only(self):
+        ring = ExpressionRing(capacity=8)
+        ring.append(0.0, [(KAFKA, 1.0)])
+        ring.append(15.0, [(KAFKA, 2.0), (HDFS, 7.0)])
+        ring.append(30.0, [(KAFKA, 3.0)])  # hdfs missing from this scrape: absent from 30 on
+        steps = np.array([-10.0, 0.0, 20.0, 30.0, 45.0, 46.0])
+        values = ring.at(steps, max_age=15.0)
+        assert np.isnan(values[0, [0, 5]]).all() and values[0, 1:5].tolist() == [1.0, 2.0, 3.0, 3.0]
+        assert values[1, 2] == 7.0 and np.isnan(values[1, [0, 1, 3, 4, 5]]).all()
+
+
+def vector(*series):
+    return {"status": "success", "data": {"resultType": "vector", "result": [
+        {"metric": {"job": job}, "value": [at, str(v)]} for job, at, v in series]}}
+
+
+class FakePrometheus:
+
+    def __init__(self):
+        self.calls = []
+        self.up = {"kafka": 1, "hdfs": 1}
+
+    async def __call__(self, query, at):
+        self.calls.append((query, at))
+        return vector(*((job, at, v) for job, v in self.up.items()))
+
+
+@pytest.fixture
+def store():
+    prom = FakePrometheus()
+    store = LocalMetricsStore(["up", "  sum(x)  by (y) "], prom, interval=15, retention=120)
+    store.prom = prom
+    return store
+
+
+class TestLocalMetricsStore:
+
+    def test_capacity_from_retention(self, store):
+        assert store.capacity == 9
+        assert store.expressions == ["up", "sum(x) by (y)"]
+
+    def test_scrape_and_query_range(self, store):
+        for n in range(5):
+            run(store.scrape(now=1000.0 + 15 * n))
+        store.prom.up["kafka"] = 0
+        run(store.scrape(now=1075.0))
+        result = store.query_range("up", 1000.0, 1075.0, 15.0)["data"]["result"]
+        kafka = next(r for r in result if r["metric"]["job"] == "kafka")
+        assert [v for _, v in kafka["values"]] == ["1"] * 5 + ["0"]
+        assert kafka["values"][0][0] == 1000.0
+
+    def test_instant_query_returns_latest(self, store):
+        run(store.scrape(now=1000.0))
+        store.prom.up["hdfs"] = 0
+        run(store.scrape(now=1015.0))
+        result = store.query("up", now=1020.0)["data"]["result"]
+        assert {r["metric"]["job"]: r["value"][1] for r in result} == {"kafka": "1", "hdfs": "0"}
+
+    def test_vanished_series_is_not_served_stale(self, store):
+        store.prom.up["hdfs"] = 123
+        run(store.scrape(now=1000.0))
+        del store.prom.up["hdfs"]
+        run(store.scrape(now=1015.0))
+        run(store.scrape(now=1030.0))
+        assert [r["metric"]["job"] for r in store.query("up", now=1016.0)["data"]["result"]] == ["kafka"]
+        result = store.query_range("up", 1000.0, 1030.0, 15.0)["data"]["result"]
+        hdfs = next(r for r in result if r["metric"]["job"] == "hdfs")
+        assert hdfs["values"] == [[1000.0, "123"]]
+        assert store.query("up", now=1046.0)["data"]["result"] == []  # no scrape covers 1046
+
+    def test_coverage(self, store):
+        assert not store.covers("up", 1000.0, 1060.0, now=1060.0)  # nothing scraped yet
+        for n in range(5):
+            run(store.scrape(now=1000.0 + 15 * n))
+        assert store.covers("up", 1000.0, 1060.0, now=1060.0)
+        assert store.covers("  up ", 1015.0, 1060.0, now=1060.0)
+        assert not store.covers("up", 990.0, 1060.0, now=1060.0)       # before the first scrape
+        assert not store.covers("up", 1000.0, 1200.0, now=1200.0)      # data is stale
+        assert not store.covers("rate(up[5m])", 1000.0, 1060.0, now=1060.0)
+
+    def test_vanished_series_dropped_after_retention(self, store):
+        run(store.scrape(now=1000.0))
+        del store.prom.up["hdfs"]
+        for n in range(1, store.capacity):
+            run(store.scrape(now=1000.0 + 15 * n))
+        assert store.stats()["expressions"]["up"] == 2  # hdfs' last sample is still in the ring
+        run(store.scrape(now=1200.0))
+        assert store.stats()["expressions"]["up"] == 1
+
+    def test_scrape_errors_are_counted(self):
+        async def broken(query, at):
+            raise RuntimeError("prometheus down")
+
+        store = LocalMetricsStore(["up"], broken)
+        run(store.scrape(now=1000.0))
+        assert store.stats()["scrape_errors"] == 1
+        assert not store.fresh("up", now=1000.0)
+
+    def test_stats_memory(self, store):
+        run(store.scrape(now=1000.0))
+        stats = store.stats()
+        assert stats["series"] == 4
+        assert stats["bytes_per_series"] == 9 * 8
+        assert stats["sample_bytes_total"] == (4 + 2) * 9 * 8
+
+    def test_summarize_matches_reduce_of_range(self, store):
+        from reduce import summarize
+        for n in range(5):
+            store.prom.up["kafka"] = n
+            run(store.scrape(now=1000.0 + 15 * n))
+        stats = ["last", "max", "avg", "rate", "count"]
+        expected = summarize(store.query_range("up", 990.0, 1080.0, 15.0)["data"]["result"], stats)
+        assert store.summarize("up", 990.0, 1080.0, 15.0, stats)["data"]["result"] == expected
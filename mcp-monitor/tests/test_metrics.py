@@ -0,0 +1,89 @@
+"""
+Tests for the /metrics instrumentation — Prometheus text rendering, the
+request middleware (trace ids, Server-Timing, per-route metrics) and
+upstream observation.
+"""
+import asyncio
+
+import httpx
+import metrics
+from fastapi import FastAPI, HTTPException
+from metrics import Counter, Histogram, RequestMetrics, observe_upstream
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestRendering:
+
+    def test_histogram_buckets_are_cumulative(self):
+        h = Histogram("t_seconds", "test", ("path",), buckets=(0.1, 1.0))
+        for v in (0.05, 0.5, 0.5, 3.0):
+            h.observe(v, "/a")
+        lines = h.render()
+        assert 't_seconds_bucket{path="/a",le="0.1"} 1' in lines
+        assert 't_seconds_bucket{path="/a",le="1"} 3' in lines
+        assert 't_seconds_bucket{path="/a",le="+Inf"} 4' in lines
+        assert 't_seconds_count{path="/a"} 4' in lines
+        assert 't_seconds_sum{path="/a"} 4.05' in lines
+
+    def test_counter_and_label_escaping(self):
+        c = Counter("t_total", "test", ("reason",))
+        c.inc('say "hi"\n')
+        c.inc('say "hi"\n', amount=2)
+        assert c.render()[-1] == 't_total{reason="say \\"hi\\"\\n"} 3'
+
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(RequestMetrics, slow_seconds=60)
+
+    @app.get("/items/{item}")
+    async def item(item: str):
+        # Stands in for a handler that called Prometheus twice
+        observe_upstream("prometheus", "GET", 200, 0.03, 0.001)
+        observe_upstream("prometheus", "GET", 503, 0.01, 0.0)
+        return {"item": item}
+
+    @app.get("/fail")
+    async def fail():
+        raise HTTPException(status_code=400, detail="bad")
+
+    return app
+
+
+async def get(app, path, **headers):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path, headers=headers)
+
+
+class TestRequestMetrics:
+
+    def test_trace_id_is_echoed_or_generated(self):
+        app = build_app()
+        assert run(get(app, "/items/a", **{"x-trace-id": "abc123"})).headers["x-trace-id"] == "abc123"
+        assert len(run(get(app, "/items/a")).headers["x-trace-id"]) == 32
+
+    def test_server_timing_charges_upstream_time_to_the_request(self):
+        r = run(get(build_app(), "/items/a"))
+        timing = r.headers["server-timing"]
+        assert 'upstream;dur=40.00;desc="2 calls"' in timing and "pool;dur=1.00" in timing
+
+    def test_metrics_per_route_template(self):
+        before = metrics.REQUEST_DURATION.count("/items/{item}", "GET", "200")
+        errors = metrics.REQUEST_ERRORS.value("/fail", "400")
+        upstream_errors = metrics.UPSTREAM_ERRORS.value("prometheus", "503")
+        app = build_app()
+        run(get(app, "/items/a"))
+        run(get(app, "/items/b"))
+        run(get(app, "/fail"))
+        assert metrics.REQUEST_DURATION.count("/items/{item}", "GET", "200") == before + 2
+        assert metrics.REQUEST_ERRORS.value("/fail", "400") == errors + 1
+        assert metrics.UPSTREAM_ERRORS.value("prometheus", "503") == upstream_errors + 2
+        assert "mcp_response_size_bytes_bucket" in metrics.REGISTRY.render()
+
+    def test_background_upstream_calls_have_no_request(self):
+        observe_upstream("alertmanager", "GET", None, 0.5, 0.0, ConnectionError("refused"))
+        assert metrics.UPSTREAM_ERRORS.value("alertmanager", "ConnectionError") >= 1
+        assert metrics.current_trace_id() is None
@@ -0,0 +1,73 @@
+"""
+Tests for /tools/query_batch — one window for many expressions, bounded
+concurrent fan-out, server-side reduction and per-expression errors.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+import server
+
+
+def matrix(value: float) -> bytes:
+    return json.dumps({"status": "success", "data": {"resultType": "matrix", "result": [
+        {"metric": {"job": "kafka"}, "values": [[0, "1"], [30, str(value)]]}]}}).encode()
+
+
+@pytest.fixture
+def prometheus(monkeypatch):
+    """Fake fetch_range: 10ms per query, records the windows asked for and the peak concurrency."""
+    calls = {"windows": [], "active": 0, "peak": 0}
+
+    async def fake_fetch_range(query, start, end, step):
+        calls["windows"].append((start, end, step))
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        await asyncio.sleep(0.01)
+        calls["active"] -= 1
+        if query == "bad(":
+            request = httpx.Request("GET", "http://prometheus/api/v1/query_range")
+            response = httpx.Response(400, json={"status": "error", "error": "parse error"}, request=request)
+            raise httpx.HTTPStatusError("400", request=request, response=response)
+        return matrix(float(len(query)))
+
+    monkeypatch.setattr(server, "fetch_range", fake_fetch_range)
+    monkeypatch.setattr(server, "API_TOKEN", "t")
+    return calls
+
+
+def post(payload):
+    async def send():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+            return await client.post("/tools/query_batch", json=payload, headers={"x-api-token": "t"})
+
+    return asyncio.run(send())
+
+
+class TestQueryBatch:
+
+    def test_results_are_reduced_and_in_request_order(self, prometheus):
+        r = post({"queries": ["up", "kafka_brokers"], "start": 0, "end": 600, "reduce": ["last", "max"]})
+        body = r.json()
+        assert body["status"] == "success"
+        assert [x["query"] for x in body["results"]] == ["up", "kafka_brokers"]
+        assert body["results"][1]["result"][0]["stats"] == {"last": "13", "max": "13"}
+        assert set(prometheus["windows"]) == {(0, 600, "30s")}
+
+    def test_fan_out_is_capped(self, prometheus, monkeypatch):
+        monkeypatch.setattr(server, "QUERY_BATCH_CONCURRENCY", 3)
+        post({"queries": [f"q{i}" for i in range(9)]})
+        assert len(prometheus["windows"]) == 9 and prometheus["peak"] == 3
+
+    def test_one_bad_expression_does_not_fail_the_batch(self, prometheus):
+        body = post({"queries": ["up", "bad("]}).json()
+        assert body["status"] == "partial"
+        assert body["results"][1] == {"query": "bad(", "error": "parse error"}
+
+    def test_limits_and_stats_are_validated(self, prometheus, monkeypatch):
+        monkeypatch.setattr(server, "QUERY_BATCH_MAX", 2)
+        assert post({"queries": ["a", "b", "c"]}).status_code == 400
+        assert post({"queries": ["a"], "reduce": ["median-ish"]}).status_code == 400
+        assert post({"queries": []}).status_code == 422
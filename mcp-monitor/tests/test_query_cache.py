@@ -0,0 +1,129 @@
+"""
+Tests for the query_range result cache — key normalization, LRU/TTL eviction
+and single-flight coalescing of concurrent identical requests.
+"""
+import asyncio
+import time
+import pytest
+from query_cache import QueryCache, make_key, step_seconds, align
+
+
+class TestCacheKey:
+
+    @pytest.mark.parametrize("step,expected", [
+        ("30", 30.0), ("30s", 30.0), ("1m", 60.0), ("1m30s", 90.0), ("500ms", 0.5), ("2h", 7200.0),
+    ])
+    def test_step_seconds(self, step, expected):
+        assert step_seconds(step) == expected
+
+    @pytest.mark.parametrize("step", ["", "abc", "30x", "1m foo"])
+    def test_step_seconds_invalid(self, step):
+        assert step_seconds(step) is None
+
+    def test_align_snaps_to_step(self):
+        assert align(1000.0, 1075.0, "30s") == (990.0, 1050.0)
+
+    def test_whitespace_and_window_jitter_share_key(self):
+        a = make_key("sum(kafka_consumergroup_lag)  by (topic)", 1000.0, 1900.0, "30s")
+        b = make_key(" sum(kafka_consumergroup_lag) by (topic)", 1005.0, 1910.0, "30")
+        assert a == b
+
+    def test_different_steps_differ(self):
+        assert make_key("up", 0, 900, "30s") != make_key("up", 0, 900, "1m")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestQueryCache:
+
+    def test_hit_after_miss(self):
+        cache = QueryCache(max_entries=4, ttl=60)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return b"result"
+
+        async def scenario():
+            assert await cache.get_or_fetch("k", fetch) == b"result"
+            assert await cache.get_or_fetch("k", fetch) == b"result"
+
+        run(scenario())
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_ttl_expiry_refetches(self):
+        cache = QueryCache(max_entries=4, ttl=0.01)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        async def scenario():
+            await cache.get_or_fetch("k", fetch)
+            time.sleep(0.02)
+            return await cache.get_or_fetch("k", fetch)
+
+        assert run(scenario()) == 2
+        assert cache.stats()["evictions"] == 1
+
+    def test_lru_bound(self):
+        cache = QueryCache(max_entries=2, ttl=60)
+
+        async def scenario():
+            for key in ("a", "b", "a", "c"):
+                await cache.get_or_fetch(key, lambda key=key: asyncio.sleep(0, key))
+
+        run(scenario())
+        assert cache.stats()["size"] == 2
+        # "b" was least recently used and evicted; "a" survived
+        assert cache._lookup("a") is not None
+        assert cache._lookup("b") is None
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        cache = QueryCache(max_entries=4, ttl=60)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"lag"
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get_or_fetch("k", fetch) for _ in range(10)))
+
+        results = run(scenario())
+        assert results == [b"lag"] * 10
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 9
+
+    def test_errors_propagate_and_are_not_cached(self):
+        cache = QueryCache(max_entries=4, ttl=60)
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("prometheus down")
+
+        async def ok():
+            return b"ok"
+
+        async def scenario():
+            results = await asyncio.gather(*(cache.get_or_fetch("k", boom) for _ in range(3)),
+                                           return_exceptions=True)
+            assert all(isinstance(r, RuntimeError) for r in results)
+            return await cache.get_or_fetch("k", ok)
+
+        assert run(scenario()) == b"ok"
+
+    def test_zero_ttl_disables_storage(self):
+        cache = QueryCache(max_entries=4, ttl=0)
+
+        async def scenario():
+            await cache.get_or_fetch("k", lambda: asyncio.sleep(0, 1))
+
+        run(scenario())
+        assert cache.stats()["size"] == 0
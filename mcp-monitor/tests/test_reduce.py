@@ -0,0 +1,81 @@
+"""
+Tests for server-side reduction of range-query matrices (stats and LTTB).
+"""
+import numpy as np
+import pytest
+from reduce import ReduceError, downsample, lttb, summarize, validate_stats
+
+
+def series(values, start=1000.0, step=30.0, **labels):
+    return {"metric": {"__name__": "m", **labels},
+            "values": [[start + i * step, str(v)] for i, v in enumerate(values)]}
+
+
+class TestValidateStats:
+
+    @pytest.mark.parametrize("stats", [["last"], ["min", "max", "avg"], ["p50", "p99.9", "rate", "count"]])
+    def test_valid(self, stats):
+        assert validate_stats(stats) == stats
+
+    @pytest.mark.parametrize("stat", ["median", "p", "p100", "LAST"])
+    def test_invalid(self, stat):
+        with pytest.raises(ReduceError):
+            validate_stats([stat])
+
+
+class TestSummarize:
+
+    def test_basic_stats(self):
+        out = summarize([series([1, 5, 3], job="a")], ["last", "first", "min", "max", "avg", "count"])
+        assert out[0]["metric"]["job"] == "a"
+        assert out[0]["stats"] == {"last": "3", "first": "1", "min": "1", "max": "5", "avg": "3", "count": "3"}
+
+    def test_ragged_series_use_their_own_last_sample(self):
+        out = summarize([series([1, 2, 3, 4]), series([10, 20])], ["last", "max"])
+        assert [o["stats"]["last"] for o in out] == ["4", "20"]
+        assert [o["stats"]["max"] for o in out] == ["4", "20"]
+
+    def test_rate_is_per_second(self):
+        out = summarize([series([0, 30, 60], step=30.0)], ["rate"])
+        assert out[0]["stats"]["rate"] == "1"
+
+    def test_percentile(self):
+        out = summarize([series(list(range(101)))], ["p95"])
+        assert out[0]["stats"]["p95"] == "95"
+
+    def test_special_values(self):
+        out = summarize([series(["NaN", "+Inf"])], ["last", "first"])
+        assert out[0]["stats"] == {"last": "+Inf", "first": "NaN"}
+
+    def test_empty_series_and_empty_result(self):
+        assert summarize([], ["last"]) == []
+        out = summarize([{"metric": {}, "values": []}], ["last", "avg", "rate"])
+        assert out[0]["stats"] == {"last": "NaN", "avg": "NaN", "rate": "NaN"}
+
+
+class TestDownsample:
+
+    def test_lttb_keeps_endpoints_and_peak(self):
+        vals = np.zeros(100)
+        vals[37] = 50.0
+        idx = lttb(np.arange(100, dtype=float)[None, :], vals[None, :], 10)[0]
+        assert len(idx) == 10
+        assert idx[0] == 0 and idx[-1] == 99
+        assert 37 in idx
+        assert list(idx) == sorted(idx)
+
+    def test_short_series_untouched(self):
+        out = downsample([series([1, 2, 3])], 10)
+        assert [v[1] for v in out[0]["values"]] == ["1", "2", "3"]
+
+    def test_batched_rows_are_independent(self):
+        a, b = np.zeros(50), np.zeros(50)
+        a[10], b[40] = 9.0, -9.0
+        idx = lttb(np.tile(np.arange(50, dtype=float), (2, 1)), np.vstack([a, b]), 6)
+        assert 10 in idx[0] and 40 not in idx[0]
+        assert 40 in idx[1] and 10 not in idx[1]
+
+    def test_downsample_limits_points(self):
+        out = downsample([series(list(range(200))), series([1])], 20)
+        assert len(out[0]["values"]) == 20
+        assert len(out[1]["values"]) == 1
@@ -0,0 +1,123 @@
+"""
+Tests for the dynamic rule store — upsert semantics, atomic writes,
+concurrent writers and debounced Prometheus reloads.
+"""
+import asyncio
+import os
+import pytest
+import yaml
+from rule_store import DebouncedReloader, RuleStore
+
+
+def rule(name, expr="up == 0"):
+    return {"alert": name, "expr": expr, "for": "1m",
+            "labels": {"severity": "warning", "priority": "P2"},
+            "annotations": {"summary": name, "description": name}}
+
+
+class CountingReload:
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("reload failed")
+
+
+def dynamic_rules(path):
+    data = yaml.safe_load(path.read_text())
+    group = next(g for g in data["groups"] if g["name"] == "dynamic-alerts")
+    return group["rules"]
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "alerts.dynamic.yml"
+    path.write_text(yaml.safe_dump({"groups": [{"name": "dynamic-alerts", "rules": [
+        rule("TestAlertUpZero"), rule("TestAlertUpZero"),
+        {"record": "job:up:sum", "expr": "sum(up) by (job)"},
+    ]}]}, sort_keys=False))
+    os.chmod(path, 0o644)
+    return path
+
+
+class TestUpsert:
+
+    def test_new_rule_is_created(self, rules_file):
+        store = RuleStore(rules_file, DebouncedReloader(CountingReload(), delay=0))
+        result = asyncio.run(store.upsert([rule("KafkaLagSpike")]))
+        assert result == {"created": ["KafkaLagSpike"], "updated": []}
+        assert "KafkaLagSpike" in [r.get("alert") for r in dynamic_rules(rules_file)]
+
+    def test_existing_rule_is_replaced_not_duplicated(self, rules_file):
+        store = RuleStore(rules_file, DebouncedReloader(CountingReload(), delay=0))
+        result = asyncio.run(store.upsert([rule("TestAlertUpZero", expr="up == 1")]))
+        assert result == {"created": [], "updated": ["TestAlertUpZero"]}
+        matching = [r for r in dynamic_rules(rules_file) if r.get("alert") == "TestAlertUpZero"]
+        assert len(matching) == 1
+        assert matching[0]["expr"] == "up == 1"
+
+    def test_recording_rules_are_kept(self, rules_file):
+        store = RuleStore(rules_file, DebouncedReloader(CountingReload(), delay=0))
+        asyncio.run(store.upsert([rule("Other")]))
+        assert any(r.get("record") == "job:up:sum" for r in dynamic_rules(rules_file))
+
+    def test_missing_file_is_created(self, tmp_path):
+        path = tmp_path / "new.yml"
+        store = RuleStore(path, DebouncedReloader(CountingReload(), delay=0))
+        asyncio.run(store.upsert([rule("First")]))
+        assert [r["alert"] for r in dynamic_rules(path)] == ["First"]
+
+
+class TestAtomicWrite:
+
+    def test_permissions_preserved_and_no_temp_files_left(self, rules_file):
+        store = RuleStore(rules_file, DebouncedReloader(CountingReload(), delay=0))
+        asyncio.run(store.upsert([rule("A")]))
+        assert oct(rules_file.stat().st_mode & 0o777) == oct(0o644)
+        assert [p.name for p in rules_file.parent.iterdir()] == [rules_file.name]
+
+
+class TestConcurrencyAndReload:
+
+    def test_concurrent_writers_lose_nothing_and_share_one_reload(self, rules_file):
+        reload = CountingReload()
+        store = RuleStore(rules_file, DebouncedReloader(reload, delay=0.05, max_delay=1.0))
+
+        async def scenario():
+            await asyncio.gather(*(store.upsert([rule(f"Alert{i}")]) for i in range(50)))
+
+        asyncio.run(scenario())
+        names = {r.get("alert") for r in dynamic_rules(rules_file)}
+        assert {f"Alert{i}" for i in range(50)} <= names
+        assert reload.calls == 1
+        stats = store.stats()
+        assert stats["reload_requests"] == 50 and stats["reloads"] == 1
+        assert stats["writes"] < 50
+
+    def test_reload_failure_reaches_every_caller(self, rules_file):
+        store = RuleStore(rules_file, DebouncedReloader(CountingReload(fail=True), delay=0.01))
+
+        async def scenario():
+            return await asyncio.gather(*(store.upsert([rule(f"A{i}")]) for i in range(3)),
+                                        return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_max_delay_bounds_debounce(self):
+        reload = CountingReload()
+        reloader = DebouncedReloader(reload, delay=0.05, max_delay=0.1)
+
+        async def scenario():
+            # Keep requesting every 20ms for 300ms: a pure trailing debounce would never fire
+            for _ in range(15):
+                reloader.request()
+                await asyncio.sleep(0.02)
+            await asyncio.sleep(0.1)
+
+        asyncio.run(scenario())
+        assert reload.calls >= 2
@@ -0,0 +1,151 @@
+"""
+Tests for the triage queue — dedupe by group key, severity order, backpressure,
+leases and durability — and the Alertmanager webhook / worker endpoints.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+import server
+from triage_queue import QueueFull, TriageQueue
+
+
+def notification(group, severity="warning", status="firing", alertname="KafkaConsumerLagHigh"):
+    return {"version": "4", "groupKey": group, "status": status, "receiver": "default",
+            "groupLabels": {"alertname": alertname},
+            "alerts": [{"status": status, "labels": {"alertname": alertname, "severity": severity},
+                        "startsAt": "2026-01-01T00:00:00Z"}]}
+
+
+class TestTriageQueue:
+
+    def test_repeated_notifications_are_merged(self):
+        queue = TriageQueue()
+        first = queue.push(notification("g1"))
+        again = queue.push(notification("g1", severity="critical"))
+        assert (first["outcome"], again["outcome"], again["id"]) == ("queued", "merged", first["id"])
+        item = queue.claim("w")
+        assert item["notifications"] == 2 and item["severity"] == "critical" and queue.claim("w") is None
+
+    def test_running_group_gets_one_follow_up(self):
+        queue = TriageQueue()
+        queue.push(notification("g1"))
+        queue.claim("w")
+        assert queue.push(notification("g1"))["outcome"] == "queued"
+        assert queue.push(notification("g1"))["outcome"] == "merged"
+
+    def test_critical_first_then_oldest(self):
+        queue = TriageQueue()
+        for group, severity in (("a", "warning"), ("b", "info"), ("c", "critical"), ("d", "warning")):
+            queue.push(notification(group, severity))
+        assert [queue.claim("w")["group_key"] for _ in range(4)] == ["c", "a", "d", "b"]
+
+    def test_resolved_before_triage_is_dropped(self):
+        queue = TriageQueue()
+        queue.push(notification("g1"))
+        assert queue.push(notification("g1", status="resolved"))["outcome"] == "resolved"
+        assert queue.push(notification("g2", status="resolved"))["outcome"] == "ignored"
+        assert queue.claim("w") is None
+
+    def test_backpressure(self):
+        queue = TriageQueue(max_depth=2)
+        queue.push(notification("a", "warning"))
+        queue.push(notification("b", "info"))
+        queue.push(notification("c", "critical"))  # displaces the info group
+        assert [i["group_key"] for i in queue.items("dropped")] == ["b"]
+        with pytest.raises(QueueFull):
+            queue.push(notification("d", "warning"))
+
+    def test_expired_lease_is_retried_then_failed(self):
+        queue = TriageQueue(lease_seconds=-1, max_attempts=2)
+        item_id = queue.push(notification("g1"))["id"]
+        assert queue.claim("w1")["id"] == item_id
+        assert queue.claim("w2")["attempts"] == 2
+        assert queue.claim("w3") is None and queue.items("failed")[0]["id"] == item_id
+
+    def test_complete_and_fail(self):
+        queue = TriageQueue(max_attempts=2)
+        item_id = queue.push(notification("g1"))["id"]
+        queue.claim("w")
+        assert queue.fail(item_id, "MCP unreachable")["status"] == "pending"
+        queue.claim("w")
+        done = queue.complete(item_id, {"plans": []})
+        assert done["status"] == "done" and done["result"] == {"plans": []}
+        assert queue.complete(item_id, {}) is None
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / "queue" / "triage.sqlite")
+        TriageQueue(path).push(notification("g1", "critical"))
+        item = TriageQueue(path).claim("w")
+        assert item["group_key"] == "g1" and item["notification"]["alerts"][0]["labels"]["severity"] == "critical"
+
+    def test_claim_wait_wakes_up_on_push(self):
+        queue = TriageQueue()
+
+        async def scenario():
+            waiter = asyncio.create_task(queue.claim_wait("w", 5))
+            await asyncio.sleep(0.01)
+            queue.push(notification("g1"))
+            return await waiter
+
+        assert asyncio.run(scenario())["group_key"] == "g1"
+
+    def test_claim_wait_wakes_up_on_push_from_a_thread(self):
+        queue = TriageQueue()
+
+        async def scenario():
+            waiter = asyncio.create_task(queue.claim_wait("w", 5))
+            await asyncio.sleep(0.01)
+            started = time.monotonic()
+            await asyncio.to_thread(queue.push, notification("g1"))
+            item = await waiter
+            return item, time.monotonic() - started
+
+        item, waited = asyncio.run(scenario())
+        assert item["group_key"] == "g1" and waited < 1
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = TriageQueue(max_depth=1)
+    monkeypatch.setattr(server, "triage_queue", queue)
+    monkeypatch.setattr(server, "API_TOKEN", "t")
+    return queue
+
+
+def call(method, path, headers=None, **kwargs):
+    async def send():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+            return await client.request(method, path, headers=headers or {"x-api-token": "t"}, **kwargs)
+
+    return asyncio.run(send())
+
+
+class TestTriageEndpoints:
+
+    def test_webhook_to_plan(self, queue):
+        before = server.TRIAGE_ALERT_TO_PLAN.count("critical")
+        r = call("POST", "/webhook/alertmanager", headers={"authorization": "Bearer t"},
+                 json=notification("g1", "critical"))
+        assert r.status_code == 202 and r.json()["outcome"] == "queued"
+        assert server.TRIAGE_DEPTH.value("pending") == 1
+
+        item = call("POST", "/tools/triage_queue/claim", params={"worker": "w1"}).json()["item"]
+        assert item["notification"]["groupKey"] == "g1" and server.TRIAGE_DEPTH.value("running") == 1
+        r = call("POST", f"/tools/triage_queue/{item['id']}/result", json={"result": {"plans": [{"action": "x"}]}})
+        assert r.json()["status"] == "done" and server.TRIAGE_ALERT_TO_PLAN.count("critical") == before + 1
+        assert call("GET", "/tools/triage_queue", params={"status": "done"}).json()["items"][0]["result"] == \
+            {"plans": [{"action": "x"}]}
+        assert "mcp_triage_queue_depth" in call("GET", "/metrics").text
+
+    def test_full_queue_answers_503(self, queue):
+        call("POST", "/webhook/alertmanager", json=notification("g1"))
+        r = call("POST", "/webhook/alertmanager", json=notification("g2"))
+        assert r.status_code == 503 and r.headers["retry-after"] == "30"
+
+    def test_auth_and_stale_results(self, queue):
+        assert call("POST", "/webhook/alertmanager", headers={"authorization": "Bearer x"},
+                    json=notification("g1")).status_code == 401
+        assert call("POST", "/tools/triage_queue/1/result", json={"ok": False, "error": "x"}).status_code == 409